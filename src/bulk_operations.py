@@ -0,0 +1,405 @@
+"""
+Actualizaciones y borrados masivos por lista de claves.
+
+``update_record`` y ``delete_record`` reciben una condición WHERE libre, así
+que tocar miles de filas concretas supone miles de llamadas. Aquí se parte
+de una lista de claves y se generan pocas sentencias parametrizadas:
+
+- con una clave de una columna, lotes ``[Id] IN (?, ?, ...)``
+- con una clave compuesta, lotes ``([a] = ? AND [b] = ?) OR (...)``, sin
+  pasar del máximo de 99 AND por cláusula WHERE de Jet
+- con valores distintos por fila, una sentencia por fila con el mismo
+  texto SQL (el driver reutiliza la sentencia preparada)
+
+Las sentencias se ejecutan en una sola transacción (o una por lote, para
+no agotar los bloqueos por archivo de Jet, ``MaxLocksPerFile``) y el
+resultado indica los registros afectados en cada lote.
+
+``merge_rows`` combina inserción y actualización (upsert): busca las claves
+que ya existen con una consulta ``IN`` por lote, separa en memoria las filas
+nuevas de las existentes y aplica cada grupo con ``executemany``.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Statement = Tuple[str, Optional[Sequence[Any]]]
+
+# Jet admite como mucho 99 AND en una cláusula WHERE
+JET_MAX_AND_CONDITIONS = 99
+DEFAULT_KEYS_PER_STATEMENT = 200
+DEFAULT_ROWS_PER_BATCH = 500
+
+
+class BulkOperationError(Exception):
+    """Error a mitad de una operación masiva; ``result`` recoge los lotes ya confirmados."""
+
+    def __init__(self, message: str, result: "BulkResult"):
+        super().__init__(message)
+        self.result = result
+
+
+def _quote(identifier: str) -> str:
+    return f"[{identifier}]"
+
+
+def normalize_keys(keys: Sequence[Any], key_columns: Sequence[str]) -> List[Tuple[Any, ...]]:
+    """
+    Convertir las claves recibidas en tuplas con un valor por columna de clave.
+
+    Cada clave puede ser un valor suelto (clave de una columna), una lista
+    con un valor por columna o un objeto ``{columna: valor}``. Las claves
+    repetidas se quitan conservando el orden.
+    """
+    normalized = []
+    seen = set()
+    for key in keys:
+        if isinstance(key, dict):
+            lowered = {str(name).lower(): value for name, value in key.items()}
+            missing = [column for column in key_columns if column.lower() not in lowered]
+            if missing:
+                raise ValueError(f"Falta la columna de clave {', '.join(missing)} en {key}")
+            values = tuple(lowered[column.lower()] for column in key_columns)
+        elif isinstance(key, (list, tuple)):
+            values = tuple(key)
+        else:
+            values = (key,)
+        if len(values) != len(key_columns):
+            raise ValueError(f"La clave {key} no tiene {len(key_columns)} valores ({', '.join(key_columns)})")
+        if any(value is None for value in values):
+            raise ValueError(f"La clave {key} contiene valores nulos")
+        marker = tuple((type(value).__name__, value) for value in values)
+        if marker not in seen:
+            seen.add(marker)
+            normalized.append(values)
+    return normalized
+
+
+def keys_per_statement(key_columns: Sequence[str], requested: int = DEFAULT_KEYS_PER_STATEMENT) -> int:
+    """Claves por sentencia sin superar el máximo de AND de Jet."""
+    requested = max(1, requested)
+    ands_per_key = len(key_columns) - 1
+    if ands_per_key <= 0:
+        return requested
+    return max(1, min(requested, JET_MAX_AND_CONDITIONS // ands_per_key))
+
+
+def key_filter(key_columns: Sequence[str], keys: Sequence[Tuple[Any, ...]]) -> Tuple[str, List[Any]]:
+    """Condición parametrizada para un lote de claves."""
+    if len(key_columns) == 1:
+        placeholders = ", ".join("?" for _ in keys)
+        return f"{_quote(key_columns[0])} IN ({placeholders})", [key[0] for key in keys]
+    condition = "(" + " AND ".join(f"{_quote(column)} = ?" for column in key_columns) + ")"
+    params = []
+    for key in keys:
+        params.extend(key)
+    return " OR ".join(condition for _ in keys), params
+
+
+@dataclass
+class BulkBatch:
+    """Lote de claves y las sentencias que lo aplican."""
+    number: int
+    keys: int
+    statements: List[Statement] = field(default_factory=list)
+    affected_rows: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"batch": self.number, "keys": self.keys, "statements": len(self.statements),
+                "affected_rows": self.affected_rows}
+
+
+@dataclass
+class BulkPlan:
+    """Sentencias de una operación masiva, agrupadas en lotes."""
+    operation: str
+    table_name: str
+    key_columns: List[str]
+    batches: List[BulkBatch] = field(default_factory=list)
+
+    @property
+    def keys(self) -> int:
+        return sum(batch.keys for batch in self.batches)
+
+    @property
+    def statements(self) -> List[Statement]:
+        return [statement for batch in self.batches for statement in batch.statements]
+
+
+@dataclass
+class BulkResult:
+    """Resultado de una operación masiva."""
+    plan: BulkPlan
+    elapsed_seconds: float
+    transactions: int
+
+    @property
+    def affected_rows(self) -> int:
+        return sum(batch.affected_rows for batch in self.plan.batches)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.plan.operation,
+            "table_name": self.plan.table_name,
+            "key_columns": self.plan.key_columns,
+            "keys": self.plan.keys,
+            "affected_rows": self.affected_rows,
+            "transactions": self.transactions,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "batches": [batch.to_dict() for batch in self.plan.batches]
+        }
+
+    def describe(self, max_batches: int = 20) -> str:
+        verb = "actualizados" if self.plan.operation == "update" else "eliminados"
+        text = (f"✅ {self.plan.table_name}: {self.affected_rows} registros {verb} de {self.plan.keys} claves "
+                f"({len(self.plan.batches)} lotes, {self.transactions} transacciones, "
+                f"{self.elapsed_seconds:.2f} s)\n")
+        for batch in self.plan.batches[:max_batches]:
+            missing = batch.keys - batch.affected_rows
+            note = f" ⚠️ {missing} claves sin registro" if missing > 0 else ""
+            text += (f"• Lote {batch.number}: {batch.keys} claves, {len(batch.statements)} sentencias, "
+                     f"{batch.affected_rows} registros{note}\n")
+        if len(self.plan.batches) > max_batches:
+            text += f"• ... {len(self.plan.batches) - max_batches} lotes más\n"
+        return text
+
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def plan_delete(table_name: str, key_columns: Sequence[str], keys: Sequence[Any],
+                max_keys_per_statement: int = DEFAULT_KEYS_PER_STATEMENT) -> BulkPlan:
+    """Borrar las filas con las claves dadas, en lotes de ``IN``/``OR``."""
+    key_columns = list(key_columns)
+    plan = BulkPlan("delete", table_name, key_columns)
+    size = keys_per_statement(key_columns, max_keys_per_statement)
+    for number, chunk in enumerate(_chunks(normalize_keys(keys, key_columns), size), 1):
+        where, params = key_filter(key_columns, chunk)
+        plan.batches.append(BulkBatch(number, len(chunk), [(f"DELETE FROM {_quote(table_name)} WHERE {where}", params)]))
+    return plan
+
+
+def plan_update(table_name: str, key_columns: Sequence[str], keys: Sequence[Any], data: Dict[str, Any],
+                max_keys_per_statement: int = DEFAULT_KEYS_PER_STATEMENT) -> BulkPlan:
+    """Dar los mismos valores a las filas con las claves dadas, en lotes de ``IN``/``OR``."""
+    if not data:
+        raise ValueError("No hay columnas que actualizar")
+    key_columns = list(key_columns)
+    plan = BulkPlan("update", table_name, key_columns)
+    set_clause = ", ".join(f"{_quote(column)} = ?" for column in data)
+    values = list(data.values())
+    size = keys_per_statement(key_columns, max_keys_per_statement)
+    for number, chunk in enumerate(_chunks(normalize_keys(keys, key_columns), size), 1):
+        where, params = key_filter(key_columns, chunk)
+        plan.batches.append(BulkBatch(number, len(chunk), [
+            (f"UPDATE {_quote(table_name)} SET {set_clause} WHERE {where}", values + params)
+        ]))
+    return plan
+
+
+def plan_row_updates(table_name: str, key_columns: Sequence[str], rows: Sequence[Dict[str, Any]],
+                     rows_per_batch: int = DEFAULT_ROWS_PER_BATCH) -> BulkPlan:
+    """
+    Actualizar cada fila con sus propios valores.
+
+    Cada fila es un objeto con las columnas de clave y las columnas a
+    actualizar; las filas con las mismas columnas comparten el texto SQL.
+    """
+    key_columns = list(key_columns)
+    key_names = {column.lower() for column in key_columns}
+    plan = BulkPlan("update", table_name, key_columns)
+    statements = []
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"Cada fila debe ser un objeto con la clave y los valores: {row}")
+        key = normalize_keys([row], key_columns)[0]
+        columns = [column for column in row if column.lower() not in key_names]
+        if not columns:
+            raise ValueError(f"La fila {row} no tiene columnas que actualizar")
+        set_clause = ", ".join(f"{_quote(column)} = ?" for column in columns)
+        where = " AND ".join(f"{_quote(column)} = ?" for column in key_columns)
+        statements.append((f"UPDATE {_quote(table_name)} SET {set_clause} WHERE {where}",
+                           [row[column] for column in columns] + list(key)))
+    for number, chunk in enumerate(_chunks(statements, max(1, rows_per_batch)), 1):
+        plan.batches.append(BulkBatch(number, len(chunk), chunk))
+    return plan
+
+
+def run_plan(plan: BulkPlan, execute_transaction: Callable[[List[Statement]], List[Any]],
+             single_transaction: bool = True) -> BulkResult:
+    """
+    Ejecutar un plan y anotar los registros afectados en cada lote.
+
+    Args:
+        execute_transaction: Ejecuta sentencias en una transacción y devuelve un
+            resultado por sentencia (``[{"affected_rows": n}]``)
+        single_transaction: Todo en una transacción (si falla no se aplica nada)
+            o una por lote (los lotes ya confirmados se mantienen)
+    """
+    start = time.perf_counter()
+    groups = [plan.batches] if single_transaction else [[batch] for batch in plan.batches]
+    transactions = 0
+    for group in groups:
+        statements = [statement for batch in group for statement in batch.statements]
+        if not statements:
+            continue
+        try:
+            results = iter(execute_transaction(statements))
+        except Exception as e:
+            committed = BulkPlan(plan.operation, plan.table_name, plan.key_columns,
+                                 plan.batches[:plan.batches.index(group[0])])
+            partial = BulkResult(committed, time.perf_counter() - start, transactions)
+            if committed.batches:
+                message = (f"Error en el lote {group[0].number}: {e}. Los {len(committed.batches)} lotes anteriores "
+                           f"ya están confirmados ({partial.affected_rows} registros)")
+            else:
+                message = f"Error en la operación masiva (no se aplicó ningún cambio): {e}"
+            raise BulkOperationError(message, partial) from e
+        transactions += 1
+        for batch in group:
+            batch.affected_rows = sum(_affected_rows(next(results)) for _ in batch.statements)
+    return BulkResult(plan, time.perf_counter() - start, transactions)
+
+
+def _affected_rows(result: Any) -> int:
+    if isinstance(result, list):
+        result = result[0] if result else {}
+    if isinstance(result, dict):
+        return max(0, result.get("affected_rows") or 0)
+    return 0
+
+
+# Inserción o actualización (merge)
+
+def _key_marker(key: Sequence[Any]) -> Tuple[Any, ...]:
+    """Clave comparable como la compara Jet (texto sin distinguir mayúsculas)."""
+    return tuple(value.lower() if isinstance(value, str) else value for value in key)
+
+
+@dataclass
+class MergeResult:
+    """Resultado de un merge."""
+    table_name: str
+    key_columns: List[str]
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    lookups: int = 0
+    statements: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table_name": self.table_name,
+            "key_columns": self.key_columns,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "duplicates": self.duplicates,
+            "lookups": self.lookups,
+            "statements": self.statements,
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
+
+    def describe(self) -> str:
+        text = (f"✅ Merge en '{self.table_name}' por {', '.join(self.key_columns)}: {self.rows} filas "
+                f"({self.elapsed_seconds:.2f} s, una transacción)\n"
+                f"• Insertadas: {self.inserted}\n"
+                f"• Actualizadas: {self.updated}\n"
+                f"• Consultas de claves: {self.lookups}, sentencias executemany: {self.statements}\n")
+        if self.unchanged:
+            text += f"• Existentes sin columnas que actualizar: {self.unchanged}\n"
+        if self.duplicates:
+            text += f"⚠️ Claves repetidas en la entrada: {self.duplicates} (se aplica la última fila)\n"
+        return text
+
+
+def merge_rows(table_name: str, key_columns: Sequence[str], rows: Sequence[Dict[str, Any]],
+               fetch_keys: Callable[[str, List[Any]], Iterable[Sequence[Any]]],
+               execute_many: Callable[[str, List[List[Any]]], Any],
+               converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+               max_keys_per_statement: int = DEFAULT_KEYS_PER_STATEMENT) -> MergeResult:
+    """
+    Insertar las filas nuevas y actualizar las existentes.
+
+    No confirma: ``fetch_keys`` y ``execute_many`` deben usar la misma
+    transacción para que la búsqueda de claves y las escrituras sean
+    coherentes.
+
+    Args:
+        rows: Objetos con las columnas de clave y el resto de valores
+        fetch_keys: Ejecuta ``(consulta, parámetros)`` y devuelve las filas de clave encontradas
+        execute_many: Ejecuta ``(sentencia, filas de parámetros)`` con ``executemany``
+        converters: Conversión por columna (en minúsculas) antes de comparar y escribir
+    """
+    start = time.perf_counter()
+    key_columns = list(key_columns)
+    key_names = {column.lower() for column in key_columns}
+    result = MergeResult(table_name, key_columns)
+    converters = converters or {}
+
+    # Filas por clave (la última gana si una clave se repite)
+    by_key: Dict[Tuple[Any, ...], Tuple[Tuple[Any, ...], Dict[str, Any]]] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"Cada fila debe ser un objeto con la clave y los valores: {row}")
+        if converters:
+            converted = {}
+            for column, value in row.items():
+                convert = converters.get(column.lower())
+                try:
+                    converted[column] = convert(value) if convert is not None and value is not None else value
+                except (ValueError, TypeError) as e:
+                    raise ValueError(f"Valor no válido para {column} en la fila {row}: {e}")
+            row = converted
+        key = normalize_keys([row], key_columns)[0]
+        marker = _key_marker(key)
+        if marker in by_key:
+            result.duplicates += 1
+        by_key[marker] = (key, row)
+    result.rows = len(by_key)
+
+    # Claves que ya existen, con una consulta por lote
+    existing = set()
+    select_columns = ", ".join(_quote(column) for column in key_columns)
+    keys = [key for key, _ in by_key.values()]
+    for chunk in _chunks(keys, keys_per_statement(key_columns, max_keys_per_statement)):
+        where, params = key_filter(key_columns, chunk)
+        for found in fetch_keys(f"SELECT {select_columns} FROM {_quote(table_name)} WHERE {where}", params):
+            existing.add(_key_marker(tuple(found)))
+        result.lookups += 1
+
+    # Agrupar por columnas para que cada grupo sea una sola sentencia
+    inserts: Dict[Tuple[str, ...], List[List[Any]]] = {}
+    updates: Dict[Tuple[str, ...], List[List[Any]]] = {}
+    for marker, (key, row) in by_key.items():
+        if marker in existing:
+            columns = tuple(column for column in row if column.lower() not in key_names)
+            if not columns:
+                result.unchanged += 1
+                continue
+            updates.setdefault(columns, []).append([row[column] for column in columns] + list(key))
+        else:
+            columns = tuple(row)
+            inserts.setdefault(columns, []).append([row[column] for column in columns])
+
+    where = " AND ".join(f"{_quote(column)} = ?" for column in key_columns)
+    for columns, params in updates.items():
+        set_clause = ", ".join(f"{_quote(column)} = ?" for column in columns)
+        execute_many(f"UPDATE {_quote(table_name)} SET {set_clause} WHERE {where}", params)
+        result.updated += len(params)
+        result.statements += 1
+    for columns, params in inserts.items():
+        execute_many(f"INSERT INTO {_quote(table_name)} ({', '.join(_quote(column) for column in columns)}) "
+                     f"VALUES ({', '.join('?' for _ in columns)})", params)
+        result.inserted += len(params)
+        result.statements += 1
+
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,265 @@
+"""
+Captura incremental de cambios por hash de clave primaria.
+
+Access no ofrece CDC, así que para saber qué filas cambiaron desde la
+última sincronización se guarda, por tabla, un mapa compacto clave
+primaria -> hash de la fila:
+
+- ``<tabla>.keys``: claves (JSON) ordenadas, una por línea
+- ``<tabla>.hashes``: hashes de 64 bits en el mismo orden (``array('Q')``)
+
+En cada ejecución se recorre la tabla por lotes, se comparan los hashes
+con la instantánea anterior (búsqueda binaria sobre las claves ordenadas)
+y se obtienen los conjuntos de claves insertadas, modificadas y eliminadas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple
+
+try:
+    from .result_formats import BINARY_TYPES, to_json_value, to_text_value
+except ImportError:
+    from result_formats import BINARY_TYPES, to_json_value, to_text_value
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w\-.]+")
+
+_NULL_MARKER = b"\x00N"
+_FIELD_SEPARATOR = b"\x1f"
+
+
+@dataclass
+class ChangeSet:
+    """Cambios detectados en una tabla desde la instantánea anterior."""
+    table_name: str
+    key_columns: List[str]
+    inserted: List[Any] = field(default_factory=list)
+    updated: List[Any] = field(default_factory=list)
+    deleted: List[Any] = field(default_factory=list)
+    rows_scanned: int = 0
+    previous_rows: int = 0
+    first_run: bool = False
+    elapsed_seconds: float = 0.0
+    # Instantánea nueva pendiente de guardar (captura con commit=False)
+    snapshot: Optional["TableSnapshot"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def summary(self) -> str:
+        """Resumen de una línea de los cambios."""
+        return (f"{len(self.inserted)} insertados, {len(self.updated)} modificados, "
+                f"{len(self.deleted)} eliminados")
+
+    def iter_records(self):
+        """Iterar los cambios como filas (tipo de cambio, clave en JSON)."""
+        for change_type, keys in (("inserted", self.inserted), ("updated", self.updated),
+                                  ("deleted", self.deleted)):
+            for key in keys:
+                yield (change_type, json.dumps(key, ensure_ascii=False))
+
+
+def encode_key(values: Sequence[Any]) -> str:
+    """Codificar una clave (simple o compuesta) como JSON estable."""
+    converted = [to_json_value(value) for value in values]
+    return json.dumps(converted[0] if len(converted) == 1 else converted,
+                      ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def row_hash(values: Sequence[Any]) -> int:
+    """Calcular un hash de 64 bits del contenido de una fila."""
+    digest = hashlib.blake2b(digest_size=8)
+    for value in values:
+        if value is None:
+            digest.update(_NULL_MARKER)
+        elif isinstance(value, BINARY_TYPES):
+            digest.update(bytes(value))
+        else:
+            digest.update(to_text_value(value).encode("utf-8"))
+        digest.update(_FIELD_SEPARATOR)
+    return struct.unpack("<Q", digest.digest())[0]
+
+
+class TableSnapshot:
+    """Instantánea compacta clave -> hash de una tabla."""
+
+    def __init__(self, keys: Optional[List[str]] = None, hashes: Optional[array] = None):
+        self.keys: List[str] = keys or []
+        self.hashes: array = hashes if hashes is not None else array("Q")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def find(self, key: str) -> int:
+        """Posición de una clave, o -1 si no existe."""
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return -1
+
+    @classmethod
+    def from_entries(cls, entries: List[Tuple[str, int]]) -> "TableSnapshot":
+        entries.sort()
+        return cls([key for key, _ in entries], array("Q", (h for _, h in entries)))
+
+    @classmethod
+    def load(cls, base_path: str) -> Optional["TableSnapshot"]:
+        """Cargar una instantánea; devuelve None si no existe."""
+        keys_path, hashes_path = base_path + ".keys", base_path + ".hashes"
+        if not (os.path.exists(keys_path) and os.path.exists(hashes_path)):
+            return None
+        with open(keys_path, "r", encoding="utf-8") as f:
+            keys = f.read().splitlines()
+        hashes = array("Q")
+        with open(hashes_path, "rb") as f:
+            hashes.frombytes(f.read())
+        if sys.byteorder != "little":
+            hashes.byteswap()
+        if len(keys) != len(hashes):
+            logger.warning(f"Instantánea inconsistente en {base_path}; se ignora")
+            return None
+        return cls(keys, hashes)
+
+    def save(self, base_path: str):
+        """Guardar la instantánea (escritura atómica de ambos ficheros)."""
+        hashes = array("Q", self.hashes)
+        if sys.byteorder != "little":
+            hashes.byteswap()
+        with open(base_path + ".keys.tmp", "w", encoding="utf-8") as f:
+            f.write("\n".join(self.keys))
+            if self.keys:
+                f.write("\n")
+        with open(base_path + ".hashes.tmp", "wb") as f:
+            f.write(hashes.tobytes())
+        os.replace(base_path + ".keys.tmp", base_path + ".keys")
+        os.replace(base_path + ".hashes.tmp", base_path + ".hashes")
+
+
+class ChangeCapture:
+    """Detección de filas insertadas, modificadas y eliminadas por tabla."""
+
+    def __init__(self, db_manager, state_dir: str, batch_size: int = 1000, change_recorder=None):
+        """
+        Inicializar la captura de cambios.
+
+        Args:
+            db_manager: Instancia de AccessDatabaseManager conectada
+            state_dir: Directorio donde se guardan las instantáneas
+            batch_size: Filas por lote al recorrer la tabla
+            change_recorder: Objeto opcional con ``record_change`` (por ejemplo
+                EnhancedDocumentationGenerator) donde registrar los cambios
+        """
+        self.db_manager = db_manager
+        self.state_dir = state_dir
+        self.batch_size = batch_size
+        self.change_recorder = change_recorder
+
+    def snapshot_path(self, table_name: str) -> str:
+        """Ruta base de la instantánea de una tabla."""
+        database_name = os.path.splitext(os.path.basename(self.db_manager.database_path or "db"))[0]
+        safe_name = _UNSAFE_FILENAME_CHARS.sub("_", f"{database_name}__{table_name}")
+        return os.path.join(self.state_dir, safe_name)
+
+    def resolve_key_columns(self, table_name: str, key_columns: Optional[Sequence[str]] = None) -> List[str]:
+        """Obtener las columnas clave (explícitas o las claves primarias de la tabla)."""
+        if key_columns:
+            return list(key_columns)
+        primary_keys = self.db_manager.get_primary_keys(table_name)
+        if not primary_keys:
+            raise ValueError(f"La tabla {table_name} no tiene clave primaria; indique 'key_columns'")
+        return [pk["column_name"] for pk in primary_keys]
+
+    def capture(self, table_name: str, key_columns: Optional[Sequence[str]] = None,
+                commit: bool = True) -> ChangeSet:
+        """
+        Comparar la tabla con la instantánea anterior.
+
+        Args:
+            table_name: Tabla a analizar
+            key_columns: Columnas clave (por defecto, la clave primaria)
+            commit: Guardar la nueva instantánea. Con False la instantánea
+                queda en ``change_set.snapshot`` y se guarda después con
+                ``commit(change_set)``, cuando los cambios ya se aplicaron
+        """
+        start = time.perf_counter()
+        key_columns = self.resolve_key_columns(table_name, key_columns)
+        base_path = self.snapshot_path(table_name)
+        previous = TableSnapshot.load(base_path)
+
+        change_set = ChangeSet(table_name=table_name, key_columns=key_columns,
+                               first_run=previous is None,
+                               previous_rows=len(previous) if previous else 0)
+        seen = bytearray(len(previous)) if previous else bytearray()
+        entries: List[Tuple[str, int]] = []
+
+        with self.db_manager.open_query(f"SELECT * FROM [{table_name}]", batch_size=self.batch_size) as stream:
+            positions = {col.lower(): i for i, col in enumerate(stream.columns)}
+            try:
+                key_indexes = [positions[col.lower()] for col in key_columns]
+            except KeyError as e:
+                raise ValueError(f"Columna clave no encontrada en {table_name}: {e.args[0]}")
+
+            for batch in stream.iter_batches():
+                for row in batch:
+                    key_values = [row[i] for i in key_indexes]
+                    key = encode_key(key_values)
+                    current_hash = row_hash(row)
+                    entries.append((key, current_hash))
+
+                    if previous is None:
+                        continue
+                    index = previous.find(key)
+                    if index < 0:
+                        change_set.inserted.append(json.loads(key))
+                    else:
+                        seen[index] = 1
+                        if previous.hashes[index] != current_hash:
+                            change_set.updated.append(json.loads(key))
+
+        change_set.rows_scanned = len(entries)
+        if previous is not None:
+            change_set.deleted = [json.loads(previous.keys[i]) for i in range(len(previous)) if not seen[i]]
+
+        change_set.snapshot = TableSnapshot.from_entries(entries)
+        if commit:
+            self.commit(change_set)
+
+        change_set.elapsed_seconds = time.perf_counter() - start
+        return change_set
+
+    def commit(self, change_set: ChangeSet):
+        """Guardar la instantánea de una captura y registrar sus cambios."""
+        if change_set.snapshot is None:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        change_set.snapshot.save(self.snapshot_path(change_set.table_name))
+        change_set.snapshot = None
+        if change_set.has_changes:
+            self._record(change_set)
+
+    def _record(self, change_set: ChangeSet):
+        """Registrar el cambio en el historial de documentación."""
+        if self.change_recorder is None:
+            return
+        try:
+            self.change_recorder.record_change(
+                change_type="data",
+                table_name=change_set.table_name,
+                description=f"Cambios detectados: {change_set.summary()}",
+                old_value=str(change_set.previous_rows),
+                new_value=str(change_set.rows_scanned)
+            )
+        except Exception as e:
+            logger.debug(f"No se pudo registrar el cambio de {change_set.table_name}: {e}")
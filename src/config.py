@@ -14,12 +14,156 @@ class AccessMCPConfig:
         "server": {
             "name": "mcp-access-server",
             "version": "1.0.0",
-            "description": "Servidor MCP para manipular bases de datos Microsoft Access"
+            "description": "Servidor MCP para manipular bases de datos Microsoft Access",
+            # Responder a initialize y tools/list desde las respuestas del arranque
+            # anterior mientras se importa el SDK de MCP (ver startup_manifest)
+            "fast_startup": True,
+            # Fichero de esas respuestas (por defecto: ~/.mcp-access/startup-manifest.json)
+            "startup_manifest": None
         },
         "database": {
             "default_timeout": 30,
             "max_records_display": 50,
-            "auto_commit": True
+            "auto_commit": True,
+            # Tiempo máximo por herramienta (segundos, None = sin límite)
+            "tool_timeouts": {
+                "export_query": 3600,
+                "import_file": 3600,
+                "mirror_database": 3600,
+                "capture_changes": 1800
+            },
+            # Espera a que el hilo de una consulta cancelada libere la conexión
+            "cancel_grace_seconds": 5
+        },
+        "results": {
+            "max_response_bytes": 65536,
+            "max_cell_chars": 255,
+            "fetch_batch_size": 500
+        },
+        "mirror": {
+            "path": None,
+            "engine": "auto",
+            "batch_size": 1000,
+            "route_reads": False
+        },
+        "change_capture": {
+            "state_dir": None,
+            "batch_size": 1000
+        },
+        "metrics": {
+            "dump_path": None,
+            "dump_interval_seconds": 60
+        },
+        "slow_query_log": {
+            "enabled": True,
+            "path": None,
+            "threshold_ms": 1000,
+            "max_bytes": 5 * 1024 * 1024,
+            "backup_count": 3,
+            "redact_parameters": True
+        },
+        "index_advisor": {
+            # Herramientas cuyas consultas lentas se analizan
+            "tools": ["execute_query", "get_records"],
+            "max_statements": 100,
+            "sample_rows": 1000,
+            # Tablas con menos filas no necesitan índices
+            "min_table_rows": 200,
+            # Fracción de filas por encima de la cual un índice no compensa
+            "max_matched_fraction": 0.2
+        },
+        "materialized_views": {
+            # Fichero SQLite de las vistas de cada base de datos (por defecto: ~/.mcp-access/views)
+            "dir": None,
+            "batch_size": 1000,
+            # Cada cuánto se comprueban los refrescos programados
+            "check_seconds": 30,
+            # Responder desde las vistas las consultas iguales a su definición o que las lean por nombre
+            "route_reads": True
+        },
+        "showplan": {
+            # showplan.out que escribe el motor (por defecto: Documentos y el directorio de trabajo)
+            "path": None,
+            # Espera máxima a que el motor escriba el plan
+            "wait_seconds": 2.0
+        },
+        "sessions": {
+            # Bases de datos consultadas a la vez por fan_out_query
+            "max_workers": 8,
+            "max_rows_per_database": 10000
+        },
+        "local_cache": {
+            # Copia local para leer bases de datos en carpetas de red (enable_local_cache)
+            "cache_dir": None,
+            "block_size": 1024 * 1024,
+            "max_staleness_seconds": 30,
+            # Verificación completa por bloques aunque no cambien tamaño ni fecha
+            "verify_interval_seconds": 300,
+            # Desfase admitido por herramienta (segundos)
+            "tool_staleness": {
+                "export_query": 300,
+                "generate_database_documentation": 600
+            }
+        },
+        "write_scheduler": {
+            # Cola de escrituras con reintentos ante bloqueos de otros usuarios de Access
+            "enabled": True,
+            "batch_size": 50,
+            "max_retries": 8,
+            "backoff_initial_seconds": 0.05,
+            "backoff_max_seconds": 2.0,
+            # Tiempo máximo que una escritura cede el paso a las lecturas en curso
+            "max_reader_wait_seconds": 5.0
+        },
+        "import": {
+            # import_file: filas por executemany/transacción
+            "batch_size": 1000,
+            # Rechazos a partir de los cuales se interrumpe la importación
+            "max_rejected": 1000,
+            # Filas examinadas para inferir los tipos al crear la tabla
+            "infer_rows": 1000
+        },
+        "write_behind": {
+            # insert_record diferido: las filas se escriben por lotes (executemany)
+            "enabled": False,
+            "max_rows": 500,
+            "max_delay_seconds": 2.0,
+            # Diario local de inserciones pendientes (por defecto: ~/.mcp-access/journal)
+            "journal_dir": None,
+            "fsync": False
+        },
+        "parameter_binding": {
+            # Convertir los parámetros al tipo de la columna y enlazarlos con setinputsizes
+            "enabled": True,
+            # Sentencias cuyo enlace se recuerda (LRU)
+            "max_statements": 256
+        },
+        "query_rewriter": {
+            # Traducir LIMIT/OFFSET, operadores y comillas ANSI a SQL de Access en execute_query
+            "enabled": True,
+            # Sentencias cuya traducción se recuerda (LRU)
+            "max_statements": 256,
+            # Consultas paginadas cuya última clave se recuerda (paginación por clave)
+            "max_pages": 1000
+        },
+        "bulk_operations": {
+            # update_records / delete_records
+            "keys_per_statement": 200,
+            "rows_per_batch": 500,
+            # Una transacción para todo (false: una por lote, para tablas muy grandes)
+            "single_transaction": True
+        },
+        "parallel_scan": {
+            # Procesos (lector directo) o conexiones (intervalos de clave); None = número de CPU
+            "workers": None,
+            "pages_per_task": 64,
+            # Por debajo de este número de páginas de datos la tabla se lee sin pool
+            "min_pages": 32,
+            "max_distinct": 10000
+        },
+        "federation": {
+            # Filas máximas del lado que se carga en memoria en la combinación por hash
+            "max_build_rows": 1000000
         },
         "logging": {
             "level": "INFO",
@@ -0,0 +1,300 @@
+"""
+Exportación de consultas a ficheros locales.
+
+Escribe el resultado de un SELECT directamente a disco leyendo por lotes
+(``fetchmany``), con memoria constante independientemente del tamaño del
+resultado. Formatos soportados: CSV, JSON Lines y Parquet (si pyarrow está
+instalado).
+"""
+
+import base64
+import csv
+import importlib.util
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence
+
+try:
+    from .result_formats import BINARY_TYPES, to_json_value, to_text_value
+except ImportError:
+    from result_formats import BINARY_TYPES, to_json_value, to_text_value
+
+# pyarrow tarda en importarse: solo se comprueba si está instalado y se
+# importa al crear el primer escritor Parquet
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ["csv", "jsonl", "parquet"]
+
+_EXTENSION_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+}
+
+
+@dataclass
+class ExportResult:
+    """Resumen de una exportación."""
+    output_path: str
+    export_format: str
+    rows: int
+    bytes_written: int
+    elapsed_seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+def resolve_export_format(output_path: str, export_format: Optional[str] = None) -> str:
+    """
+    Determinar el formato de exportación (explícito o por extensión).
+
+    Raises:
+        ValueError: Si el formato no está soportado o no se puede deducir
+    """
+    if export_format:
+        export_format = export_format.lower()
+    else:
+        export_format = _EXTENSION_FORMATS.get(os.path.splitext(output_path)[1].lower())
+        if export_format is None:
+            raise ValueError("No se pudo deducir el formato por la extensión; indique 'format'")
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Formato de exportación no soportado: {export_format}. "
+            f"Formatos disponibles: {', '.join(EXPORT_FORMATS)}"
+        )
+    if export_format == "parquet" and not PYARROW_AVAILABLE:
+        raise ValueError("La exportación a Parquet requiere pyarrow (pip install pyarrow)")
+    return export_format
+
+
+def _export_json_value(value: Any) -> Any:
+    # En una exportación los binarios se conservan completos (base64)
+    if isinstance(value, BINARY_TYPES):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return to_json_value(value)
+
+
+def _export_text_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, BINARY_TYPES):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return to_text_value(value)
+
+
+class CsvExportWriter:
+    """Escritor CSV con cabecera."""
+
+    def __init__(self, path: str, columns: Sequence[str], description: Optional[Sequence] = None):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]):
+        self._writer.writerows([[_export_text_value(value) for value in row] for row in rows])
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesExportWriter:
+    """Escritor JSON Lines (un objeto por fila)."""
+
+    def __init__(self, path: str, columns: Sequence[str], description: Optional[Sequence] = None):
+        self._file = open(path, "w", encoding="utf-8")
+        self._columns = list(columns)
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]):
+        columns = self._columns
+        self._file.write("".join(
+            json.dumps({column: _export_json_value(value) for column, value in zip(columns, row)},
+                       ensure_ascii=False, separators=(",", ":")) + "\n"
+            for row in rows
+        ))
+
+    def close(self):
+        self._file.close()
+
+
+def _load_pyarrow():
+    """Importar pyarrow (y pyarrow.parquet) la primera vez que se necesita."""
+    global pyarrow
+    if pyarrow is None:
+        import pyarrow.parquet
+    return pyarrow
+
+
+def _arrow_type(column_description: Sequence) -> Any:
+    """Tipo de pyarrow para una columna según ``cursor.description`` (None si el driver no lo indica)."""
+    type_code = column_description[1]
+    if type_code is bool:
+        return pyarrow.bool_()
+    if type_code is int:
+        return pyarrow.int64()
+    if type_code is float:
+        return pyarrow.float64()
+    if type_code is Decimal:
+        precision, scale = column_description[4], column_description[5]
+        if isinstance(precision, int) and isinstance(scale, int) and 0 < precision <= 38:
+            return pyarrow.decimal128(precision, scale)
+        return pyarrow.string()
+    if type_code is str:
+        return pyarrow.string()
+    if type_code is datetime:
+        return pyarrow.timestamp("us")
+    if type_code is date:
+        return pyarrow.date32()
+    if type_code is time_of_day:
+        return pyarrow.time64("us")
+    if type_code in BINARY_TYPES:
+        return pyarrow.binary()
+    return None
+
+
+class ParquetExportWriter:
+    """Escritor Parquet.
+
+    El tipo de cada columna se toma de ``cursor.description`` (pyodbc indica
+    el tipo Python de cada columna). Si el driver no lo indica, el tipo se
+    deduce del primer lote y no puede cambiar después: un lote posterior con
+    valores de otro tipo en esa columna hace fallar la exportación.
+    """
+
+    def __init__(self, path: str, columns: Sequence[str], description: Optional[Sequence] = None):
+        _load_pyarrow()
+        self._path = path
+        self._columns = list(columns)
+        self._types = [_arrow_type(column) for column in description] if description else [None] * len(columns)
+        self._schema = None
+        self._writer = None
+
+    def _column_arrays(self, rows: Sequence[Sequence[Any]]) -> List[Any]:
+        values_by_column = [[row[i] for row in rows] for i in range(len(self._columns))]
+        if self._schema is None:
+            arrays = []
+            for values, arrow_type in zip(values_by_column, self._types):
+                if arrow_type is not None:
+                    if pyarrow.types.is_string(arrow_type):
+                        values = [None if value is None else _export_text_value(value) for value in values]
+                    arrays.append(pyarrow.array(values, type=arrow_type))
+                    continue
+                array = pyarrow.array(values)
+                # Columnas sin valores en el primer lote: se guardan como texto
+                if pyarrow.types.is_null(array.type):
+                    array = pyarrow.array(values, type=pyarrow.string())
+                arrays.append(array)
+            return arrays
+
+        arrays = []
+        for field, values in zip(self._schema, values_by_column):
+            if pyarrow.types.is_string(field.type):
+                values = [None if value is None else _export_text_value(value) for value in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        return arrays
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]):
+        arrays = self._column_arrays(rows)
+        if self._schema is None:
+            table = pyarrow.Table.from_arrays(arrays, names=self._columns)
+            self._schema = table.schema
+            self._writer = pyarrow.parquet.ParquetWriter(self._path, self._schema)
+        else:
+            table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is None:
+            # Resultado vacío: tipos del cursor o, sin ellos, texto
+            self._schema = pyarrow.schema([(column, arrow_type or pyarrow.string())
+                                           for column, arrow_type in zip(self._columns, self._types)])
+            self._writer = pyarrow.parquet.ParquetWriter(self._path, self._schema)
+        self._writer.close()
+
+
+EXPORT_WRITERS = {
+    "csv": CsvExportWriter,
+    "jsonl": JsonLinesExportWriter,
+    "parquet": ParquetExportWriter,
+}
+
+
+class StreamingExporter:
+    """Exportador de resultados por lotes a un fichero local."""
+
+    def __init__(self, progress_every: int = 10000,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        """
+        Inicializar el exportador.
+
+        Args:
+            progress_every: Cada cuántas filas se informa del progreso
+            progress_callback: Función opcional ``(filas, bytes_escritos)``
+        """
+        self.progress_every = max(1, int(progress_every))
+        self.progress_callback = progress_callback
+
+    def export(self, stream, output_path: str, export_format: Optional[str] = None) -> ExportResult:
+        """
+        Exportar un flujo de resultados (``QueryStream``) a un fichero.
+
+        Se escribe en un fichero temporal ``.part`` que se renombra al final,
+        de modo que nunca queda un fichero de destino a medio escribir.
+        """
+        export_format = resolve_export_format(output_path, export_format)
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+
+        part_path = output_path + ".part"
+        start = time.perf_counter()
+        rows = 0
+        next_report = self.progress_every
+
+        description = getattr(getattr(stream, "cursor", None), "description", None)
+        try:
+            writer = EXPORT_WRITERS[export_format](part_path, stream.columns, description)
+            try:
+                for batch in stream.iter_batches():
+                    writer.write_batch(batch)
+                    rows += len(batch)
+                    if rows >= next_report:
+                        next_report = rows + self.progress_every
+                        self._report_progress(part_path, rows)
+            finally:
+                writer.close()
+            os.replace(part_path, output_path)
+        finally:
+            # Si falla la lectura, la escritura o el cierre no queda el .part
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        result = ExportResult(
+            output_path=output_path,
+            export_format=export_format,
+            rows=rows,
+            bytes_written=os.path.getsize(output_path),
+            elapsed_seconds=time.perf_counter() - start
+        )
+        logger.info(f"Exportadas {rows} filas a {output_path} ({result.bytes_written} bytes, "
+                    f"{result.elapsed_seconds:.2f}s)")
+        return result
+
+    def _report_progress(self, part_path: str, rows: int):
+        bytes_written = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        logger.info(f"Exportación en curso: {rows} filas, {bytes_written} bytes")
+        if self.progress_callback:
+            try:
+                self.progress_callback(rows, bytes_written)
+            except Exception as e:
+                logger.debug(f"Error notificando progreso: {e}")
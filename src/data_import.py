@@ -0,0 +1,660 @@
+"""
+Importación de ficheros locales a tablas Access.
+
+Lee un CSV o JSON Lines por streaming, convierte cada valor al tipo de la
+columna de destino (según ``get_table_schema``) y carga las filas por
+lotes con ``executemany``, una transacción por lote, con memoria constante
+independientemente del tamaño del fichero.
+
+- las columnas del fichero se emparejan con las de la tabla por nombre (sin
+  distinguir mayúsculas) o con un mapeo explícito
+- si la tabla no existe se pueden inferir los tipos de las primeras filas y
+  crearla
+- las filas que no se pueden convertir o que el motor rechaza (clave
+  duplicada, validación...) se escriben en un fichero aparte
+  (``<fichero>.rejects.jsonl``) con el número de línea y el error; si un lote
+  falla, se repite fila a fila para que solo se rechacen las filas erróneas
+"""
+
+import base64
+import csv
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .query_control import QueryCancelledError, current_scope
+except ImportError:
+    from query_control import QueryCancelledError, current_scope
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ["csv", "jsonl"]
+
+_EXTENSION_FORMATS = {
+    ".csv": "csv",
+    ".tsv": "csv",
+    ".txt": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_INFER_ROWS = 1000
+
+_DATETIME_FORMATS = ["%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y/%m/%d", "%Y/%m/%d %H:%M:%S"]
+_TRUE_VALUES = {"1", "-1", "true", "t", "yes", "y", "si", "sí", "s", "verdadero"}
+_FALSE_VALUES = {"0", "false", "f", "no", "n", "falso"}
+# "1.000", "1,000", "12.345.678": separadores de miles, que no se pueden
+# distinguir de un decimal y no se deben truncar a entero
+_GROUPED_INTEGER = re.compile(r"^[-+]?\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*$")
+
+_INTEGER_RANGES = {
+    "BYTE": (0, 255), "TINYINT": (0, 255),
+    "SMALLINT": (-2 ** 15, 2 ** 15 - 1), "SHORT": (-2 ** 15, 2 ** 15 - 1),
+    "INTEGER": (-2 ** 31, 2 ** 31 - 1), "INT": (-2 ** 31, 2 ** 31 - 1), "LONG": (-2 ** 31, 2 ** 31 - 1),
+    "COUNTER": (-2 ** 31, 2 ** 31 - 1), "AUTOINCREMENT": (-2 ** 31, 2 ** 31 - 1),
+    "BIGINT": (-2 ** 63, 2 ** 63 - 1),
+}
+_FLOAT_TYPES = {"REAL", "DOUBLE", "FLOAT", "SINGLE", "DOUBLE PRECISION"}
+_DECIMAL_TYPES = {"CURRENCY", "MONEY", "DECIMAL", "NUMERIC"}
+_BOOLEAN_TYPES = {"BIT", "YESNO", "BOOLEAN", "LOGICAL"}
+_DATETIME_TYPES = {"DATETIME", "DATE", "TIME", "TIMESTAMP"}
+_BINARY_TYPES = {"LONGBINARY", "BINARY", "VARBINARY", "OLEOBJECT", "IMAGE", "BLOB"}
+_LONG_TEXT_TYPES = {"LONGCHAR", "MEMO", "LONGTEXT", "NTEXT", "CLOB"}
+_AUTONUMBER_TYPES = {"COUNTER", "AUTOINCREMENT"}
+
+
+class ImportAbortedError(Exception):
+    """Importación interrumpida; ``result`` recoge lo ya confirmado."""
+
+    def __init__(self, message: str, result: "ImportResult"):
+        super().__init__(message)
+        self.result = result
+
+
+def resolve_import_format(source_path: str, import_format: Optional[str] = None) -> str:
+    """
+    Determinar el formato del fichero (explícito o por extensión).
+
+    Raises:
+        ValueError: Si el formato no es válido o no se puede deducir
+    """
+    if import_format:
+        import_format = import_format.lower()
+        if import_format not in IMPORT_FORMATS:
+            raise ValueError(f"Formato de importación no válido: {import_format}. "
+                             f"Opciones: {', '.join(IMPORT_FORMATS)}")
+        return import_format
+    extension = os.path.splitext(source_path)[1].lower()
+    if extension not in _EXTENSION_FORMATS:
+        raise ValueError(f"No se puede deducir el formato de '{source_path}'; indique format "
+                         f"({', '.join(IMPORT_FORMATS)})")
+    return _EXTENSION_FORMATS[extension]
+
+
+# Conversión de valores
+
+def _base_type(data_type: Optional[str]) -> str:
+    return (data_type or "TEXT").upper().split("(")[0].strip()
+
+
+def _integer_converter(low: int, high: int) -> Callable[[Any], int]:
+    def convert(value):
+        if isinstance(value, bool):
+            number = int(value)
+        elif isinstance(value, int):
+            number = value
+        elif isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"{value} no es un número entero")
+            number = int(value)
+        else:
+            text = str(value).strip()
+            try:
+                number = int(text)
+            except ValueError:
+                if _GROUPED_INTEGER.match(text):
+                    raise ValueError(f"'{value}' lleva separadores de miles; no se admiten en una columna entera")
+                number = _to_float(text)
+                if not number.is_integer():
+                    raise ValueError(f"'{value}' no es un número entero")
+                number = int(number)
+        if number < low or number > high:
+            raise ValueError(f"{number} fuera de rango ({low} a {high})")
+        return number
+    return convert
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        if text.count(",") == 1 and "." not in text:
+            try:
+                return float(text.replace(",", "."))
+            except ValueError:
+                pass
+        raise ValueError(f"'{value}' no es un número")
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    text = str(value).strip()
+    if text.count(",") == 1 and "." not in text:
+        text = text.replace(",", ".")
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"'{value}' no es un número decimal")
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"'{value}' no es un valor Sí/No")
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for pattern in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, pattern)
+        except ValueError:
+            continue
+    raise ValueError(f"'{value}' no es una fecha reconocida")
+
+
+def _to_binary(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    try:
+        # Mismo formato que la exportación (base64)
+        return base64.b64decode(str(value), validate=True)
+    except ValueError:
+        raise ValueError("valor binario no válido (se espera base64)")
+
+
+def _text_converter(max_length: Optional[int]) -> Callable[[Any], str]:
+    def convert(value):
+        text = value if isinstance(value, str) else str(value)
+        if max_length is not None and len(text) > max_length:
+            raise ValueError(f"texto de {len(text)} caracteres (máximo {max_length})")
+        return text
+    return convert
+
+
+def value_converter(column: Dict[str, Any]) -> Callable[[Any], Any]:
+    """Función que convierte un valor leído del fichero al tipo de la columna."""
+    data_type = _base_type(column.get("data_type"))
+    if data_type in _INTEGER_RANGES:
+        return _integer_converter(*_INTEGER_RANGES[data_type])
+    if data_type in _FLOAT_TYPES:
+        return _to_float
+    if data_type in _DECIMAL_TYPES:
+        return _to_decimal
+    if data_type in _BOOLEAN_TYPES:
+        return _to_bool
+    if data_type in _DATETIME_TYPES:
+        return _to_datetime
+    if data_type in _BINARY_TYPES:
+        return _to_binary
+    size = column.get("size")
+    limited = data_type not in _LONG_TEXT_TYPES and isinstance(size, int) and 0 < size <= 255
+    return _text_converter(size if limited else None)
+
+
+# Inferencia de tipos para tablas nuevas
+
+def _infer_value_type(value: Any) -> Optional[str]:
+    """Tipo Access más estrecho para un valor (None si está vacío)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return "BIT"
+    if isinstance(value, int):
+        return "LONG" if -2 ** 31 <= value < 2 ** 31 else "DOUBLE"
+    if isinstance(value, float):
+        return "DOUBLE"
+    if not isinstance(value, str):
+        return "TEXT"
+    text = value.strip()
+    digits = text.lstrip("-")
+    if digits.isdigit():
+        # Los ceros a la izquierda (códigos postales, referencias) se conservan como texto
+        if len(digits) > 1 and digits.startswith("0"):
+            return "TEXT"
+        return "LONG" if -2 ** 31 <= int(text) < 2 ** 31 else "DOUBLE"
+    try:
+        float(text)
+        return "DOUBLE"
+    except ValueError:
+        pass
+    if text.lower() in ("true", "false"):
+        return "BIT"
+    try:
+        _to_datetime(text)
+        return "DATETIME"
+    except ValueError:
+        return "TEXT"
+
+
+_WIDENING = {("LONG", "DOUBLE"): "DOUBLE", ("DOUBLE", "LONG"): "DOUBLE"}
+
+
+def infer_columns(field_names: Sequence[str], records: Sequence[Sequence[Any]]) -> List[Dict[str, str]]:
+    """
+    Inferir las columnas de una tabla nueva a partir de una muestra de filas.
+
+    Devuelve definiciones para ``create_table`` (``name``/``type``): LONG,
+    DOUBLE, BIT, DATETIME, TEXT(255) o MEMO si algún texto es más largo.
+    """
+    columns = []
+    for index, name in enumerate(field_names):
+        inferred = None
+        longest = 0
+        for record in records:
+            value = record[index] if index < len(record) else None
+            value_type = _infer_value_type(value)
+            if value_type is None:
+                continue
+            if isinstance(value, str):
+                longest = max(longest, len(value))
+            if inferred is None or inferred == value_type:
+                inferred = value_type
+            else:
+                inferred = _WIDENING.get((inferred, value_type), "TEXT")
+        if inferred in (None, "TEXT"):
+            inferred = "MEMO" if longest > 255 else "TEXT(255)"
+        columns.append({"name": name, "type": inferred})
+    return columns
+
+
+# Lectura del fichero
+
+class _RecordSource:
+    """Registros de un fichero como listas de valores en el orden de ``fields``."""
+
+    def __init__(self, source_path: str, import_format: str, delimiter: Optional[str], encoding: str):
+        self.source_path = source_path
+        self.import_format = import_format
+        self.handle = open(source_path, "r", encoding=encoding, newline="" if import_format == "csv" else None)
+        self.fields: List[str] = []
+        self._pending: List[Tuple[int, Any]] = []
+        if import_format == "csv":
+            sample = self.handle.read(64 * 1024)
+            self.handle.seek(0)
+            if delimiter is None:
+                delimiter = ";" if sample.count(";") > sample.count(",") else ","
+                if sample.count("\t") > max(sample.count(";"), sample.count(",")):
+                    delimiter = "\t"
+            self._reader = csv.reader(self.handle, delimiter=delimiter)
+            self.fields = [name.strip() for name in next(self._reader, [])]
+        else:
+            # Los campos salen del primer registro válido
+            self._line_number = 0
+            for line_number, line in enumerate(self.handle, 1):
+                self._line_number = line_number
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self._pending.append((line_number, line.rstrip("\n")))
+                    continue
+                if isinstance(record, dict):
+                    self.fields = list(record)
+                self._pending.append((line_number, record))
+                break
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        """Pares (línea, registro); el registro es una lista, o el texto original si no se pudo leer."""
+        if self.import_format == "csv":
+            for record in self._reader:
+                if record:
+                    yield self._reader.line_num, record
+            return
+        fields = self.fields
+        for line_number, record in self._pending:
+            yield line_number, self._as_list(record, fields)
+        for line_number, line in enumerate(self.handle, self._line_number + 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, line.rstrip("\n")
+                continue
+            yield line_number, self._as_list(record, fields)
+
+    @staticmethod
+    def _as_list(record: Any, fields: List[str]) -> Any:
+        if isinstance(record, dict):
+            return [record.get(name) for name in fields]
+        return record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)
+
+    def close(self):
+        self.handle.close()
+
+
+class _RejectWriter:
+    """Fichero JSON Lines con las filas rechazadas (se crea con el primer rechazo)."""
+
+    def __init__(self, path: str, fields: List[str]):
+        self.path = path
+        self.fields = fields
+        self.handle = None
+        self.count = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, line_number: int, record: Any, error: Any):
+        if self.handle is None:
+            self.handle = open(self.path, "w", encoding="utf-8")
+        if isinstance(record, list):
+            record = dict(zip(self.fields, record))
+        entry = {"line": line_number, "error": str(error), "record": record}
+        self.handle.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self.count += 1
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+
+@dataclass
+class ImportResult:
+    """Resumen de una importación."""
+    source_path: str
+    table_name: str
+    import_format: str
+    columns: List[str] = field(default_factory=list)
+    ignored_fields: List[str] = field(default_factory=list)
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_rejected: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+    rejects_path: Optional[str] = None
+    created_table: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_imported / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source_path": self.source_path,
+            "table_name": self.table_name,
+            "format": self.import_format,
+            "columns": self.columns,
+            "ignored_fields": self.ignored_fields,
+            "rows_read": self.rows_read,
+            "rows_imported": self.rows_imported,
+            "rows_rejected": self.rows_rejected,
+            "batches": self.batches,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "rows_per_second": round(self.rows_per_second),
+            "rejects_path": self.rejects_path,
+            "created_table": self.created_table
+        }
+
+    def describe(self, title: str = "✅ Importación completada") -> str:
+        text = (f"{title} ({self.import_format}): {self.source_path} → {self.table_name}"
+                f"{' (tabla creada)' if self.created_table else ''}\n"
+                f"• Registros leídos: {self.rows_read}\n"
+                f"• Registros importados: {self.rows_imported} en {self.batches} lotes\n"
+                f"• Tiempo: {self.elapsed_seconds:.2f} s ({self.rows_per_second:.0f} registros/s)\n"
+                f"• Columnas: {', '.join(self.columns)}\n")
+        if self.ignored_fields:
+            text += f"• Campos del fichero sin columna en la tabla (ignorados): {', '.join(self.ignored_fields)}\n"
+        if self.rows_rejected:
+            text += f"⚠️ Registros rechazados: {self.rows_rejected} (detalle en {self.rejects_path})\n"
+        return text
+
+
+class FileImporter:
+    """Importador por lotes de CSV/JSON Lines a una tabla."""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, max_rejected: Optional[int] = 1000,
+                 infer_rows: int = DEFAULT_INFER_ROWS, empty_as_null: bool = True,
+                 progress_every: int = 10000,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 is_fatal: Optional[Callable[[Exception], bool]] = None):
+        """
+        Inicializar el importador.
+
+        Args:
+            batch_size: Filas por ``executemany`` (y por transacción)
+            max_rejected: Rechazos a partir de los cuales se interrumpe (None = sin límite)
+            infer_rows: Filas que se examinan para inferir los tipos de una tabla nueva
+            empty_as_null: Tratar los campos vacíos como NULL
+            progress_every: Cada cuántas filas se informa del progreso
+            progress_callback: Función opcional ``(filas_importadas, filas_rechazadas)``
+            is_fatal: Errores de escritura que interrumpen la importación en lugar
+                de repetir el lote fila a fila (p. ej. un bloqueo persistente)
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.max_rejected = max_rejected
+        self.infer_rows = max(1, int(infer_rows))
+        self.empty_as_null = empty_as_null
+        self.progress_every = max(1, int(progress_every))
+        self.progress_callback = progress_callback
+        self.is_fatal = is_fatal
+
+    def import_file(self, source_path: str, table_name: str,
+                    insert_many: Callable[[str, List[Sequence[Any]]], Any],
+                    schema: Optional[List[Dict[str, Any]]] = None,
+                    create_table: Optional[Callable[[List[Dict[str, str]]], List[Dict[str, Any]]]] = None,
+                    import_format: Optional[str] = None, column_map: Optional[Dict[str, str]] = None,
+                    delimiter: Optional[str] = None, encoding: str = "utf-8-sig",
+                    rejects_path: Optional[str] = None) -> ImportResult:
+        """
+        Importar un fichero a una tabla.
+
+        Args:
+            insert_many: Ejecuta ``(sentencia, filas)`` en una transacción
+            schema: Columnas de la tabla (``get_table_schema``); vacío si no existe
+            create_table: Crea la tabla con las columnas inferidas y devuelve su
+                esquema; sin ella, la tabla debe existir
+            column_map: Campo del fichero → columna de la tabla
+            delimiter: Separador CSV (por defecto se detecta: coma, punto y coma o tabulador)
+            rejects_path: Fichero de rechazos (por defecto ``<fichero>.rejects.jsonl``)
+        """
+        import_format = resolve_import_format(source_path, import_format)
+        if not os.path.isfile(source_path):
+            raise ValueError(f"No existe el fichero {source_path}")
+        start = time.perf_counter()
+        source = _RecordSource(source_path, import_format, delimiter, encoding)
+        rejects = _RejectWriter(rejects_path or source_path + ".rejects.jsonl", source.fields)
+        result = ImportResult(source_path, table_name, import_format, rejects_path=rejects.path)
+        try:
+            records = iter(source)
+            sample: List[Tuple[int, Any]] = []
+            if not schema:
+                if create_table is None:
+                    raise ValueError(f"La tabla '{table_name}' no existe; use create_table para crearla")
+                if not source.fields:
+                    raise ValueError(f"El fichero {source_path} no tiene cabecera ni registros")
+                for line_number, record in records:
+                    sample.append((line_number, record))
+                    if len(sample) >= self.infer_rows:
+                        break
+                fields = self._map_fields(source.fields, column_map)
+                schema = create_table(infer_columns(fields, [r for _, r in sample if isinstance(r, list)]))
+                result.created_table = True
+
+            plan = self._plan_columns(source.fields, schema, column_map, result)
+            query = (f"INSERT INTO [{table_name}] ({', '.join(f'[{name}]' for name, _, _ in plan)}) "
+                     f"VALUES ({', '.join('?' for _ in plan)})")
+            positions = [position for _, position, _ in plan]
+            converters = [converter for _, _, converter in plan]
+            pairs = list(zip(positions, converters))
+            width = max(positions) + 1 if positions else 0
+            empty_as_null = self.empty_as_null
+
+            batch: List[Sequence[Any]] = []
+            originals: List[Tuple[int, List[Any]]] = []
+            next_report = self.progress_every
+            for line_number, record in _chain(sample, records):
+                result.rows_read += 1
+                if not isinstance(record, list):
+                    rejects.write(line_number, record, "registro JSON no válido")
+                    self._check_rejects(rejects, result)
+                    continue
+                if len(record) < width:
+                    record = record + [None] * (width - len(record))
+                try:
+                    row = []
+                    for position, convert in pairs:
+                        value = record[position]
+                        if value is None or (empty_as_null and value == ""):
+                            row.append(None)
+                        else:
+                            row.append(convert(value))
+                except (ValueError, TypeError, OverflowError) as e:
+                    column = plan[len(row)][0]
+                    rejects.write(line_number, record, f"{column}: {e}")
+                    self._check_rejects(rejects, result)
+                    continue
+                batch.append(row)
+                originals.append((line_number, record))
+                if len(batch) >= self.batch_size:
+                    self._flush(query, batch, originals, insert_many, rejects, result)
+                    batch, originals = [], []
+                    if result.rows_imported >= next_report:
+                        next_report = result.rows_imported + self.progress_every
+                        self._report_progress(result, rejects.count)
+            if batch:
+                self._flush(query, batch, originals, insert_many, rejects, result)
+        except ImportAbortedError:
+            raise
+        except QueryCancelledError:
+            logger.warning(f"Importación cancelada tras {result.rows_imported} filas confirmadas en {table_name}")
+            raise
+        finally:
+            source.close()
+            rejects.close()
+            result.rows_rejected = rejects.count
+            result.elapsed_seconds = time.perf_counter() - start
+            if not rejects.count:
+                result.rejects_path = None
+        logger.info(f"Importadas {result.rows_imported} filas en {table_name} desde {source_path} "
+                     f"({result.rows_rejected} rechazadas, {result.elapsed_seconds:.2f}s)")
+        return result
+
+    @staticmethod
+    def _map_fields(fields: List[str], column_map: Optional[Dict[str, str]]) -> List[str]:
+        """Nombres de columna para los campos del fichero."""
+        lowered = {source.lower(): target for source, target in (column_map or {}).items()}
+        return [lowered.get(name.lower(), name) for name in fields]
+
+    def _plan_columns(self, fields: List[str], schema: List[Dict[str, Any]], column_map: Optional[Dict[str, str]],
+                      result: ImportResult) -> List[Tuple[str, int, Callable[[Any], Any]]]:
+        """Emparejar campos y columnas: (columna, posición en el registro, conversor)."""
+        columns = {column["column_name"].lower(): column for column in schema}
+        if column_map:
+            unknown = [target for target in column_map.values() if target.lower() not in columns]
+            if unknown:
+                raise ValueError(f"Columnas de column_map que no existen en la tabla: {', '.join(unknown)}")
+        plan = []
+        used = set()
+        for position, target in enumerate(self._map_fields(fields, column_map)):
+            column = columns.get(target.lower())
+            if column is None or target.lower() in used:
+                result.ignored_fields.append(fields[position])
+                continue
+            used.add(target.lower())
+            plan.append((column["column_name"], position, value_converter(column)))
+        if not plan:
+            raise ValueError("Ningún campo del fichero coincide con las columnas de la tabla; use column_map")
+
+        missing = [column["column_name"] for name, column in columns.items()
+                   if name not in used and not column.get("nullable", True) and column.get("default_value") is None
+                   and _base_type(column.get("data_type")) not in _AUTONUMBER_TYPES]
+        if missing:
+            raise ValueError(f"El fichero no tiene las columnas obligatorias: {', '.join(missing)}")
+        result.columns = [name for name, _, _ in plan]
+        return plan
+
+    def _flush(self, query: str, batch: List[Sequence[Any]], originals: List[Tuple[int, List[Any]]], insert_many,
+               rejects: _RejectWriter, result: ImportResult):
+        scope = current_scope()
+        if scope is not None:
+            scope.check()
+        try:
+            insert_many(query, batch)
+            result.rows_imported += len(batch)
+            result.batches += 1
+            return
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            if self.is_fatal is not None and self.is_fatal(e):
+                raise ImportAbortedError(f"Importación interrumpida tras {result.rows_imported} filas: {e}",
+                                         result) from e
+            logger.info(f"Lote rechazado ({e}); se repite fila a fila")
+
+        # Repetir fila a fila para rechazar solo las filas erróneas
+        imported = 0
+        for (line_number, record), row in zip(originals, batch):
+            try:
+                insert_many(query, [row])
+                imported += 1
+            except QueryCancelledError:
+                raise
+            except Exception as e:
+                if self.is_fatal is not None and self.is_fatal(e):
+                    result.rows_imported += imported
+                    raise ImportAbortedError(f"Importación interrumpida tras {result.rows_imported} filas: {e}",
+                                             result) from e
+                rejects.write(line_number, record, e)
+                self._check_rejects(rejects, result, imported)
+        result.rows_imported += imported
+        result.batches += 1
+
+    def _check_rejects(self, rejects: _RejectWriter, result: ImportResult, pending: int = 0):
+        if self.max_rejected is not None and rejects.count > self.max_rejected:
+            result.rows_imported += pending
+            raise ImportAbortedError(
+                f"Importación interrumpida: más de {self.max_rejected} registros rechazados "
+                f"({result.rows_imported} importados; detalle en {rejects.path})", result
+            )
+
+    def _report_progress(self, result: ImportResult, rejected: int):
+        logger.info(f"Importación en curso: {result.rows_imported} filas ({rejected} rechazadas)")
+        if self.progress_callback:
+            try:
+                self.progress_callback(result.rows_imported, rejected)
+            except Exception as e:
+                logger.debug(f"Error notificando progreso: {e}")
+
+
+def _chain(first: List[Tuple[int, Any]], rest: Iterator[Tuple[int, Any]]) -> Iterator[Tuple[int, Any]]:
+    yield from first
+    yield from rest
@@ -0,0 +1,480 @@
+"""
+Réplica local de tablas Access en SQLite o DuckDB.
+
+Copia las tablas seleccionadas de la base de datos conectada a un fichero
+local leyendo por lotes, conserva los tipos y los índices, y permite
+ejecutar allí las consultas analíticas de solo lectura. El modo de refresco
+vuelve a copiar solo las tablas cuya firma ha cambiado o, si se configura
+una captura de cambios (``ChangeCapture``), aplica solo las filas
+insertadas, modificadas y eliminadas.
+"""
+
+import importlib.util
+import logging
+import re
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+try:
+    from .streaming import QueryStream
+except ImportError:
+    from streaming import QueryStream
+
+# duckdb solo se importa al abrir una réplica DuckDB
+DUCKDB_AVAILABLE = importlib.util.find_spec("duckdb") is not None
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ENGINES = ["auto", "sqlite", "duckdb"]
+
+STATE_TABLE = "_mirror_state"
+
+# Claves por sentencia al buscar o borrar filas concretas
+KEY_BATCH_SIZE = 100
+
+# Tipos ODBC de Access (type_name) -> tipo en la réplica
+SQLITE_TYPES = {
+    "COUNTER": "INTEGER", "INTEGER": "INTEGER", "LONG": "INTEGER", "SMALLINT": "INTEGER",
+    "BYTE": "INTEGER", "BIT": "INTEGER", "YESNO": "INTEGER",
+    "REAL": "REAL", "SINGLE": "REAL", "DOUBLE": "REAL", "FLOAT": "REAL",
+    "CURRENCY": "NUMERIC", "DECIMAL": "NUMERIC", "NUMERIC": "NUMERIC",
+    "DATETIME": "TIMESTAMP", "DATE": "DATE", "TIME": "TIME", "TIMESTAMP": "TIMESTAMP",
+    "LONGBINARY": "BLOB", "VARBINARY": "BLOB", "BINARY": "BLOB", "LONGVARBINARY": "BLOB",
+    "OLEOBJECT": "BLOB",
+}
+
+DUCKDB_TYPES = {
+    "COUNTER": "INTEGER", "INTEGER": "INTEGER", "LONG": "INTEGER", "SMALLINT": "SMALLINT",
+    "BYTE": "UTINYINT", "BIT": "BOOLEAN", "YESNO": "BOOLEAN",
+    "REAL": "FLOAT", "SINGLE": "FLOAT", "DOUBLE": "DOUBLE", "FLOAT": "DOUBLE",
+    "CURRENCY": "DECIMAL(19,4)", "DECIMAL": "DECIMAL(28,6)", "NUMERIC": "DECIMAL(28,6)",
+    "DATETIME": "TIMESTAMP", "DATE": "DATE", "TIME": "TIME", "TIMESTAMP": "TIMESTAMP",
+    "LONGBINARY": "BLOB", "VARBINARY": "BLOB", "BINARY": "BLOB", "LONGVARBINARY": "BLOB",
+    "OLEOBJECT": "BLOB",
+}
+
+_TOP_PATTERN = re.compile(r"^(\s*SELECT\s+(?:DISTINCT\s+)?)TOP\s+(\d+)\s+", re.IGNORECASE)
+# Cadenas y nombres entrecomillados se copian tal cual; solo se traducen
+# los corchetes y las fechas #...# que quedan fuera de ellos
+_SQL_TOKEN_PATTERN = re.compile(
+    r"(?P<string>'(?:[^']|'')*')"
+    r"|(?P<quoted>\"(?:[^\"]|\"\")*\")"
+    r"|(?P<bracket>\[[^\]]+\])"
+    r"|(?P<date>#[^#\n]+#)"
+    r"|(?P<other>[^'\"\[#]+|.)",
+    re.DOTALL
+)
+_TABLE_REFERENCE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(\[[^\]]+\]|[\w$]+)", re.IGNORECASE)
+
+
+@dataclass
+class MirrorTableResult:
+    """Resultado de copiar (o saltar) una tabla."""
+    table_name: str
+    status: str  # 'copied', 'updated', 'unchanged', 'error'
+    rows: int = 0
+    indexes: int = 0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def quote_identifier(identifier: str) -> str:
+    """Entrecomillar un identificador para SQLite/DuckDB."""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def referenced_tables(query: str) -> Set[str]:
+    """Obtener (en minúsculas) las tablas referenciadas en FROM/JOIN."""
+    tables = set()
+    for match in _TABLE_REFERENCE_PATTERN.finditer(query):
+        name = match.group(1)
+        if name.startswith("["):
+            name = name[1:-1]
+        tables.add(name.lower())
+    return tables
+
+
+def translate_query(query: str) -> str:
+    """
+    Traducir las construcciones más comunes de Jet SQL al dialecto de la réplica.
+
+    - ``SELECT TOP n`` -> ``LIMIT n``
+    - ``[identificador]`` -> ``"identificador"``
+    - ``#fecha#`` -> ``'fecha'``
+    """
+    limit = None
+    match = _TOP_PATTERN.match(query)
+    if match:
+        limit = match.group(2)
+        query = match.group(1) + query[match.end():]
+
+    parts = []
+    for token in _SQL_TOKEN_PATTERN.finditer(query):
+        text = token.group()
+        if token.lastgroup == "bracket":
+            text = quote_identifier(text[1:-1])
+        elif token.lastgroup == "date":
+            text = "'" + text[1:-1].strip() + "'"
+        parts.append(text)
+    query = "".join(parts)
+
+    if limit is not None:
+        query = query.rstrip().rstrip(";") + f" LIMIT {limit}"
+    return query
+
+
+def _convert_value(value: Any) -> Any:
+    """Adaptar un valor de Access a un tipo que acepten SQLite y DuckDB."""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    return value
+
+
+_DATETIME_TYPES = {"DATETIME", "TIMESTAMP"}
+_DECIMAL_TYPES = {"CURRENCY", "DECIMAL", "NUMERIC", "MONEY"}
+
+
+def _json_to_value(value: Any, data_type: str) -> Any:
+    """Devolver un valor de clave en JSON (``to_json_value``) a su tipo de Access."""
+    if not isinstance(value, str):
+        return value
+    try:
+        if data_type in _DATETIME_TYPES:
+            return datetime.fromisoformat(value)
+        if data_type == "DATE":
+            return date.fromisoformat(value)
+        if data_type == "TIME":
+            return dt_time.fromisoformat(value)
+        if data_type in _DECIMAL_TYPES:
+            return Decimal(value)
+    except ValueError:
+        pass
+    return value
+
+
+def _key_from_json(key: Any, key_types: Sequence[str], convert=None) -> Any:
+    """Clave (simple o compuesta) de un ChangeSet como valores de Access (o de la réplica con ``convert``)."""
+    parts = key if len(key_types) > 1 else [key]
+    values = [_json_to_value(value, data_type) for value, data_type in zip(parts, key_types)]
+    if convert is not None:
+        values = [convert(value) for value in values]
+    return values if len(key_types) > 1 else values[0]
+
+
+class DatabaseMirror:
+    """Réplica local de tablas Access para consultas analíticas."""
+
+    def __init__(self, db_manager, mirror_path: str, engine: str = "auto", batch_size: int = 1000,
+                 change_capture=None):
+        """
+        Inicializar la réplica.
+
+        Args:
+            db_manager: Instancia de AccessDatabaseManager conectada
+            mirror_path: Ruta del fichero local de la réplica
+            engine: 'sqlite', 'duckdb' o 'auto' (DuckDB si está instalado)
+            batch_size: Filas por lote al copiar
+            change_capture: ChangeCapture opcional para refrescos incrementales
+        """
+        if engine not in MIRROR_ENGINES:
+            raise ValueError(f"Motor de réplica no soportado: {engine}. Motores: {', '.join(MIRROR_ENGINES)}")
+        if engine == "auto":
+            engine = "duckdb" if DUCKDB_AVAILABLE else "sqlite"
+        if engine == "duckdb" and not DUCKDB_AVAILABLE:
+            raise ValueError("El motor DuckDB requiere el paquete duckdb (pip install duckdb)")
+
+        self.db_manager = db_manager
+        self.mirror_path = mirror_path
+        self.engine = engine
+        self.batch_size = batch_size
+        self.type_map = DUCKDB_TYPES if engine == "duckdb" else SQLITE_TYPES
+        self.change_capture = change_capture
+        self.connection = None
+
+    def connect(self):
+        """Abrir el fichero de la réplica y preparar la tabla de estado."""
+        if self.connection is not None:
+            return
+        if self.engine == "duckdb":
+            import duckdb
+            self.connection = duckdb.connect(self.mirror_path)
+        else:
+            # La réplica se usa también desde el executor de las herramientas
+            self.connection = sqlite3.connect(self.mirror_path, check_same_thread=False)
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} ("
+            "table_name VARCHAR PRIMARY KEY, source_path VARCHAR, signature VARCHAR, "
+            "row_count INTEGER, refreshed_at VARCHAR)"
+        )
+        self.connection.commit()
+
+    def close(self):
+        """Cerrar la réplica."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def get_state(self) -> Dict[str, Dict[str, Any]]:
+        """Obtener el estado de las tablas replicadas (clave en minúsculas)."""
+        self.connect()
+        cursor = self.connection.execute(
+            f"SELECT table_name, source_path, signature, row_count, refreshed_at FROM {STATE_TABLE}"
+        )
+        state = {}
+        for table_name, source_path, signature, row_count, refreshed_at in cursor.fetchall():
+            state[table_name.lower()] = {
+                "table_name": table_name,
+                "source_path": source_path,
+                "signature": signature,
+                "row_count": row_count,
+                "refreshed_at": refreshed_at
+            }
+        return state
+
+    def covers(self, query: str) -> bool:
+        """Indicar si todas las tablas de una consulta están replicadas."""
+        if not query.strip().upper().startswith("SELECT"):
+            return False
+        tables = referenced_tables(query)
+        if not tables:
+            return False
+        state = self.get_state()
+        source_path = self.db_manager.database_path
+        return all(t in state and state[t]["source_path"] == source_path for t in tables)
+
+    def open_query(self, query: str, params: Optional[List] = None) -> QueryStream:
+        """Ejecutar una consulta de solo lectura sobre la réplica."""
+        self.connect()
+        cursor = self.connection.cursor()
+        cursor.execute(translate_query(query), params or [])
+        return QueryStream(cursor, self.batch_size)
+
+    def source_signature(self, table_name: str) -> str:
+        """
+        Calcular una firma barata de la tabla origen.
+
+        Combina el número de filas con el máximo de la clave primaria; detecta
+        inserciones y borrados, pero no modificaciones en filas existentes.
+        """
+        count_result = self.db_manager.execute_query(f"SELECT COUNT(*) AS row_count FROM [{table_name}]")
+        row_count = count_result[0]["row_count"] if count_result else 0
+
+        max_key = None
+        try:
+            primary_keys = self.db_manager.get_primary_keys(table_name)
+            if primary_keys:
+                key = primary_keys[0]["column_name"]
+                max_result = self.db_manager.execute_query(f"SELECT MAX([{key}]) AS max_key FROM [{table_name}]")
+                max_key = max_result[0]["max_key"] if max_result else None
+        except Exception as e:
+            logger.debug(f"No se pudo obtener el máximo de la clave de {table_name}: {e}")
+
+        return f"rows={row_count};max_key={max_key}"
+
+    def mirror_tables(self, tables: Optional[Sequence[str]] = None,
+                      refresh: bool = False) -> List[MirrorTableResult]:
+        """
+        Copiar tablas a la réplica.
+
+        Args:
+            tables: Tablas a copiar (por defecto todas)
+            refresh: Si es True, solo se copian las tablas cuya firma cambió
+        """
+        self.connect()
+        if not tables:
+            tables = self.db_manager.list_tables()
+
+        state = self.get_state()
+        results = []
+        for table_name in tables:
+            try:
+                previous = state.get(table_name.lower())
+                same_source = previous and previous["source_path"] == self.db_manager.database_path
+                if refresh and same_source and self.change_capture is not None:
+                    results.append(self.refresh_table_incremental(table_name))
+                    continue
+
+                signature = self.source_signature(table_name)
+                if refresh and same_source and previous["signature"] == signature:
+                    results.append(MirrorTableResult(table_name, "unchanged", rows=previous["row_count"]))
+                    continue
+                results.append(self.copy_table(table_name, signature))
+            except Exception as e:
+                logger.error(f"Error replicando tabla {table_name}: {e}")
+                results.append(MirrorTableResult(table_name, "error", error=str(e)))
+        return results
+
+    def copy_table(self, table_name: str, signature: Optional[str] = None) -> MirrorTableResult:
+        """Copiar una tabla completa; se construye aparte y se sustituye al final."""
+        start = time.perf_counter()
+        schema = self.db_manager.get_table_schema(table_name)
+        columns = [col["column_name"] for col in schema]
+        staging = f"{table_name}__mirror_tmp"
+
+        column_definitions = ", ".join(
+            f"{quote_identifier(col['column_name'])} {self.type_map.get(str(col['data_type']).upper(), 'VARCHAR' if self.engine == 'duckdb' else 'TEXT')}"
+            for col in schema
+        )
+        self.connection.execute(f"DROP TABLE IF EXISTS {quote_identifier(staging)}")
+        self.connection.execute(f"CREATE TABLE {quote_identifier(staging)} ({column_definitions})")
+
+        insert_sql = (f"INSERT INTO {quote_identifier(staging)} VALUES "
+                      f"({', '.join('?' for _ in columns)})")
+        select_sql = f"SELECT {', '.join(f'[{col}]' for col in columns)} FROM [{table_name}]"
+
+        rows = 0
+        with self.db_manager.open_query(select_sql, batch_size=self.batch_size) as stream:
+            for batch in stream.iter_batches():
+                self.connection.executemany(insert_sql, [tuple(_convert_value(v) for v in row) for row in batch])
+                rows += len(batch)
+
+        self.connection.execute(f"DROP TABLE IF EXISTS {quote_identifier(table_name)}")
+        self.connection.execute(
+            f"ALTER TABLE {quote_identifier(staging)} RENAME TO {quote_identifier(table_name)}"
+        )
+        index_count = self._copy_indexes(table_name, set(c.lower() for c in columns))
+
+        if signature is None:
+            signature = self.source_signature(table_name)
+        self._save_state(table_name, signature, rows)
+        self.connection.commit()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Tabla {table_name} replicada: {rows} filas, {index_count} índices ({elapsed:.2f}s)")
+        return MirrorTableResult(table_name, "copied", rows=rows, indexes=index_count, elapsed_seconds=elapsed)
+
+    def refresh_table_incremental(self, table_name: str) -> MirrorTableResult:
+        """
+        Refrescar una tabla aplicando solo las filas cambiadas.
+
+        La primera vez que se captura la tabla no hay instantánea con la que
+        comparar, así que se hace una copia completa.
+        """
+        start = time.perf_counter()
+        # La instantánea se guarda solo cuando la réplica ya tiene los cambios:
+        # si falla la aplicación, el siguiente refresco los vuelve a detectar
+        change_set = self.change_capture.capture(table_name, commit=False)
+        if change_set.first_run:
+            result = self.copy_table(table_name)
+            self.change_capture.commit(change_set)
+            return result
+        if not change_set.has_changes:
+            self.change_capture.commit(change_set)
+            return MirrorTableResult(table_name, "unchanged", rows=change_set.rows_scanned,
+                                     elapsed_seconds=time.perf_counter() - start)
+
+        try:
+            applied = self.apply_changes(table_name, change_set)
+            self._save_state(table_name, self.source_signature(table_name), change_set.rows_scanned)
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.change_capture.commit(change_set)
+        return MirrorTableResult(table_name, "updated", rows=applied,
+                                 elapsed_seconds=time.perf_counter() - start)
+
+    def apply_changes(self, table_name: str, change_set) -> int:
+        """Aplicar a la réplica un ChangeSet; devuelve las filas reescritas."""
+        key_columns = change_set.key_columns
+        schema = self.db_manager.get_table_schema(table_name)
+        columns = [col["column_name"] for col in schema]
+        data_types = {col["column_name"].lower(): str(col["data_type"]).upper() for col in schema}
+        key_types = [data_types.get(col.lower(), "") for col in key_columns]
+
+        # Las claves del ChangeSet vienen en JSON (fechas ISO con "T", Decimal
+        # como texto): se devuelven a valores de Access y en la réplica se
+        # comparan con la misma conversión con la que se guardan las filas
+        def source_keys(keys):
+            return [_key_from_json(key, key_types) for key in keys]
+
+        def mirror_keys(keys):
+            return [_key_from_json(key, key_types, _convert_value) for key in keys]
+
+        # Las claves insertadas también se borran para que aplicar dos veces sea inocuo
+        stale_keys = change_set.deleted + change_set.updated + change_set.inserted
+        for chunk in _chunks(stale_keys, KEY_BATCH_SIZE):
+            where, params = _key_filter(key_columns, mirror_keys(chunk), quote_identifier)
+            self.connection.execute(f"DELETE FROM {quote_identifier(table_name)} WHERE {where}", params)
+
+        insert_sql = (f"INSERT INTO {quote_identifier(table_name)} ({', '.join(quote_identifier(c) for c in columns)}) "
+                      f"VALUES ({', '.join('?' for _ in columns)})")
+        select_columns = ", ".join(f"[{col}]" for col in columns)
+
+        applied = 0
+        for chunk in _chunks(change_set.inserted + change_set.updated, KEY_BATCH_SIZE):
+            where, params = _key_filter(key_columns, source_keys(chunk), lambda c: f"[{c}]")
+            query = f"SELECT {select_columns} FROM [{table_name}] WHERE {where}"
+            with self.db_manager.open_query(query, params, batch_size=self.batch_size) as stream:
+                for batch in stream.iter_batches():
+                    self.connection.executemany(insert_sql, [tuple(_convert_value(v) for v in row) for row in batch])
+                    applied += len(batch)
+        return applied
+
+    def _copy_indexes(self, table_name: str, column_names: Set[str]) -> int:
+        """Recrear en la réplica los índices de la tabla origen."""
+        created = 0
+        for index in self.db_manager.get_table_indexes(table_name):
+            index_columns = [c for c in index.get("columns", []) if c and c.lower() in column_names]
+            if not index_columns:
+                continue
+            index_name = quote_identifier(f"mirror_{table_name}_{index['index_name']}")
+            column_list = ", ".join(quote_identifier(c) for c in index_columns)
+            unique = "UNIQUE " if index.get("unique") else ""
+            try:
+                self.connection.execute(
+                    f"CREATE {unique}INDEX IF NOT EXISTS {index_name} ON {quote_identifier(table_name)} ({column_list})"
+                )
+                created += 1
+            except Exception as e:
+                # Los índices inferidos pueden no ser realmente únicos
+                logger.debug(f"Índice {index['index_name']} no replicado en {table_name}: {e}")
+                if unique:
+                    try:
+                        self.connection.execute(
+                            f"CREATE INDEX IF NOT EXISTS {index_name} ON {quote_identifier(table_name)} ({column_list})"
+                        )
+                        created += 1
+                    except Exception:
+                        pass
+        return created
+
+    def _save_state(self, table_name: str, signature: str, rows: int):
+        self.connection.execute(f"DELETE FROM {STATE_TABLE} WHERE table_name = ?", [table_name])
+        self.connection.execute(
+            f"INSERT INTO {STATE_TABLE} (table_name, source_path, signature, row_count, refreshed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [table_name, self.db_manager.database_path, signature, rows, datetime.now().isoformat(timespec="seconds")]
+        )
+
+
+def _chunks(items: List[Any], size: int):
+    """Dividir una lista en trozos de como mucho ``size`` elementos."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _key_filter(key_columns: Sequence[str], keys: Sequence[Any], quote) -> tuple:
+    """Construir un filtro parametrizado para un lote de claves."""
+    if len(key_columns) == 1:
+        placeholders = ", ".join("?" for _ in keys)
+        return f"{quote(key_columns[0])} IN ({placeholders})", list(keys)
+
+    condition = "(" + " AND ".join(f"{quote(col)} = ?" for col in key_columns) + ")"
+    params = []
+    for key in keys:
+        params.extend(key)
+    return " OR ".join(condition for _ in keys), params
@@ -93,6 +93,8 @@ class EnhancedDocumentationGenerator:
         self.change_history: List[DatabaseChangeRecord] = []
         self.field_descriptions: Dict[str, Dict[str, str]] = {}
         self.table_descriptions: Dict[str, str] = {}
+        # Índices propuestos por advise_indexes (tabla en minúsculas -> CREATE INDEX)
+        self.index_recommendations: Dict[str, List[str]] = {}
         
     def analyze_data_quality(self, table_name: str, sample_size: int = 1000) -> Dict[str, Any]:
         """
@@ -488,8 +490,11 @@ class EnhancedDocumentationGenerator:
             recommendations.append(f"Documentar {len(undocumented_fields)} campos sin descripción")
         
         # Verificar índices
-        if len(table_doc["basic_info"].get("indexes", [])) == 0:
-            recommendations.append("Considerar agregar índices para mejorar rendimiento")
+        suggested = self.index_recommendations.get(table_name.lower(), [])
+        for statement in suggested:
+            recommendations.append(f"Crear índice (según el registro de consultas lentas): {statement}")
+        if not suggested and len(table_doc["basic_info"].get("indexes", [])) == 0:
+            recommendations.append("Considerar agregar índices para mejorar rendimiento (ver advise_indexes)")
         
         return recommendations
     
@@ -0,0 +1,392 @@
+"""
+Consultas federadas entre varias bases de datos Access.
+
+Une una tabla (o consulta) de una base de datos con otra de un archivo
+distinto sin exportar nada. Hay dos estrategias:
+
+- ``jet``: una sola sentencia ejecutada por el motor Jet/ACE, que referencia
+  la tabla del otro archivo con la sintaxis de base de datos externa
+  (``[;DATABASE=ruta].[Tabla]``, la forma por tabla de ``IN 'ruta'``)
+- ``hash``: combinación por hash en Python sobre los resultados leídos por
+  lotes. El lado con menos filas (según ``COUNT(*)``) se carga en memoria
+  como tabla hash y el otro se recorre sin materializarlo
+
+``auto`` usa Jet cuando los dos lados son tablas y, si el driver rechaza la
+sentencia, recurre a la combinación por hash.
+"""
+
+import contextlib
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .streaming import IterableStream
+except ImportError:
+    from streaming import IterableStream
+
+logger = logging.getLogger(__name__)
+
+JOIN_TYPES = ["inner", "left"]
+JOIN_STRATEGIES = ["auto", "jet", "hash"]
+BUILD_SIDES = ["auto", "left", "right"]
+
+_ACCESS_EXTENSIONS = (".mdb", ".accdb")
+_SELECT_PATTERN = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+
+@dataclass
+class SourceConnection:
+    """Conexión desde la que se lee un lado de la combinación."""
+    manager: Any
+    database_path: Optional[str]
+    password: Optional[str] = None
+    lock: Any = None
+
+    def locked(self):
+        return self.lock if self.lock is not None else contextlib.nullcontext()
+
+
+@dataclass
+class JoinSource:
+    """Un lado de la combinación: una tabla (con filtro opcional) o una consulta."""
+    table: Optional[str] = None
+    query: Optional[str] = None
+    columns: Optional[List[str]] = None
+    where: Optional[str] = None
+    session: Optional[str] = None
+
+    def __post_init__(self):
+        if bool(self.table) == bool(self.query):
+            raise ValueError("Cada lado de la combinación necesita 'table' o 'query' (solo uno)")
+        if self.query and not _SELECT_PATTERN.match(self.query):
+            raise ValueError("Las consultas federadas solo admiten SELECT")
+
+    @classmethod
+    def from_arguments(cls, arguments: Dict[str, Any]) -> "JoinSource":
+        return cls(
+            table=arguments.get("table"),
+            query=arguments.get("query"),
+            columns=arguments.get("columns"),
+            where=arguments.get("where"),
+            session=arguments.get("session")
+        )
+
+    @property
+    def label(self) -> str:
+        """Prefijo de las columnas del resultado (alias de sesión + tabla)."""
+        name = self.table or "consulta"
+        return f"{self.session}.{name}" if self.session else name
+
+    def select_sql(self, table_reference: Optional[str] = None) -> str:
+        """SELECT de este lado (``table_reference`` sustituye al nombre de la tabla)."""
+        if self.query:
+            return self.query
+        columns = ", ".join(f"[{column}]" for column in self.columns) if self.columns else "*"
+        sql = f"SELECT {columns} FROM {table_reference or f'[{self.table}]'}"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+    def count_sql(self) -> str:
+        if self.query:
+            return f"SELECT COUNT(*) FROM ({self.query}) AS q"
+        sql = f"SELECT COUNT(*) FROM [{self.table}]"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+@dataclass
+class JoinPlan:
+    """Estrategia elegida para una combinación."""
+    strategy: str
+    join_type: str
+    left: JoinSource
+    right: JoinSource
+    on: List[Tuple[str, str]]
+    build_side: Optional[str] = None
+    row_counts: Dict[str, int] = field(default_factory=dict)
+    sql: Optional[str] = None
+    notes: List[str] = field(default_factory=list)
+    columns: Dict[str, List[str]] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        if self.strategy == "jet":
+            return "Jet (una sentencia con referencia a la base de datos externa)"
+        probe_side = "right" if self.build_side == "left" else "left"
+        counts = ""
+        if self.row_counts:
+            counts = (f": construcción {self.row_counts.get(self.build_side, '?')} filas, "
+                      f"sondeo {self.row_counts.get(probe_side, '?')} filas")
+        return f"hash en Python (tabla hash con el lado {self.build_side}{counts})"
+
+
+def same_database(first: Optional[str], second: Optional[str]) -> bool:
+    if not first or not second:
+        return False
+    return os.path.normcase(os.path.abspath(first)) == os.path.normcase(os.path.abspath(second))
+
+
+def external_table_reference(table: str, database_path: str, password: Optional[str] = None) -> str:
+    """Referencia Jet a una tabla de otro archivo Access."""
+    if "]" in database_path or ";" in database_path:
+        raise ValueError(f"Ruta no válida para una referencia externa: {database_path}")
+    if password:
+        if "]" in password or ";" in password:
+            raise ValueError("La contraseña contiene caracteres no admitidos en una referencia externa")
+        return f"[MS Access;PWD={password};DATABASE={database_path}].[{table}]"
+    return f"[;DATABASE={database_path}].[{table}]"
+
+
+def build_jet_join_sql(left: JoinSource, right: JoinSource, on: Sequence[Tuple[str, str]],
+                       join_type: str = "inner", left_reference: Optional[str] = None,
+                       right_reference: Optional[str] = None) -> str:
+    """
+    Sentencia Jet que combina dos tablas.
+
+    Los lados con columnas o filtro se escriben como tabla derivada para que
+    el WHERE de cada lado no sea ambiguo.
+    """
+    if left.query or right.query:
+        raise ValueError("La estrategia Jet solo combina tablas, no consultas")
+
+    def from_item(source: JoinSource, reference: Optional[str], alias: str) -> str:
+        if source.columns or source.where:
+            return f"({source.select_sql(reference)}) AS {alias}"
+        return f"{reference or f'[{source.table}]'} AS {alias}"
+
+    condition = " AND ".join(f"l.[{left_column}] = r.[{right_column}]" for left_column, right_column in on)
+    keyword = "LEFT JOIN" if join_type == "left" else "INNER JOIN"
+    return (f"SELECT l.*, r.* FROM {from_item(left, left_reference, 'l')} "
+            f"{keyword} {from_item(right, right_reference, 'r')} ON {condition}")
+
+
+def join_key(row: Sequence[Any], positions: Sequence[int]) -> Optional[Tuple]:
+    """
+    Clave de combinación de una fila (None si alguna parte es NULL).
+
+    El texto se compara sin distinguir mayúsculas, como en Jet.
+    """
+    key = []
+    for position in positions:
+        value = row[position]
+        if value is None:
+            return None
+        key.append(value.casefold() if isinstance(value, str) else value)
+    return tuple(key)
+
+
+def _positions(columns: Sequence[str], wanted: Sequence[str], label: str) -> List[int]:
+    lookup = {column.lower(): index for index, column in enumerate(columns)}
+    missing = [name for name in wanted if name.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Columnas de combinación no encontradas en '{label}': {', '.join(missing)}")
+    return [lookup[name.lower()] for name in wanted]
+
+
+def hash_join(build_columns: Sequence[str], build_rows: Iterable[Sequence[Any]],
+              probe_columns: Sequence[str], probe_rows: Iterable[Sequence[Any]],
+              build_keys: Sequence[str], probe_keys: Sequence[str],
+              build_is_left: bool, join_type: str = "inner",
+              max_build_rows: Optional[int] = None) -> Iterator[Tuple]:
+    """
+    Combinar por hash. Las filas resultantes siempre son ``izquierda + derecha``.
+
+    En un LEFT JOIN se conservan todas las filas del lado izquierdo, sea cual
+    sea el lado que se cargó en memoria.
+    """
+    build_positions = _positions(build_columns, build_keys, "construcción")
+    probe_positions = _positions(probe_columns, probe_keys, "sondeo")
+    keep_unmatched_build = join_type == "left" and build_is_left
+    keep_unmatched_probe = join_type == "left" and not build_is_left
+
+    table: Dict[Tuple, List[int]] = {}
+    rows: List[Tuple] = []
+    for row in build_rows:
+        if max_build_rows is not None and len(rows) >= max_build_rows:
+            raise ValueError(f"El lado de construcción supera {max_build_rows} filas; filtre los datos "
+                             f"o aumente federation.max_build_rows")
+        row = tuple(row)
+        key = join_key(row, build_positions)
+        if key is not None:
+            table.setdefault(key, []).append(len(rows))
+        elif not keep_unmatched_build:
+            continue
+        rows.append(row)
+
+    matched = bytearray(len(rows)) if keep_unmatched_build else None
+    build_nulls = (None,) * len(build_columns)
+    probe_nulls = (None,) * len(probe_columns)
+
+    for probe_row in probe_rows:
+        probe_row = tuple(probe_row)
+        key = join_key(probe_row, probe_positions)
+        matches = table.get(key) if key is not None else None
+        if not matches:
+            if keep_unmatched_probe:
+                yield probe_row + build_nulls
+            continue
+        for index in matches:
+            if matched is not None:
+                matched[index] = 1
+            if build_is_left:
+                yield rows[index] + probe_row
+            else:
+                yield probe_row + rows[index]
+
+    if matched is not None:
+        for index, row in enumerate(rows):
+            if not matched[index]:
+                yield row + probe_nulls
+
+
+class FederatedQueryEngine:
+    """Planifica y ejecuta combinaciones entre bases de datos."""
+
+    def __init__(self, resolver: Callable[[Optional[str]], SourceConnection],
+                 batch_size: int = 500, max_build_rows: Optional[int] = None):
+        """
+        Args:
+            resolver: Devuelve la conexión de una sesión (None = conexión principal)
+            batch_size: Filas por lote al leer cada lado
+            max_build_rows: Máximo de filas que se cargan en la tabla hash
+        """
+        self.resolver = resolver
+        self.batch_size = batch_size
+        self.max_build_rows = max_build_rows
+
+    def count_rows(self, source: JoinSource) -> int:
+        connection = self.resolver(source.session)
+        with connection.locked():
+            with connection.manager.open_query(source.count_sql()) as stream:
+                row = next(iter(stream), None)
+        return int(row[0]) if row and row[0] is not None else 0
+
+    def plan(self, left: JoinSource, right: JoinSource, on: Sequence[Tuple[str, str]],
+             join_type: str = "inner", strategy: str = "auto", build_side: str = "auto") -> JoinPlan:
+        """Elegir la estrategia y, para la combinación por hash, el lado que se carga en memoria."""
+        if join_type not in JOIN_TYPES:
+            raise ValueError(f"Tipo de combinación no soportado: {join_type}. Use uno de: {', '.join(JOIN_TYPES)}")
+        if strategy not in JOIN_STRATEGIES:
+            raise ValueError(f"Estrategia no soportada: {strategy}. Use una de: {', '.join(JOIN_STRATEGIES)}")
+        if build_side not in BUILD_SIDES:
+            raise ValueError(f"Lado de construcción no válido: {build_side}. Use uno de: {', '.join(BUILD_SIDES)}")
+        if not on:
+            raise ValueError("Indique al menos una pareja de columnas en 'on'")
+        on = [tuple(pair) for pair in on]
+
+        plan = JoinPlan(strategy, join_type, left, right, on)
+        if strategy in ("auto", "jet"):
+            jet_sql = self._jet_sql(left, right, on, join_type, plan.notes)
+            if jet_sql is not None:
+                plan.strategy, plan.sql = "jet", jet_sql
+                return plan
+            if strategy == "jet":
+                raise ValueError("No se puede usar la estrategia Jet: " + "; ".join(plan.notes))
+
+        plan.strategy = "hash"
+        if build_side == "auto":
+            plan.row_counts = {"left": self.count_rows(left), "right": self.count_rows(right)}
+            plan.build_side = "right" if plan.row_counts["right"] <= plan.row_counts["left"] else "left"
+        else:
+            plan.build_side = build_side
+        return plan
+
+    def _jet_sql(self, left: JoinSource, right: JoinSource, on, join_type: str,
+                 notes: List[str]) -> Optional[str]:
+        if left.query or right.query:
+            notes.append("Jet solo combina tablas, no consultas")
+            return None
+        left_connection = self.resolver(left.session)
+        right_connection = self.resolver(right.session)
+        if not str(left_connection.database_path or "").lower().endswith(_ACCESS_EXTENSIONS):
+            notes.append("la conexión izquierda no es una base de datos Access")
+            return None
+        right_reference = None
+        if not same_database(left_connection.database_path, right_connection.database_path):
+            if not right_connection.database_path:
+                notes.append("se desconoce la ruta de la base de datos derecha")
+                return None
+            right_reference = external_table_reference(right.table, right_connection.database_path,
+                                                       right_connection.password)
+        return build_jet_join_sql(left, right, on, join_type, right_reference=right_reference)
+
+    def open(self, plan: JoinPlan):
+        """Abrir el resultado de la combinación como flujo (hay que cerrarlo)."""
+        if plan.strategy == "jet":
+            connection = self.resolver(plan.left.session)
+            return connection.manager.open_query(plan.sql, batch_size=self.batch_size)
+        return IterableStream(self._hash_columns(plan), self._hash_rows(plan), self.batch_size)
+
+    def execute(self, left: JoinSource, right: JoinSource, on: Sequence[Tuple[str, str]],
+                join_type: str = "inner", strategy: str = "auto", build_side: str = "auto"):
+        """
+        Planificar y abrir una combinación.
+
+        Returns:
+            Tupla (plan, flujo). En modo ``auto``, si Jet rechaza la sentencia
+            se repite con la combinación por hash.
+        """
+        plan = self.plan(left, right, on, join_type, strategy, build_side)
+        if plan.strategy != "jet" or strategy == "jet":
+            return plan, self.open(plan)
+        try:
+            return plan, self.open(plan)
+        except Exception as e:
+            logger.info(f"Jet rechazó la consulta federada, se usa la combinación por hash: {e}")
+            fallback = self.plan(left, right, on, join_type, "hash", build_side)
+            fallback.notes.append(f"Jet rechazó la sentencia ({e})")
+            return fallback, self.open(fallback)
+
+    def _read(self, source: JoinSource, columns_out: Optional[List[str]] = None) -> Iterator[Tuple]:
+        connection = self.resolver(source.session)
+        with connection.locked():
+            with connection.manager.open_query(source.select_sql(), batch_size=self.batch_size) as stream:
+                if columns_out is not None:
+                    columns_out.extend(stream.columns)
+                for batch in stream.iter_batches():
+                    for row in batch:
+                        yield row
+
+    def _hash_columns(self, plan: JoinPlan) -> List[str]:
+        """Columnas de cada lado, con el nombre del lado como prefijo."""
+        columns = []
+        for side, source in (("left", plan.left), ("right", plan.right)):
+            plan.columns[side] = self._source_columns(source)
+            columns.extend(f"{source.label}.{column}" for column in plan.columns[side])
+        return columns
+
+    def _source_columns(self, source: JoinSource) -> List[str]:
+        if source.columns and source.table:
+            return list(source.columns)
+        connection = self.resolver(source.session)
+        # Jet no admite LIMIT; un filtro imposible devuelve solo la descripción
+        sql = f"SELECT * FROM ({source.select_sql()}) AS q WHERE 1 = 0"
+        with connection.locked():
+            with connection.manager.open_query(sql) as stream:
+                return list(stream.columns)
+
+    def _hash_rows(self, plan: JoinPlan) -> Iterator[Tuple]:
+        build_is_left = plan.build_side == "left"
+        build, probe = (plan.left, plan.right) if build_is_left else (plan.right, plan.left)
+        left_keys = [left for left, _ in plan.on]
+        right_keys = [right for _, right in plan.on]
+        build_keys, probe_keys = (left_keys, right_keys) if build_is_left else (right_keys, left_keys)
+        build_side = "left" if build_is_left else "right"
+        probe_side = "right" if build_is_left else "left"
+
+        # hash_join lee el lado de construcción completo (liberando su conexión)
+        # antes de empezar a leer el lado de sondeo
+        build_rows = self._read(build)
+        probe_rows = self._read(probe)
+        try:
+            yield from hash_join(
+                plan.columns[build_side], build_rows, plan.columns[probe_side], probe_rows,
+                build_keys, probe_keys, build_is_left, plan.join_type, self.max_build_rows
+            )
+        finally:
+            build_rows.close()
+            probe_rows.close()
@@ -0,0 +1,406 @@
+"""
+Asesor de índices a partir del registro de consultas lentas.
+
+``IndexAdvisor`` recorre las sentencias registradas (por defecto las de
+``execute_query`` y ``get_records``), extrae las columnas que se usan en
+WHERE (igualdades, rangos, LIKE con prefijo, IN), en los ON de las
+combinaciones y en ORDER BY, y propone para cada tabla:
+
+- un índice con las columnas de igualdad (las más selectivas primero)
+  seguidas de una columna de rango, o de las de ORDER BY si no hay rango
+- un índice de una columna por cada columna de combinación
+
+La selectividad se estima con una muestra de la tabla (``SELECT TOP n``):
+la fracción de filas que devuelve una igualdad es 1 / valores distintos
+de la muestra. Para un rango se usa, si la sentencia es de una sola
+tabla, la fracción observada (filas devueltas de media / filas de la
+tabla), y si no, un tercio de la tabla. El tiempo ahorrado de cada
+sentencia se estima como su tiempo de ejecución por la fracción de filas
+que el índice evita leer (una décima parte si solo sirve para ordenar).
+Se descartan las tablas pequeñas, los índices poco selectivos y los que
+ya cubre un índice existente, y las propuestas se ordenan por el tiempo
+ahorrado.
+
+Son estimaciones: la muestra son las primeras filas de la tabla y el
+registro solo contiene las consultas que superaron el umbral.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from .parameter_binding import SqlToken, split_name, table_references, tokenize_sql
+except ImportError:
+    from parameter_binding import SqlToken, split_name, table_references, tokenize_sql
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_ROWS = 1000
+# Con menos filas un recorrido completo es barato
+DEFAULT_MIN_TABLE_ROWS = 200
+# Por encima de esta fracción de filas Jet prefiere recorrer la tabla
+DEFAULT_MAX_MATCHED_FRACTION = 0.2
+RANGE_SELECTIVITY = 1 / 3
+SORT_SAVING = 0.1
+# Access admite hasta 10 campos por índice
+MAX_INDEX_COLUMNS = 10
+MAX_INDEX_NAME = 64
+
+_UNINDEXABLE_TYPES = {"LONGBINARY", "OLEOBJECT", "BINARY", "VARBINARY", "IMAGE"}
+_RANGE_OPERATORS = {"<", ">", "<=", ">="}
+_CLAUSE_RESET = {"SELECT", "FROM", "JOIN", "HAVING", "UNION", "SET", "VALUES"}
+_NAME_CHARS = re.compile(r"[^0-9A-Za-z_]+")
+
+
+@dataclass
+class ColumnUse:
+    """Uso de una columna en una sentencia."""
+    table: str
+    column: str
+    role: str  # equality, range, join u order
+
+
+def _is_column(token: Optional[SqlToken]) -> bool:
+    return token is not None and token.kind in ("name", "qualified")
+
+
+def _is_value(token: Optional[SqlToken]) -> bool:
+    return token is not None and (token.kind == "literal" or token.text == "?")
+
+
+def _raw_column_uses(tokens: List[SqlToken]) -> List[Tuple[SqlToken, str]]:
+    """Identificadores usados como columna en WHERE, ON y ORDER BY, con su papel."""
+    uses: List[Tuple[SqlToken, str]] = []
+    clause = None
+    for index, token in enumerate(tokens):
+        word = token.upper if token.kind == "word" else None
+        previous = tokens[index - 1] if index > 0 else None
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if word == "WHERE":
+            clause = "where"
+        elif word == "ON":
+            clause = "join"
+        elif word in ("ORDER", "GROUP") and following is not None and following.upper == "BY":
+            clause = "order" if word == "ORDER" else None
+        elif word in _CLAUSE_RESET:
+            clause = None
+        elif clause in ("where", "join"):
+            if token.kind == "operator" and token.text in _RANGE_OPERATORS | {"="}:
+                role = "equality" if token.text == "=" else "range"
+                if _is_column(previous) and _is_column(following):
+                    uses.extend([(previous, "join"), (following, "join")])
+                elif _is_column(previous) and _is_value(following):
+                    uses.append((previous, role))
+                elif _is_value(previous) and _is_column(following):
+                    uses.append((following, role))
+            elif word == "LIKE" and _is_column(previous) and _is_value(following):
+                # Solo un patrón con prefijo fijo puede usar el índice
+                if not (following.kind == "literal" and following.text[1:2] in ("%", "*")):
+                    uses.append((previous, "range"))
+            elif word == "BETWEEN" and _is_column(previous):
+                uses.append((previous, "range"))
+            elif (word == "IN" and _is_column(previous) and following is not None and following.text == "("
+                  and index + 2 < len(tokens) and tokens[index + 2].upper != "SELECT"):
+                uses.append((previous, "equality"))
+        elif clause == "order" and _is_column(token):
+            uses.append((token, "order"))
+    return uses
+
+
+def statement_columns(query: str, table_columns: Callable[[str], Dict[str, Dict[str, Any]]]) -> List[ColumnUse]:
+    """
+    Columnas de las tablas de ``query`` que podrían aprovechar un índice.
+
+    ``table_columns(tabla)`` devuelve las columnas de la tabla por nombre en
+    minúsculas (vacío si no existe); las columnas sin cualificar se asignan
+    a la única tabla de la sentencia que las tiene.
+    """
+    tokens = tokenize_sql(query)
+    tables = table_references(tokens)
+    distinct_tables = list(dict.fromkeys(tables.values()))
+    uses = []
+    seen = set()
+    for token, role in _raw_column_uses(tokens):
+        qualifier, column_name = split_name(token)
+        if qualifier is not None:
+            candidates = [tables.get(qualifier.lower(), qualifier)]
+        else:
+            candidates = distinct_tables
+        owners = [table for table in candidates if column_name.lower() in table_columns(table)]
+        if len(owners) != 1:
+            continue
+        column = table_columns(owners[0])[column_name.lower()]
+        key = (owners[0].lower(), column["column_name"].lower(), role)
+        if key not in seen:
+            seen.add(key)
+            uses.append(ColumnUse(owners[0], column["column_name"], role))
+    return uses
+
+
+@dataclass
+class IndexCandidate:
+    """Índice propuesto y las sentencias que lo aprovecharían."""
+    table: str
+    columns: List[str]
+    kind: str  # filter, join o sort
+    matched_fraction: float
+    saved_ms: float = 0.0
+    executions: int = 0
+    statements: List[str] = field(default_factory=list)
+    distinct_values: Dict[str, int] = field(default_factory=dict)
+    sample_rows: int = 0
+
+    @property
+    def key(self) -> Tuple[str, Tuple[str, ...]]:
+        return self.table.lower(), tuple(column.lower() for column in self.columns)
+
+    @property
+    def index_name(self) -> str:
+        name = _NAME_CHARS.sub("_", "_".join(["IX", self.table] + self.columns)).strip("_")
+        return name[:MAX_INDEX_NAME]
+
+    @property
+    def create_sql(self) -> str:
+        columns = ", ".join(f"[{column}]" for column in self.columns)
+        return f"CREATE INDEX [{self.index_name}] ON [{self.table}] ({columns})"
+
+    def merge(self, other: "IndexCandidate"):
+        """Sumar las sentencias de otra propuesta que este índice también cubre."""
+        if any(statement in self.statements for statement in other.statements):
+            # La misma sentencia no ahorra dos veces
+            return
+        self.saved_ms += other.saved_ms
+        self.executions += other.executions
+        self.statements.extend(other.statements)
+        self.matched_fraction = min(self.matched_fraction, other.matched_fraction)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "columns": list(self.columns),
+            "kind": self.kind,
+            "create_sql": self.create_sql,
+            "saved_ms": round(self.saved_ms, 3),
+            "executions": self.executions,
+            "matched_fraction": round(self.matched_fraction, 6),
+            "distinct_values": dict(self.distinct_values),
+            "sample_rows": self.sample_rows,
+            "statements": list(self.statements),
+        }
+
+
+@dataclass
+class IndexAdvice:
+    """Resultado de un análisis del registro."""
+    candidates: List[IndexCandidate]
+    statements_analyzed: int = 0
+    statements_without_columns: int = 0
+    tables_sampled: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+
+class IndexAdvisor:
+    """
+    Propone índices para las sentencias del registro de consultas lentas.
+
+    Args:
+        get_columns: ``get_columns(tabla)`` con las columnas como ``get_table_schema``
+            (lista vacía si la tabla no existe)
+        get_indexes: ``get_indexes(tabla)`` con los índices como ``get_table_indexes``
+        sample: ``sample(tabla, columnas, filas)`` con una muestra de filas (tuplas)
+        count_rows: ``count_rows(tabla)`` con el número de filas (opcional)
+    """
+
+    def __init__(self, get_columns: Callable[[str], List[Dict[str, Any]]],
+                 get_indexes: Callable[[str], List[Dict[str, Any]]],
+                 sample: Callable[[str, List[str], int], Sequence[Sequence[Any]]],
+                 count_rows: Optional[Callable[[str], int]] = None, sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                 min_table_rows: int = DEFAULT_MIN_TABLE_ROWS,
+                 max_matched_fraction: float = DEFAULT_MAX_MATCHED_FRACTION):
+        self.get_columns = get_columns
+        self.get_indexes = get_indexes
+        self.sample = sample
+        self.count_rows = count_rows
+        self.sample_rows = max(1, sample_rows)
+        self.min_table_rows = min_table_rows
+        self.max_matched_fraction = max_matched_fraction
+        self._schemas: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _table_columns(self, table: str) -> Dict[str, Dict[str, Any]]:
+        key = table.lower()
+        if key not in self._schemas:
+            try:
+                columns = self.get_columns(table)
+            except Exception as e:
+                logger.debug(f"Sin esquema para {table}: {e}")
+                columns = []
+            self._schemas[key] = {column["column_name"].lower(): column
+                                  for column in columns if column.get("column_name")}
+        return self._schemas[key]
+
+    def advise(self, groups: Iterable[Dict[str, Any]], limit: int = 10) -> IndexAdvice:
+        """
+        Analizar sentencias agregadas como las de ``SlowQueryLog.top``.
+
+        Cada grupo necesita ``example_sql`` (o ``normalized_sql``), ``count``
+        y ``execute_ms`` (o ``total_ms``): el tiempo total de ejecución.
+        """
+        advice = IndexAdvice(candidates=[])
+        usages = []
+        needed: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        for group in groups:
+            query = group.get("example_sql") or group.get("normalized_sql") or ""
+            if not query.strip().upper().startswith("SELECT"):
+                continue
+            advice.statements_analyzed += 1
+            uses = [use for use in statement_columns(query, self._table_columns) if self._indexable(use)]
+            if not uses:
+                advice.statements_without_columns += 1
+                continue
+            usages.append((group, uses))
+            for use in uses:
+                needed.setdefault(use.table.lower(), (use.table, {}))[1][use.column.lower()] = use.column
+
+        samples = {key: self._sample(table, list(columns.values())) for key, (table, columns) in needed.items()}
+        advice.tables_sampled = len(samples)
+
+        candidates: Dict[Tuple[str, Tuple[str, ...]], IndexCandidate] = {}
+        for group, uses in usages:
+            for candidate in self._statement_candidates(group, uses, samples, advice):
+                existing = candidates.get(candidate.key)
+                if existing is None:
+                    candidates[candidate.key] = candidate
+                else:
+                    existing.merge(candidate)
+
+        # Un índice que empieza por las columnas de otro también sirve a sus sentencias
+        ranked = sorted(candidates.values(), key=lambda candidate: len(candidate.columns), reverse=True)
+        kept: List[IndexCandidate] = []
+        for candidate in ranked:
+            wider = next((other for other in kept if other.key[0] == candidate.key[0]
+                          and other.key[1][:len(candidate.columns)] == candidate.key[1]), None)
+            if wider is not None:
+                wider.merge(candidate)
+            else:
+                kept.append(candidate)
+
+        for candidate in kept:
+            if self._covered(candidate):
+                advice.skip("ya cubierto por un índice existente")
+            else:
+                advice.candidates.append(candidate)
+        advice.candidates.sort(key=lambda candidate: candidate.saved_ms, reverse=True)
+        advice.candidates = advice.candidates[:limit]
+        return advice
+
+    def _indexable(self, use: ColumnUse) -> bool:
+        column = self._table_columns(use.table).get(use.column.lower(), {})
+        data_type = (column.get("data_type") or "").upper().split("(")[0].strip()
+        return data_type not in _UNINDEXABLE_TYPES
+
+    def _sample(self, table: str, columns: List[str]) -> Dict[str, Any]:
+        try:
+            rows = [tuple(row) for row in self.sample(table, columns, self.sample_rows)]
+        except Exception as e:
+            logger.warning(f"No se pudo muestrear {table}: {e}")
+            rows = None
+        table_rows = None
+        if rows is not None and len(rows) >= self.sample_rows and self.count_rows is not None:
+            try:
+                table_rows = self.count_rows(table)
+            except Exception as e:
+                logger.debug(f"No se pudo contar {table}: {e}")
+        elif rows is not None:
+            # La muestra es la tabla completa
+            table_rows = len(rows)
+        return {"columns": [column.lower() for column in columns], "rows": rows, "table_rows": table_rows}
+
+    def _distinct(self, sample: Dict[str, Any], columns: List[str]) -> int:
+        positions = [sample["columns"].index(column.lower()) for column in columns]
+        return max(1, len({tuple(row[position] for position in positions) for row in sample["rows"]}))
+
+    def _statement_candidates(self, group: Dict[str, Any], uses: List[ColumnUse],
+                              samples: Dict[str, Dict[str, Any]], advice: IndexAdvice) -> List[IndexCandidate]:
+        execute_ms = group.get("execute_ms") or group.get("total_ms") or 0.0
+        statement = group.get("normalized_sql") or group.get("example_sql")
+        by_table: Dict[str, Dict[str, List[str]]] = {}
+        for use in uses:
+            roles = by_table.setdefault(use.table, {"equality": [], "range": [], "join": [], "order": []})
+            if use.column not in roles[use.role]:
+                roles[use.role].append(use.column)
+
+        results = []
+        for table, roles in by_table.items():
+            sample = samples[table.lower()]
+            if sample["rows"] is None:
+                advice.skip("sin muestra")
+                continue
+            sample_rows = len(sample["rows"])
+            if sample_rows < self.min_table_rows:
+                advice.skip("tabla pequeña")
+                continue
+            distinct = {column: self._distinct(sample, [column])
+                        for column in roles["equality"] + roles["range"] + roles["join"] + roles["order"]}
+
+            proposals = []
+            equality = sorted(roles["equality"], key=lambda column: distinct[column], reverse=True)
+            if equality or roles["range"]:
+                fraction = 1.0 / self._distinct(sample, equality) if equality else 1.0
+                columns = list(equality)
+                if roles["range"]:
+                    columns.append(roles["range"][0])
+                    observed = self._observed_fraction(group, sample) if len(by_table) == 1 else None
+                    fraction = observed if observed is not None else fraction * RANGE_SELECTIVITY
+                else:
+                    columns.extend(column for column in roles["order"] if column not in columns)
+                proposals.append(("filter", columns, fraction, execute_ms * (1 - fraction)))
+            elif roles["order"]:
+                proposals.append(("sort", list(roles["order"]), 1.0, execute_ms * SORT_SAVING))
+            for column in roles["join"]:
+                if proposals and proposals[0][1][0] == column:
+                    continue
+                fraction = 1.0 / distinct[column]
+                proposals.append(("join", [column], fraction, execute_ms * (1 - fraction)))
+
+            for kind, columns, fraction, saved in proposals:
+                if kind != "sort" and fraction > self.max_matched_fraction:
+                    advice.skip("poco selectivo")
+                    continue
+                results.append(IndexCandidate(
+                    table=table,
+                    columns=columns[:MAX_INDEX_COLUMNS],
+                    kind=kind,
+                    matched_fraction=fraction,
+                    saved_ms=saved,
+                    executions=group.get("count", 1),
+                    statements=[statement],
+                    distinct_values={column: distinct[column] for column in columns if column in distinct},
+                    sample_rows=sample_rows,
+                ))
+        return results
+
+    @staticmethod
+    def _observed_fraction(group: Dict[str, Any], sample: Dict[str, Any]) -> Optional[float]:
+        """Filas devueltas de media sobre las filas de la tabla (None si no se conocen)."""
+        if not sample["table_rows"] or not group.get("count") or group.get("rows") is None:
+            return None
+        return min(1.0, max(group["rows"] / group["count"], 1) / sample["table_rows"])
+
+    def _covered(self, candidate: IndexCandidate) -> bool:
+        """Si un índice existente empieza por las mismas columnas."""
+        try:
+            indexes = self.get_indexes(candidate.table)
+        except Exception as e:
+            logger.debug(f"Sin índices de {candidate.table}: {e}")
+            return False
+        wanted = candidate.key[1]
+        for index in indexes:
+            existing = tuple(column.lower() for column in index.get("columns", []) if column)
+            if existing[:len(wanted)] == wanted:
+                return True
+        return False
@@ -0,0 +1,629 @@
+"""
+Lector de solo lectura del formato de páginas Jet/ACE (.mdb/.accdb).
+
+Lee el archivo directamente, sin driver ODBC, proyectándolo en memoria
+(``mmap``): las páginas no se copian y varias lecturas pueden recorrer el
+mismo archivo a la vez desde hilos distintos. Decodifica:
+
+- la cabecera de la base de datos (página 0)
+- el catálogo ``MSysObjects`` (definición de tabla en la página 2)
+- las definiciones de tabla (páginas 0x02, encadenadas si no caben en una)
+- los mapas de uso que indican qué páginas de datos pertenecen a cada tabla
+- las páginas de datos (0x01): filas, máscara de nulos y columnas variables
+- los valores largos (Memo / Objeto OLE) en línea o en páginas LVAL
+
+Se admiten los formatos Jet 4 (Access 2000-2003, .mdb) y ACE (Access 2007 y
+posteriores, .accdb), con páginas de 4096 bytes. Jet 3 (Access 97) y las
+bases de datos cifradas no se admiten. El archivo se lee tal como está en
+disco: si Access lo está modificando, una lectura puede ver páginas a medio
+escribir, así que conviene usarlo sobre copias o archivos sin escritores.
+"""
+
+import logging
+import mmap
+import struct
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .streaming import IterableStream
+except ImportError:
+    from streaming import IterableStream
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 4096
+
+PAGE_DATA = 0x01
+PAGE_TABLE_DEFINITION = 0x02
+PAGE_USAGE_MAP = 0x05
+
+CATALOG_PAGE = 2
+
+# Versión del motor en el byte 0x14 de la cabecera
+JET_VERSIONS = {0: "Jet 3", 1: "Jet 4", 2: "ACE 12", 3: "ACE 14", 4: "ACE 15", 5: "ACE 16"}
+
+# Tipos de columna
+TYPE_BOOL = 0x01
+TYPE_BYTE = 0x02
+TYPE_INT = 0x03
+TYPE_LONG = 0x04
+TYPE_MONEY = 0x05
+TYPE_FLOAT = 0x06
+TYPE_DOUBLE = 0x07
+TYPE_DATETIME = 0x08
+TYPE_BINARY = 0x09
+TYPE_TEXT = 0x0A
+TYPE_OLE = 0x0B
+TYPE_MEMO = 0x0C
+TYPE_GUID = 0x0F
+TYPE_NUMERIC = 0x10
+TYPE_COMPLEX = 0x12
+
+# Nombres de tipo como los devuelve el driver ODBC de Access
+TYPE_NAMES = {
+    TYPE_BOOL: "BIT", TYPE_BYTE: "BYTE", TYPE_INT: "SMALLINT", TYPE_LONG: "INTEGER",
+    TYPE_MONEY: "CURRENCY", TYPE_FLOAT: "REAL", TYPE_DOUBLE: "DOUBLE", TYPE_DATETIME: "DATETIME",
+    TYPE_BINARY: "VARBINARY", TYPE_TEXT: "VARCHAR", TYPE_OLE: "LONGBINARY", TYPE_MEMO: "LONGCHAR",
+    TYPE_GUID: "GUID", TYPE_NUMERIC: "DECIMAL", TYPE_COMPLEX: "INTEGER",
+}
+
+_FIXED_STRUCTS = {
+    TYPE_BYTE: struct.Struct("<B"), TYPE_INT: struct.Struct("<h"), TYPE_LONG: struct.Struct("<i"),
+    TYPE_COMPLEX: struct.Struct("<i"), TYPE_MONEY: struct.Struct("<q"), TYPE_FLOAT: struct.Struct("<f"),
+    TYPE_DOUBLE: struct.Struct("<d"), TYPE_DATETIME: struct.Struct("<d"),
+}
+
+# Indicadores de columna
+COLUMN_FIXED = 0x01
+COLUMN_AUTONUMBER = 0x04
+
+# Indicadores en la tabla de desplazamientos de filas
+ROW_DELETED = 0x8000
+ROW_OVERFLOW = 0x4000
+ROW_OFFSET_MASK = 0x1FFF
+
+# Indicadores de la cabecera de un valor largo (Memo / OLE)
+LONG_VALUE_INLINE = 0x80000000
+LONG_VALUE_SINGLE_PAGE = 0x40000000
+LONG_VALUE_LENGTH_MASK = 0x3FFFFFFF
+
+# MSysObjects
+OBJECT_TYPE_TABLE = 1
+SYSTEM_OBJECT_FLAGS = 0x80000002
+OBJECT_ID_PAGE_MASK = 0x00FFFFFF
+
+# Definición de tabla (Jet 4 / ACE)
+_TDEF_NUM_ROWS = 16
+_TDEF_NUM_VAR_COLS = 43
+_TDEF_NUM_COLS = 45
+_TDEF_NUM_REAL_INDEXES = 51
+_TDEF_USAGE_MAP = 55
+_TDEF_COLUMNS_START = 63
+_TDEF_REAL_INDEX_SIZE = 12
+_TDEF_COLUMN_SIZE = 25
+
+_ACCESS_EPOCH = datetime(1899, 12, 30)
+
+_UINT16 = struct.Struct("<H")
+_UINT32 = struct.Struct("<I")
+
+_MAX_CHAIN = 100000
+
+
+class JetFormatError(ValueError):
+    """El archivo no tiene un formato Jet/ACE que se pueda leer."""
+
+
+@dataclass
+class JetColumn:
+    """Columna de una definición de tabla."""
+    name: str
+    type_code: int
+    column_number: int
+    variable_number: int
+    fixed_offset: int
+    length: int
+    flags: int
+    precision: int = 0
+    scale: int = 0
+
+    @property
+    def is_fixed(self) -> bool:
+        return bool(self.flags & COLUMN_FIXED)
+
+    @property
+    def is_autonumber(self) -> bool:
+        return bool(self.flags & COLUMN_AUTONUMBER)
+
+    @property
+    def type_name(self) -> str:
+        if self.type_code == TYPE_LONG and self.is_autonumber:
+            return "COUNTER"
+        return TYPE_NAMES.get(self.type_code, f"UNKNOWN_{self.type_code:#x}")
+
+    @property
+    def size(self) -> int:
+        """Tamaño como lo informa ODBC (caracteres en el texto, bytes en el resto)."""
+        if self.type_code == TYPE_TEXT:
+            return self.length // 2
+        if self.type_code == TYPE_NUMERIC:
+            return self.precision
+        return self.length
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decodificar texto Jet 4: UCS-2 o "compresión Unicode".
+
+    El texto comprimido empieza por FF FE y alterna tramos de un byte por
+    carácter (Latin-1) y tramos UCS-2, separados por un byte 0x00.
+    """
+    if len(data) >= 2 and data[0] == 0xFF and data[1] == 0xFE:
+        decoded = bytearray()
+        compressed = True
+        position, length = 2, len(data)
+        while position < length:
+            byte = data[position]
+            if byte == 0:
+                compressed = not compressed
+                position += 1
+            elif compressed:
+                decoded += bytes((byte, 0))
+                position += 1
+            elif position + 1 < length:
+                decoded += data[position:position + 2]
+                position += 2
+            else:
+                break
+        data = bytes(decoded)
+    return bytes(data).decode("utf-16-le", errors="replace")
+
+
+def decode_datetime(value: float) -> datetime:
+    """
+    Convertir una fecha de Access (días desde 1899-12-30) a ``datetime``.
+
+    En las fechas anteriores a 1899-12-30 la parte entera es negativa pero
+    la fracción (la hora) se cuenta hacia delante desde la medianoche.
+    """
+    days = int(value)
+    milliseconds = round(abs(value - days) * 86400000)
+    return _ACCESS_EPOCH + timedelta(days=days, milliseconds=milliseconds)
+
+
+def decode_numeric(data: bytes, scale: int) -> Decimal:
+    """Decimal de 17 bytes: signo y cuatro enteros de 32 bits (el más significativo primero)."""
+    negative = data[0] & 0x80
+    high, mid_high, mid_low, low = struct.unpack_from("<IIII", data, 1)
+    magnitude = (high << 96) | (mid_high << 64) | (mid_low << 32) | low
+    value = Decimal(-magnitude if negative else magnitude)
+    return value.scaleb(-scale) if scale else value
+
+
+class JetTable:
+    """Definición de una tabla y lectura de sus filas."""
+
+    def __init__(self, database: "JetDatabase", name: str, definition_page: int):
+        self.database = database
+        self.name = name
+        self.definition_page = definition_page
+        self._parse_definition()
+
+    def _parse_definition(self):
+        definition = self.database.read_definition(self.definition_page)
+        if len(definition) < _TDEF_COLUMNS_START:
+            raise JetFormatError(f"Definición de tabla truncada en la página {self.definition_page}")
+        self.row_count = _UINT32.unpack_from(definition, _TDEF_NUM_ROWS)[0]
+        self.variable_column_count = _UINT16.unpack_from(definition, _TDEF_NUM_VAR_COLS)[0]
+        column_count = _UINT16.unpack_from(definition, _TDEF_NUM_COLS)[0]
+        real_index_count = _UINT32.unpack_from(definition, _TDEF_NUM_REAL_INDEXES)[0]
+        self.usage_map_pointer = _UINT32.unpack_from(definition, _TDEF_USAGE_MAP)[0]
+
+        offset = _TDEF_COLUMNS_START + real_index_count * _TDEF_REAL_INDEX_SIZE
+        entries = []
+        for _ in range(column_count):
+            if offset + _TDEF_COLUMN_SIZE > len(definition):
+                raise JetFormatError(f"Definición de columnas truncada en '{self.name}'")
+            entries.append(bytes(definition[offset:offset + _TDEF_COLUMN_SIZE]))
+            offset += _TDEF_COLUMN_SIZE
+
+        columns = []
+        for entry in entries:
+            name_length = _UINT16.unpack_from(definition, offset)[0]
+            name = decode_text(bytes(definition[offset + 2:offset + 2 + name_length]))
+            offset += 2 + name_length
+            columns.append(JetColumn(
+                name=name,
+                type_code=entry[0],
+                column_number=_UINT16.unpack_from(entry, 5)[0],
+                variable_number=_UINT16.unpack_from(entry, 7)[0],
+                precision=entry[11],
+                scale=entry[12],
+                flags=entry[15],
+                fixed_offset=_UINT16.unpack_from(entry, 21)[0],
+                length=_UINT16.unpack_from(entry, 23)[0],
+            ))
+        # El orden de las columnas fijas dentro de la fila sigue el número de columna
+        self.columns: List[JetColumn] = sorted(columns, key=lambda column: column.column_number)
+        # Las filas escritas antes de añadir una columna fija no le reservan espacio:
+        # solo están presentes las N primeras columnas fijas de la fila
+        self._fixed_rank = {
+            column.column_number: rank
+            for rank, column in enumerate(column for column in self.columns if column.is_fixed)
+        }
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def schema(self) -> List[Dict[str, Any]]:
+        """Columnas con el mismo formato que ``AccessDatabaseManager.get_table_schema``."""
+        return [
+            {
+                "column_name": column.name,
+                "data_type": column.type_name,
+                "size": column.size,
+                # La obligatoriedad se guarda en las propiedades (LvProp), no en la definición
+                "nullable": None,
+                "default_value": None
+            }
+            for column in self.columns
+        ]
+
+    def data_pages(self) -> List[int]:
+        """Páginas de datos de la tabla según su mapa de uso."""
+        database = self.database
+        usage_map = database.read_row(self.usage_map_pointer)
+        if not usage_map:
+            return []
+        candidates: List[int] = []
+        if usage_map[0] == 0:
+            start_page = _UINT32.unpack_from(usage_map, 1)[0]
+            candidates.extend(_bitmap_pages(usage_map[5:], start_page))
+        elif usage_map[0] == 1:
+            pages_per_map = (database.page_size - 4) * 8
+            for index in range((len(usage_map) - 1) // 4):
+                map_page = _UINT32.unpack_from(usage_map, 1 + index * 4)[0]
+                if not map_page or map_page >= database.page_count:
+                    continue
+                bitmap = database.page(map_page)[4:]
+                candidates.extend(_bitmap_pages(bitmap, index * pages_per_map))
+        else:
+            raise JetFormatError(f"Tipo de mapa de uso desconocido ({usage_map[0]}) en '{self.name}'")
+        return [page for page in candidates if database.is_data_page_of(page, self.definition_page)]
+
+    def iter_rows(self, columns: Optional[Sequence[str]] = None,
+                  pages: Optional[Sequence[int]] = None) -> Iterator[Tuple]:
+        """
+        Recorrer las filas de la tabla.
+
+        Args:
+            columns: Columnas a devolver (None = todas, en orden de definición)
+            pages: Páginas de datos a recorrer (None = todas); permite repartir
+                la lectura entre varios hilos
+        """
+        selected = self.select_columns(columns)
+        database = self.database
+        for page_number in (self.data_pages() if pages is None else pages):
+            for start, end in database.row_bounds(page_number, follow_overflow=True):
+                yield self.decode_row(start, end, selected)
+
+    def select_columns(self, columns: Optional[Sequence[str]]) -> List[JetColumn]:
+        """Columnas pedidas por nombre (sin distinguir mayúsculas); None = todas."""
+        if not columns:
+            return self.columns
+        lookup = {column.name.lower(): column for column in self.columns}
+        missing = [name for name in columns if name.lower() not in lookup]
+        if missing:
+            raise ValueError(f"Columnas no encontradas en '{self.name}': {', '.join(missing)}")
+        return [lookup[name.lower()] for name in columns]
+
+    def decode_row(self, start: int, end: int, columns: Sequence[JetColumn]) -> Tuple:
+        """Decodificar la fila entre ``start`` y ``end`` (posiciones absolutas en el archivo)."""
+        data = self.database.data
+        row_columns = _UINT16.unpack_from(data, start)[0]
+        mask_size = (row_columns + 7) // 8
+        mask_start = end - mask_size
+
+        variable_offsets: List[int] = []
+        row_variable_count = 0
+        if self.variable_column_count:
+            row_variable_count = _UINT16.unpack_from(data, mask_start - 2)[0]
+            table_start = mask_start - 4
+            variable_offsets = [_UINT16.unpack_from(data, table_start - 2 * index)[0]
+                                for index in range(row_variable_count + 1)]
+        row_fixed_count = row_columns - row_variable_count
+        fixed_rank = self._fixed_rank
+
+        values = []
+        for column in columns:
+            byte_index = column.column_number // 8
+            present = (byte_index < mask_size and
+                       data[mask_start + byte_index] & (1 << (column.column_number % 8)))
+            if column.type_code == TYPE_BOOL:
+                values.append(bool(present))
+                continue
+            if not present:
+                values.append(None)
+                continue
+            if column.is_fixed:
+                if fixed_rank[column.column_number] >= row_fixed_count:
+                    values.append(None)
+                    continue
+                position = start + 2 + column.fixed_offset
+                values.append(self._decode_fixed(column, data, position))
+            else:
+                if column.variable_number >= row_variable_count:
+                    values.append(None)
+                    continue
+                value_start = start + variable_offsets[column.variable_number]
+                value_end = start + variable_offsets[column.variable_number + 1]
+                values.append(self._decode_variable(column, data[value_start:value_end]))
+        return tuple(values)
+
+    def _decode_fixed(self, column: JetColumn, data, position: int) -> Any:
+        type_code = column.type_code
+        unpacker = _FIXED_STRUCTS.get(type_code)
+        if unpacker is not None:
+            value = unpacker.unpack_from(data, position)[0]
+            if type_code == TYPE_MONEY:
+                return Decimal(value).scaleb(-4)
+            if type_code == TYPE_DATETIME:
+                return decode_datetime(value)
+            return value
+        raw = bytes(data[position:position + column.length])
+        if type_code == TYPE_GUID:
+            return "{" + str(uuid.UUID(bytes_le=raw)).upper() + "}"
+        if type_code == TYPE_NUMERIC:
+            return decode_numeric(raw, column.scale)
+        if type_code == TYPE_TEXT:
+            return decode_text(raw)
+        return raw
+
+    def _decode_variable(self, column: JetColumn, raw: bytes) -> Any:
+        type_code = column.type_code
+        if type_code == TYPE_TEXT:
+            return decode_text(raw)
+        if type_code == TYPE_MEMO:
+            return decode_text(self.database.read_long_value(raw))
+        if type_code == TYPE_OLE:
+            return self.database.read_long_value(raw)
+        if type_code == TYPE_NUMERIC and len(raw) >= 17:
+            return decode_numeric(raw, column.scale)
+        if type_code == TYPE_GUID and len(raw) == 16:
+            return "{" + str(uuid.UUID(bytes_le=raw)).upper() + "}"
+        return bytes(raw)
+
+
+def _bitmap_pages(bitmap, first_page: int) -> Iterator[int]:
+    for byte_index, byte in enumerate(bitmap):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte & (1 << bit):
+                yield first_page + byte_index * 8 + bit
+
+
+class JetDatabase:
+    """Archivo Access abierto en solo lectura con ``mmap``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise JetFormatError(f"Archivo vacío: {path}")
+        self._tables: Dict[str, JetTable] = {}
+        self._catalog: Optional[Dict[str, Tuple[int, int, int]]] = None
+        self._lock = threading.Lock()
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        data = self.data
+        if len(data) < PAGE_SIZE or data[:4] != b"\x00\x01\x00\x00":
+            raise JetFormatError(f"No es una base de datos Access: {self.path}")
+        signature = bytes(data[4:19])
+        if signature not in (b"Standard Jet DB", b"Standard ACE DB"):
+            raise JetFormatError(f"Firma de base de datos desconocida: {signature!r}")
+        self.version = data[0x14]
+        if self.version == 0:
+            raise JetFormatError("Jet 3 (Access 97) no está soportado por el lector directo")
+        if self.version not in JET_VERSIONS:
+            logger.warning(f"Versión de formato desconocida ({self.version}); se lee como ACE")
+        self.page_size = PAGE_SIZE
+        self.page_count = len(data) // PAGE_SIZE
+        if data[CATALOG_PAGE * PAGE_SIZE] != PAGE_TABLE_DEFINITION:
+            raise JetFormatError("No se encontró el catálogo MSysObjects (¿archivo cifrado?)")
+
+    @property
+    def format_name(self) -> str:
+        return JET_VERSIONS.get(self.version, f"ACE ({self.version})")
+
+    def close(self):
+        data, self.data = getattr(self, "data", None), None
+        if data is not None:
+            data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # Páginas y filas
+
+    def page(self, number: int) -> memoryview:
+        """Página ``number`` sin copiarla."""
+        if not 0 <= number < self.page_count:
+            raise JetFormatError(f"Página fuera del archivo: {number}")
+        offset = number * self.page_size
+        return memoryview(self.data)[offset:offset + self.page_size]
+
+    def is_data_page_of(self, number: int, definition_page: int) -> bool:
+        if not 0 < number < self.page_count:
+            return False
+        offset = number * self.page_size
+        return (self.data[offset] == PAGE_DATA and
+                _UINT32.unpack_from(self.data, offset + 4)[0] == definition_page)
+
+    def read_definition(self, number: int) -> bytes:
+        """Definición de tabla completa (puede ocupar varias páginas encadenadas)."""
+        page = self.page(number)
+        if page[0] != PAGE_TABLE_DEFINITION:
+            raise JetFormatError(f"La página {number} no es una definición de tabla")
+        parts = [bytes(page)]
+        next_page = _UINT32.unpack_from(page, 4)[0]
+        seen = {number}
+        while next_page:
+            if next_page in seen or len(seen) > _MAX_CHAIN:
+                raise JetFormatError(f"Cadena de definición de tabla circular en la página {number}")
+            seen.add(next_page)
+            page = self.page(next_page)
+            parts.append(bytes(page[8:]))
+            next_page = _UINT32.unpack_from(page, 4)[0]
+        return b"".join(parts)
+
+    def row_bounds(self, page_number: int, follow_overflow: bool = True) -> Iterator[Tuple[int, int]]:
+        """
+        Posiciones absolutas (inicio, fin) de las filas vivas de una página de datos.
+
+        Las filas borradas se saltan. Una fila desbordada contiene un puntero
+        a la fila real en otra página; la fila de destino está marcada como
+        borrada para que el recorrido no la lea dos veces.
+        """
+        base = page_number * self.page_size
+        data = self.data
+        row_count = _UINT16.unpack_from(data, base + 0x0C)[0]
+        previous_start = self.page_size
+        for row in range(row_count):
+            raw_offset = _UINT16.unpack_from(data, base + 0x0E + row * 2)[0]
+            start = raw_offset & ROW_OFFSET_MASK
+            end = previous_start
+            previous_start = start
+            if raw_offset & ROW_DELETED or start >= end:
+                continue
+            if raw_offset & ROW_OVERFLOW:
+                if follow_overflow:
+                    target = self._follow_overflow(_UINT32.unpack_from(data, base + start)[0])
+                    if target is not None:
+                        yield target
+                continue
+            yield base + start, base + end
+
+    def _follow_overflow(self, pointer: int) -> Optional[Tuple[int, int]]:
+        for _ in range(16):
+            bounds = self._row_at(pointer)
+            if bounds is None:
+                return None
+            start, end, flags = bounds
+            if not flags & ROW_OVERFLOW:
+                return start, end
+            pointer = _UINT32.unpack_from(self.data, start)[0]
+        logger.warning("Cadena de filas desbordadas demasiado larga")
+        return None
+
+    def _row_at(self, pointer: int) -> Optional[Tuple[int, int, int]]:
+        """Fila apuntada por ``página << 8 | fila`` (sin mirar si está borrada)."""
+        page_number, row = pointer >> 8, pointer & 0xFF
+        if not 0 < page_number < self.page_count:
+            return None
+        base = page_number * self.page_size
+        if self.data[base] != PAGE_DATA:
+            return None
+        row_count = _UINT16.unpack_from(self.data, base + 0x0C)[0]
+        if row >= row_count:
+            return None
+        raw_offset = _UINT16.unpack_from(self.data, base + 0x0E + row * 2)[0]
+        end = self.page_size
+        if row > 0:
+            end = _UINT16.unpack_from(self.data, base + 0x0E + (row - 1) * 2)[0] & ROW_OFFSET_MASK
+        return base + (raw_offset & ROW_OFFSET_MASK), base + end, raw_offset & 0xE000
+
+    def read_row(self, pointer: int) -> bytes:
+        bounds = self._row_at(pointer)
+        if bounds is None:
+            return b""
+        return bytes(self.data[bounds[0]:bounds[1]])
+
+    def read_long_value(self, field: bytes) -> bytes:
+        """Contenido de un Memo / Objeto OLE a partir de su cabecera de 12 bytes."""
+        if len(field) < 12:
+            return bytes(field)
+        header, pointer = struct.unpack_from("<II", field, 0)
+        length = header & LONG_VALUE_LENGTH_MASK
+        if header & LONG_VALUE_INLINE:
+            return bytes(field[12:12 + length])
+        if header & LONG_VALUE_SINGLE_PAGE:
+            return self.read_row(pointer)[:length]
+
+        # Valor en varias páginas: cada fragmento empieza con el puntero al siguiente
+        parts, total, seen = [], 0, set()
+        while pointer and total < length:
+            if pointer in seen or len(seen) > _MAX_CHAIN:
+                raise JetFormatError("Cadena de valor largo circular")
+            seen.add(pointer)
+            chunk = self.read_row(pointer)
+            if len(chunk) < 4:
+                break
+            pointer = _UINT32.unpack_from(chunk, 0)[0]
+            parts.append(chunk[4:])
+            total += len(chunk) - 4
+        return b"".join(parts)[:length]
+
+    # Catálogo
+
+    def _read_catalog(self) -> Dict[str, Tuple[int, int, int]]:
+        if self._catalog is None:
+            catalog_table = JetTable(self, "MSysObjects", CATALOG_PAGE)
+            catalog = {}
+            for object_id, name, object_type, flags in catalog_table.iter_rows(["Id", "Name", "Type", "Flags"]):
+                if object_type == OBJECT_TYPE_TABLE and name:
+                    catalog[name] = (object_id & OBJECT_ID_PAGE_MASK, object_type, flags or 0)
+            self._catalog = catalog
+        return self._catalog
+
+    def list_tables(self, include_system: bool = False) -> List[str]:
+        """Tablas locales (sin vinculadas y, por defecto, sin las del sistema)."""
+        return [
+            name for name, (_, _, flags) in self._read_catalog().items()
+            if include_system or not (flags & SYSTEM_OBJECT_FLAGS)
+        ]
+
+    def table(self, name: str) -> JetTable:
+        key = name.lower()
+        with self._lock:
+            table = self._tables.get(key)
+            if table is None:
+                matches = [(table_name, entry) for table_name, entry in self._read_catalog().items()
+                           if table_name.lower() == key]
+                if not matches:
+                    raise ValueError(f"La tabla '{name}' no existe en {self.path}")
+                table_name, (page, _, _) = matches[0]
+                table = self._tables[key] = JetTable(self, table_name, page)
+        return table
+
+    def get_table_schema(self, name: str) -> List[Dict[str, Any]]:
+        return self.table(name).schema()
+
+    def iter_rows(self, name: str, columns: Optional[Sequence[str]] = None) -> Iterator[Tuple]:
+        return self.table(name).iter_rows(columns)
+
+    def open_table(self, name: str, columns: Optional[Sequence[str]] = None,
+                   batch_size: int = 500) -> IterableStream:
+        """Flujo de filas con la interfaz de ``QueryStream``."""
+        table = self.table(name)
+        selected = [column.name for column in table.select_columns(columns)]
+        return IterableStream(selected, table.iter_rows(selected), batch_size)
@@ -0,0 +1,367 @@
+"""
+Copia local de lectura para bases de datos en carpetas de red.
+
+Si el .accdb está en un recurso SMB lento, cada página que lee el driver
+ODBC cruza la red. ``LocalReadCache`` mantiene una copia del archivo en un
+disco local y abre allí las consultas de lectura:
+
+- la comprobación rápida compara tamaño y fecha de modificación; como en
+  un recurso de red la fecha puede tardar en actualizarse mientras Access
+  tiene el archivo abierto, cada ``verify_interval_seconds`` se hace además
+  una verificación completa por bloques
+- la copia se actualiza por bloques: se lee el archivo de origen, se calcula
+  un resumen de cada bloque y solo se escriben los bloques que cambiaron
+- hay dos copias que se alternan: la nueva versión se prepara en la que no
+  está en uso y la conexión se cambia a ella cuando está lista; la anterior
+  se cierra cuando terminan las lecturas que la usaban
+- cada lectura indica cuánto desfase admite (``max_staleness_seconds``)
+
+La copia refleja el archivo tal como estaba al copiarlo: si otro usuario
+estaba a mitad de una transacción, se verá la parte ya escrita. Si el
+archivo cambia durante la copia se repite, y si no se estabiliza se sigue
+usando la versión anterior.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+_DIGEST_SIZE = 16
+
+
+@dataclass
+class RefreshResult:
+    """Resultado de una comprobación de la copia local."""
+    changed: bool
+    verified: bool = False
+    blocks_checked: int = 0
+    blocks_copied: int = 0
+    bytes_copied: int = 0
+    elapsed_seconds: float = 0.0
+    generation: int = 0
+    consistent: bool = True
+
+    def describe(self) -> str:
+        if not self.changed:
+            check = "verificación por bloques" if self.verified else "tamaño y fecha"
+            return f"sin cambios ({check}, {self.elapsed_seconds:.2f} s)"
+        return (f"versión {self.generation}: {self.blocks_copied}/{self.blocks_checked} bloques copiados "
+                f"({self.bytes_copied} bytes, {self.elapsed_seconds:.2f} s)")
+
+
+@dataclass
+class _Slot:
+    """Una de las dos copias locales con los resúmenes de sus bloques."""
+    path: str
+    checksums: List[str] = field(default_factory=list)
+    source_size: int = -1
+    source_mtime_ns: int = -1
+
+    @property
+    def state_path(self) -> str:
+        return self.path + ".blocks.json"
+
+    def load(self):
+        if not os.path.exists(self.path) or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as state_file:
+                state = json.load(state_file)
+            if state.get("size") == os.path.getsize(self.path):
+                self.checksums = state["checksums"]
+                self.source_size = state["source_size"]
+                self.source_mtime_ns = state["source_mtime_ns"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Estado de bloques no válido en {self.state_path}: {e}")
+
+    def save(self):
+        state = {"size": os.path.getsize(self.path), "checksums": self.checksums,
+                 "source_size": self.source_size, "source_mtime_ns": self.source_mtime_ns}
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, self.state_path)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.source_size == stat.st_size and self.source_mtime_ns == stat.st_mtime_ns
+
+
+class BlockSyncedCopy:
+    """Copia local de un archivo que se actualiza escribiendo solo los bloques cambiados."""
+
+    def __init__(self, source_path: str, cache_dir: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_attempts: int = 3):
+        self.source_path = source_path
+        self.block_size = max(4096, block_size)
+        self.max_attempts = max(1, max_attempts)
+        os.makedirs(cache_dir, exist_ok=True)
+        base, extension = os.path.splitext(os.path.basename(source_path))
+        self.slots = [_Slot(os.path.join(cache_dir, f"{base}.{name}{extension}")) for name in ("a", "b")]
+        for slot in self.slots:
+            slot.load()
+
+    def sync_into(self, slot: _Slot, force: bool = False) -> RefreshResult:
+        """Dejar ``slot`` igual que el archivo de origen."""
+        start = time.perf_counter()
+        result = RefreshResult(changed=False, verified=force)
+        for attempt in range(self.max_attempts):
+            before = os.stat(self.source_path)
+            if slot.matches(before) and not force and os.path.exists(slot.path):
+                break
+            self._copy_blocks(slot, result)
+            after = os.stat(self.source_path)
+            slot.source_size, slot.source_mtime_ns = after.st_size, after.st_mtime_ns
+            if after.st_size == before.st_size and after.st_mtime_ns == before.st_mtime_ns:
+                result.consistent = True
+                slot.save()
+                break
+            # El archivo cambió mientras se copiaba: se repite (solo se escribe lo que vuelva a diferir)
+            result.consistent = False
+            logger.info(f"{self.source_path} cambió durante la copia (intento {attempt + 1})")
+            force = True
+        result.elapsed_seconds = time.perf_counter() - start
+        return result
+
+    def _copy_blocks(self, slot: _Slot, result: RefreshResult):
+        checksums = []
+        copied = 0
+        mode = "r+b" if os.path.exists(slot.path) else "w+b"
+        with open(self.source_path, "rb") as source, open(slot.path, mode) as target:
+            while True:
+                block = source.read(self.block_size)
+                if not block:
+                    break
+                index = len(checksums)
+                digest = hashlib.blake2b(block, digest_size=_DIGEST_SIZE).hexdigest()
+                if index >= len(slot.checksums) or slot.checksums[index] != digest:
+                    target.seek(index * self.block_size)
+                    target.write(block)
+                    result.blocks_copied += 1
+                    result.bytes_copied += len(block)
+                checksums.append(digest)
+                copied += len(block)
+            target.truncate(copied)
+        result.blocks_checked += len(checksums)
+        slot.checksums = checksums
+
+
+@dataclass
+class _Generation:
+    """Conexión abierta sobre una de las copias."""
+    number: int
+    slot: _Slot
+    manager: Any
+    readers: int = 0
+    retired: bool = False
+
+
+class LocalReadCache:
+    """Consultas de lectura sobre una copia local que se refresca según el desfase admitido."""
+
+    def __init__(self, source_path: str, cache_dir: str, manager_factory: Callable[[], Any],
+                 password: Optional[str] = None, block_size: int = DEFAULT_BLOCK_SIZE,
+                 max_staleness_seconds: float = 30.0, verify_interval_seconds: float = 300.0,
+                 change_token: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            source_path: Archivo de origen (normalmente en una carpeta de red)
+            cache_dir: Directorio local para las copias
+            manager_factory: Crea un gestor sin conectar (como AccessDatabaseManager)
+            password: Contraseña de la base de datos
+            block_size: Tamaño de bloque de la comparación
+            max_staleness_seconds: Desfase admitido por defecto
+            verify_interval_seconds: Cada cuánto se verifica por bloques aunque no cambien tamaño ni fecha
+            change_token: Valor que cambia cuando el propio servidor escribe en el origen;
+                si difiere del de la última comprobación la copia se considera desfasada
+        """
+        self.source_path = source_path
+        self.copy = BlockSyncedCopy(source_path, cache_dir, block_size)
+        self.manager_factory = manager_factory
+        self.password = password
+        self.max_staleness_seconds = max_staleness_seconds
+        self.verify_interval_seconds = verify_interval_seconds
+        self.change_token = change_token
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._current: Optional[_Generation] = None
+        self._generations: List[_Generation] = []
+        self._checked_at = 0.0
+        self._verified_at = 0.0
+        self._token: Any = None
+        self.last_result: Optional[RefreshResult] = None
+        self.refreshes = 0
+        self.swaps = 0
+
+    # Refresco
+
+    def _connect(self, slot: _Slot) -> Any:
+        manager = self.manager_factory()
+        connected = manager.connect(slot.path, self.password) if self.password else manager.connect(slot.path)
+        if not connected:
+            raise ValueError(f"No se pudo abrir la copia local {slot.path}")
+        return manager
+
+    def _idle_slot(self) -> Optional[_Slot]:
+        """Copia que no está en uso por ninguna conexión abierta."""
+        with self._lock:
+            busy = {id(generation.slot) for generation in self._generations}
+        for slot in self.copy.slots:
+            if id(slot) not in busy:
+                return slot
+        return None
+
+    def refresh(self, force: bool = False) -> RefreshResult:
+        """
+        Comprobar el origen y, si cambió, preparar la otra copia y cambiar la conexión.
+
+        Args:
+            force: Verificar por bloques aunque no cambien tamaño ni fecha
+        """
+        with self._refresh_lock:
+            token = self.change_token() if self.change_token else None
+            now = time.monotonic()
+            verify = (force or self._current is None or token != self._token or
+                      now - self._verified_at >= self.verify_interval_seconds)
+            current = self._current
+            if current is not None and not verify and current.slot.matches(os.stat(self.source_path)):
+                self._checked_at = now
+                result = RefreshResult(changed=False, generation=current.number)
+                self.last_result = result
+                return result
+
+            if current is None:
+                slot = self.copy.slots[0]
+            else:
+                slot = self._idle_slot()
+                if slot is None:
+                    # La otra copia sigue abierta por lecturas largas: se mantiene la versión actual
+                    logger.info("Copia local ocupada; se mantiene la versión actual")
+                    return RefreshResult(changed=False, generation=current.number, consistent=False)
+
+            # La otra copia se pone al día en la misma pasada que detecta los cambios
+            result = self.copy.sync_into(slot, force=verify)
+            self.refreshes += 1
+            self._checked_at = now
+            self._token = token
+            if verify:
+                self._verified_at = now
+
+            if current is None:
+                self._swap(slot)
+                result.changed = True
+            elif not result.consistent:
+                # El origen no se estabilizó: se sigue con la versión anterior
+                result.changed = False
+            elif slot.checksums != current.slot.checksums:
+                self._swap(slot)
+                result.changed = True
+            else:
+                result.changed = False
+                # Mismo contenido: la versión actual se da por comprobada
+                current.slot.source_size, current.slot.source_mtime_ns = slot.source_size, slot.source_mtime_ns
+            result.generation = self._current.number
+            self.last_result = result
+            return result
+
+    def _swap(self, slot: _Slot):
+        manager = self._connect(slot)
+        with self._lock:
+            previous = self._current
+            number = previous.number + 1 if previous else 1
+            self._current = _Generation(number, slot, manager)
+            self._generations.append(self._current)
+            self.swaps += 1
+            if previous is not None:
+                previous.retired = True
+                to_close = self._collect(previous)
+            else:
+                to_close = None
+        if to_close is not None:
+            to_close.manager.disconnect()
+
+    def _collect(self, generation: _Generation) -> Optional[_Generation]:
+        """Quitar una versión retirada sin lecturas (con ``_lock`` tomado)."""
+        if generation.retired and generation.readers == 0:
+            self._generations.remove(generation)
+            return generation
+        return None
+
+    # Lecturas
+
+    def is_stale(self, max_staleness_seconds: Optional[float] = None) -> bool:
+        if self._current is None:
+            return True
+        if self.change_token is not None and self.change_token() != self._token:
+            return True
+        limit = self.max_staleness_seconds if max_staleness_seconds is None else max_staleness_seconds
+        return time.monotonic() - self._checked_at > limit
+
+    def open_query(self, query: str, params: Optional[List] = None,
+                   max_staleness_seconds: Optional[float] = None):
+        """Abrir una consulta en la copia local, refrescándola si supera el desfase admitido."""
+        if self.is_stale(max_staleness_seconds):
+            self.refresh()
+        with self._lock:
+            generation = self._current
+            generation.readers += 1
+        try:
+            stream = generation.manager.open_query(query, params)
+        except Exception:
+            self._release(generation)
+            raise
+        previous_on_close = stream.on_close
+
+        def on_close(closed_stream):
+            if previous_on_close is not None:
+                previous_on_close(closed_stream)
+            self._release(generation)
+
+        stream.on_close = on_close
+        return stream
+
+    def _release(self, generation: _Generation):
+        with self._lock:
+            generation.readers -= 1
+            to_close = self._collect(generation)
+        if to_close is not None:
+            to_close.manager.disconnect()
+
+    @property
+    def active_path(self) -> Optional[str]:
+        return self._current.slot.path if self._current else None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            open_generations = len(self._generations)
+        age = time.monotonic() - self._checked_at if current else None
+        return {
+            "source_path": self.source_path,
+            "local_path": current.slot.path if current else None,
+            "generation": current.number if current else 0,
+            "seconds_since_check": age,
+            "max_staleness_seconds": self.max_staleness_seconds,
+            "open_connections": open_generations,
+            "refreshes": self.refreshes,
+            "swaps": self.swaps,
+            "last_refresh": self.last_result.describe() if self.last_result else None
+        }
+
+    def close(self):
+        with self._lock:
+            generations, self._generations = self._generations, []
+            self._current = None
+        for generation in generations:
+            try:
+                generation.manager.disconnect()
+            except Exception as e:
+                logger.debug(f"Error cerrando la copia local: {e}")
@@ -0,0 +1,441 @@
+"""
+Planificación de escrituras sobre archivos Access compartidos.
+
+Cuando el .accdb/.mdb está en una carpeta compartida y lo usan a la vez
+otros front-ends de Access, las escrituras del servidor chocan con los
+bloqueos de página o de registro de esos usuarios y el driver devuelve
+errores genéricos. ``WriteScheduler``:
+
+- pone las escrituras en una cola que atiende un único hilo y agrupa las
+  que llegan a la vez en una sola transacción (un único commit); un grupo
+  de sentencias que deben ir juntas (``execute_transaction``) o una función
+  que escribe por su cuenta (``execute_call``, p. ej. un ``executemany``)
+  se ejecutan solas, en su propia transacción
+- da prioridad a las lecturas: un lote no empieza mientras haya lecturas
+  en curso de otros hilos (con un tiempo máximo de espera)
+- reintenta los conflictos de bloqueo con espera exponencial y, si se
+  agotan los intentos, informa de quién figura en el archivo de bloqueo
+- publica la profundidad de la cola y los tiempos de espera en ``metrics``
+
+El archivo de bloqueo (.laccdb para .accdb, .ldb para .mdb) tiene una
+entrada de 64 bytes por conexión: 32 bytes con el nombre del equipo y 32
+con el usuario de seguridad (normalmente "Admin"). Access no borra las
+entradas de quien se desconecta mientras quede alguien conectado, así que
+la lista puede incluir usuarios que ya no están; si el archivo no existe,
+no hay nadie conectado.
+"""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .metrics import KIND_WAIT, REGISTRY, MetricsRegistry
+    from .query_control import QueryCancelledError, current_scope
+except ImportError:
+    from metrics import KIND_WAIT, REGISTRY, MetricsRegistry
+    from query_control import QueryCancelledError, current_scope
+
+logger = logging.getLogger(__name__)
+
+LOCK_ENTRY_SIZE = 64
+LOCK_NAME_SIZE = 32
+
+# Números de error de Jet/ACE que indican un bloqueo de otro usuario
+# (el driver ODBC los incluye en el mensaje como "(-3218)")
+LOCK_ERROR_CODES = {3006, 3008, 3009, 3045, 3050, 3186, 3187, 3188, 3189, 3197, 3202, 3211, 3212, 3218,
+                    3260, 3261, 3734}
+_ERROR_CODE = re.compile(r"\(-?(\d{4})\)")
+_LOCK_MESSAGE = re.compile(
+    r"currently locked|locked by|could not lock|couldn't lock|already in use|exclusively locked|"
+    r"bloqueado|bloqueada|no se pudo bloquear|ya está en uso|está en uso",
+    re.IGNORECASE
+)
+
+Statement = Tuple[str, Optional[Sequence[Any]]]
+
+
+class LockConflictError(Exception):
+    """La escritura siguió bloqueada por otro usuario tras todos los reintentos."""
+
+
+def lock_file_path(database_path: str) -> str:
+    """Ruta del archivo de bloqueo de una base de datos."""
+    base, extension = os.path.splitext(database_path)
+    return base + (".laccdb" if extension.lower() == ".accdb" else ".ldb")
+
+
+def is_lock_conflict(error: BaseException) -> bool:
+    """Si un error del driver se debe a un bloqueo de otro usuario."""
+    message = str(error)
+    codes = {int(code) for code in _ERROR_CODE.findall(message)}
+    return bool(codes & LOCK_ERROR_CODES) or bool(_LOCK_MESSAGE.search(message))
+
+
+@dataclass
+class LockFileUser:
+    """Entrada del archivo de bloqueo."""
+    machine: str
+    user: str
+
+    def __str__(self) -> str:
+        return f"{self.machine} ({self.user})" if self.user else self.machine
+
+
+@dataclass
+class LockFileStatus:
+    """Contenido del archivo de bloqueo en un momento dado."""
+    path: str
+    exists: bool
+    users: List[LockFileUser] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def describe(self) -> str:
+        if self.error:
+            return f"no se pudo leer {self.path}: {self.error}"
+        if not self.exists:
+            return "sin archivo de bloqueo (nadie más conectado)"
+        if not self.users:
+            return "archivo de bloqueo vacío"
+        return ", ".join(str(user) for user in self.users)
+
+
+def _decode_name(raw: bytes) -> str:
+    return raw.split(b"\x00", 1)[0].decode("cp1252", errors="replace").strip()
+
+
+def read_lock_file(database_path: str) -> LockFileStatus:
+    """Leer las entradas del archivo de bloqueo de ``database_path``."""
+    path = lock_file_path(database_path)
+    try:
+        with open(path, "rb") as lock_file:
+            data = lock_file.read()
+    except FileNotFoundError:
+        return LockFileStatus(path, exists=False)
+    except OSError as e:
+        # En Windows el archivo puede estar abierto en exclusiva por Access
+        return LockFileStatus(path, exists=True, error=str(e))
+
+    users = []
+    for offset in range(0, len(data) - LOCK_ENTRY_SIZE + 1, LOCK_ENTRY_SIZE):
+        machine = _decode_name(data[offset:offset + LOCK_NAME_SIZE])
+        user = _decode_name(data[offset + LOCK_NAME_SIZE:offset + LOCK_ENTRY_SIZE])
+        if machine or user:
+            users.append(LockFileUser(machine, user))
+    return LockFileStatus(path, exists=True, users=users)
+
+
+@dataclass
+class _WriteRequest:
+    statement: Optional[Statement]
+    future: Future
+    submitted_at: float
+    thread_id: int
+    # Transacción propia: función que escribe y confirma (o deshace) por su cuenta
+    call: Optional[Callable[[], Any]] = None
+    # Escrituras que contiene (para las estadísticas)
+    writes: int = 1
+
+
+class WriteScheduler:
+    """Cola de escrituras con lotes, prioridad de lectura y reintentos."""
+
+    def __init__(self, execute_batch: Callable[[List[Statement]], List[Any]],
+                 lock_status: Optional[Callable[[], LockFileStatus]] = None,
+                 batch_size: int = 50, max_retries: int = 8,
+                 backoff_initial_seconds: float = 0.05, backoff_max_seconds: float = 2.0,
+                 max_reader_wait_seconds: float = 5.0, name: str = "write_queue",
+                 registry: Optional[MetricsRegistry] = None, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            execute_batch: Ejecuta las sentencias en una transacción y devuelve un
+                resultado por sentencia; si falla debe deshacerla entera
+            lock_status: Devuelve el estado del archivo de bloqueo (para los mensajes)
+            batch_size: Escrituras máximas por transacción
+            max_retries: Reintentos ante un conflicto de bloqueo
+            backoff_initial_seconds: Primera espera entre reintentos (se duplica en cada uno)
+            backoff_max_seconds: Espera máxima entre reintentos
+            max_reader_wait_seconds: Tiempo máximo que un lote cede el paso a las lecturas
+            name: Prefijo de las métricas
+        """
+        self.execute_batch = execute_batch
+        self.lock_status = lock_status
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff_initial_seconds = backoff_initial_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.max_reader_wait_seconds = max_reader_wait_seconds
+        self.name = name
+        self.registry = registry or REGISTRY
+        self._sleep = sleep
+
+        self._condition = threading.Condition()
+        self._queue: Deque[_WriteRequest] = deque()
+        self._readers: Dict[int, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.batches = 0
+        self.writes = 0
+        self.conflicts = 0
+        self.failures = 0
+
+    # Lecturas
+
+    def begin_read(self) -> int:
+        """Anotar una lectura en curso del hilo actual; devuelve el valor para ``end_read``."""
+        thread_id = threading.get_ident()
+        with self._condition:
+            self._readers[thread_id] = self._readers.get(thread_id, 0) + 1
+        return thread_id
+
+    def end_read(self, thread_id: int):
+        """Terminar una lectura (el flujo se puede cerrar desde otro hilo)."""
+        with self._condition:
+            count = self._readers.get(thread_id, 0) - 1
+            if count > 0:
+                self._readers[thread_id] = count
+            else:
+                self._readers.pop(thread_id, None)
+            self._condition.notify_all()
+
+    @contextmanager
+    def reading(self):
+        thread_id = self.begin_read()
+        try:
+            yield
+        finally:
+            self.end_read(thread_id)
+
+    @property
+    def active_readers(self) -> int:
+        with self._condition:
+            return sum(self._readers.values())
+
+    # Escrituras
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def in_writer_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, query: str, params: Optional[Sequence[Any]] = None) -> Future:
+        """Encolar una escritura; el ``Future`` devuelve el resultado de ``execute_batch``."""
+        return self._enqueue(_WriteRequest((query, params), Future(), time.perf_counter(), threading.get_ident()))
+
+    def submit_transaction(self, statements: Sequence[Statement]) -> Future:
+        """Encolar sentencias que deben confirmarse juntas; el ``Future`` devuelve un resultado por sentencia."""
+        statements = list(statements)
+        return self.submit_call(lambda: self.execute_batch(statements) if statements else [], len(statements))
+
+    def submit_call(self, call: Callable[[], Any], writes: int = 1) -> Future:
+        """
+        Encolar una función que escribe en su propia transacción.
+
+        Se ejecuta en el hilo escritor, sola, con la misma espera a las
+        lecturas y los mismos reintentos ante bloqueos; debe confirmar o
+        deshacer sus cambios antes de volver.
+        """
+        return self._enqueue(_WriteRequest(None, Future(), time.perf_counter(), threading.get_ident(),
+                                           call=call, writes=writes))
+
+    def _enqueue(self, request: _WriteRequest) -> Future:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("La cola de escrituras está cerrada")
+            self._queue.append(request)
+            self._publish_depth()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return request.future
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> Any:
+        """
+        Encolar una escritura y esperar su resultado.
+
+        Si la llamada se cancela mientras la escritura sigue en la cola, se
+        retira de ella; si ya se está ejecutando, termina con su lote.
+        """
+        return self._wait(self.submit(query, params))
+
+    def execute_transaction(self, statements: Sequence[Statement]) -> List[Any]:
+        """
+        Encolar sentencias que deben confirmarse juntas y esperar sus resultados.
+
+        No se mezclan con otras escrituras: si una falla se deshacen todas y
+        el error llega a quien llama, sin repetirlas por separado.
+        """
+        return self._wait(self.submit_transaction(statements))
+
+    def execute_call(self, call: Callable[[], Any], writes: int = 1) -> Any:
+        """Encolar una función que escribe en su propia transacción y esperar su resultado."""
+        return self._wait(self.submit_call(call, writes))
+
+    def _wait(self, future: Future) -> Any:
+        scope = current_scope()
+        if scope is not None:
+            scope.register(future)
+        try:
+            return future.result()
+        except CancelledError:
+            raise QueryCancelledError((scope.reason if scope else None) or "La escritura fue cancelada")
+        finally:
+            if scope is not None:
+                scope.unregister(future)
+
+    def close(self, timeout: Optional[float] = 30):
+        """Dejar de aceptar escrituras y esperar a que se vacíe la cola."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "active_readers": sum(self._readers.values()),
+                "batches": self.batches,
+                "writes": self.writes,
+                "lock_conflicts": self.conflicts,
+                "failures": self.failures
+            }
+
+    # Hilo escritor
+
+    def _publish_depth(self):
+        self.registry.set_gauge(f"{self.name}.depth", len(self._queue))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                if self._queue[0].call is not None:
+                    batch = [self._queue.popleft()]
+                else:
+                    batch = []
+                    while (self._queue and len(batch) < self.batch_size and
+                           self._queue[0].call is None):
+                        batch.append(self._queue.popleft())
+                self._publish_depth()
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if batch:
+                try:
+                    self._run_batch(batch)
+                except Exception as e:
+                    logger.error(f"Error inesperado en la cola de escrituras: {e}")
+                    for request in batch:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+
+    def _wait_for_readers(self, batch: List[_WriteRequest]):
+        """Ceder el paso a las lecturas en curso (las del propio hilo que escribe no cuentan)."""
+        writers = {request.thread_id for request in batch}
+        started = time.monotonic()
+        deadline = started + self.max_reader_wait_seconds
+        with self._condition:
+            while any(thread_id not in writers for thread_id in self._readers):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.info("Se agotó la espera a las lecturas en curso; se escribe igualmente")
+                    break
+                self._condition.wait(remaining)
+        self.registry.record(KIND_WAIT, f"{self.name}.reader_wait", time.monotonic() - started)
+
+    def _run_batch(self, batch: List[_WriteRequest]):
+        started = time.perf_counter()
+        for request in batch:
+            self.registry.record(KIND_WAIT, f"{self.name}.queue_wait", started - request.submitted_at)
+        self._wait_for_readers(batch)
+        self.batches += 1
+        if batch[0].call is not None:
+            self._run_call(batch[0])
+            return
+        try:
+            statements = [request.statement for request in batch]
+            results = self._with_retries(lambda: self.execute_batch(statements))
+        except Exception as e:
+            if len(batch) > 1 and not isinstance(e, LockConflictError):
+                # Una sentencia del lote falló: se repiten por separado para que
+                # solo falle esa y las demás se escriban
+                for request in batch:
+                    self._run_single(request)
+                return
+            self.failures += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self.writes += len(batch)
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+
+    def _run_call(self, request: _WriteRequest):
+        try:
+            result = self._with_retries(request.call)
+        except Exception as e:
+            self.failures += request.writes
+            request.future.set_exception(e)
+        else:
+            self.writes += request.writes
+            request.future.set_result(result)
+
+    def _run_single(self, request: _WriteRequest):
+        try:
+            result = self._with_retries(lambda: self.execute_batch([request.statement]))[0]
+        except Exception as e:
+            self.failures += 1
+            request.future.set_exception(e)
+        else:
+            self.writes += 1
+            request.future.set_result(result)
+
+    def _with_retries(self, call: Callable[[], Any]) -> Any:
+        delay = self.backoff_initial_seconds
+        waited = 0.0
+        attempt = 0
+        try:
+            while True:
+                try:
+                    return call()
+                except Exception as e:
+                    if not is_lock_conflict(e):
+                        raise
+                    self.conflicts += 1
+                    if attempt >= self.max_retries:
+                        raise LockConflictError(self._conflict_message(attempt + 1, waited, e)) from e
+                    attempt += 1
+                    pause = delay * (0.5 + random.random() / 2)
+                    logger.info(f"Conflicto de bloqueo; reintento {attempt}/{self.max_retries} en {pause:.2f} s")
+                    self._sleep(pause)
+                    waited += pause
+                    delay = min(delay * 2, self.backoff_max_seconds)
+        finally:
+            # Tiempo perdido esperando a que otro usuario libere el bloqueo
+            self.registry.record(KIND_WAIT, f"{self.name}.lock_wait", waited)
+
+    def _conflict_message(self, attempts: int, waited: float, error: Exception) -> str:
+        message = f"La escritura sigue bloqueada tras {attempts} intentos ({waited:.1f} s de espera): {error}"
+        if self.lock_status is not None:
+            try:
+                message += f". Usuarios en el archivo de bloqueo: {self.lock_status().describe()}"
+            except Exception as e:
+                logger.debug(f"No se pudo leer el archivo de bloqueo: {e}")
+        return message
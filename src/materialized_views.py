@@ -0,0 +1,750 @@
+"""
+Vistas materializadas de consultas agregadas.
+
+Los cuadros de mando repiten los mismos ``GROUP BY`` sobre tablas grandes
+de Access. ``MaterializedViewStore`` guarda el resultado de cada consulta
+declarada en un fichero SQLite local y lo sirve desde allí:
+
+- refresco completo: se vuelve a ejecutar la consulta en Access
+- refresco incremental: si la vista declara una columna creciente
+  (``key_column``: autonumérico o fecha de alta) y la consulta es un
+  ``SELECT grupos, SUM/COUNT/MIN/MAX/AVG FROM tabla [WHERE ...] GROUP BY
+  grupos`` de una sola tabla, solo se agregan las filas con la clave mayor
+  que la del refresco anterior y se combinan con los grupos guardados
+
+El incremental no ve las filas modificadas o borradas; para eso cada vista
+puede programar además un refresco completo periódico. Una consulta igual
+a la definición de una vista, o que solo lea vistas por su nombre, se
+responde desde el fichero local.
+
+Los refrescos leen de Access sin bloquear el fichero local: el completo
+carga una tabla aparte que sustituye a la anterior al terminar y el
+incremental aplica los grupos leídos en una sola transacción, así que las
+lecturas de las vistas nunca esperan a Access.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .config import AccessUtils
+    from .database_mirror import _convert_value, quote_identifier, referenced_tables, translate_query
+    from .query_control import CancelScope
+    from .streaming import IterableStream
+except ImportError:
+    from config import AccessUtils
+    from database_mirror import _convert_value, quote_identifier, referenced_tables, translate_query
+    from query_control import CancelScope
+    from streaming import IterableStream
+
+logger = logging.getLogger(__name__)
+
+STATE_TABLE = "_materialized_views"
+DEFAULT_CHECK_SECONDS = 30.0
+
+_TOKEN_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\[[^\]]*\]|#[^#\n]*#|[A-Za-z_][\w$]*|\S",
+                            re.DOTALL)
+_ALIAS_PATTERN = re.compile(r"^(?P<expression>.*?)\s+AS\s+(?P<alias>\[[^\]]+\]|[\w$]+)$", re.IGNORECASE | re.DOTALL)
+_AGGREGATE_PATTERN = re.compile(r"^(?P<function>SUM|COUNT|MIN|MAX|AVG)\s*\((?P<argument>.*)\)$",
+                                re.IGNORECASE | re.DOTALL)
+_SOURCE_PATTERN = re.compile(r"^(?P<table>\[[^\]]+\]|[\w$]+)(?:\s+(?:AS\s+)?(?P<alias>[\w$]+))?$", re.IGNORECASE)
+_NAME_PATTERN = re.compile(r"^(?:(?:\[[^\]]+\]|[\w$]+)\.)?(?P<name>\[[^\]]+\]|[\w$]+)$")
+_VIEW_NAME_PATTERN = re.compile(r"^[A-Za-z_][\w ]{0,63}$")
+_CLAUSES = ("SELECT", "FROM", "WHERE", "GROUP", "HAVING", "ORDER")
+
+
+class ViewDefinitionError(ValueError):
+    """La consulta o los parámetros de la vista no son válidos."""
+
+
+@dataclass
+class ViewColumn:
+    """Columna de una vista agregada: grupo o agregado."""
+    name: str
+    kind: str  # 'group', 'sum', 'count', 'min', 'max', 'avg'
+    expression: str
+
+    @property
+    def storage(self) -> List[str]:
+        """Columnas guardadas (AVG se guarda como suma y recuento)."""
+        if self.kind == "avg":
+            return [f"__sum_{self.name}", f"__count_{self.name}"]
+        return [self.name]
+
+    @property
+    def parts(self) -> List[str]:
+        """Expresiones de Access que calculan las columnas guardadas."""
+        if self.kind == "group":
+            return [self.expression]
+        if self.kind == "avg":
+            return [f"SUM({self.expression})", f"COUNT({self.expression})"]
+        return [f"{self.kind.upper()}({self.expression})"]
+
+
+@dataclass
+class AggregateQuery:
+    """Consulta agregada de una sola tabla que se puede refrescar por incrementos."""
+    source: str
+    where: Optional[str]
+    group_by: List[str]
+    columns: List[ViewColumn]
+    order_by: List[Tuple[str, bool]] = field(default_factory=list)
+
+    def access_sql(self, extra_condition: Optional[str] = None) -> str:
+        """Sentencia de Access que devuelve las columnas guardadas (con alias c0, c1...)."""
+        parts = [part for column in self.columns for part in column.parts]
+        sql = "SELECT " + ", ".join(f"{part} AS [c{position}]" for position, part in enumerate(parts))
+        sql += f" FROM {self.source}"
+        conditions = [f"({condition})" for condition in (self.where, extra_condition) if condition]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if self.group_by:
+            sql += " GROUP BY " + ", ".join(self.group_by)
+        return sql
+
+
+def _tokens(text: str) -> List[Tuple[int, int, str, int]]:
+    """Símbolos con su posición y la profundidad de paréntesis."""
+    tokens = []
+    depth = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token == ")":
+            depth -= 1
+            if depth < 0:
+                raise ViewDefinitionError("Paréntesis sin equilibrar")
+        tokens.append((match.start(), match.end(), token, depth))
+        if token == "(":
+            depth += 1
+    if depth != 0:
+        raise ViewDefinitionError("Paréntesis sin equilibrar")
+    return tokens
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Separar por las comas que no están entre paréntesis."""
+    pieces, start = [], 0
+    for token_start, token_end, token, depth in _tokens(text):
+        if token == "," and depth == 0:
+            pieces.append(text[start:token_start].strip())
+            start = token_end
+    pieces.append(text[start:].strip())
+    return [piece for piece in pieces if piece]
+
+
+def _balanced(text: str) -> bool:
+    """Si los paréntesis del texto están equilibrados (``SUM(a) + SUM(b)`` no es un solo agregado)."""
+    try:
+        _tokens(text)
+    except ViewDefinitionError:
+        return False
+    return True
+
+
+def normalize_sql(text: str) -> str:
+    """Forma canónica para comparar expresiones y consultas (Jet no distingue mayúsculas)."""
+    normalized = []
+    for _, _, token, _ in _tokens(text.strip().rstrip(";")):
+        if token.startswith("[") and re.fullmatch(r"\[[\w$]+\]", token):
+            token = token[1:-1]
+        normalized.append(token.upper())
+    return " ".join(normalized)
+
+
+def _plain_name(expression: str) -> Optional[str]:
+    """Nombre de la columna de ``t.[Col]`` o ``Col`` (None si es una expresión)."""
+    match = _NAME_PATTERN.match(expression.strip())
+    if match is None:
+        return None
+    return match.group("name").strip("[]")
+
+
+def parse_aggregate_query(query: str) -> AggregateQuery:
+    """
+    Analizar ``SELECT grupos, agregados FROM tabla [WHERE] [GROUP BY] [ORDER BY]``.
+
+    Lanza ``ViewDefinitionError`` si la consulta no se puede refrescar por
+    incrementos (varias tablas, DISTINCT, HAVING, COUNT(DISTINCT)...).
+    """
+    text = query.strip().rstrip(";").strip()
+    tokens = _tokens(text)
+    positions: Dict[str, Tuple[int, int]] = {}
+    for index, (start, end, token, depth) in enumerate(tokens):
+        word = token.upper()
+        if depth != 0:
+            continue
+        if word in ("UNION", "JOIN", "DISTINCT", "DISTINCTROW", "TOP", "HAVING", "TRANSFORM", "PIVOT", "INTO"):
+            raise ViewDefinitionError(f"{word} no admite refresco incremental")
+        if word in ("GROUP", "ORDER"):
+            if index + 1 < len(tokens) and tokens[index + 1][2].upper() == "BY":
+                positions.setdefault(word, (start, tokens[index + 1][1]))
+        elif word in _CLAUSES:
+            positions.setdefault(word, (start, end))
+    if not text.upper().startswith("SELECT") or "FROM" not in positions:
+        raise ViewDefinitionError("La vista debe ser un SELECT ... FROM")
+    order = sorted(positions.items(), key=lambda item: item[1][0])
+    clauses = {}
+    for position, (name, (_, body_start)) in enumerate(order):
+        body_end = order[position + 1][1][0] if position + 1 < len(order) else len(text)
+        clauses[name] = text[body_start:body_end].strip()
+
+    source = clauses["FROM"]
+    source_match = _SOURCE_PATTERN.match(source)
+    if source_match is None or "," in source:
+        raise ViewDefinitionError("El refresco incremental necesita una sola tabla en FROM")
+    group_by = _split_top_level(clauses.get("GROUP", ""))
+    groups = {normalize_sql(expression): expression for expression in group_by}
+
+    columns: List[ViewColumn] = []
+    for item in _split_top_level(clauses["SELECT"]):
+        alias_match = _ALIAS_PATTERN.match(item)
+        expression = alias_match.group("expression").strip() if alias_match else item
+        alias = alias_match.group("alias").strip("[]") if alias_match else None
+        aggregate = _AGGREGATE_PATTERN.match(expression)
+        if aggregate and _balanced(aggregate.group("argument")):
+            argument = aggregate.group("argument").strip()
+            if argument.upper().startswith("DISTINCT"):
+                raise ViewDefinitionError("COUNT(DISTINCT ...) no admite refresco incremental")
+            if alias is None:
+                raise ViewDefinitionError(f"Ponga un nombre a '{item}' con AS")
+            columns.append(ViewColumn(alias, aggregate.group("function").lower(), argument))
+        elif normalize_sql(expression) in groups:
+            name = alias or _plain_name(expression)
+            if name is None:
+                raise ViewDefinitionError(f"Ponga un nombre a '{item}' con AS")
+            columns.append(ViewColumn(name, "group", expression))
+        else:
+            raise ViewDefinitionError(f"'{item}' no es un agregado ni una expresión del GROUP BY")
+    if not any(column.kind != "group" for column in columns):
+        raise ViewDefinitionError("La vista no tiene agregados")
+    names = [column.name.lower() for column in columns]
+    if len(set(names)) != len(names):
+        raise ViewDefinitionError("Nombres de columna repetidos en la vista")
+    if len(groups) != sum(1 for column in columns if column.kind == "group"):
+        raise ViewDefinitionError("Todas las expresiones del GROUP BY deben estar en el SELECT")
+
+    order_by = []
+    by_expression = {normalize_sql(column.expression): column.name for column in columns}
+    for term in _split_top_level(clauses.get("ORDER", "")):
+        descending = bool(re.search(r"\s+DESC$", term, re.IGNORECASE))
+        term = re.sub(r"\s+(ASC|DESC)$", "", term, flags=re.IGNORECASE).strip()
+        name = next((column.name for column in columns if column.name.lower() == (_plain_name(term) or "").lower()),
+                    None) or by_expression.get(normalize_sql(term))
+        if name is None:
+            raise ViewDefinitionError(f"ORDER BY {term} no es una columna de la vista")
+        order_by.append((name, descending))
+    return AggregateQuery(source, clauses.get("WHERE") or None, group_by, columns, order_by)
+
+
+@dataclass
+class RefreshResult:
+    """Resultado de refrescar una vista."""
+    name: str
+    mode: str  # 'full', 'incremental', 'unchanged', 'error'
+    rows_read: int = 0
+    groups: int = 0
+    elapsed_seconds: float = 0.0
+    high_water: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class MaterializedView:
+    """Definición y estado de una vista."""
+    name: str
+    query: str
+    key_column: Optional[str] = None
+    refresh_seconds: Optional[float] = None
+    full_refresh_seconds: Optional[float] = None
+    max_staleness_seconds: Optional[float] = None
+    high_water: Any = None
+    refreshed_at: Optional[float] = None
+    full_refreshed_at: Optional[float] = None
+    row_count: int = 0
+    columns: List[str] = field(default_factory=list)
+
+    @property
+    def aggregate(self) -> Optional[AggregateQuery]:
+        try:
+            return parse_aggregate_query(self.query)
+        except ViewDefinitionError:
+            return None
+
+    @property
+    def storage_table(self) -> str:
+        return f"_mv_{self.name}"
+
+    def age_seconds(self, now: Optional[float] = None) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return (now or time.time()) - self.refreshed_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        age = self.age_seconds()
+        return {
+            "name": self.name,
+            "query": self.query,
+            "key_column": self.key_column,
+            "incremental": self.key_column is not None,
+            "refresh_seconds": self.refresh_seconds,
+            "full_refresh_seconds": self.full_refresh_seconds,
+            "max_staleness_seconds": self.max_staleness_seconds,
+            "high_water": self.high_water,
+            "row_count": self.row_count,
+            "columns": self.columns,
+            "age_seconds": round(age, 1) if age is not None else None,
+        }
+
+
+def _encode_key(value: Any) -> Optional[str]:
+    """Guardar la última clave conservando las fechas."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return json.dumps({"datetime": value.isoformat()})
+    if isinstance(value, date):
+        return json.dumps({"date": value.isoformat()})
+    return json.dumps({"value": _convert_value(value)})
+
+
+def _decode_key(text: Optional[str]) -> Any:
+    if text is None:
+        return None
+    data = json.loads(text)
+    if "datetime" in data:
+        return datetime.fromisoformat(data["datetime"])
+    if "date" in data:
+        return date.fromisoformat(data["date"])
+    return data["value"]
+
+
+def _due(view: MaterializedView, now: Optional[float] = None) -> Optional[bool]:
+    """Refresco programado pendiente de una vista: True completo, False incremental, None ninguno."""
+    now = now or time.time()
+    if view.full_refresh_seconds and (view.full_refreshed_at is None
+                                      or now - view.full_refreshed_at >= view.full_refresh_seconds):
+        return True
+    if view.refresh_seconds and (view.refreshed_at is None or now - view.refreshed_at >= view.refresh_seconds):
+        return False
+    return None
+
+
+def _stale(view: MaterializedView) -> bool:
+    """Si la vista es más antigua de lo que admite para responder consultas."""
+    age = view.age_seconds()
+    return view.max_staleness_seconds is not None and (age is None or age > view.max_staleness_seconds)
+
+
+def _combine(column: str, kind: str) -> Tuple[str, int]:
+    """Expresión SQLite que combina el valor guardado con el del incremento (y nº de parámetros)."""
+    quoted = quote_identifier(column)
+    if kind == "count":
+        return f"{quoted} + ?", 1
+    if kind == "sum":
+        return f"CASE WHEN ? IS NULL THEN {quoted} WHEN {quoted} IS NULL THEN ? ELSE {quoted} + ? END", 3
+    if kind in ("min", "max"):
+        operator = "<" if kind == "min" else ">"
+        return (f"CASE WHEN ? IS NULL THEN {quoted} WHEN {quoted} IS NULL OR ? {operator} {quoted} "
+                f"THEN ? ELSE {quoted} END"), 3
+    return quoted, 0
+
+
+class MaterializedViewStore:
+    """Vistas materializadas de una base de datos en un fichero SQLite local."""
+
+    def __init__(self, db_manager, path: str, batch_size: int = 1000, refresh_timeout: Optional[float] = None):
+        """
+        Inicializar el almacén.
+
+        Args:
+            db_manager: Instancia de AccessDatabaseManager conectada
+            path: Fichero SQLite de las vistas
+            batch_size: Filas por lote al leer de Access
+            refresh_timeout: Tiempo máximo de cada ronda de refrescos
+                programados en segundo plano (None = sin límite)
+        """
+        self.db_manager = db_manager
+        self.path = path
+        self.batch_size = batch_size
+        self.refresh_timeout = refresh_timeout
+        # Protege el fichero SQLite y el diccionario de vistas; nunca se
+        # mantiene mientras se lee de Access
+        self._lock = threading.RLock()
+        # Un refresco a la vez por vista
+        self._refreshing: Dict[str, threading.Lock] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._scope: Optional[CancelScope] = None
+        # Las transacciones se abren a mano (BEGIN) para que el DDL también se deshaga
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} ("
+            "name VARCHAR PRIMARY KEY, query VARCHAR, key_column VARCHAR, refresh_seconds REAL, "
+            "full_refresh_seconds REAL, max_staleness_seconds REAL, high_water VARCHAR, refreshed_at REAL, "
+            "full_refreshed_at REAL, row_count INTEGER, columns VARCHAR)"
+        )
+        self._views: Dict[str, MaterializedView] = {}
+        for row in self.connection.execute(f"SELECT * FROM {STATE_TABLE}"):
+            view = MaterializedView(row[0], row[1], row[2], row[3], row[4], row[5], _decode_key(row[6]),
+                                    row[7], row[8], row[9] or 0, json.loads(row[10] or "[]"))
+            self._views[view.name.lower()] = view
+
+    @contextmanager
+    def _transaction(self):
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    # Definición
+
+    def create(self, name: str, query: str, key_column: Optional[str] = None,
+               refresh_seconds: Optional[float] = None, full_refresh_seconds: Optional[float] = None,
+               max_staleness_seconds: Optional[float] = None, replace: bool = False) -> RefreshResult:
+        """Declarar una vista y cargarla con un refresco completo."""
+        if not _VIEW_NAME_PATTERN.match(name):
+            raise ViewDefinitionError("El nombre de la vista solo admite letras, números, espacios y '_'")
+        if not query.strip().upper().startswith("SELECT"):
+            raise ViewDefinitionError("La vista debe ser una consulta SELECT")
+        if key_column is not None:
+            # El incremental necesita una consulta agregada descomponible
+            parse_aggregate_query(query)
+        with self._guard(name):
+            if name.lower() in self._views and not replace:
+                raise ViewDefinitionError(f"Ya existe la vista '{name}' (use replace)")
+            if name.lower() in {table.lower() for table in self.db_manager.list_tables()}:
+                raise ViewDefinitionError(f"'{name}' es una tabla de la base de datos")
+            # La vista se publica al terminar la primera carga (y sustituye a la anterior)
+            view = MaterializedView(name, query.strip().rstrip(";").strip(), key_column, refresh_seconds,
+                                    full_refresh_seconds, max_staleness_seconds)
+            return self._refresh_full(view)
+
+    def drop(self, name: str) -> bool:
+        with self._guard(name), self._lock:
+            self._refreshing.pop(name.lower(), None)
+            view = self._views.pop(name.lower(), None)
+            if view is None:
+                return False
+            with self._transaction():
+                self.connection.execute(f"DROP VIEW IF EXISTS {quote_identifier(view.name)}")
+                self.connection.execute(f"DROP TABLE IF EXISTS {quote_identifier(view.storage_table)}")
+                self.connection.execute(f"DELETE FROM {STATE_TABLE} WHERE name = ?", [view.name])
+            return True
+
+    def get(self, name: str) -> MaterializedView:
+        view = self._views.get(name.lower())
+        if view is None:
+            raise KeyError(f"No existe la vista materializada '{name}'")
+        return view
+
+    def list(self) -> List[MaterializedView]:
+        with self._lock:
+            views = list(self._views.values())
+        return sorted(views, key=lambda view: view.name.lower())
+
+    # Refresco
+
+    def _guard(self, name: str) -> threading.Lock:
+        """Bloqueo de los refrescos de una vista (se toma antes que el del almacén)."""
+        with self._lock:
+            return self._refreshing.setdefault(name.lower(), threading.Lock())
+
+    def refresh(self, name: str, full: bool = False) -> RefreshResult:
+        """Refrescar una vista: por incremento si declara ``key_column`` (salvo ``full``)."""
+        return self._refresh(name, full)
+
+    def _refresh(self, name: str, full: bool = False,
+                 needed: Optional[Callable[[MaterializedView], bool]] = None) -> RefreshResult:
+        with self._guard(name):
+            view = self.get(name)
+            if needed is not None and not needed(view):
+                # Otro hilo la refrescó mientras se esperaba
+                return RefreshResult(view.name, "unchanged", groups=view.row_count, high_water=view.high_water)
+            if full or view.key_column is None or view.high_water is None:
+                return self._refresh_full(view)
+            return self._refresh_incremental(view)
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[str, bool]]:
+        """Vistas con un refresco programado pendiente: ``(nombre, completo)``."""
+        now = now or time.time()
+        due = []
+        for view in self.list():
+            full = _due(view, now)
+            if full is not None:
+                due.append((view.name, full))
+        return due
+
+    def refresh_due(self) -> List[RefreshResult]:
+        """Hacer los refrescos programados pendientes (los errores se anotan en el resultado)."""
+        results = []
+        for name, full in self.due():
+            try:
+                results.append(self._refresh(name, full=full, needed=lambda view: _due(view) is not None))
+            except Exception as e:
+                logger.error(f"Error refrescando la vista materializada {name}: {e}")
+                results.append(RefreshResult(name, "error", error=str(e)))
+        return results
+
+    def start(self, check_seconds: float = DEFAULT_CHECK_SECONDS):
+        """Comprobar en segundo plano los refrescos programados cada ``check_seconds``."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(check_seconds):
+                if self.db_manager.is_connected():
+                    self._refresh_in_background()
+
+        self._thread = threading.Thread(target=run, name="materialized-views", daemon=True)
+        self._thread.start()
+
+    def _refresh_in_background(self):
+        """Refrescos programados con su propio ámbito de cancelación y tiempo máximo."""
+        scope = CancelScope(self.refresh_timeout)
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self._scope = scope
+        timer = None
+        if scope.timeout:
+            timer = threading.Timer(scope.timeout, scope.cancel, ["tiempo máximo agotado"])
+            timer.daemon = True
+            timer.start()
+        try:
+            scope.run(self.refresh_due)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                self._scope = None
+
+    def close(self):
+        with self._lock:
+            self._stop.set()
+            scope = self._scope
+        if scope is not None:
+            scope.cancel("vistas materializadas cerradas")
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            self.connection.close()
+
+    def _high_water(self, view: MaterializedView, aggregate: AggregateQuery) -> Any:
+        sql = (f"SELECT MAX({AccessUtils.escape_sql_identifier(view.key_column)}) AS [high_water] "
+               f"FROM {aggregate.source}")
+        if aggregate.where:
+            sql += f" WHERE ({aggregate.where})"
+        results = self.db_manager.execute_query(sql)
+        return next(iter(results[0].values())) if results else None
+
+    def _publish(self, view: MaterializedView):
+        """Sustituir la vista publicada (con el bloqueo y tras confirmar la transacción)."""
+        self._views[view.name.lower()] = view
+
+    def _refresh_full(self, view: MaterializedView) -> RefreshResult:
+        start = time.perf_counter()
+        aggregate = view.aggregate
+        high_water = self._high_water(view, aggregate) if view.key_column else None
+        if view.key_column and high_water is not None:
+            condition = f"{AccessUtils.escape_sql_identifier(view.key_column)} <= ?"
+            sql, params = aggregate.access_sql(condition), [high_water]
+        elif aggregate is not None:
+            sql, params = aggregate.access_sql(), None
+        else:
+            sql, params = view.query, None
+
+        table = quote_identifier(view.storage_table)
+        # Se carga en una tabla aparte: las lecturas siguen viendo la anterior hasta el cambio
+        staging = quote_identifier(view.storage_table + "_refresh")
+        rows = 0
+        try:
+            with self.db_manager.open_query(sql, params, batch_size=self.batch_size) as stream:
+                if aggregate is not None:
+                    storage = [name for column in aggregate.columns for name in column.storage]
+                    types = ["" if column.kind == "group" else " NUMERIC"
+                             for column in aggregate.columns for _ in column.storage]
+                else:
+                    storage, types = list(stream.columns), [""] * len(stream.columns)
+                insert = (f"INSERT INTO {staging} VALUES ({', '.join('?' for _ in storage)})")
+                with self._lock:
+                    self.connection.execute(f"DROP TABLE IF EXISTS {staging}")
+                    self.connection.execute(f"CREATE TABLE {staging} ("
+                                            + ", ".join(quote_identifier(name) + kind
+                                                        for name, kind in zip(storage, types)) + ")")
+                for batch in stream.iter_batches():
+                    values = [[_convert_value(value) for value in row] for row in batch]
+                    with self._lock, self._transaction():
+                        self.connection.executemany(insert, values)
+                    rows += len(batch)
+            # Se trabaja sobre una copia: si la transacción falla la vista publicada no cambia
+            now = time.time()
+            updated = replace(view, columns=[column.name for column in aggregate.columns] if aggregate else storage,
+                              high_water=high_water if view.key_column else view.high_water,
+                              refreshed_at=now, full_refreshed_at=now, row_count=rows)
+            with self._lock:
+                with self._transaction():
+                    self.connection.execute(f"DROP VIEW IF EXISTS {quote_identifier(view.name)}")
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+                    self.connection.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+                    if aggregate is not None and aggregate.group_by:
+                        groups = [quote_identifier(column.name) for column in aggregate.columns
+                                  if column.kind == "group"]
+                        self.connection.execute(f"CREATE INDEX {quote_identifier(view.storage_table + '_groups')} "
+                                                f"ON {table} ({', '.join(groups)})")
+                    self.connection.execute(
+                        f"CREATE VIEW {quote_identifier(view.name)} AS {self._select(view, aggregate)}")
+                    self._save(updated)
+                self._publish(updated)
+        except BaseException:
+            with self._lock:
+                try:
+                    self.connection.execute(f"DROP TABLE IF EXISTS {staging}")
+                except sqlite3.Error as e:
+                    logger.debug(f"No se pudo quitar la carga incompleta de {view.name}: {e}")
+            raise
+        elapsed = time.perf_counter() - start
+        logger.info(f"Vista materializada {view.name}: refresco completo, {rows} filas en {elapsed:.2f} s")
+        return RefreshResult(view.name, "full", rows, rows, elapsed, updated.high_water)
+
+    def _refresh_incremental(self, view: MaterializedView) -> RefreshResult:
+        start = time.perf_counter()
+        aggregate = view.aggregate
+        high_water = self._high_water(view, aggregate)
+        if high_water is None or high_water == view.high_water:
+            updated = replace(view, columns=list(view.columns), refreshed_at=time.time())
+            with self._lock:
+                self._save(updated)
+                self._publish(updated)
+            return RefreshResult(view.name, "unchanged", groups=view.row_count,
+                                 elapsed_seconds=time.perf_counter() - start, high_water=view.high_water)
+
+        key = AccessUtils.escape_sql_identifier(view.key_column)
+        sql = aggregate.access_sql(f"{key} > ? AND {key} <= ?")
+        table = quote_identifier(view.storage_table)
+        group_columns = [column for column in aggregate.columns if column.kind == "group"]
+        # Posición de cada columna guardada en las filas de Access
+        group_positions, measure_positions, position = [], [], 0
+        for column in aggregate.columns:
+            for _ in column.storage:
+                (group_positions if column.kind == "group" else measure_positions).append(position)
+                position += 1
+        where = " AND ".join(f"{quote_identifier(column.name)} IS ?" for column in group_columns) or "1 = 1"
+        assignments = []
+        for column in aggregate.columns:
+            if column.kind == "group":
+                continue
+            kinds = ["sum", "count"] if column.kind == "avg" else [column.kind]
+            for name, kind in zip(column.storage, kinds):
+                expression, count = _combine(name, kind)
+                assignments.append((f"{quote_identifier(name)} = {expression}", count))
+        update = f"UPDATE {table} SET {', '.join(text for text, _ in assignments)} WHERE {where}"
+        insert = f"INSERT INTO {table} VALUES ({', '.join('?' for column in aggregate.columns for _ in column.storage)})"
+
+        # El incremento (un grupo por fila) se lee entero de Access antes de
+        # tocar el fichero local, donde se aplica en una sola transacción
+        with self.db_manager.open_query(sql, [view.high_water, high_water], batch_size=self.batch_size) as stream:
+            increment = [row for batch in stream.iter_batches() for row in batch]
+        # Se trabaja sobre una copia: si la transacción falla la vista publicada no cambia
+        updated = replace(view, columns=list(view.columns), high_water=high_water)
+        with self._lock:
+            with self._transaction():
+                for row in increment:
+                    values = [_convert_value(value) for value in row]
+                    groups = [values[position] for position in group_positions]
+                    measures = [values[position] for position in measure_positions]
+                    params = [value for value, (_, count) in zip(measures, assignments) for _ in range(count)]
+                    cursor = self.connection.execute(update, params + groups)
+                    if cursor.rowcount == 0:
+                        self.connection.execute(insert, values)
+                        updated.row_count += 1
+                updated.refreshed_at = time.time()
+                self._save(updated)
+            self._publish(updated)
+        rows_read = len(increment)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Vista materializada {view.name}: {rows_read} grupos nuevos o cambiados en {elapsed:.2f} s")
+        return RefreshResult(view.name, "incremental", rows_read, updated.row_count, elapsed, high_water)
+
+    def _select(self, view: MaterializedView, aggregate: Optional[AggregateQuery]) -> str:
+        """SELECT de la vista SQLite con las columnas visibles (AVG a partir de suma y recuento)."""
+        table = quote_identifier(view.storage_table)
+        if aggregate is None:
+            return f"SELECT * FROM {table} ORDER BY rowid"
+        items = []
+        for column in aggregate.columns:
+            if column.kind == "avg":
+                total, count = (quote_identifier(name) for name in column.storage)
+                items.append(f"CASE WHEN {count} > 0 THEN {total} * 1.0 / {count} END AS {quote_identifier(column.name)}")
+            else:
+                items.append(quote_identifier(column.name))
+        sql = f"SELECT {', '.join(items)} FROM {table}"
+        if aggregate.order_by:
+            sql += " ORDER BY " + ", ".join(quote_identifier(name) + (" DESC" if descending else "")
+                                            for name, descending in aggregate.order_by)
+        return sql
+
+    def _save(self, view: MaterializedView):
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [view.name, view.query, view.key_column, view.refresh_seconds, view.full_refresh_seconds,
+             view.max_staleness_seconds, _encode_key(view.high_water), view.refreshed_at, view.full_refreshed_at,
+             view.row_count, json.dumps(view.columns)]
+        )
+
+    # Lecturas
+
+    def match(self, query: str) -> Optional[str]:
+        """Vista que responde a la consulta: misma definición o solo lee vistas por su nombre."""
+        if not self._views or not query.strip().upper().startswith("SELECT"):
+            return None
+        with self._lock:
+            views = dict(self._views)
+        normalized = normalize_sql(query)
+        for view in views.values():
+            if normalize_sql(view.query) == normalized:
+                return view.name
+        tables = referenced_tables(query)
+        if tables and all(table in views for table in tables):
+            return views[sorted(tables)[0]].name
+        return None
+
+    def open_query(self, query: str, params: Optional[Sequence[Any]] = None) -> Optional[IterableStream]:
+        """Responder la consulta desde las vistas (None si ninguna la cubre)."""
+        name = self.match(query)
+        if name is None:
+            return None
+        # Refrescar antes las vistas demasiado antiguas (sin bloquear las demás lecturas)
+        names = {name.lower()} | referenced_tables(query)
+        with self._lock:
+            stale = [view.name for key, view in self._views.items() if key in names and _stale(view)]
+        for stale_name in stale:
+            try:
+                self._refresh(stale_name, needed=_stale)
+            except KeyError:
+                continue
+        with self._lock:
+            view = self._views.get(name.lower())
+            if view is None:
+                # Se borró mientras se refrescaba
+                return None
+            if normalize_sql(view.query) == normalize_sql(query):
+                sql, params = f"SELECT * FROM {quote_identifier(view.name)}", None
+            else:
+                sql = translate_query(query)
+            cursor = self.connection.execute(sql, list(params or []))
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return IterableStream(columns, rows, self.batch_size)
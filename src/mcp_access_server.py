@@ -4,59 +4,194 @@ Servidor MCP para manipular bases de datos de Microsoft Access.
 Proporciona herramientas completas para gestionar tablas, consultas y datos.
 """
 
+import importlib
+
+def _warm_up_sdk():
+    """Importar el SDK de MCP mientras el cliente prepara su primera llamada."""
+    for name in ("mcp.types", "mcp.server.models", "mcp.server", "mcp.server.stdio"):
+        importlib.import_module(name)
+
+# Como proceso del cliente MCP se responde al saludo inicial antes de
+# importar nada pesado (ver startup_manifest)
+_startup_handshake = None
+if __name__ == "__main__":
+    from startup_manifest import serve_startup_handshake
+    _startup_handshake = serve_startup_handshake(_warm_up_sdk)
+
 import asyncio
+import contextvars
+import hashlib
+import json
 import logging
+import os
 import sys
-from typing import Any, Dict, List, Optional, Sequence
-import pyodbc
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence
 from pathlib import Path
 
-# COM automation imports
-try:
-    import win32com.client
-    import pythoncom
-    COM_AVAILABLE = True
-except ImportError:
-    COM_AVAILABLE = False
-    logging.warning("pywin32 no está disponible. Funcionalidad COM deshabilitada.")
-
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 import mcp.server.stdio
-from mcp.types import (
-    Resource,
-    Tool,
-    TextContent,
-    ImageContent,
-    EmbeddedResource,
-    LoggingLevel
-)
-from pydantic import AnyUrl
+from mcp.types import Tool
 import mcp.types as types
 
-# Importar módulo de documentación mejorada
+# pyodbc, pywin32 y el módulo de documentación mejorada se importan la primera
+# vez que se usan: el cliente MCP lanza un proceso nuevo por sesión y estas
+# importaciones retrasaban la primera respuesta de list_tools.
+class _LazyModule:
+    """Módulo que se importa al acceder a su primer atributo."""
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+pyodbc = _LazyModule("pyodbc")
+win32com = None
+pythoncom = None
+EnhancedDocumentationGenerator = None
+_com_import_attempted = False
+_enhanced_doc_import_attempted = False
+
+def _load_com() -> bool:
+    """Importar pywin32 al pedir relaciones por COM; devuelve si está disponible."""
+    global win32com, pythoncom, _com_import_attempted
+    if not _com_import_attempted:
+        _com_import_attempted = True
+        try:
+            import win32com.client
+            import pythoncom
+        except ImportError:
+            logging.warning("pywin32 no está disponible. Funcionalidad COM deshabilitada.")
+    return win32com is not None and pythoncom is not None
+
+def _load_enhanced_documentation() -> bool:
+    """Importar el módulo de documentación mejorada; devuelve si está disponible."""
+    global EnhancedDocumentationGenerator, _enhanced_doc_import_attempted
+    if not _enhanced_doc_import_attempted:
+        _enhanced_doc_import_attempted = True
+        try:
+            from .enhanced_documentation import EnhancedDocumentationGenerator
+        except ImportError:
+            try:
+                from enhanced_documentation import EnhancedDocumentationGenerator
+            except ImportError:
+                logging.warning("Módulo de documentación mejorada no disponible")
+    return EnhancedDocumentationGenerator is not None
+
+def __getattr__(name: str):
+    """Mantener COM_AVAILABLE y ENHANCED_DOC_AVAILABLE como atributos del módulo."""
+    if name == "COM_AVAILABLE":
+        return _load_com()
+    if name == "ENHANCED_DOC_AVAILABLE":
+        return _load_enhanced_documentation()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 try:
-    from .enhanced_documentation import EnhancedDocumentationGenerator
-    ENHANCED_DOC_AVAILABLE = True
+    from .config import CONFIG
+    from .streaming import IterableStream, QueryStream
+    from .result_shaping import ResultShaper
+    from .data_export import EXPORT_FORMATS, StreamingExporter
+    from .database_mirror import MIRROR_ENGINES, DatabaseMirror
+    from .change_capture import ChangeCapture
+    from .metrics import KIND_TOOL, REGISTRY as metrics, MetricsDumper, format_stats, timed
+    from .slow_query_log import SORT_KEYS as SLOW_QUERY_SORT_KEYS, SlowQueryLog
+    from .query_control import CancelScope, QueryCancelledError, QueryTimeoutError, current_scope
+    from .tool_registry import ToolRegistry
+    from .session_manager import AGGREGATE_FUNCTIONS, MERGE_MODES, SessionManager
+    from .federated_query import (BUILD_SIDES, JOIN_STRATEGIES, JOIN_TYPES, FederatedQueryEngine,
+                                  JoinSource, SourceConnection)
+    from .jet_reader import JetDatabase, JetFormatError
+    from .parallel_scan import SCAN_MODES, ParallelScanner, TableProfile
+    from .bulk_operations import (BulkOperationError, merge_rows, plan_delete, plan_row_updates, plan_update,
+                                  run_plan)
+    from .data_import import FileImporter, ImportAbortedError, value_converter
+    from .lock_scheduler import LockConflictError, WriteScheduler, read_lock_file
+    from .write_behind import WriteBehindBuffer
+    from .parameter_binding import ParameterBinder
+    from .query_rewriter import QueryRewriteError, QueryRewriter
+    from .materialized_views import MaterializedViewStore, ViewDefinitionError
+    from .query_plan import (ShowPlanCapture, ShowPlanError, enable_showplan, format_plan, parse_showplan,
+                             showplan_enabled)
+    from .index_advisor import IndexAdvisor
+    from .local_cache import LocalReadCache
+    from .startup_manifest import load_manifest, manifest_key, manifest_path, save_manifest
 except ImportError:
-    try:
-        from enhanced_documentation import EnhancedDocumentationGenerator
-        ENHANCED_DOC_AVAILABLE = True
-    except ImportError:
-        ENHANCED_DOC_AVAILABLE = False
-        logging.warning("Módulo de documentación mejorada no disponible")
+    from config import CONFIG
+    from streaming import IterableStream, QueryStream
+    from result_shaping import ResultShaper
+    from data_export import EXPORT_FORMATS, StreamingExporter
+    from database_mirror import MIRROR_ENGINES, DatabaseMirror
+    from change_capture import ChangeCapture
+    from metrics import KIND_TOOL, REGISTRY as metrics, MetricsDumper, format_stats, timed
+    from slow_query_log import SORT_KEYS as SLOW_QUERY_SORT_KEYS, SlowQueryLog
+    from query_control import CancelScope, QueryCancelledError, QueryTimeoutError, current_scope
+    from tool_registry import ToolRegistry
+    from session_manager import AGGREGATE_FUNCTIONS, MERGE_MODES, SessionManager
+    from federated_query import (BUILD_SIDES, JOIN_STRATEGIES, JOIN_TYPES, FederatedQueryEngine,
+                                 JoinSource, SourceConnection)
+    from jet_reader import JetDatabase, JetFormatError
+    from parallel_scan import SCAN_MODES, ParallelScanner, TableProfile
+    from bulk_operations import (BulkOperationError, merge_rows, plan_delete, plan_row_updates, plan_update,
+                                 run_plan)
+    from data_import import FileImporter, ImportAbortedError, value_converter
+    from lock_scheduler import LockConflictError, WriteScheduler, read_lock_file
+    from write_behind import WriteBehindBuffer
+    from parameter_binding import ParameterBinder
+    from query_rewriter import QueryRewriteError, QueryRewriter
+    from materialized_views import MaterializedViewStore, ViewDefinitionError
+    from query_plan import (ShowPlanCapture, ShowPlanError, enable_showplan, format_plan, parse_showplan,
+                            showplan_enabled)
+    from index_advisor import IndexAdvisor
+    from local_cache import LocalReadCache
+    from startup_manifest import load_manifest, manifest_key, manifest_path, save_manifest
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mcp-access-server")
 
+def _serialized(method):
+    """Ejecutar un método del gestor con acceso exclusivo a su conexión."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.connection_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class AccessDatabaseManager:
     """Gestor de conexiones y operaciones con bases de datos Access."""
     
     def __init__(self):
-        self.connection: Optional[pyodbc.Connection] = None
+        self.connection: Optional["pyodbc.Connection"] = None
+        # pyodbc no admite usar una conexión desde varios hilos a la vez
+        # (threadsafety=1): los hilos del executor, el escritor de la cola, el
+        # write-behind y las vistas materializadas se turnan con este cerrojo
+        self.connection_lock = threading.RLock()
         self.database_path: Optional[str] = None
+        # Contraseña con la que se abrió (para referenciar el archivo desde otra conexión)
+        self.password: Optional[str] = None
+        self.slow_query_log = SlowQueryLog.from_config(CONFIG)
+        # Cola de escrituras (se crea al conectar si está activada)
+        self.write_scheduler: Optional[WriteScheduler] = None
+        # Escrituras confirmadas por esta conexión (invalida la copia local de lectura)
+        self.write_count = 0
+        # Conversión de parámetros al tipo de sus columnas (caché por sentencia)
+        settings = CONFIG["parameter_binding"]
+        self.parameter_binder = (ParameterBinder(self._column_types, settings["max_statements"])
+                                 if settings["enabled"] else None)
+        # Traducción de SQL ANSI a SQL de Access para execute_query (caché por huella)
+        settings = CONFIG["query_rewriter"]
+        self.query_rewriter = (QueryRewriter(self._identifiers, self._unique_key, settings["max_statements"],
+                                             settings["max_pages"], change_token=lambda: self.write_count)
+                               if settings["enabled"] else None)
         
+    @timed()
     def connect(self, database_path: str, password: str = "dpddpd") -> bool:
         """Conectar a una base de datos Access.
         
@@ -75,6 +210,11 @@ class AccessDatabaseManager:
             if not Path(database_path).exists():
                 raise FileNotFoundError(f"La base de datos no existe: {database_path}")
             
+            # Cerrar antes la base de datos anterior: su cola de escrituras
+            # termina lo encolado en ella (no en la nueva) y se olvidan los
+            # tipos de columna, nombres y claves que se guardaron de ella
+            self.disconnect()
+            
             # Crear cadena de conexión con contraseña
             conn_str = f"DRIVER={{{driver}}};DBQ={database_path};"
             
@@ -84,7 +224,10 @@ class AccessDatabaseManager:
             
             # Conectar
             self.connection = pyodbc.connect(conn_str)
+            self.connection.timeout = CONFIG["database"]["default_timeout"]
             self.database_path = database_path
+            self.password = password or None
+            self._start_write_scheduler()
             logger.info(f"Conectado exitosamente a: {database_path} (con contraseña)")
             return True
             
@@ -96,60 +239,354 @@ class AccessDatabaseManager:
                 try:
                     conn_str_no_pwd = f"DRIVER={{{driver}}};DBQ={database_path};"
                     self.connection = pyodbc.connect(conn_str_no_pwd)
+                    self.connection.timeout = CONFIG["database"]["default_timeout"]
                     self.database_path = database_path
+                    self.password = None
+                    self._start_write_scheduler()
                     logger.info(f"Conectado exitosamente a: {database_path} (sin contraseña)")
                     return True
                 except Exception as e2:
                     logger.error(f"Error al conectar sin contraseña: {e2}")
             return False
     
+    def _start_write_scheduler(self):
+        """Crear la cola de escrituras de la conexión actual."""
+        settings = CONFIG["write_scheduler"]
+        if not settings["enabled"]:
+            return
+        database_path = self.database_path
+        self.write_scheduler = WriteScheduler(
+            self.execute_write_batch,
+            lock_status=lambda: read_lock_file(database_path),
+            batch_size=settings["batch_size"],
+            max_retries=settings["max_retries"],
+            backoff_initial_seconds=settings["backoff_initial_seconds"],
+            backoff_max_seconds=settings["backoff_max_seconds"],
+            max_reader_wait_seconds=settings["max_reader_wait_seconds"],
+            name=f"write_queue:{Path(database_path).name}"
+        )
+    
     def disconnect(self):
         """Desconectar de la base de datos."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-            self.database_path = None
-            logger.info("Desconectado de la base de datos")
+        if self.write_scheduler is not None:
+            # Terminar las escrituras encoladas antes de cerrar la conexión
+            self.write_scheduler.close()
+            self.write_scheduler = None
+        if self.parameter_binder is not None:
+            self.parameter_binder.invalidate()
+        if self.query_rewriter is not None:
+            self.query_rewriter.invalidate()
+        with self.connection_lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+                self.database_path = None
+                self.password = None
+                logger.info("Desconectado de la base de datos")
     
     def is_connected(self) -> bool:
         """Verificar si hay una conexión activa."""
         return self.connection is not None
     
-    def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict[str, Any]]:
-        """Ejecutar una consulta SQL y retornar los resultados."""
-        if not self.is_connected():
-            raise Exception("No hay conexión activa a la base de datos")
+    def _cursor(self):
+        """Crear un cursor con el tiempo máximo de la llamada en curso.
+        
+        pyodbc aplica ``connection.timeout`` a cada cursor al crearlo: se fija
+        y se crea el cursor sin soltar el cerrojo, así que el tiempo de una
+        herramienta no se aplica a las sentencias de otra. Sin ámbito de
+        cancelación (hilo escritor, tareas de fondo) se usa el de por defecto.
+        """
+        scope = current_scope()
+        timeout = (scope.statement_timeout if scope else None) or CONFIG["database"]["default_timeout"]
+        with self.connection_lock:
+            if hasattr(self.connection, "timeout") and self.connection.timeout != timeout:
+                self.connection.timeout = timeout
+            return self.connection.cursor()
+    
+    def _new_cursor(self):
+        """Crear un cursor (``_cursor``) registrado en el ámbito de cancelación actual.
         
+        Así se puede abortar la sentencia desde el bucle de eventos.
+        """
+        cursor = self._cursor()
+        scope = current_scope()
+        if scope is not None:
+            scope.register(cursor)
+        return cursor
+    
+    @_serialized
+    def _column_types(self, table_name: str) -> List[Dict[str, Any]]:
+        """Columnas de una tabla según el catálogo ODBC (lista vacía si no es una tabla)."""
+        cursor = self._cursor()
         try:
-            cursor = self.connection.cursor()
+            return [{
+                "column_name": column.column_name,
+                "data_type": column.type_name,
+                "size": column.column_size
+            } for column in cursor.columns(table=table_name)]
+        finally:
+            cursor.close()
+    
+    @_serialized
+    def _identifiers(self) -> List[str]:
+        """Nombres de tablas y columnas (para reconocer identificadores en la traducción de SQL)."""
+        cursor = self._cursor()
+        try:
+            names = [table.table_name for table in cursor.tables(tableType='TABLE')]
+            names += [column.column_name for column in cursor.columns()]
+            return names
+        finally:
+            cursor.close()
+    
+    def _unique_key(self, table_name: str) -> Optional[str]:
+        """Columna con índice único de una sola columna (preferentemente la clave principal)."""
+        keys = [index for index in self.get_table_indexes(table_name)
+                if index.get("type") == "INDEX" and index.get("unique") and len(index["columns"]) == 1]
+        keys.sort(key=lambda index: index["index_name"] != "PrimaryKey")
+        return keys[0]["columns"][0] if keys else None
+    
+    def _execute(self, cursor, query: str, params: Optional[Sequence[Any]] = None):
+        """Ejecutar una sentencia con los parámetros convertidos al tipo de sus columnas."""
+        input_sizes = None
+        if params and self.parameter_binder is not None:
+            params, input_sizes = self.parameter_binder.bind(query, params)
+        with self.connection_lock:
+            if self.parameter_binder is not None and hasattr(cursor, "setinputsizes"):
+                # Los lotes reutilizan el cursor: sin tamaños propios se quitan los de la sentencia anterior
+                cursor.setinputsizes(input_sizes or None)
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
-            
-            # Si es una consulta SELECT, obtener resultados
-            if query.strip().upper().startswith('SELECT'):
-                columns = [column[0] for column in cursor.description]
-                results = []
-                for row in cursor.fetchall():
-                    results.append(dict(zip(columns, row)))
-                return results
-            else:
-                # Para INSERT, UPDATE, DELETE
-                self.connection.commit()
-                return [{"affected_rows": cursor.rowcount}]
+    
+    def rollback(self):
+        """Deshacer la transacción pendiente (la de quien tiene el cerrojo, tras fallar una sentencia)."""
+        if self.connection is None:
+            return
+        try:
+            with self.connection_lock:
+                self.connection.rollback()
+        except Exception as e:
+            logger.warning(f"No se pudo deshacer la transacción: {e}")
+    
+    @timed()
+    def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict[str, Any]]:
+        """Ejecutar una consulta SQL y retornar los resultados.
+        
+        Las escrituras pasan por la cola de escrituras (si está activada),
+        que las agrupa y reintenta los conflictos de bloqueo.
+        """
+        if not self.is_connected():
+            raise Exception("No hay conexión activa a la base de datos")
+        
+        is_select = query.strip().upper().startswith('SELECT')
+        scheduler = self.write_scheduler
+        if scheduler is not None and not is_select and not scheduler.in_writer_thread():
+            return scheduler.execute(query, params)
+        if scheduler is None and not is_select:
+            # Sin cola: la escritura es su propia transacción, que se deshace
+            # si falla o se cancela sin tocar la de otra llamada
+            return self.execute_write_batch([(query, params)])[0]
+        
+        reader = scheduler.begin_read() if scheduler is not None and is_select else None
+        scope = current_scope()
+        cursor = None
+        started = time.perf_counter()
+        try:
+            # La sentencia y su lectura (o su commit) sin que otro hilo use la conexión
+            with self.connection_lock:
+                cursor = self._new_cursor()
+                start = time.perf_counter()
+                self._execute(cursor, query, params)
+                execute_seconds = time.perf_counter() - start
                 
+                # Si es una consulta SELECT, obtener resultados
+                if is_select:
+                    columns = [column[0] for column in cursor.description]
+                    results = []
+                    start = time.perf_counter()
+                    for row in cursor.fetchall():
+                        results.append(dict(zip(columns, row)))
+                    self.slow_query_log.record(query, params, execute_seconds, time.perf_counter() - start,
+                                               len(results), metrics.current_tool())
+                    return results
+                else:
+                    # Para INSERT, UPDATE, DELETE
+                    self.connection.commit()
+                    self.write_count += 1
+                    if self.parameter_binder is not None:
+                        self.parameter_binder.note_statement(query)
+                    if self.query_rewriter is not None:
+                        self.query_rewriter.note_statement(query)
+                    self.slow_query_log.record(query, params, execute_seconds, rows=cursor.rowcount,
+                                               tool=metrics.current_tool())
+                    return [{"affected_rows": cursor.rowcount}]
+                
+        except Exception as e:
+            logger.error(f"Error ejecutando consulta: {e}")
+            self.slow_query_log.record(query, params, time.perf_counter() - started, tool=metrics.current_tool(),
+                                       error=str(e))
+            raise
+        finally:
+            if scope is not None and cursor is not None:
+                scope.unregister(cursor)
+            if reader is not None:
+                scheduler.end_read(reader)
+    
+    @_serialized
+    def execute_write_batch(self, statements: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """Ejecutar varias escrituras en una sola transacción (la usa la cola de escrituras).
+        
+        Si una sentencia falla se deshace el lote completo y se relanza el error.
+        """
+        if not self.is_connected():
+            raise Exception("No hay conexión activa a la base de datos")
+        
+        scope = current_scope()
+        tool = metrics.current_tool()
+        cursor = self._new_cursor()
+        try:
+            results = []
+            for query, params in statements:
+                start = time.perf_counter()
+                try:
+                    self._execute(cursor, query, params)
+                except Exception as e:
+                    self.slow_query_log.record(query, params, time.perf_counter() - start, tool=tool, error=str(e))
+                    raise
+                self.slow_query_log.record(query, params, time.perf_counter() - start, rows=cursor.rowcount,
+                                           tool=tool)
+                results.append([{"affected_rows": cursor.rowcount}])
+            self.connection.commit()
+            self.write_count += 1
+            if self.parameter_binder is not None:
+                for query, _ in statements:
+                    self.parameter_binder.note_statement(query)
+            if self.query_rewriter is not None:
+                for query, _ in statements:
+                    self.query_rewriter.note_statement(query)
+            return results
+        except Exception:
+            self.rollback()
+            raise
+        finally:
+            if scope is not None:
+                scope.unregister(cursor)
+            cursor.close()
+    
+    def run_in_transaction(self, func: Callable[[Any], Any], writes: int = 1) -> Any:
+        """Ejecutar ``func(cursor)`` en una transacción (por la cola de escrituras si está activa).
+        
+        Se confirma si ``func`` termina bien y se deshace si lanza una excepción.
+        """
+        if not self.is_connected():
+            raise Exception("No hay conexión activa a la base de datos")
+        
+        scheduler = self.write_scheduler
+        if scheduler is not None and not scheduler.in_writer_thread():
+            return scheduler.execute_call(lambda: self.run_in_transaction(func, writes), writes)
+        
+        with self.connection_lock:
+            cursor = self._cursor()
+            try:
+                result = func(cursor)
+                self.connection.commit()
+                self.write_count += 1
+                return result
+            except Exception:
+                self.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def execute_many(self, query: str, rows: Sequence[Sequence[Any]]) -> int:
+        """Ejecutar una sentencia con muchas filas de parámetros en una transacción (``executemany``).
+        
+        El driver de Access no admite matrices de parámetros (``fast_executemany``),
+        pero ``executemany`` prepara la sentencia una sola vez y se confirma al final.
+        """
+        def run(cursor):
+            start = time.perf_counter()
+            try:
+                cursor.executemany(query, rows)
+            except Exception as e:
+                self.slow_query_log.record(query, None, time.perf_counter() - start, error=str(e))
+                raise
+            self.slow_query_log.record(query, None, time.perf_counter() - start, rows=len(rows))
+            return len(rows)
+        
+        return self.run_in_transaction(run, len(rows))
+    
+    def execute_transaction(self, statements: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """Ejecutar escrituras que deben confirmarse juntas (por la cola si está activa).
+        
+        Devuelve un resultado por sentencia; si una falla no se confirma ninguna.
+        """
+        scheduler = self.write_scheduler
+        if scheduler is not None and not scheduler.in_writer_thread():
+            return scheduler.execute_transaction(statements)
+        return self.execute_write_batch(statements)
+    
+    @timed()
+    def open_query(self, query: str, params: Optional[List] = None,
+                   batch_size: Optional[int] = None) -> QueryStream:
+        """Ejecutar una consulta y devolver un flujo de filas leído por lotes.
+        
+        El llamador debe cerrar el flujo (se puede usar como context manager).
+        """
+        if not self.is_connected():
+            raise Exception("No hay conexión activa a la base de datos")
+        
+        if batch_size is None:
+            batch_size = CONFIG["results"]["fetch_batch_size"]
+        
+        scheduler = self.write_scheduler
+        reader = scheduler.begin_read() if scheduler is not None else None
+        scope = current_scope()
+        cursor = None
+        start = time.perf_counter()
+        try:
+            cursor = self._new_cursor()
+            start = time.perf_counter()
+            self._execute(cursor, query, params)
+            execute_seconds = time.perf_counter() - start
+            tool = metrics.current_tool()
+            
+            def on_close(stream: QueryStream):
+                if reader is not None:
+                    scheduler.end_read(reader)
+                if scope is not None:
+                    scope.unregister(stream)
+                metrics.add_rows(stream.rows_fetched)
+                self.slow_query_log.record(query, params, execute_seconds, stream.fetch_seconds,
+                                           stream.rows_fetched, tool,
+                                           error="Lectura cancelada" if stream.cancelled else None)
+            
+            stream = QueryStream(cursor, batch_size, on_close=on_close, lock=self.connection_lock)
+            if scope is not None:
+                # A partir de aquí se cancela el flujo (corta también la lectura por lotes)
+                scope.unregister(cursor)
+                scope.register(stream)
+            return stream
         except Exception as e:
             logger.error(f"Error ejecutando consulta: {e}")
+            self.slow_query_log.record(query, params, time.perf_counter() - start, tool=metrics.current_tool(),
+                                       error=str(e))
+            if scope is not None and cursor is not None:
+                scope.unregister(cursor)
+            if reader is not None:
+                scheduler.end_read(reader)
             raise
     
+    @timed()
+    @_serialized
     def list_tables(self) -> List[str]:
         """Listar todas las tablas en la base de datos."""
         if not self.is_connected():
             raise Exception("No hay conexión activa a la base de datos")
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             tables = []
             for table_info in cursor.tables(tableType='TABLE'):
                 tables.append(table_info.table_name)
@@ -158,13 +595,15 @@ class AccessDatabaseManager:
             logger.error(f"Error listando tablas: {e}")
             raise
     
+    @timed()
+    @_serialized
     def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
         """Obtener el esquema de una tabla específica."""
         if not self.is_connected():
             raise Exception("No hay conexión activa a la base de datos")
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             columns = []
             
             try:
@@ -253,6 +692,8 @@ class AccessDatabaseManager:
         }
         return type_mapping.get(type_code, "TEXT")
     
+    @timed()
+    @_serialized
     def create_table(self, table_name: str, columns: List[Dict[str, str]]) -> bool:
         """Crear una nueva tabla."""
         if not self.is_connected():
@@ -273,9 +714,14 @@ class AccessDatabaseManager:
             
             query = f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
             
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             cursor.execute(query)
             self.connection.commit()
+            self.write_count += 1
+            if self.parameter_binder is not None:
+                self.parameter_binder.invalidate(table_name)
+            if self.query_rewriter is not None:
+                self.query_rewriter.invalidate()
             logger.info(f"Tabla {table_name} creada exitosamente")
             return True
             
@@ -283,15 +729,22 @@ class AccessDatabaseManager:
             logger.error(f"Error creando tabla {table_name}: {e}")
             raise
     
+    @timed()
+    @_serialized
     def drop_table(self, table_name: str) -> bool:
         """Eliminar una tabla."""
         if not self.is_connected():
             raise Exception("No hay conexión activa a la base de datos")
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             cursor.execute(f"DROP TABLE {table_name}")
             self.connection.commit()
+            self.write_count += 1
+            if self.parameter_binder is not None:
+                self.parameter_binder.invalidate(table_name)
+            if self.query_rewriter is not None:
+                self.query_rewriter.invalidate()
             logger.info(f"Tabla {table_name} eliminada exitosamente")
             return True
             
@@ -299,6 +752,7 @@ class AccessDatabaseManager:
             logger.error(f"Error eliminando tabla {table_name}: {e}")
             raise
     
+    @timed()
     def get_table_relationships(self) -> List[Dict[str, Any]]:
         """Obtener las relaciones entre tablas de la base de datos."""
         if not self.is_connected():
@@ -307,7 +761,7 @@ class AccessDatabaseManager:
         relationships = []
         
         # Método 1: Intentar usar COM automation (más confiable)
-        if COM_AVAILABLE and self.database_path:
+        if self.database_path and _load_com():
             try:
                 com_manager = AccessCOMManager()
                 if com_manager.connect(self.database_path):
@@ -339,11 +793,13 @@ class AccessDatabaseManager:
         
         # Método 2: ODBC foreignKeys (fallback)
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             
             try:
                 # Intentar obtener información de claves foráneas usando ODBC
-                for fk in cursor.foreignKeys():
+                with self.connection_lock:
+                    foreign_keys = list(cursor.foreignKeys())
+                for fk in foreign_keys:
                     relationships.append({
                         "parent_table": fk.pktable_name,
                         "parent_column": fk.pkcolumn_name,
@@ -557,13 +1013,15 @@ class AccessDatabaseManager:
         
         return relationships
     
+    @timed()
+    @_serialized
     def get_table_indexes(self, table_name: str) -> List[Dict[str, Any]]:
         """Obtener los índices de una tabla específica."""
         if not self.is_connected():
             raise Exception("No hay conexión activa a la base de datos")
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             indexes = []
             
             # Primero intentar usar la función statistics de ODBC
@@ -654,13 +1112,15 @@ class AccessDatabaseManager:
                 "type": "PRIMARY"
             }]
     
+    @timed()
+    @_serialized
     def get_primary_keys(self, table_name: str) -> List[Dict[str, Any]]:
         """Obtener las claves primarias de una tabla."""
         if not self.is_connected():
             raise Exception("No hay conexión activa a la base de datos")
         
         try:
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             primary_keys = []
             
             # Intentar usar cursor.primaryKeys primero
@@ -967,7 +1427,7 @@ class AccessCOMManager:
         Returns:
             bool: True si la conexión fue exitosa
         """
-        if not COM_AVAILABLE:
+        if not _load_com():
             logging.error("COM automation no está disponible. Instale pywin32.")
             return False
             
@@ -1292,767 +1752,2801 @@ class AccessCOMManager:
 # Instancia global del gestor de base de datos
 db_manager = AccessDatabaseManager()
 
+# Formateador de resultados con límites de tamaño por respuesta
+result_shaper = ResultShaper.from_config(CONFIG)
+
+def _new_session_manager() -> AccessDatabaseManager:
+    """Gestor para una sesión con alias (comparte el registro de consultas lentas)."""
+    manager = AccessDatabaseManager()
+    manager.slow_query_log = db_manager.slow_query_log
+    return manager
+
+# Bases de datos abiertas con alias para consultas repartidas (open_session)
+session_manager = SessionManager(_new_session_manager, max_workers=CONFIG["sessions"]["max_workers"])
+
+def _federation_source(alias: Optional[str]) -> SourceConnection:
+    """Conexión de un lado de una consulta federada (None = conexión principal)."""
+    if alias:
+        session = session_manager.get(alias)
+        return SourceConnection(session.manager, session.database_path,
+                                getattr(session.manager, "password", None), session.lock)
+    if not db_manager.is_connected():
+        raise ValueError("No hay conexión activa a la base de datos; indique 'session' o use connect_database")
+    return SourceConnection(db_manager, db_manager.database_path, db_manager.password)
+
+# Combinaciones entre bases de datos (federated_query)
+federated_engine = FederatedQueryEngine(
+    _federation_source,
+    batch_size=CONFIG["results"]["fetch_batch_size"],
+    max_build_rows=CONFIG["federation"]["max_build_rows"]
+)
+
+# Réplica local para consultas analíticas (se crea con mirror_database)
+database_mirror: Optional[DatabaseMirror] = None
+
+# Copia local del archivo para lecturas en carpetas de red (se crea con enable_local_cache)
+read_cache: Optional[LocalReadCache] = None
+
+# Inserciones diferidas de insert_record (se crea con write_behind o si quedó un diario pendiente)
+write_behind: Optional[WriteBehindBuffer] = None
+
+def _write_behind_journal(database_path: str) -> str:
+    """Diario de inserciones pendientes de una base de datos."""
+    journal_dir = CONFIG["write_behind"]["journal_dir"] or str(Path.home() / ".mcp-access" / "journal")
+    digest = hashlib.sha1(os.path.abspath(database_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(journal_dir, f"{Path(database_path).stem}-{digest}.jsonl")
+
+def _write_behind_retryable(error: Exception) -> bool:
+    """Errores que dejan las filas pendientes (se reintentan) en lugar de descartarlas."""
+    return isinstance(error, (LockConflictError, QueryCancelledError)) or not db_manager.is_connected()
+
+def _start_write_behind() -> WriteBehindBuffer:
+    """Crear (o devolver) la escritura diferida de la conexión actual."""
+    global write_behind
+    if write_behind is None:
+        settings = CONFIG["write_behind"]
+        write_behind = WriteBehindBuffer(
+            db_manager.execute_many,
+            journal_path=_write_behind_journal(db_manager.database_path),
+            max_rows=settings["max_rows"],
+            max_delay_seconds=settings["max_delay_seconds"],
+            fsync=settings["fsync"],
+            is_retryable=_write_behind_retryable
+        )
+        recovered = write_behind.start()
+        if recovered:
+            logger.info(f"📥 {recovered} inserciones diferidas recuperadas del diario")
+    return write_behind
+
+def _stop_write_behind():
+    """Escribir lo pendiente y parar la escritura diferida (lo que no se pueda queda en el diario)."""
+    global write_behind
+    if write_behind is not None:
+        buffer, write_behind = write_behind, None
+        result = buffer.close(flush=db_manager.is_connected())
+        if result is not None and result.remaining:
+            logger.warning(f"{result.remaining} inserciones diferidas quedan en el diario {buffer.journal.path}")
+
+# Vistas materializadas de la base de datos conectada (se abren al conectar si existen)
+materialized_views: Optional[MaterializedViewStore] = None
+
+def _materialized_views_path(database_path: str) -> str:
+    """Fichero SQLite con las vistas materializadas de una base de datos."""
+    views_dir = CONFIG["materialized_views"]["dir"] or str(Path.home() / ".mcp-access" / "views")
+    digest = hashlib.sha1(os.path.abspath(database_path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(views_dir, f"{Path(database_path).stem}-{digest}.sqlite")
+
+def _open_materialized_views(create: bool = False) -> Optional[MaterializedViewStore]:
+    """Abrir las vistas de la conexión actual (con create, aunque aún no haya ninguna)."""
+    global materialized_views
+    if materialized_views is None:
+        path = _materialized_views_path(db_manager.database_path)
+        if not create and not os.path.exists(path):
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        settings = CONFIG["materialized_views"]
+        materialized_views = MaterializedViewStore(db_manager, path, batch_size=settings["batch_size"],
+                                                   refresh_timeout=_tool_timeout("refresh_materialized_view", {}))
+        materialized_views.start(settings["check_seconds"])
+    return materialized_views
+
+def _close_materialized_views():
+    global materialized_views
+    if materialized_views is not None:
+        store, materialized_views = materialized_views, None
+        store.close()
+
+def _parallel_scanner(workers: Optional[int] = None) -> ParallelScanner:
+    """Recorrido en paralelo con la configuración de 'parallel_scan'."""
+    settings = CONFIG["parallel_scan"]
+    return ParallelScanner(
+        workers=workers or settings["workers"],
+        pages_per_task=settings["pages_per_task"],
+        max_distinct=settings["max_distinct"],
+        min_pages=settings["min_pages"]
+    )
+
+def _connect_scan_worker() -> AccessDatabaseManager:
+    """Conexión adicional a la base de datos principal para un intervalo de clave."""
+    manager = _new_session_manager()
+    password = db_manager.password
+    connected = (manager.connect(db_manager.database_path, password) if password
+                 else manager.connect(db_manager.database_path))
+    if not connected:
+        raise ValueError(f"No se pudo abrir otra conexión a {db_manager.database_path}")
+    return manager
+
+def _profile_table(table_name: str, scan_mode: str = "auto", workers: Optional[int] = None) -> TableProfile:
+    """
+    Perfilar una tabla completa de la base de datos conectada.
+
+    En modo auto se lee el archivo por páginas y, si el lector directo no
+    admite el archivo, se reparte por intervalos de la clave primaria.
+    """
+    if not db_manager.is_connected():
+        raise ValueError("No hay conexión activa a la base de datos")
+    if scan_mode not in SCAN_MODES:
+        raise ValueError(f"Modo de recorrido no válido: {scan_mode}. Opciones: {', '.join(SCAN_MODES)}")
+    scanner = _parallel_scanner(workers)
+    if scan_mode in ("auto", "pages"):
+        try:
+            return scanner.profile_file(db_manager.database_path, table_name)
+        except (JetFormatError, OSError) as e:
+            if scan_mode == "pages":
+                raise
+            logger.info(f"Lector directo no disponible para '{table_name}' ({e}); se usan intervalos de clave")
+    keys = db_manager.get_primary_keys(table_name)
+    if len(keys) != 1:
+        raise ValueError(f"El recorrido por intervalos requiere una clave primaria de una columna en '{table_name}'")
+    return scanner.profile_key_ranges(_connect_scan_worker, table_name, keys[0]["column_name"])
+
+def _format_profile(profile: TableProfile) -> str:
+    """Resumen legible del perfil completo de una tabla."""
+    workers_unit = "procesos" if profile.mode == "pages" else "conexiones"
+    text = (f"📊 Análisis completo de '{profile.table}' ({profile.mode}: {profile.partitions} particiones, "
+            f"{profile.workers} {workers_unit}, {profile.elapsed_seconds:.2f} s, "
+            f"{profile.rows_per_second:.0f} registros/s):\n\n")
+    text += f"• Total de registros: {profile.rows}\n"
+    for column in profile.columns:
+        details = column.to_dict()
+        distinct = details["distinct_count"]
+        distinct_text = f">{CONFIG['parallel_scan']['max_distinct']}" if distinct is None else str(distinct)
+        text += (f"  - {column.name} ({column.data_type}): nulos {column.nulls}, vacíos {column.empty}, "
+                 f"distintos {distinct_text}, completitud {column.completeness:.1%}")
+        if details["min"] is not None:
+            text += f", rango {details['min']} .. {details['max']}"
+        text += "\n"
+    return text
+
+# Generador de documentación compartido para conservar el historial de cambios
+documentation_generator = None
+documentation_database_path: Optional[str] = None
+
+def _get_doc_generator():
+    """Obtener el generador de documentación de la base de datos conectada."""
+    global documentation_generator, documentation_database_path
+    if documentation_generator is None or documentation_database_path != db_manager.database_path:
+        documentation_generator = EnhancedDocumentationGenerator(db_manager)
+        documentation_database_path = db_manager.database_path
+    return documentation_generator
+
+def _change_state_dir() -> str:
+    """Directorio de las instantáneas de captura de cambios."""
+    return CONFIG["change_capture"]["state_dir"] or str(Path.home() / ".mcp-access" / "changes")
+
+def _read_staleness(max_staleness: Optional[float] = None) -> float:
+    """Desfase admitido en la copia local: el pedido, el de la herramienta en curso o el general."""
+    if max_staleness is not None:
+        return max_staleness
+    settings = CONFIG["local_cache"]
+    return settings["tool_staleness"].get(metrics.current_tool(), settings["max_staleness_seconds"])
+
+def _open_read_query(query: str, params: Optional[List] = None, use_mirror: Optional[bool] = None,
+                     max_staleness: Optional[float] = None) -> QueryStream:
+    """Abrir una consulta de lectura en una vista materializada, la réplica local o la copia local si la cubren, o en Access."""
+    if materialized_views is not None and CONFIG["materialized_views"]["route_reads"]:
+        stream = materialized_views.open_query(query, params)
+        metrics.record_cache("materialized_view", stream is not None)
+        if stream is not None:
+            logger.debug("Consulta respondida desde una vista materializada")
+            return stream
+    if use_mirror is None:
+        use_mirror = CONFIG["mirror"]["route_reads"]
+    if use_mirror and database_mirror is not None:
+        covered = database_mirror.covers(query)
+        metrics.record_cache("mirror", covered)
+        if covered:
+            logger.debug("Consulta enrutada a la réplica local")
+            stream = database_mirror.open_query(query, params)
+            stream.on_close = lambda s: metrics.add_rows(s.rows_fetched)
+            return stream
+    if read_cache is not None and read_cache.source_path == db_manager.database_path:
+        staleness = _read_staleness(max_staleness)
+        metrics.record_cache("local_copy", not read_cache.is_stale(staleness))
+        return read_cache.open_query(query, params, staleness)
+    return db_manager.open_query(query, params)
+
+def _shaped_response(shaped, shaper: ResultShaper, title: str, empty_text: str) -> List[types.TextContent]:
+    """Construir la respuesta de una consulta ya formateada.
+    
+    Los formatos legibles por máquina se devuelven sin adornos; si el resultado
+    se truncó, el aviso va en un segundo bloque de texto.
+    """
+    if shaped.output_format != "text":
+        response = [types.TextContent(type="text", text=shaped.text)]
+        if shaped.truncated:
+            response.append(types.TextContent(type="text", text=shaper.truncation_notice(shaped).strip()))
+        return response
+    
+    if not shaped.rows_rendered:
+        return [types.TextContent(type="text", text=empty_text)]
+    
+    result_text = f"{title} ({shaped.rows_rendered} registros mostrados):\n\n"
+    result_text += shaped.text
+    result_text += shaper.truncation_notice(shaped)
+    return [types.TextContent(type="text", text=result_text)]
+
 # Crear el servidor MCP
 server = Server("mcp-access-server")
 
-@server.list_tools()
-async def handle_list_tools() -> List[Tool]:
-    """Listar todas las herramientas disponibles."""
-    return [
-        Tool(
-            name="connect_database",
-            description="Conectar a una base de datos Microsoft Access",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "database_path": {
-                        "type": "string",
-                        "description": "Ruta completa al archivo de base de datos Access (.mdb o .accdb)"
-                    },
-                    "password": {
-                        "type": "string",
-                        "description": "Contraseña de la base de datos (opcional, por defecto: dpddpd)"
-                    }
-                },
-                "required": ["database_path"]
-            }
-        ),
-        Tool(
-            name="disconnect_database",
-            description="Desconectar de la base de datos actual",
-            inputSchema={
-                "type": "object",
-                "properties": {}
-            }
-        ),
-        Tool(
-            name="list_tables",
-            description="Listar todas las tablas en la base de datos conectada",
-            inputSchema={
-                "type": "object",
-                "properties": {}
-            }
-        ),
-        Tool(
-            name="get_table_schema",
-            description="Obtener el esquema (estructura) de una tabla específica",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla"
-                    }
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="create_table",
-            description="Crear una nueva tabla en la base de datos",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la nueva tabla"
-                    },
-                    "columns": {
-                        "type": "array",
-                        "description": "Lista de columnas con sus definiciones",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string", "description": "Nombre de la columna"},
-                                "type": {"type": "string", "description": "Tipo de datos (TEXT, INTEGER, DOUBLE, DATE, etc.)"},
-                                "primary_key": {"type": "boolean", "description": "Si es clave primaria"},
-                                "not_null": {"type": "boolean", "description": "Si no permite valores nulos"},
-                                "default": {"type": "string", "description": "Valor por defecto"}
-                            },
-                            "required": ["name", "type"]
-                        }
-                    }
-                },
-                "required": ["table_name", "columns"]
-            }
-        ),
-        Tool(
-            name="drop_table",
-            description="Eliminar una tabla de la base de datos",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla a eliminar"
-                    }
-                },
-                "required": ["table_name"]
-            }
-        ),
-        Tool(
-            name="execute_query",
-            description="Ejecutar una consulta SQL personalizada",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Consulta SQL a ejecutar"
-                    },
-                    "parameters": {
-                        "type": "array",
-                        "description": "Parámetros para la consulta (opcional)",
-                        "items": {"type": "string"}
-                    }
-                },
-                "required": ["query"]
+# Herramientas declaradas con @tool_registry.tool (esquemas validados al importar)
+tool_registry = ToolRegistry(default_timeouts=CONFIG["database"]["tool_timeouts"])
+
+def _progress_reporter(unit: str):
+    """Crear una función que envía notificaciones de progreso MCP desde otro hilo.
+    
+    Devuelve None si el cliente no pidió progreso (sin progressToken).
+    """
+    try:
+        context = server.request_context
+    except LookupError:
+        return None
+    
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+    
+    loop = asyncio.get_running_loop()
+    
+    def report(progress: int, *_):
+        asyncio.run_coroutine_threadsafe(
+            context.session.send_progress_notification(token, progress, message=f"{progress:,} {unit}"),
+            loop
+        )
+    
+    return report
+
+def _tool_timeout(name: str, arguments: Dict[str, Any]) -> Optional[float]:
+    """Tiempo máximo de una llamada: 'timeout_seconds' o el configurado para la herramienta."""
+    if arguments.get("timeout_seconds") is not None:
+        return arguments["timeout_seconds"]
+    spec = tool_registry.get(name)
+    if spec is not None and spec.timeout is not None:
+        return spec.timeout
+    return CONFIG["database"]["default_timeout"]
+
+async def _run_blocking(func, timeout: Optional[float] = None):
+    """Ejecutar una función bloqueante en el executor.
+    
+    Conserva el contexto (la herramienta en curso a la que se atribuyen las
+    métricas) y aplica un tiempo máximo. Si se agota el tiempo o el cliente
+    cancela la petición, se cancelan las sentencias en curso. Desde aquí no
+    se deshace nada en la conexión compartida: cada transacción de escritura
+    se deshace en el hilo que la ejecuta (el escritor de la cola o, sin
+    cola, el de la propia llamada) cuando su sentencia falla por la
+    cancelación, y las lecturas no tienen nada que deshacer.
+    """
+    scope = CancelScope(timeout)
+    context = contextvars.copy_context()
+    future = asyncio.get_running_loop().run_in_executor(None, context.run, scope.run, func)
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), scope.timeout)
+    except asyncio.TimeoutError:
+        scope.cancel("tiempo máximo agotado")
+        # Esperar un poco a que el hilo libere la conexión antes de responder
+        await asyncio.wait({future}, timeout=CONFIG["database"]["cancel_grace_seconds"])
+        raise QueryTimeoutError(scope.timeout)
+    except asyncio.CancelledError:
+        # Cancelación MCP (notifications/cancelled): no se puede esperar aquí
+        scope.cancel("cancelada por el cliente")
+        raise
+
+@tool_registry.tool(
+    name="connect_database",
+    description="Conectar a una base de datos Microsoft Access",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "database_path": {
+                "type": "string",
+                "description": "Ruta completa al archivo de base de datos Access (.mdb o .accdb)"
+            },
+            "password": {
+                "type": "string",
+                "description": "Contraseña de la base de datos (opcional, por defecto: dpddpd)"
             }
-        ),
-        Tool(
-            name="insert_record",
-            description="Insertar un nuevo registro en una tabla",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla"
-                    },
-                    "data": {
-                        "type": "object",
-                        "description": "Datos a insertar (clave: valor)"
-                    }
-                },
-                "required": ["table_name", "data"]
+        },
+        "required": ["database_path"]
+    }
+)
+async def _tool_connect_database(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    database_path = arguments["database_path"]
+    password = arguments.get("password", "dpddpd")  # Usar contraseña por defecto si no se proporciona
+    await _run_blocking(_stop_write_behind)
+    await _run_blocking(_close_materialized_views)
+    success = await _run_blocking(lambda: db_manager.connect(database_path, password))
+    if success:
+        text = f"✅ Conectado exitosamente a la base de datos: {database_path}"
+        views = _open_materialized_views()
+        if views is not None and views.list():
+            text += f"\n🧊 {len(views.list())} vistas materializadas disponibles (list_materialized_views)"
+        # Inserciones diferidas que quedaron sin escribir (p. ej. tras una caída)
+        if os.path.exists(_write_behind_journal(database_path)):
+            pending = (await _run_blocking(_start_write_behind)).pending_rows
+            if pending:
+                text += f"\n📥 {pending} inserciones diferidas recuperadas del diario; se escribirán en segundo plano"
+        return [types.TextContent(
+            type="text",
+            text=text
+        )]
+    else:
+        return [types.TextContent(
+            type="text",
+            text="❌ Error al conectar a la base de datos. Verifica la ruta, contraseña y que tengas los drivers de Access instalados."
+        )]
+
+@tool_registry.tool(
+    name="disconnect_database",
+    description="Desconectar de la base de datos actual",
+    input_schema={
+        "type": "object",
+        "properties": {}
+    }
+)
+async def _tool_disconnect_database(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    global read_cache
+    if read_cache is not None:
+        read_cache.close()
+        read_cache = None
+    await _run_blocking(_stop_write_behind)
+    await _run_blocking(_close_materialized_views)
+    # Espera a que termine la sentencia que tenga la conexión
+    await _run_blocking(db_manager.disconnect)
+    return [types.TextContent(
+        type="text",
+        text="✅ Desconectado de la base de datos"
+    )]
+
+@tool_registry.tool(
+    name="list_tables",
+    description="Listar todas las tablas en la base de datos conectada",
+    input_schema={
+        "type": "object",
+        "properties": {}
+    }
+)
+async def _tool_list_tables(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    tables = await _run_blocking(db_manager.list_tables, _tool_timeout("list_tables", arguments))
+    if tables:
+        table_list = "\n".join([f"• {table}" for table in tables])
+        return [types.TextContent(
+            type="text",
+            text=f"📋 Tablas encontradas ({len(tables)}):\n{table_list}"
+        )]
+    else:
+        return [types.TextContent(
+            type="text",
+            text="📋 No se encontraron tablas en la base de datos"
+        )]
+
+@tool_registry.tool(
+    name="get_table_schema",
+    description="Obtener el esquema (estructura) de una tabla específica",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
             }
-        ),
-        Tool(
-            name="update_record",
-            description="Actualizar registros en una tabla",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla"
-                    },
-                    "data": {
-                        "type": "object",
-                        "description": "Datos a actualizar (clave: valor)"
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_get_table_schema(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    schema = await _run_blocking(lambda: db_manager.get_table_schema(table_name),
+                                 _tool_timeout("get_table_schema", arguments))
+    if schema:
+        schema_text = f"📊 Esquema de la tabla '{table_name}':\n\n"
+        for col in schema:
+            nullable = "NULL" if col["nullable"] else "NOT NULL"
+            default = f" DEFAULT {col['default_value']}" if col["default_value"] else ""
+            schema_text += f"• {col['column_name']} - {col['data_type']}({col['size']}) {nullable}{default}\n"
+        return [types.TextContent(type="text", text=schema_text)]
+    else:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ No se pudo obtener el esquema de la tabla '{table_name}'"
+        )]
+
+@tool_registry.tool(
+    name="create_table",
+    description="Crear una nueva tabla en la base de datos",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la nueva tabla"
+            },
+            "columns": {
+                "type": "array",
+                "description": "Lista de columnas con sus definiciones",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "description": "Nombre de la columna"},
+                        "type": {"type": "string", "description": "Tipo de datos (TEXT, INTEGER, DOUBLE, DATE, etc.)"},
+                        "primary_key": {"type": "boolean", "description": "Si es clave primaria"},
+                        "not_null": {"type": "boolean", "description": "Si no permite valores nulos"},
+                        "default": {"type": "string", "description": "Valor por defecto"}
                     },
-                    "where_clause": {
-                        "type": "string",
-                        "description": "Condición WHERE para la actualización"
-                    }
-                },
-                "required": ["table_name", "data", "where_clause"]
+                    "required": ["name", "type"]
+                }
             }
-        ),
-        Tool(
-            name="delete_record",
-            description="Eliminar registros de una tabla",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla"
-                    },
-                    "where_clause": {
-                        "type": "string",
-                        "description": "Condición WHERE para la eliminación"
-                    }
-                },
-                "required": ["table_name", "where_clause"]
+        },
+        "required": ["table_name", "columns"]
+    }
+)
+async def _tool_create_table(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    columns = arguments["columns"]
+    success = await _run_blocking(lambda: db_manager.create_table(table_name, columns),
+                                  _tool_timeout("create_table", arguments))
+    if success:
+        return [types.TextContent(
+            type="text",
+            text=f"✅ Tabla '{table_name}' creada exitosamente"
+        )]
+
+@tool_registry.tool(
+    name="drop_table",
+    description="Eliminar una tabla de la base de datos",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla a eliminar"
             }
-        ),
-        Tool(
-            name="get_records",
-            description="Obtener registros de una tabla con filtros opcionales",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de la tabla"
-                    },
-                    "columns": {
-                        "type": "array",
-                        "description": "Columnas a seleccionar (opcional, por defecto todas)",
-                        "items": {"type": "string"}
-                    },
-                    "where_clause": {
-                        "type": "string",
-                        "description": "Condición WHERE (opcional)"
-                    },
-                    "order_by": {
-                        "type": "string",
-                        "description": "Orden de los resultados (opcional)"
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Límite de registros (opcional)"
-                    }
-                },
-                "required": ["table_name"]
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_drop_table(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    success = await _run_blocking(lambda: db_manager.drop_table(table_name), _tool_timeout("drop_table", arguments))
+    if success:
+        return [types.TextContent(
+            type="text",
+            text=f"✅ Tabla '{table_name}' eliminada exitosamente"
+        )]
+
+@tool_registry.tool(
+    name="execute_query",
+    description="Ejecutar una consulta SQL personalizada",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Consulta SQL a ejecutar"
+            },
+            "parameters": {
+                "type": "array",
+                "description": "Parámetros para la consulta (opcional); se convierten al tipo de la columna con la que se comparan",
+                "items": {"type": ["string", "number", "boolean", "null"]}
+            },
+            "columns": {
+                "type": "array",
+                "description": "Columnas del resultado a mostrar (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "rewrite_sql": {
+                "type": "boolean",
+                "description": "Traducir SQL ANSI a SQL de Access: LIMIT/OFFSET/FETCH a TOP, ||, !=, ILIKE, CURRENT_DATE y comillas en nombres (por defecto: query_rewriter.enabled)"
+            },
+            "use_mirror": {
+                "type": "boolean",
+                "description": "Ejecutar en la réplica local si contiene todas las tablas (opcional, ver mirror_database)"
+            },
+            "max_staleness_seconds": {
+                "type": "number",
+                "description": "Con la copia local activa (enable_local_cache): desfase máximo admitido antes de refrescarla (opcional)"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "jsonl", "csv", "columnar"],
+                "description": "Formato del resultado: text (tabla legible), jsonl, csv o columnar (JSON compacto por columnas). Por defecto: text"
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Tamaño máximo de la respuesta en bytes (opcional)"
+            },
+            "max_cell_chars": {
+                "type": "integer",
+                "description": "Caracteres máximos por celda antes de truncar en text y csv (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la consulta (por defecto: database.default_timeout)"
             }
-        ),
-        Tool(
-            name="get_table_relationships",
-            description="Obtener las relaciones entre tablas de la base de datos",
-            inputSchema={
+        },
+        "required": ["query"]
+    }
+)
+async def _tool_execute_query(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    query = arguments["query"]
+    parameters = arguments.get("parameters")
+    is_select = query.strip().upper().startswith('SELECT')
+    
+    # Traducir a SQL de Access lo que otros motores aceptan y Jet no
+    rewritten = None
+    rewriter = db_manager.query_rewriter
+    if rewriter is not None and arguments.get("rewrite_sql", True):
+        try:
+            rewritten = await _run_blocking(lambda: rewriter.rewrite(query, parameters),
+                                            _tool_timeout("execute_query", arguments))
+        except QueryRewriteError as e:
+            # Se ejecuta tal cual: si de verdad no es SQL de Access, Jet dará su propio error
+            logger.debug(f"Consulta sin reescribir ({e}): {query}")
+        else:
+            query, parameters = rewritten.sql, rewritten.params
+            if rewritten.changed:
+                logger.debug(f"Consulta reescrita para Access ({'; '.join(rewritten.changes)}): {query}")
+    
+    if is_select:
+        shaper = result_shaper.with_overrides(
+            max_response_bytes=arguments.get("max_response_bytes"),
+            max_cell_chars=arguments.get("max_cell_chars")
+        )
+        formatter = shaper.formatter_for(arguments.get("output_format"))
+        # La tabla de texto se limita a max_records_display; los formatos
+        # legibles por máquina solo al presupuesto de bytes
+        max_rows = CONFIG["database"]["max_records_display"] if formatter.name == "text" else None
+        
+        def run_query():
+            with _open_read_query(query, parameters, arguments.get("use_mirror"),
+                                  arguments.get("max_staleness_seconds")) as stream:
+                # OFFSET: se descartan las primeras filas y se recuerda la última clave de la página
+                rows = rewritten.rows(stream.columns, stream) if rewritten is not None else stream
+                return shaper.render(
+                    stream.columns,
+                    rows,
+                    formatter=formatter,
+                    project_columns=arguments.get("columns"),
+                    max_rows=max_rows
+                )
+        
+        shaped = await _run_blocking(run_query, _tool_timeout("execute_query", arguments))
+        response = _shaped_response(
+            shaped, shaper,
+            title="📊 Resultados de la consulta",
+            empty_text="📊 La consulta no devolvió resultados"
+        )
+        if rewritten is not None and rewritten.changed and shaped.output_format == "text":
+            response[0].text += f"\n\n🔁 Reescrita para Access: {'; '.join(rewritten.changes)}"
+        return response
+    else:
+        # Para INSERT, UPDATE, DELETE
+        results = await _run_blocking(lambda: db_manager.execute_query(query, parameters),
+                                      _tool_timeout("execute_query", arguments))
+        affected = results[0]["affected_rows"] if results else 0
+        result_text = f"✅ Consulta ejecutada. Registros afectados: {affected}"
+        if rewritten is not None and rewritten.changed:
+            result_text += f"\n🔁 Reescrita para Access: {'; '.join(rewritten.changes)}"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="insert_record",
+    description="Insertar un nuevo registro en una tabla",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "data": {
                 "type": "object",
-                "properties": {},
-                "required": []
+                "description": "Datos a insertar (clave: valor)"
+            },
+            "write_behind": {
+                "type": "boolean",
+                "description": "Encolar la inserción y escribirla por lotes en segundo plano; devuelve un identificador para flush_writes (por defecto: write_behind.enabled)"
             }
-        ),
-        Tool(
-            name="get_table_indexes",
-            description="Obtener los índices de una tabla específica",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Nombre de la tabla"}
-                },
-                "required": ["table_name"]
+        },
+        "required": ["table_name", "data"]
+    }
+)
+async def _tool_insert_record(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    data = arguments["data"]
+    
+    if arguments.get("write_behind", CONFIG["write_behind"]["enabled"]):
+        if not db_manager.is_connected():
+            return [types.TextContent(type="text", text="❌ No hay conexión activa a la base de datos")]
+        # Sin tiempo máximo: anotada en el diario, la fila se escribirá aunque se dejara de esperar
+        token = await _run_blocking(lambda: _start_write_behind().enqueue(table_name, data))
+        settings = CONFIG["write_behind"]
+        return [types.TextContent(
+            type="text",
+            text=(f"📥 Registro encolado para '{table_name}' (identificador: {token}); se escribirá en menos de "
+                  f"{settings['max_delay_seconds']} s o al reunir {settings['max_rows']} filas. "
+                  f"Use flush_writes para escribirlo ya y ver su estado")
+        )]
+    
+    # Construir consulta INSERT
+    columns = list(data.keys())
+    values = list(data.values())
+    placeholders = ", ".join(["?" for _ in values])
+    query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+    
+    results = await _run_blocking(lambda: db_manager.execute_query(query, values),
+                                  _tool_timeout("insert_record", arguments))
+    return [types.TextContent(
+        type="text",
+        text=f"✅ Registro insertado en '{table_name}'"
+    )]
+
+@tool_registry.tool(
+    name="flush_writes",
+    description="Escribir ahora las inserciones diferidas de insert_record (write_behind) y devolver su estado final, o el de los identificadores indicados",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Escribir solo las de esta tabla (opcional)"
+            },
+            "tokens": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Identificadores devueltos por insert_record cuyo estado se quiere conocer (opcional)"
             }
-        ),
-        Tool(
-            name="get_primary_keys",
-            description="Obtener las claves primarias de una tabla",
-            inputSchema={
+        },
+        "required": []
+    }
+)
+async def _tool_flush_writes(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    buffer = write_behind
+    if buffer is None:
+        return [types.TextContent(type="text", text="📊 No hay inserciones diferidas activas")]
+    
+    result = await _run_blocking(lambda: buffer.flush(arguments.get("table_name")),
+                                 _tool_timeout("flush_writes", arguments))
+    stats = buffer.stats()
+    icon = "✅" if not result.failed and result.retry_error is None else "⚠️"
+    text = (f"{icon} Inserciones diferidas escritas: {result.rows} filas en {result.statements} sentencias "
+            f"({result.elapsed_seconds:.2f} s)\n"
+            f"• Pendientes: {result.remaining}\n"
+            f"• Escritas desde el inicio: {stats['rows_written']}, descartadas: {stats['failed_rows']}\n")
+    if result.retry_error:
+        text += f"• Aplazadas (se reintentarán): {result.retry_error}\n"
+    for token, error in result.failed:
+        text += f"❌ {token}: {error}\n"
+    tokens = arguments.get("tokens") or []
+    if tokens:
+        text += "\n📋 Estado de los identificadores:\n"
+        for token in tokens:
+            try:
+                status = buffer.token_status(token)
+            except ValueError as e:
+                status = str(e)
+            text += f"• {token}: {status}\n"
+    return [types.TextContent(type="text", text=text)]
+
+@tool_registry.tool(
+    name="update_record",
+    description="Actualizar registros en una tabla",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "data": {
                 "type": "object",
-                "properties": {
-                    "table_name": {"type": "string", "description": "Nombre de la tabla"}
-                },
-                "required": ["table_name"]
+                "description": "Datos a actualizar (clave: valor)"
+            },
+            "where_clause": {
+                "type": "string",
+                "description": "Condición WHERE para la actualización"
             }
-        ),
-        Tool(
-            name="generate_database_documentation",
-            description="Generar documentación completa de la base de datos",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
+        },
+        "required": ["table_name", "data", "where_clause"]
+    }
+)
+async def _tool_update_record(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    data = arguments["data"]
+    where_clause = arguments["where_clause"]
+    
+    # Construir consulta UPDATE
+    set_clauses = [f"{col} = ?" for col in data.keys()]
+    query = f"UPDATE {table_name} SET {', '.join(set_clauses)} WHERE {where_clause}"
+    
+    results = await _run_blocking(lambda: db_manager.execute_query(query, list(data.values())),
+                                  _tool_timeout("update_record", arguments))
+    affected = results[0]["affected_rows"] if results else 0
+    return [types.TextContent(
+        type="text",
+        text=f"✅ Actualización completada en '{table_name}'. Registros afectados: {affected}"
+    )]
+
+@tool_registry.tool(
+    name="delete_record",
+    description="Eliminar registros de una tabla",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "where_clause": {
+                "type": "string",
+                "description": "Condición WHERE para la eliminación"
             }
-        ),
-        Tool(
-            name="export_documentation_markdown",
-            description="Exportar la documentación de la base de datos en formato Markdown",
-            inputSchema={
+        },
+        "required": ["table_name", "where_clause"]
+    }
+)
+async def _tool_delete_record(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    where_clause = arguments["where_clause"]
+    
+    query = f"DELETE FROM {table_name} WHERE {where_clause}"
+    results = await _run_blocking(lambda: db_manager.execute_query(query), _tool_timeout("delete_record", arguments))
+    affected = results[0]["affected_rows"] if results else 0
+    return [types.TextContent(
+        type="text",
+        text=f"✅ Eliminación completada en '{table_name}'. Registros eliminados: {affected}"
+    )]
+
+def _bulk_key_columns(table_name: str, key_columns: Optional[List[str]]) -> List[str]:
+    """Columnas de clave indicadas o, si no se indican, la clave primaria de la tabla."""
+    if key_columns:
+        return list(key_columns)
+    keys = [key["column_name"] for key in db_manager.get_primary_keys(table_name)]
+    if not keys:
+        raise ValueError(f"La tabla '{table_name}' no tiene clave primaria; indique 'key_columns'")
+    return keys
+
+def _run_bulk_plan(plan, arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Ejecutar una operación masiva y describir el resultado por lotes."""
+    single_transaction = arguments.get("single_transaction", CONFIG["bulk_operations"]["single_transaction"])
+    try:
+        result = run_plan(plan, db_manager.execute_transaction, single_transaction=single_transaction)
+    except BulkOperationError as e:
+        text = f"❌ {e}"
+        if e.result.plan.batches:
+            text += "\n\n" + e.result.describe()
+        return [types.TextContent(type="text", text=text)]
+    response = [types.TextContent(type="text", text=result.describe())]
+    if arguments.get("output_format") == "json":
+        response.append(types.TextContent(type="text", text=json.dumps(result.to_dict(), ensure_ascii=False)))
+    return response
+
+_BULK_COMMON_PROPERTIES = {
+    "table_name": {
+        "type": "string",
+        "description": "Nombre de la tabla"
+    },
+    "key_columns": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Columnas de clave (opcional, por defecto: la clave primaria de la tabla)"
+    },
+    "single_transaction": {
+        "type": "boolean",
+        "description": "Aplicar todo en una transacción (por defecto) o una por lote, para no agotar los bloqueos de Jet en tablas muy grandes"
+    },
+    "output_format": {
+        "type": "string",
+        "enum": ["text", "json"],
+        "description": "Añadir el detalle por lotes en JSON (por defecto: text)"
+    }
+}
+
+@tool_registry.tool(
+    name="update_records",
+    description="Actualizar muchos registros por clave: 'keys' + 'data' da los mismos valores a todas las claves (lotes IN), 'rows' da a cada fila sus propios valores; todo en una transacción, con los registros afectados por lote",
+    input_schema={
+        "type": "object",
+        "properties": {
+            **_BULK_COMMON_PROPERTIES,
+            "keys": {
+                "type": "array",
+                "description": "Claves a actualizar: valores sueltos, listas (clave compuesta) u objetos {columna: valor}"
+            },
+            "data": {
                 "type": "object",
-                "properties": {},
-                "required": []
+                "description": "Valores a asignar a todas las claves de 'keys' (columna: valor)"
+            },
+            "rows": {
+                "type": "array",
+                "items": {"type": "object"},
+                "description": "Alternativa a keys/data: objetos con las columnas de clave y los valores de cada fila"
             }
-        ),
-        Tool(
-            name="generate_enhanced_documentation",
-            description="Generar documentación mejorada con diagramas ER, análisis de calidad y múltiples formatos",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "include_er_diagram": {
-                        "type": "boolean",
-                        "description": "Incluir diagrama ER en formato Mermaid (por defecto: true)"
-                    },
-                    "include_data_quality": {
-                        "type": "boolean", 
-                        "description": "Incluir análisis de calidad de datos (por defecto: true)"
-                    },
-                    "include_field_analysis": {
-                        "type": "boolean",
-                        "description": "Incluir análisis detallado de campos (por defecto: true)"
-                    }
-                },
-                "required": []
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_update_records(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    settings = CONFIG["bulk_operations"]
+    if arguments.get("rows") is None and (arguments.get("keys") is None or not arguments.get("data")):
+        return [types.TextContent(type="text", text="❌ Indique 'keys' y 'data', o bien 'rows'")]
+    
+    def update():
+        key_columns = _bulk_key_columns(table_name, arguments.get("key_columns"))
+        if arguments.get("rows") is not None:
+            plan = plan_row_updates(table_name, key_columns, arguments["rows"], settings["rows_per_batch"])
+        else:
+            plan = plan_update(table_name, key_columns, arguments["keys"], arguments["data"],
+                               settings["keys_per_statement"])
+        return _run_bulk_plan(plan, arguments)
+    
+    return await _run_blocking(update, _tool_timeout("update_records", arguments))
+
+@tool_registry.tool(
+    name="delete_records",
+    description="Eliminar muchos registros por clave en lotes IN (o OR para claves compuestas) dentro de una transacción, con los registros eliminados por lote",
+    input_schema={
+        "type": "object",
+        "properties": {
+            **_BULK_COMMON_PROPERTIES,
+            "keys": {
+                "type": "array",
+                "description": "Claves a eliminar: valores sueltos, listas (clave compuesta) u objetos {columna: valor}"
             }
-        ),
-        Tool(
-            name="export_documentation_html",
-            description="Exportar documentación en formato HTML con estilos mejorados",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "output_path": {
-                        "type": "string",
-                        "description": "Ruta donde guardar el archivo HTML (opcional)"
-                    }
-                },
-                "required": []
+        },
+        "required": ["table_name", "keys"]
+    }
+)
+async def _tool_delete_records(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    
+    def delete():
+        key_columns = _bulk_key_columns(table_name, arguments.get("key_columns"))
+        plan = plan_delete(table_name, key_columns, arguments["keys"],
+                           CONFIG["bulk_operations"]["keys_per_statement"])
+        return _run_bulk_plan(plan, arguments)
+    
+    return await _run_blocking(delete, _tool_timeout("delete_records", arguments))
+
+@tool_registry.tool(
+    name="merge_records",
+    description="Insertar o actualizar filas por clave (upsert): busca las claves existentes con una consulta IN por lote, inserta las nuevas y actualiza las existentes con executemany, todo en una transacción",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "rows": {
+                "type": "array",
+                "items": {"type": "object"},
+                "description": "Filas a aplicar: objetos con las columnas de clave y el resto de valores"
+            },
+            "key_columns": _BULK_COMMON_PROPERTIES["key_columns"],
+            "output_format": _BULK_COMMON_PROPERTIES["output_format"]
+        },
+        "required": ["table_name", "rows"]
+    }
+)
+async def _tool_merge_records(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    rows = arguments["rows"]
+    
+    def merge():
+        key_columns = _bulk_key_columns(table_name, arguments.get("key_columns"))
+        # Los valores se convierten a los tipos de la tabla para comparar las claves como Access
+        converters = {column["column_name"].lower(): value_converter(column)
+                      for column in db_manager.get_table_schema(table_name)}
+        
+        def apply(cursor):
+            def fetch_keys(query, params):
+                cursor.execute(query, params)
+                return cursor.fetchall()
+            return merge_rows(table_name, key_columns, rows, fetch_keys, cursor.executemany,
+                              converters=converters,
+                              max_keys_per_statement=CONFIG["bulk_operations"]["keys_per_statement"])
+        
+        return db_manager.run_in_transaction(apply, len(rows))
+    
+    result = await _run_blocking(merge, _tool_timeout("merge_records", arguments))
+    response = [types.TextContent(type="text", text=result.describe())]
+    if arguments.get("output_format") == "json":
+        response.append(types.TextContent(type="text", text=json.dumps(result.to_dict(), ensure_ascii=False)))
+    return response
+
+@tool_registry.tool(
+    name="get_records",
+    description="Obtener registros de una tabla con filtros opcionales",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "columns": {
+                "type": "array",
+                "description": "Columnas a seleccionar (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "where_clause": {
+                "type": "string",
+                "description": "Condición WHERE (opcional)"
+            },
+            "order_by": {
+                "type": "string",
+                "description": "Orden de los resultados (opcional)"
+            },
+            "limit": {
+                "type": "integer",
+                "description": "Límite de registros (opcional)"
+            },
+            "use_mirror": {
+                "type": "boolean",
+                "description": "Ejecutar en la réplica local si contiene todas las tablas (opcional, ver mirror_database)"
+            },
+            "max_staleness_seconds": {
+                "type": "number",
+                "description": "Con la copia local activa (enable_local_cache): desfase máximo admitido antes de refrescarla (opcional)"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "jsonl", "csv", "columnar"],
+                "description": "Formato del resultado: text (tabla legible), jsonl, csv o columnar (JSON compacto por columnas). Por defecto: text"
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Tamaño máximo de la respuesta en bytes (opcional)"
+            },
+            "max_cell_chars": {
+                "type": "integer",
+                "description": "Caracteres máximos por celda antes de truncar en text y csv (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la consulta (por defecto: database.default_timeout)"
             }
-        ),
-        Tool(
-            name="export_documentation_json",
-            description="Exportar documentación en formato JSON estructurado",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "output_path": {
-                        "type": "string",
-                        "description": "Ruta donde guardar el archivo JSON (opcional)"
-                    }
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="analyze_data_quality",
-            description="Realizar análisis de calidad de datos en todas las tablas",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "table_name": {
-                        "type": "string",
-                        "description": "Nombre de tabla específica (opcional, por defecto analiza todas)"
-                    }
-                },
-                "required": []
-            }
-        ),
-        Tool(
-            name="generate_er_diagram",
-            description="Generar diagrama ER en formato Mermaid",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "output_path": {
-                        "type": "string",
-                        "description": "Ruta donde guardar el diagrama (opcional)"
-                    }
-                },
-                "required": []
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_get_records(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    columns = arguments.get("columns", ["*"])
+    where_clause = arguments.get("where_clause")
+    order_by = arguments.get("order_by")
+    limit = arguments.get("limit")
+    
+    # Construir consulta SELECT (las columnas se proyectan en la propia consulta)
+    column_str = ", ".join(columns) if columns != ["*"] else "*"
+    top_str = f"TOP {int(limit)} " if limit else ""
+    query = f"SELECT {top_str}{column_str} FROM {table_name}"
+    
+    if where_clause:
+        query += f" WHERE {where_clause}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    
+    shaper = result_shaper.with_overrides(
+        max_response_bytes=arguments.get("max_response_bytes"),
+        max_cell_chars=arguments.get("max_cell_chars")
+    )
+    formatter = shaper.formatter_for(arguments.get("output_format"))
+    
+    def run_query():
+        with _open_read_query(query, use_mirror=arguments.get("use_mirror"),
+                              max_staleness=arguments.get("max_staleness_seconds")) as stream:
+            return shaper.render(stream.columns, stream, formatter=formatter)
+    
+    shaped = await _run_blocking(run_query, _tool_timeout("get_records", arguments))
+    
+    return _shaped_response(
+        shaped, shaper,
+        title=f"📊 Registros de '{table_name}'",
+        empty_text=f"📊 No se encontraron registros en '{table_name}'"
+    )
+
+@tool_registry.tool(
+    name="get_table_relationships",
+    description="Obtener las relaciones entre tablas de la base de datos",
+    input_schema={
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+)
+async def _tool_get_table_relationships(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    relationships = await _run_blocking(db_manager.get_table_relationships,
+                                        _tool_timeout("get_table_relationships", arguments))
+    
+    if relationships:
+        result_text = f"🔗 Relaciones entre tablas ({len(relationships)} encontradas):\n\n"
+        for rel in relationships:
+            result_text += f"• {rel['parent_table']}.{rel['parent_column']} → {rel['child_table']}.{rel['child_column']}\n"
+            if rel['constraint_name']:
+                result_text += f"  Restricción: {rel['constraint_name']}\n"
+            result_text += f"  Actualización: {rel['update_rule']}, Eliminación: {rel['delete_rule']}\n\n"
+    else:
+        result_text = "🔗 No se encontraron relaciones entre tablas"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="get_table_indexes",
+    description="Obtener los índices de una tabla específica",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {"type": "string", "description": "Nombre de la tabla"}
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_get_table_indexes(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    indexes = await _run_blocking(lambda: db_manager.get_table_indexes(table_name),
+                                  _tool_timeout("get_table_indexes", arguments))
+    
+    if indexes:
+        result_text = f"📇 Índices de la tabla '{table_name}' ({len(indexes)} encontrados):\n\n"
+        for idx in indexes:
+            unique_text = " (ÚNICO)" if idx["unique"] else ""
+            result_text += f"• {idx['index_name']}: {idx['column_name']}{unique_text}\n"
+            result_text += f"  Posición: {idx['ordinal_position']}, Tipo: {idx['type']}\n\n"
+    else:
+        result_text = f"📇 No se encontraron índices en la tabla '{table_name}'"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="get_primary_keys",
+    description="Obtener las claves primarias de una tabla",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {"type": "string", "description": "Nombre de la tabla"}
+        },
+        "required": ["table_name"]
+    }
+)
+async def _tool_get_primary_keys(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    primary_keys = await _run_blocking(lambda: db_manager.get_primary_keys(table_name),
+                                       _tool_timeout("get_primary_keys", arguments))
+    
+    if primary_keys:
+        result_text = f"🔑 Claves primarias de la tabla '{table_name}':\n\n"
+        result_text += "\n".join([f"• {pk}" for pk in primary_keys])
+    else:
+        result_text = f"🔑 No se encontraron claves primarias en la tabla '{table_name}'"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="generate_database_documentation",
+    description="Generar documentación completa de la base de datos",
+    input_schema={
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+)
+async def _tool_generate_database_documentation(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    documentation = await _run_blocking(db_manager.generate_database_documentation,
+                                        _tool_timeout("generate_database_documentation", arguments))
+    
+    result_text = f"📚 Documentación de la base de datos generada:\n\n"
+    result_text += f"📁 Archivo: {documentation['database_path']}\n"
+    result_text += f"📊 Total de tablas: {documentation['summary']['total_tables']}\n"
+    result_text += f"🔗 Total de relaciones: {documentation['summary']['total_relationships']}\n\n"
+    
+    result_text += "📋 Tablas:\n"
+    for table_name, table_info in documentation["tables"].items():
+        result_text += f"• {table_name} ({table_info['record_count']} registros)\n"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="export_documentation_markdown",
+    description="Exportar la documentación de la base de datos en formato Markdown",
+    input_schema={
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+)
+async def _tool_export_documentation_markdown(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    markdown_doc = await _run_blocking(db_manager.export_documentation_markdown,
+                                       _tool_timeout("export_documentation_markdown", arguments))
+    
+    return [types.TextContent(
+        type="text",
+        text="📄 Documentación exportada en formato Markdown:\n\n" + markdown_doc
+    )]
+
+@tool_registry.tool(
+    name="generate_enhanced_documentation",
+    description="Generar documentación mejorada con diagramas ER, análisis de calidad y múltiples formatos",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "include_er_diagram": {
+                "type": "boolean",
+                "description": "Incluir diagrama ER en formato Mermaid (por defecto: true)"
+            },
+            "include_data_quality": {
+                "type": "boolean", 
+                "description": "Incluir análisis de calidad de datos (por defecto: true)"
+            },
+            "include_field_analysis": {
+                "type": "boolean",
+                "description": "Incluir análisis detallado de campos (por defecto: true)"
             }
-        )
-    ]
+        },
+        "required": []
+    }
+)
+async def _tool_generate_enhanced_documentation(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if not _load_enhanced_documentation():
+        return [types.TextContent(
+            type="text",
+            text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
+        )]
+    
+    include_er_diagram = arguments.get("include_er_diagram", True)
+    include_data_quality = arguments.get("include_data_quality", True)
+    include_field_analysis = arguments.get("include_field_analysis", True)
+    
+    try:
+        enhanced_gen = _get_doc_generator()
+        documentation = await _run_blocking(lambda: enhanced_gen.generate_enhanced_documentation(
+            include_er_diagram=include_er_diagram,
+            include_data_quality=include_data_quality,
+            include_field_analysis=include_field_analysis
+        ), _tool_timeout("generate_enhanced_documentation", arguments))
+        
+        return [types.TextContent(
+            type="text",
+            text=f"📚 Documentación mejorada generada exitosamente:\n\n{documentation}"
+        )]
+    except Exception as e:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Error generando documentación mejorada: {str(e)}"
+        )]
 
-@server.call_tool()
-async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
-    """Manejar las llamadas a las herramientas."""
+@tool_registry.tool(
+    name="export_documentation_html",
+    description="Exportar documentación en formato HTML con estilos mejorados",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "output_path": {
+                "type": "string",
+                "description": "Ruta donde guardar el archivo HTML (opcional)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_export_documentation_html(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if not _load_enhanced_documentation():
+        return [types.TextContent(
+            type="text",
+            text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
+        )]
+    
+    output_path = arguments.get("output_path")
     
     try:
-        if name == "connect_database":
-            database_path = arguments["database_path"]
-            password = arguments.get("password", "dpddpd")  # Usar contraseña por defecto si no se proporciona
-            success = db_manager.connect(database_path, password)
-            if success:
-                return [types.TextContent(
-                    type="text",
-                    text=f"✅ Conectado exitosamente a la base de datos: {database_path}"
-                )]
-            else:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Error al conectar a la base de datos. Verifica la ruta, contraseña y que tengas los drivers de Access instalados."
-                )]
+        enhanced_gen = _get_doc_generator()
+        html_content = await _run_blocking(enhanced_gen.export_to_html,
+                                           _tool_timeout("export_documentation_html", arguments))
         
-        elif name == "disconnect_database":
-            db_manager.disconnect()
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(html_content)
             return [types.TextContent(
                 type="text",
-                text="✅ Desconectado de la base de datos"
+                text=f"📄 Documentación HTML exportada a: {output_path}"
             )]
-        
-        elif name == "list_tables":
-            tables = db_manager.list_tables()
-            if tables:
-                table_list = "\n".join([f"• {table}" for table in tables])
-                return [types.TextContent(
-                    type="text",
-                    text=f"📋 Tablas encontradas ({len(tables)}):\n{table_list}"
-                )]
-            else:
-                return [types.TextContent(
-                    type="text",
-                    text="📋 No se encontraron tablas en la base de datos"
-                )]
-        
-        elif name == "get_table_schema":
-            table_name = arguments["table_name"]
-            schema = db_manager.get_table_schema(table_name)
-            if schema:
-                schema_text = f"📊 Esquema de la tabla '{table_name}':\n\n"
-                for col in schema:
-                    nullable = "NULL" if col["nullable"] else "NOT NULL"
-                    default = f" DEFAULT {col['default_value']}" if col["default_value"] else ""
-                    schema_text += f"• {col['column_name']} - {col['data_type']}({col['size']}) {nullable}{default}\n"
-                return [types.TextContent(type="text", text=schema_text)]
-            else:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ No se pudo obtener el esquema de la tabla '{table_name}'"
-                )]
-        
-        elif name == "create_table":
-            table_name = arguments["table_name"]
-            columns = arguments["columns"]
-            success = db_manager.create_table(table_name, columns)
-            if success:
-                return [types.TextContent(
-                    type="text",
-                    text=f"✅ Tabla '{table_name}' creada exitosamente"
-                )]
-        
-        elif name == "drop_table":
-            table_name = arguments["table_name"]
-            success = db_manager.drop_table(table_name)
-            if success:
-                return [types.TextContent(
-                    type="text",
-                    text=f"✅ Tabla '{table_name}' eliminada exitosamente"
-                )]
-        
-        elif name == "execute_query":
-            query = arguments["query"]
-            parameters = arguments.get("parameters")
-            results = db_manager.execute_query(query, parameters)
-            
-            if query.strip().upper().startswith('SELECT'):
-                if results:
-                    # Formatear resultados de SELECT
-                    result_text = f"📊 Resultados de la consulta ({len(results)} registros):\n\n"
-                    if len(results) > 0:
-                        # Mostrar encabezados
-                        headers = list(results[0].keys())
-                        result_text += " | ".join(headers) + "\n"
-                        result_text += "-" * (len(" | ".join(headers))) + "\n"
-                        
-                        # Mostrar datos (limitar a 50 registros para evitar overflow)
-                        for i, row in enumerate(results[:50]):
-                            values = [str(row[header]) if row[header] is not None else "NULL" for header in headers]
-                            result_text += " | ".join(values) + "\n"
-                        
-                        if len(results) > 50:
-                            result_text += f"\n... y {len(results) - 50} registros más"
-                else:
-                    result_text = "📊 La consulta no devolvió resultados"
-            else:
-                # Para INSERT, UPDATE, DELETE
-                affected = results[0]["affected_rows"] if results else 0
-                result_text = f"✅ Consulta ejecutada. Registros afectados: {affected}"
-            
-            return [types.TextContent(type="text", text=result_text)]
-        
-        elif name == "insert_record":
-            table_name = arguments["table_name"]
-            data = arguments["data"]
-            
-            # Construir consulta INSERT
-            columns = list(data.keys())
-            values = list(data.values())
-            placeholders = ", ".join(["?" for _ in values])
-            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-            
-            results = db_manager.execute_query(query, values)
+        else:
             return [types.TextContent(
                 type="text",
-                text=f"✅ Registro insertado en '{table_name}'"
+                text=f"📄 Documentación HTML generada:\n\n{html_content[:2000]}..."
             )]
+    except Exception as e:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Error exportando HTML: {str(e)}"
+        )]
+
+@tool_registry.tool(
+    name="export_documentation_json",
+    description="Exportar documentación en formato JSON estructurado",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "output_path": {
+                "type": "string",
+                "description": "Ruta donde guardar el archivo JSON (opcional)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_export_documentation_json(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if not _load_enhanced_documentation():
+        return [types.TextContent(
+            type="text",
+            text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
+        )]
+    
+    output_path = arguments.get("output_path")
+    
+    try:
+        enhanced_gen = _get_doc_generator()
+        json_content = await _run_blocking(enhanced_gen.export_to_json,
+                                           _tool_timeout("export_documentation_json", arguments))
         
-        elif name == "update_record":
-            table_name = arguments["table_name"]
-            data = arguments["data"]
-            where_clause = arguments["where_clause"]
-            
-            # Construir consulta UPDATE
-            set_clauses = [f"{col} = ?" for col in data.keys()]
-            query = f"UPDATE {table_name} SET {', '.join(set_clauses)} WHERE {where_clause}"
-            
-            results = db_manager.execute_query(query, list(data.values()))
-            affected = results[0]["affected_rows"] if results else 0
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(json_content)
             return [types.TextContent(
                 type="text",
-                text=f"✅ Actualización completada en '{table_name}'. Registros afectados: {affected}"
+                text=f"📄 Documentación JSON exportada a: {output_path}"
             )]
-        
-        elif name == "delete_record":
-            table_name = arguments["table_name"]
-            where_clause = arguments["where_clause"]
-            
-            query = f"DELETE FROM {table_name} WHERE {where_clause}"
-            results = db_manager.execute_query(query)
-            affected = results[0]["affected_rows"] if results else 0
+        else:
             return [types.TextContent(
                 type="text",
-                text=f"✅ Eliminación completada en '{table_name}'. Registros eliminados: {affected}"
+                text=f"📄 Documentación JSON generada:\n\n{json_content[:2000]}..."
             )]
+    except Exception as e:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Error exportando JSON: {str(e)}"
+        )]
+
+@tool_registry.tool(
+    name="analyze_data_quality",
+    description="Realizar análisis de calidad de datos en todas las tablas",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de tabla específica (opcional, por defecto analiza todas)"
+            },
+            "full_scan": {
+                "type": "boolean",
+                "description": "Analizar todas las filas en paralelo en lugar de una muestra (por defecto: false)"
+            },
+            "scan_mode": {
+                "type": "string",
+                "enum": SCAN_MODES,
+                "description": "Con full_scan: pages (lector directo en varios procesos), pk_ranges (intervalos de la clave primaria por ODBC) o auto (por defecto)"
+            },
+            "workers": {
+                "type": "integer",
+                "description": "Procesos o conexiones simultáneas con full_scan (por defecto: parallel_scan.workers)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos con full_scan (por defecto: database.default_timeout)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_analyze_data_quality(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if arguments.get("full_scan"):
+        scan_mode = arguments.get("scan_mode", "auto")
+        workers = arguments.get("workers")
         
-        elif name == "get_records":
-            table_name = arguments["table_name"]
-            columns = arguments.get("columns", ["*"])
-            where_clause = arguments.get("where_clause")
-            order_by = arguments.get("order_by")
-            limit = arguments.get("limit")
-            
-            # Construir consulta SELECT
-            column_str = ", ".join(columns) if columns != ["*"] else "*"
-            query = f"SELECT {column_str} FROM {table_name}"
-            
-            if where_clause:
-                query += f" WHERE {where_clause}"
-            if order_by:
-                query += f" ORDER BY {order_by}"
-            if limit:
-                query += f" TOP {limit}"
-            
-            results = db_manager.execute_query(query)
-            
-            if results:
-                result_text = f"📊 Registros de '{table_name}' ({len(results)} encontrados):\n\n"
-                if len(results) > 0:
-                    # Mostrar encabezados
-                    headers = list(results[0].keys())
-                    result_text += " | ".join(headers) + "\n"
-                    result_text += "-" * (len(" | ".join(headers))) + "\n"
-                    
-                    # Mostrar datos
-                    for row in results:
-                        values = [str(row[header]) if row[header] is not None else "NULL" for header in headers]
-                        result_text += " | ".join(values) + "\n"
-            else:
-                result_text = f"📊 No se encontraron registros en '{table_name}'"
-            
-            return [types.TextContent(type="text", text=result_text)]
-        
-        elif name == "get_table_relationships":
-            relationships = db_manager.get_table_relationships()
-            
-            if relationships:
-                result_text = f"🔗 Relaciones entre tablas ({len(relationships)} encontradas):\n\n"
-                for rel in relationships:
-                    result_text += f"• {rel['parent_table']}.{rel['parent_column']} → {rel['child_table']}.{rel['child_column']}\n"
-                    if rel['constraint_name']:
-                        result_text += f"  Restricción: {rel['constraint_name']}\n"
-                    result_text += f"  Actualización: {rel['update_rule']}, Eliminación: {rel['delete_rule']}\n\n"
-            else:
-                result_text = "🔗 No se encontraron relaciones entre tablas"
-            
-            return [types.TextContent(type="text", text=result_text)]
+        def run_scan():
+            tables = [arguments["table_name"]] if arguments.get("table_name") else db_manager.list_tables()
+            return [_profile_table(table, scan_mode, workers) for table in tables]
         
-        elif name == "get_table_indexes":
-            table_name = arguments["table_name"]
-            indexes = db_manager.get_table_indexes(table_name)
-            
-            if indexes:
-                result_text = f"📇 Índices de la tabla '{table_name}' ({len(indexes)} encontrados):\n\n"
-                for idx in indexes:
-                    unique_text = " (ÚNICO)" if idx["unique"] else ""
-                    result_text += f"• {idx['index_name']}: {idx['column_name']}{unique_text}\n"
-                    result_text += f"  Posición: {idx['ordinal_position']}, Tipo: {idx['type']}\n\n"
-            else:
-                result_text = f"📇 No se encontraron índices en la tabla '{table_name}'"
-            
-            return [types.TextContent(type="text", text=result_text)]
+        profiles = await _run_blocking(run_scan, _tool_timeout("analyze_data_quality", arguments))
+        if not profiles:
+            return [types.TextContent(type="text", text="📊 No hay tablas que analizar")]
+        return [types.TextContent(type="text", text="\n".join(_format_profile(profile) for profile in profiles))]
+    
+    if not _load_enhanced_documentation():
+        return [types.TextContent(
+            type="text",
+            text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
+        )]
+    
+    table_name = arguments.get("table_name")
+    
+    try:
+        enhanced_gen = _get_doc_generator()
         
-        elif name == "get_primary_keys":
-            table_name = arguments["table_name"]
-            primary_keys = db_manager.get_primary_keys(table_name)
+        if table_name:
+            # Análisis de una tabla específica
+            analysis = await _run_blocking(lambda: enhanced_gen.analyze_data_quality_for_table(table_name),
+                                           _tool_timeout("analyze_data_quality", arguments))
+            result_text = f"📊 Análisis de calidad de datos para '{table_name}':\n\n"
+            result_text += f"• Total de registros: {analysis['total_records']}\n"
+            result_text += f"• Registros únicos: {analysis['unique_records']}\n"
+            result_text += f"• Registros duplicados: {analysis['duplicate_records']}\n"
+            result_text += f"• Campos con valores nulos: {analysis['null_fields']}\n"
+            result_text += f"• Campos con valores vacíos: {analysis['empty_fields']}\n"
+        else:
+            # Análisis de todas las tablas
+            def analyze_all():
+                return [(table, enhanced_gen.analyze_data_quality_for_table(table))
+                        for table in db_manager.list_tables()]
             
-            if primary_keys:
-                result_text = f"🔑 Claves primarias de la tabla '{table_name}':\n\n"
-                result_text += "\n".join([f"• {pk}" for pk in primary_keys])
-            else:
-                result_text = f"🔑 No se encontraron claves primarias en la tabla '{table_name}'"
+            analyses = await _run_blocking(analyze_all, _tool_timeout("analyze_data_quality", arguments))
+            result_text = "📊 Análisis de calidad de datos (todas las tablas):\n\n"
             
-            return [types.TextContent(type="text", text=result_text)]
+            for table, analysis in analyses:
+                result_text += f"📋 {table}:\n"
+                result_text += f"  • Registros: {analysis['total_records']}\n"
+                result_text += f"  • Únicos: {analysis['unique_records']}\n"
+                result_text += f"  • Duplicados: {analysis['duplicate_records']}\n"
+                result_text += f"  • Campos con nulos: {len(analysis['null_fields'])}\n\n"
         
-        elif name == "generate_database_documentation":
-            documentation = db_manager.generate_database_documentation()
-            
-            result_text = f"📚 Documentación de la base de datos generada:\n\n"
-            result_text += f"📁 Archivo: {documentation['database_path']}\n"
-            result_text += f"📊 Total de tablas: {documentation['summary']['total_tables']}\n"
-            result_text += f"🔗 Total de relaciones: {documentation['summary']['total_relationships']}\n\n"
-            
-            result_text += "📋 Tablas:\n"
-            for table_name, table_info in documentation["tables"].items():
-                result_text += f"• {table_name} ({table_info['record_count']} registros)\n"
-            
-            return [types.TextContent(type="text", text=result_text)]
+        return [types.TextContent(type="text", text=result_text)]
+    except Exception as e:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Error analizando calidad de datos: {str(e)}"
+        )]
+
+@tool_registry.tool(
+    name="generate_er_diagram",
+    description="Generar diagrama ER en formato Mermaid",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "output_path": {
+                "type": "string",
+                "description": "Ruta donde guardar el diagrama (opcional)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_generate_er_diagram(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if not _load_enhanced_documentation():
+        return [types.TextContent(
+            type="text",
+            text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
+        )]
+    
+    output_path = arguments.get("output_path")
+    
+    try:
+        enhanced_gen = _get_doc_generator()
+        mermaid_diagram = await _run_blocking(enhanced_gen.generate_er_diagram,
+                                              _tool_timeout("generate_er_diagram", arguments))
         
-        elif name == "export_documentation_markdown":
-            markdown_doc = db_manager.export_documentation_markdown()
-            
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(mermaid_diagram)
             return [types.TextContent(
                 type="text",
-                text="📄 Documentación exportada en formato Markdown:\n\n" + markdown_doc
+                text=f"📊 Diagrama ER exportado a: {output_path}\n\n{mermaid_diagram}"
             )]
+        else:
+            return [types.TextContent(
+                type="text",
+                text=f"📊 Diagrama ER generado:\n\n{mermaid_diagram}"
+            )]
+    except Exception as e:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Error generando diagrama ER: {str(e)}"
+        )]
+
+@tool_registry.tool(
+    name="export_query",
+    description="Exportar el resultado de un SELECT o una tabla completa a un fichero local (CSV, JSON Lines o Parquet) leyendo por lotes; con parallel la tabla se decodifica en varios procesos",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Consulta SELECT a exportar (o indique table_name)"
+            },
+            "table_name": {
+                "type": "string",
+                "description": "Tabla a exportar completa en lugar de una consulta"
+            },
+            "columns": {
+                "type": "array",
+                "description": "Columnas de la tabla a exportar (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "parallel": {
+                "type": "boolean",
+                "description": "Con table_name: decodificar el archivo por páginas en varios procesos con el lector directo (por defecto: false)"
+            },
+            "workers": {
+                "type": "integer",
+                "description": "Procesos con parallel (por defecto: parallel_scan.workers)"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Ruta del fichero de destino"
+            },
+            "format": {
+                "type": "string",
+                "enum": EXPORT_FORMATS,
+                "description": "Formato del fichero (opcional, por defecto según la extensión). Parquet requiere pyarrow"
+            },
+            "parameters": {
+                "type": "array",
+                "description": "Parámetros para la consulta (opcional); se convierten al tipo de la columna con la que se comparan",
+                "items": {"type": ["string", "number", "boolean", "null"]}
+            },
+            "batch_size": {
+                "type": "integer",
+                "description": "Filas por lote de lectura (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la consulta (por defecto: database.tool_timeouts)"
+            }
+        },
+        "required": ["output_path"]
+    },
+    max_concurrency=1
+)
+async def _tool_export_query(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    query = arguments.get("query")
+    table_name = arguments.get("table_name")
+    columns = arguments.get("columns")
+    output_path = arguments["output_path"]
+    
+    if arguments.get("parallel") and not table_name:
+        return [types.TextContent(type="text", text="❌ parallel requiere table_name")]
+    if not query and table_name and not arguments.get("parallel"):
+        column_str = ", ".join(f"[{column}]" for column in columns) if columns else "*"
+        query = f"SELECT {column_str} FROM [{table_name}]"
+    if not arguments.get("parallel") and not (query or "").strip().upper().startswith('SELECT'):
+        return [types.TextContent(
+            type="text",
+            text="❌ export_query solo admite consultas SELECT"
+        )]
+    
+    exporter = StreamingExporter(progress_callback=_progress_reporter("filas exportadas"))
+    
+    def run_export():
+        if arguments.get("parallel"):
+            if not db_manager.database_path:
+                raise ValueError("No hay conexión activa a la base de datos")
+            scanner = _parallel_scanner(arguments.get("workers"))
+            stream = scanner.open_file_table(db_manager.database_path, table_name, columns,
+                                             arguments.get("batch_size") or CONFIG["results"]["fetch_batch_size"])
+        else:
+            stream = db_manager.open_query(query, arguments.get("parameters"),
+                                           batch_size=arguments.get("batch_size"))
+        with stream:
+            return exporter.export(stream, output_path, arguments.get("format"))
+    
+    # La exportación se ejecuta fuera del bucle de eventos para poder
+    # enviar notificaciones de progreso mientras avanza
+    result = await _run_blocking(run_export, _tool_timeout("export_query", arguments))
+    
+    return [types.TextContent(
+        type="text",
+        text=(f"✅ Exportación completada ({result.export_format}): {result.output_path}\n"
+              f"• Registros: {result.rows}\n"
+              f"• Bytes escritos: {result.bytes_written}\n"
+              f"• Tiempo: {result.elapsed_seconds:.2f} s ({result.rows_per_second:.0f} registros/s)")
+    )]
+
+@tool_registry.tool(
+    name="import_file",
+    description="Importar un fichero local CSV o JSON Lines a una tabla: convierte los valores a los tipos de la tabla, carga por lotes con executemany (una transacción por lote) y deja las filas rechazadas en un fichero aparte",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "source_path": {
+                "type": "string",
+                "description": "Ruta del fichero a importar"
+            },
+            "table_name": {
+                "type": "string",
+                "description": "Tabla de destino"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["csv", "jsonl"],
+                "description": "Formato del fichero (por defecto: según la extensión)"
+            },
+            "column_map": {
+                "type": "object",
+                "description": "Campo del fichero → columna de la tabla (por defecto: mismo nombre, sin distinguir mayúsculas)"
+            },
+            "create_table": {
+                "type": "boolean",
+                "description": "Crear la tabla con los tipos inferidos de las primeras filas si no existe (por defecto: false)"
+            },
+            "delimiter": {
+                "type": "string",
+                "description": "Separador CSV (por defecto: se detecta coma, punto y coma o tabulador)"
+            },
+            "encoding": {
+                "type": "string",
+                "description": "Codificación del fichero (por defecto: utf-8, p. ej. cp1252 para CSV de Excel)"
+            },
+            "batch_size": {
+                "type": "integer",
+                "description": "Filas por lote y transacción (por defecto: import.batch_size)"
+            },
+            "max_rejected": {
+                "type": "integer",
+                "description": "Rechazos a partir de los cuales se interrumpe (por defecto: import.max_rejected)"
+            },
+            "rejects_path": {
+                "type": "string",
+                "description": "Fichero JSON Lines de filas rechazadas (por defecto: <fichero>.rejects.jsonl)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos (por defecto: database.tool_timeouts.import_file)"
+            }
+        },
+        "required": ["source_path", "table_name"]
+    },
+    max_concurrency=1
+)
+async def _tool_import_file(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    source_path = arguments["source_path"]
+    table_name = arguments["table_name"]
+    settings = CONFIG["import"]
+    
+    if not db_manager.is_connected():
+        return [types.TextContent(type="text", text="❌ No hay conexión activa a la base de datos")]
+    
+    report = _progress_reporter("filas importadas")
+    importer = FileImporter(
+        batch_size=arguments.get("batch_size") or settings["batch_size"],
+        max_rejected=arguments.get("max_rejected", settings["max_rejected"]),
+        infer_rows=settings["infer_rows"],
+        progress_callback=report,
+        is_fatal=lambda error: isinstance(error, LockConflictError)
+    )
+    
+    def run_import():
+        exists = table_name.lower() in (table.lower() for table in db_manager.list_tables())
+        schema = db_manager.get_table_schema(table_name) if exists else []
         
-        elif name == "generate_enhanced_documentation":
-            if not ENHANCED_DOC_AVAILABLE:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
-                )]
-            
-            include_er_diagram = arguments.get("include_er_diagram", True)
-            include_data_quality = arguments.get("include_data_quality", True)
-            include_field_analysis = arguments.get("include_field_analysis", True)
-            
-            try:
-                enhanced_gen = EnhancedDocumentationGenerator(db_manager)
-                documentation = enhanced_gen.generate_enhanced_documentation(
-                    include_er_diagram=include_er_diagram,
-                    include_data_quality=include_data_quality,
-                    include_field_analysis=include_field_analysis
-                )
-                
-                return [types.TextContent(
-                    type="text",
-                    text=f"📚 Documentación mejorada generada exitosamente:\n\n{documentation}"
-                )]
-            except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Error generando documentación mejorada: {str(e)}"
-                )]
-        
-        elif name == "export_documentation_html":
-            if not ENHANCED_DOC_AVAILABLE:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
-                )]
-            
-            output_path = arguments.get("output_path")
-            
-            try:
-                enhanced_gen = EnhancedDocumentationGenerator(db_manager)
-                html_content = enhanced_gen.export_to_html()
-                
-                if output_path:
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📄 Documentación HTML exportada a: {output_path}"
-                    )]
-                else:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📄 Documentación HTML generada:\n\n{html_content[:2000]}..."
-                    )]
-            except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Error exportando HTML: {str(e)}"
-                )]
-        
-        elif name == "export_documentation_json":
-            if not ENHANCED_DOC_AVAILABLE:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
-                )]
-            
-            output_path = arguments.get("output_path")
-            
-            try:
-                enhanced_gen = EnhancedDocumentationGenerator(db_manager)
-                json_content = enhanced_gen.export_to_json()
-                
-                if output_path:
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(json_content)
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📄 Documentación JSON exportada a: {output_path}"
-                    )]
-                else:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📄 Documentación JSON generada:\n\n{json_content[:2000]}..."
-                    )]
-            except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Error exportando JSON: {str(e)}"
-                )]
-        
-        elif name == "analyze_data_quality":
-            if not ENHANCED_DOC_AVAILABLE:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
-                )]
-            
-            table_name = arguments.get("table_name")
-            
-            try:
-                enhanced_gen = EnhancedDocumentationGenerator(db_manager)
-                
-                if table_name:
-                    # Análisis de una tabla específica
-                    analysis = enhanced_gen.analyze_data_quality_for_table(table_name)
-                    result_text = f"📊 Análisis de calidad de datos para '{table_name}':\n\n"
-                    result_text += f"• Total de registros: {analysis['total_records']}\n"
-                    result_text += f"• Registros únicos: {analysis['unique_records']}\n"
-                    result_text += f"• Registros duplicados: {analysis['duplicate_records']}\n"
-                    result_text += f"• Campos con valores nulos: {analysis['null_fields']}\n"
-                    result_text += f"• Campos con valores vacíos: {analysis['empty_fields']}\n"
-                else:
-                    # Análisis de todas las tablas
-                    tables = db_manager.list_tables()
-                    result_text = "📊 Análisis de calidad de datos (todas las tablas):\n\n"
-                    
-                    for table in tables:
-                        analysis = enhanced_gen.analyze_data_quality_for_table(table)
-                        result_text += f"📋 {table}:\n"
-                        result_text += f"  • Registros: {analysis['total_records']}\n"
-                        result_text += f"  • Únicos: {analysis['unique_records']}\n"
-                        result_text += f"  • Duplicados: {analysis['duplicate_records']}\n"
-                        result_text += f"  • Campos con nulos: {len(analysis['null_fields'])}\n\n"
-                
-                return [types.TextContent(type="text", text=result_text)]
-            except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Error analizando calidad de datos: {str(e)}"
-                )]
+        def create_table(columns):
+            db_manager.create_table(f"[{table_name}]", [dict(column, name=f"[{column['name']}]") for column in columns])
+            return db_manager.get_table_schema(table_name)
         
-        elif name == "generate_er_diagram":
-            if not ENHANCED_DOC_AVAILABLE:
-                return [types.TextContent(
-                    type="text",
-                    text="❌ Módulo de documentación mejorada no disponible. Instala las dependencias necesarias."
-                )]
-            
-            output_path = arguments.get("output_path")
-            
+        return importer.import_file(
+            source_path, table_name, db_manager.execute_many, schema=schema,
+            create_table=create_table if arguments.get("create_table") else None,
+            import_format=arguments.get("format"), column_map=arguments.get("column_map"),
+            delimiter=arguments.get("delimiter"), encoding=arguments.get("encoding") or "utf-8-sig",
+            rejects_path=arguments.get("rejects_path")
+        )
+    
+    try:
+        result = await _run_blocking(run_import, _tool_timeout("import_file", arguments))
+    except ImportAbortedError as e:
+        return [types.TextContent(type="text", text=f"❌ {e}\n\n{e.result.describe('📊 Importación parcial')}")]
+    return [types.TextContent(type="text", text=result.describe())]
+
+@tool_registry.tool(
+    name="mirror_database",
+    description="Copiar tablas de la base de datos conectada a una réplica local SQLite/DuckDB para consultas analíticas rápidas",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "mirror_path": {
+                "type": "string",
+                "description": "Ruta del fichero de la réplica (opcional si ya existe una réplica o está configurada)"
+            },
+            "tables": {
+                "type": "array",
+                "description": "Tablas a replicar (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "engine": {
+                "type": "string",
+                "enum": MIRROR_ENGINES,
+                "description": "Motor de la réplica (por defecto: auto, DuckDB si está instalado)"
+            },
+            "refresh": {
+                "type": "boolean",
+                "description": "Copiar solo las tablas que han cambiado (por defecto: false)"
+            },
+            "incremental": {
+                "type": "boolean",
+                "description": "Al refrescar, aplicar solo las filas cambiadas usando la captura de cambios (por defecto: false)"
+            }
+        },
+        "required": []
+    },
+    max_concurrency=1
+)
+async def _tool_mirror_database(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    global database_mirror
+    
+    mirror_path = arguments.get("mirror_path") or CONFIG["mirror"]["path"]
+    engine = arguments.get("engine", CONFIG["mirror"]["engine"])
+    if mirror_path and (database_mirror is None or database_mirror.mirror_path != mirror_path):
+        if database_mirror is not None:
+            database_mirror.close()
+        database_mirror = DatabaseMirror(db_manager, mirror_path, engine=engine,
+                                         batch_size=CONFIG["mirror"]["batch_size"])
+    if database_mirror is None:
+        return [types.TextContent(
+            type="text",
+            text="❌ Indica 'mirror_path' para crear la réplica local"
+        )]
+    
+    # La réplica usa sus propias instantáneas para no interferir con capture_changes
+    if arguments.get("incremental", False):
+        if database_mirror.change_capture is None:
+            database_mirror.change_capture = ChangeCapture(
+                db_manager, database_mirror.mirror_path + ".changes",
+                batch_size=CONFIG["change_capture"]["batch_size"]
+            )
+    else:
+        database_mirror.change_capture = None
+    
+    results = await _run_blocking(
+        lambda: database_mirror.mirror_tables(arguments.get("tables"), arguments.get("refresh", False)),
+        _tool_timeout("mirror_database", arguments)
+    )
+    
+    status_icons = {"copied": "✅", "updated": "🔄", "unchanged": "⏭️", "error": "❌"}
+    result_text = f"🪞 Réplica local ({database_mirror.engine}): {database_mirror.mirror_path}\n\n"
+    for result in results:
+        result_text += f"{status_icons.get(result.status, '•')} {result.table_name}: {result.status}"
+        if result.status == "copied":
+            result_text += f" ({result.rows} registros, {result.indexes} índices, {result.elapsed_seconds:.2f} s)"
+        elif result.status == "updated":
+            result_text += f" ({result.rows} registros reescritos, {result.elapsed_seconds:.2f} s)"
+        elif result.status == "error":
+            result_text += f" ({result.error})"
+        result_text += "\n"
+    result_text += "\nUsa 'use_mirror': true en execute_query/get_records para consultar la réplica."
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="capture_changes",
+    description="Detectar filas insertadas, modificadas y eliminadas en una tabla desde la última captura (hash por clave primaria)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "table_name": {
+                "type": "string",
+                "description": "Nombre de la tabla"
+            },
+            "key_columns": {
+                "type": "array",
+                "description": "Columnas clave (opcional, por defecto la clave primaria)",
+                "items": {"type": "string"}
+            },
+            "commit": {
+                "type": "boolean",
+                "description": "Guardar la nueva instantánea (por defecto: true; false solo consulta)"
+            },
+            "export_path": {
+                "type": "string",
+                "description": "Fichero donde exportar las claves cambiadas (opcional, .csv/.jsonl/.parquet)"
+            },
+            "max_keys": {
+                "type": "integer",
+                "description": "Máximo de claves a mostrar por tipo de cambio (por defecto: 20)"
+            }
+        },
+        "required": ["table_name"]
+    },
+    max_concurrency=1
+)
+async def _tool_capture_changes(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    table_name = arguments["table_name"]
+    max_keys = arguments.get("max_keys", 20)
+    capture = ChangeCapture(
+        db_manager, _change_state_dir(),
+        batch_size=CONFIG["change_capture"]["batch_size"],
+        change_recorder=_get_doc_generator() if _load_enhanced_documentation() else None
+    )
+    
+    change_set = await _run_blocking(
+        lambda: capture.capture(table_name, arguments.get("key_columns"), arguments.get("commit", True)),
+        _tool_timeout("capture_changes", arguments)
+    )
+    
+    if change_set.first_run:
+        return [types.TextContent(
+            type="text",
+            text=(f"📸 Primera captura de '{table_name}': instantánea creada con "
+                  f"{change_set.rows_scanned} registros ({change_set.elapsed_seconds:.2f} s).\n"
+                  "Las siguientes llamadas mostrarán los cambios desde este punto.")
+        )]
+    
+    result_text = f"🔍 Cambios en '{table_name}' desde la última captura: {change_set.summary()}\n"
+    result_text += f"• Registros analizados: {change_set.rows_scanned} (antes: {change_set.previous_rows})\n"
+    result_text += f"• Tiempo: {change_set.elapsed_seconds:.2f} s\n"
+    for label, keys in (("Insertados", change_set.inserted), ("Modificados", change_set.updated),
+                        ("Eliminados", change_set.deleted)):
+        if keys:
+            shown = ", ".join(json.dumps(key, ensure_ascii=False) for key in keys[:max_keys])
+            more = f" … (+{len(keys) - max_keys})" if len(keys) > max_keys else ""
+            result_text += f"\n{label} ({', '.join(change_set.key_columns)}): {shown}{more}"
+    
+    export_path = arguments.get("export_path")
+    if export_path and change_set.has_changes:
+        stream = IterableStream(["change_type", "key"], change_set.iter_records())
+        exported = await _run_blocking(lambda: StreamingExporter().export(stream, export_path))
+        result_text += f"\n\n📄 Cambios exportados a: {exported.output_path} ({exported.rows} registros)"
+    if not arguments.get("commit", True):
+        result_text += "\n\n(Modo consulta: la instantánea no se ha actualizado)"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="enable_local_cache",
+    description="Leer desde una copia local del archivo (para bases de datos en carpetas de red): las consultas de lectura usan la copia, que se refresca copiando solo los bloques cambiados según el desfase admitido",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "enabled": {
+                "type": "boolean",
+                "description": "Activar (true, por defecto) o desactivar la copia local"
+            },
+            "cache_dir": {
+                "type": "string",
+                "description": "Directorio local de las copias (por defecto: local_cache.cache_dir o ~/.mcp-access/cache)"
+            },
+            "max_staleness_seconds": {
+                "type": "number",
+                "description": "Desfase admitido por defecto en segundos (por defecto: local_cache.max_staleness_seconds)"
+            },
+            "refresh": {
+                "type": "boolean",
+                "description": "Forzar una verificación completa por bloques ahora (por defecto: false)"
+            }
+        },
+        "required": []
+    },
+    max_concurrency=1
+)
+async def _tool_enable_local_cache(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    global read_cache
+    
+    if not arguments.get("enabled", True):
+        if read_cache is None:
+            return [types.TextContent(type="text", text="📊 La copia local no estaba activa")]
+        cache, read_cache = read_cache, None
+        await _run_blocking(cache.close, _tool_timeout("enable_local_cache", arguments))
+        return [types.TextContent(type="text", text="✅ Copia local desactivada: las lecturas vuelven al archivo original")]
+    
+    if not db_manager.is_connected():
+        return [types.TextContent(type="text", text="❌ No hay conexión activa a la base de datos")]
+    
+    settings = CONFIG["local_cache"]
+    database_path = db_manager.database_path
+    
+    def enable():
+        global read_cache
+        cache = read_cache
+        if cache is None or cache.source_path != database_path:
+            if cache is not None:
+                cache.close()
+            cache_dir = arguments.get("cache_dir") or settings["cache_dir"] or str(Path.home() / ".mcp-access" / "cache")
+            cache = LocalReadCache(
+                database_path,
+                os.path.join(cache_dir, hashlib.sha1(os.path.abspath(database_path).encode("utf-8")).hexdigest()[:12]),
+                _new_session_manager,
+                password=db_manager.password,
+                block_size=settings["block_size"],
+                max_staleness_seconds=settings["max_staleness_seconds"],
+                verify_interval_seconds=settings["verify_interval_seconds"],
+                change_token=lambda: db_manager.write_count
+            )
+        if arguments.get("max_staleness_seconds") is not None:
+            cache.max_staleness_seconds = arguments["max_staleness_seconds"]
+        try:
+            result = cache.refresh(force=arguments.get("refresh", False))
+        except Exception:
+            if cache is not read_cache:
+                cache.close()
+            raise
+        read_cache = cache
+        return cache.status(), result
+    
+    status, result = await _run_blocking(enable, _tool_timeout("enable_local_cache", arguments))
+    return [types.TextContent(
+        type="text",
+        text=(f"✅ Copia local activa: {status['local_path']}\n"
+              f"• Origen: {status['source_path']}\n"
+              f"• Comprobación: {result.describe()}\n"
+              f"• Desfase admitido: {status['max_staleness_seconds']} s "
+              f"(por herramienta en local_cache.tool_staleness o con max_staleness_seconds)\n"
+              f"• Las escrituras siguen yendo al archivo original")
+    )]
+
+@tool_registry.tool(
+    name="get_server_stats",
+    description="Mostrar latencias (p50/p95/p99), llamadas, errores, filas, bytes y aciertos de caché por herramienta y por método",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "format": {
+                "type": "string",
+                "enum": ["text", "json"],
+                "description": "Formato de salida (por defecto: text)"
+            },
+            "reset": {
+                "type": "boolean",
+                "description": "Reiniciar las métricas después de leerlas (por defecto: false)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_get_server_stats(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    snapshot = metrics.snapshot()
+    if arguments.get("reset", False):
+        metrics.reset()
+    
+    if arguments.get("format", "text") == "json":
+        return [types.TextContent(type="text", text=json.dumps(snapshot, ensure_ascii=False, indent=2))]
+    return [types.TextContent(type="text", text=format_stats(snapshot))]
+
+@tool_registry.tool(
+    name="get_lock_status",
+    description="Mostrar quién figura en el archivo de bloqueo (.laccdb/.ldb) de la base de datos y el estado de la cola de escrituras (profundidad, lotes, conflictos de bloqueo)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "database_path": {
+                "type": "string",
+                "description": "Ruta del archivo Access (por defecto: la base de datos conectada)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_get_lock_status(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    database_path = arguments.get("database_path") or db_manager.database_path
+    if not database_path:
+        return [types.TextContent(type="text", text="❌ Indique database_path o conecte una base de datos")]
+    
+    status = read_lock_file(database_path)
+    result_text = f"🔒 Archivo de bloqueo: {status.path}\n"
+    if status.users:
+        result_text += f"• Entradas ({len(status.users)}, pueden incluir usuarios ya desconectados):\n"
+        result_text += "\n".join(f"  - {user}" for user in status.users) + "\n"
+    else:
+        result_text += f"• {status.describe()}\n"
+    
+    scheduler = db_manager.write_scheduler
+    if scheduler is not None and database_path == db_manager.database_path:
+        stats = scheduler.stats()
+        result_text += (f"\n📥 Cola de escrituras:\n"
+                        f"• Pendientes: {stats['queue_depth']}\n"
+                        f"• Lecturas en curso: {stats['active_readers']}\n"
+                        f"• Lotes: {stats['batches']} ({stats['writes']} escrituras)\n"
+                        f"• Conflictos de bloqueo: {stats['lock_conflicts']}\n"
+                        f"• Escrituras fallidas: {stats['failures']}\n")
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="top_slow_queries",
+    description="Mostrar las consultas más lentas del registro de consultas lentas, agrupadas por sentencia normalizada",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "limit": {
+                "type": "integer",
+                "description": "Número de sentencias a mostrar (por defecto: 10)"
+            },
+            "sort_by": {
+                "type": "string",
+                "enum": SLOW_QUERY_SORT_KEYS,
+                "description": "Criterio de orden (por defecto: total_ms)"
+            },
+            "tool": {
+                "type": "string",
+                "description": "Filtrar por la herramienta que lanzó la consulta (opcional)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_top_slow_queries(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    slow_log = db_manager.slow_query_log
+    groups = await _run_blocking(lambda: slow_log.top(
+        arguments.get("limit", 10), arguments.get("sort_by", "total_ms"), arguments.get("tool")
+    ))
+    
+    if not groups:
+        return [types.TextContent(
+            type="text",
+            text=(f"🐢 No hay consultas por encima de {slow_log.threshold_ms:.0f} ms "
+                  f"en {slow_log.path}")
+        )]
+    
+    result_text = f"🐢 Consultas lentas (umbral {slow_log.threshold_ms:.0f} ms, {slow_log.path}):\n"
+    for position, group in enumerate(groups, 1):
+        result_text += f"\n{position}. {group['normalized_sql'][:500]}\n"
+        result_text += (f"   • Ejecuciones: {group['count']} | total {group['total_ms']:.0f} ms | "
+                        f"media {group['mean_ms']:.0f} ms | máx {group['max_ms']:.0f} ms\n")
+        result_text += (f"   • Ejecución {group['execute_ms'] / group['count']:.0f} ms / "
+                        f"lectura {group['fetch_ms'] / group['count']:.0f} ms de media, "
+                        f"{group['rows'] / group['count']:.0f} filas de media\n")
+        if group["errors"]:
+            result_text += f"   • ⚠️ Fallidas o canceladas: {group['errors']}\n"
+        if group["tools"]:
+            result_text += f"   • Herramientas: {', '.join(group['tools'])}\n"
+        result_text += f"   • Última: {group['last_seen']}\n"
+    
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="advise_indexes",
+    description="Proponer índices (CREATE INDEX) a partir de las columnas de WHERE/JOIN/ORDER BY del registro de consultas lentas, ordenados por el tiempo que ahorrarían",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "limit": {
+                "type": "integer",
+                "description": "Número máximo de índices a proponer (por defecto: 10)"
+            },
+            "tools": {
+                "type": "array",
+                "description": "Herramientas cuyas consultas se analizan (por defecto: index_advisor.tools)",
+                "items": {"type": "string"}
+            },
+            "sample_rows": {
+                "type": "integer",
+                "description": "Filas de muestra por tabla para estimar la selectividad (por defecto: index_advisor.sample_rows)"
+            },
+            "apply": {
+                "type": "boolean",
+                "description": "Crear los índices propuestos (por defecto: false, solo los muestra)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_advise_indexes(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    settings = CONFIG["index_advisor"]
+    tools = set(arguments.get("tools") or settings["tools"])
+    slow_log = db_manager.slow_query_log
+    
+    def sample(table, columns, rows):
+        column_list = ", ".join(f"[{column}]" for column in columns)
+        results = db_manager.execute_query(f"SELECT TOP {int(rows)} {column_list} FROM [{table}]")
+        return [tuple(row.values()) for row in results]
+    
+    def count_rows(table):
+        return db_manager.execute_query(f"SELECT COUNT(*) AS Filas FROM [{table}]")[0]["Filas"]
+    
+    def advise():
+        groups = [group for group in slow_log.top(settings["max_statements"])
+                  if tools.intersection(group["tools"])]
+        advisor = IndexAdvisor(
+            db_manager._column_types,
+            db_manager.get_table_indexes,
+            sample,
+            count_rows=count_rows,
+            sample_rows=arguments.get("sample_rows", settings["sample_rows"]),
+            min_table_rows=settings["min_table_rows"],
+            max_matched_fraction=settings["max_matched_fraction"]
+        )
+        return advisor.advise(groups, arguments.get("limit", 10))
+    
+    advice = await _run_blocking(advise, _tool_timeout("advise_indexes", arguments))
+    if _load_enhanced_documentation():
+        recommendations = {}
+        for candidate in advice.candidates:
+            recommendations.setdefault(candidate.table.lower(), []).append(candidate.create_sql)
+        _get_doc_generator().index_recommendations = recommendations
+    
+    result_text = (f"🔎 Asesor de índices: {advice.statements_analyzed} sentencias de "
+                   f"{', '.join(sorted(tools))} en {slow_log.path}, {advice.tables_sampled} tablas muestreadas\n")
+    if advice.skipped:
+        result_text += "• Descartados: " + ", ".join(f"{reason} ({count})"
+                                                     for reason, count in sorted(advice.skipped.items())) + "\n"
+    if not advice.candidates:
+        result_text += "\n✅ No hay índices que recomendar"
+        return [types.TextContent(type="text", text=result_text)]
+    
+    applied = {}
+    if arguments.get("apply"):
+        for candidate in advice.candidates:
             try:
-                enhanced_gen = EnhancedDocumentationGenerator(db_manager)
-                mermaid_diagram = enhanced_gen.generate_er_diagram()
-                
-                if output_path:
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(mermaid_diagram)
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📊 Diagrama ER exportado a: {output_path}\n\n{mermaid_diagram}"
-                    )]
-                else:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"📊 Diagrama ER generado:\n\n{mermaid_diagram}"
-                    )]
+                await _run_blocking(lambda sql=candidate.create_sql: db_manager.execute_query(sql))
+                applied[candidate.create_sql] = "✅ creado"
             except Exception as e:
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Error generando diagrama ER: {str(e)}"
-                )]
-        
+                applied[candidate.create_sql] = f"❌ {e}"
+    
+    for position, candidate in enumerate(advice.candidates, 1):
+        result_text += f"\n{position}. {candidate.create_sql}\n"
+        result_text += (f"   • Ahorro estimado: {candidate.saved_ms:.0f} ms en {candidate.executions} ejecuciones "
+                        f"({candidate.kind}, {candidate.matched_fraction:.2%} de las filas)\n")
+        distinct = ", ".join(f"{column}: {count}" for column, count in candidate.distinct_values.items())
+        result_text += f"   • Valores distintos en {candidate.sample_rows} filas de muestra: {distinct}\n"
+        for statement in candidate.statements[:3]:
+            result_text += f"   • {statement[:200]}\n"
+        if candidate.create_sql in applied:
+            result_text += f"   • {applied[candidate.create_sql]}\n"
+    if not arguments.get("apply"):
+        result_text += "\nUsa 'apply': true para crear los índices."
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="explain_query",
+    description="Mostrar el plan de ejecución de Jet (ShowPlan) de una consulta SELECT: cómo se lee cada tabla (recorrido completo, índice, Rushmore), qué índice se usa y la estrategia de cada combinación",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Consulta SELECT a analizar (se ejecuta para que el motor escriba el plan)"
+            },
+            "parameters": {
+                "type": "array",
+                "description": "Parámetros para la consulta (opcional)",
+                "items": {"type": ["string", "number", "boolean", "null"]}
+            },
+            "enable_showplan": {
+                "type": "boolean",
+                "description": "Activar JETSHOWPLAN en el registro si no lo está (Windows, requiere administrador; el motor lo lee al cargarse, puede hacer falta reiniciar el servidor)"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "json"],
+                "description": "Formato del plan: text (resumen legible) o json (estructura completa). Por defecto: text"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la consulta (por defecto: database.default_timeout)"
+            }
+        },
+        "required": ["query"]
+    }
+)
+async def _tool_explain_query(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    query = arguments["query"]
+    parameters = arguments.get("parameters")
+    if not query.strip().upper().startswith('SELECT'):
+        return [types.TextContent(type="text",
+                                  text="❌ explain_query solo admite SELECT: el plan se obtiene ejecutando la sentencia")]
+    if not db_manager.is_connected():
+        return [types.TextContent(type="text", text="❌ No hay conexión activa a la base de datos")]
+    
+    notes = []
+    enabled = showplan_enabled()
+    if arguments.get("enable_showplan") and not enabled:
+        try:
+            keys = enable_showplan()
+        except ShowPlanError as e:
+            return [types.TextContent(type="text", text=f"❌ {e}")]
+        notes.append(f"🔧 JETSHOWPLAN activado en {len(keys)} rama(s) del registro")
+    
+    # El plan es el de la consulta que ejecuta execute_query
+    rewriter = db_manager.query_rewriter
+    if rewriter is not None:
+        try:
+            rewritten = await _run_blocking(lambda: rewriter.rewrite(query, parameters),
+                                            _tool_timeout("explain_query", arguments))
+        except QueryRewriteError as e:
+            notes.append(f"⚠️ Sin reescribir para Access: {e}")
         else:
-            return [types.TextContent(
-                type="text",
-                text=f"❌ Herramienta desconocida: {name}"
-            )]
+            query, parameters = rewritten.sql, rewritten.params
+            if rewritten.changed:
+                notes.append(f"🔁 Reescrita para Access: {'; '.join(rewritten.changes)}")
+    
+    settings = CONFIG["showplan"]
+    capture = ShowPlanCapture(settings["path"], settings["wait_seconds"])
+    
+    def run():
+        # Con la conexión reservada ninguna otra consulta del servidor escribe
+        # su plan entre la marca y la lectura de showplan.out
+        with db_manager.connection_lock:
+            marks = capture.mark()
+            # Basta con leer la primera fila: Jet escribe el plan al optimizar la consulta
+            with db_manager.open_query(query, parameters, batch_size=1) as stream:
+                next(iter(stream), None)
+            return capture.read_since(marks)
+    
+    text = await _run_blocking(run, _tool_timeout("explain_query", arguments))
+    plans = parse_showplan(text)
+    if not plans:
+        hint = ("activa JETSHOWPLAN = \"ON\" en la rama Engines\\Debug del motor (o usa 'enable_showplan': true) "
+                "y reinicia el servidor" if not enabled else
+                f"comprueba la ruta de showplan.out ({', '.join(capture.paths)}) o showplan.path en la configuración")
+        return [types.TextContent(type="text", text="\n".join(notes + [f"❌ El motor no escribió ningún plan: {hint}"]))]
     
+    plan = plans[-1]
+    if len(plans) > 1:
+        # Otro proceso con el mismo motor también ha escrito en showplan.out
+        notes.append(f"⚠️ El motor escribió {len(plans)} planes durante la consulta; se muestra el último")
+    if arguments.get("output_format") == "json":
+        return [types.TextContent(type="text", text=json.dumps(plan.to_dict(), ensure_ascii=False, indent=2))]
+    
+    result_text = f"🔎 Plan de ejecución de Jet ({len(plan.steps)} pasos)\n"
+    if notes:
+        result_text += "\n".join(notes) + "\n"
+    result_text += "\n" + format_plan(plan)
+    if plan.scanned_tables:
+        result_text += f"\n\n⚠️ Recorrido completo de: {', '.join(plan.scanned_tables)} (ver advise_indexes)"
+    return [types.TextContent(type="text", text=result_text)]
+
+def _format_refresh(result) -> str:
+    """Una línea con el resultado del refresco de una vista."""
+    if result.mode == "error":
+        return f"❌ {result.name}: {result.error}"
+    if result.mode == "unchanged":
+        return f"✅ {result.name}: sin filas nuevas ({result.groups} filas)"
+    detail = (f"{result.rows_read} grupos nuevos o cambiados, {result.groups} filas"
+              if result.mode == "incremental" else f"{result.groups} filas")
+    return f"✅ {result.name}: refresco {'incremental' if result.mode == 'incremental' else 'completo'}, {detail} en {result.elapsed_seconds:.2f} s"
+
+@tool_registry.tool(
+    name="create_materialized_view",
+    description="Guardar el resultado de una consulta agregada (GROUP BY) en una vista materializada local; las consultas iguales a su definición o que lean la vista por su nombre se responden desde ella",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Nombre de la vista (no puede coincidir con una tabla)"
+            },
+            "query": {
+                "type": "string",
+                "description": "Consulta SELECT de la vista; para el refresco incremental: SELECT grupos, SUM/COUNT/MIN/MAX/AVG(...) AS nombre FROM tabla [WHERE ...] GROUP BY grupos"
+            },
+            "key_column": {
+                "type": "string",
+                "description": "Columna creciente de la tabla (autonumérico o fecha de alta) para refrescar solo las filas nuevas (opcional)"
+            },
+            "refresh_seconds": {
+                "type": "number",
+                "description": "Refrescar cada N segundos (incremental si hay key_column) (opcional)"
+            },
+            "full_refresh_seconds": {
+                "type": "number",
+                "description": "Refresco completo cada N segundos; recoge las filas modificadas o borradas (opcional)"
+            },
+            "max_staleness_seconds": {
+                "type": "number",
+                "description": "Antigüedad máxima al leer la vista; si es mayor se refresca antes de responder (opcional)"
+            },
+            "replace": {
+                "type": "boolean",
+                "description": "Sustituir la vista si ya existe (por defecto: false)"
+            }
+        },
+        "required": ["name", "query"]
+    }
+)
+async def _tool_create_materialized_view(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    if not db_manager.is_connected():
+        return [types.TextContent(type="text", text="❌ No hay conexión activa a la base de datos")]
+    query = arguments["query"]
+    # Se guarda como SQL de Access para que coincida con lo que ejecuta execute_query
+    rewriter = db_manager.query_rewriter
+    if rewriter is not None:
+        try:
+            query = (await _run_blocking(lambda: rewriter.rewrite(query),
+                                         _tool_timeout("create_materialized_view", arguments))).sql
+        except QueryRewriteError as e:
+            logger.debug(f"Vista guardada sin reescribir ({e}): {query}")
+    store = _open_materialized_views(create=True)
+    try:
+        result = await _run_blocking(lambda: store.create(
+            arguments["name"], query,
+            key_column=arguments.get("key_column"),
+            refresh_seconds=arguments.get("refresh_seconds"),
+            full_refresh_seconds=arguments.get("full_refresh_seconds"),
+            max_staleness_seconds=arguments.get("max_staleness_seconds"),
+            replace=arguments.get("replace", False)
+        ), _tool_timeout("create_materialized_view", arguments))
+    except ViewDefinitionError as e:
+        return [types.TextContent(type="text", text=f"❌ Vista no válida: {e}")]
+    view = store.get(arguments["name"])
+    result_text = f"🧊 Vista materializada '{view.name}' creada en {store.path}\n{_format_refresh(result)}\n"
+    result_text += f"• Columnas: {', '.join(view.columns)}\n"
+    if view.key_column:
+        result_text += f"• Refresco incremental por {view.key_column} (última clave: {view.high_water})\n"
+    elif view.aggregate is None:
+        result_text += "• Solo refresco completo (la consulta no es un GROUP BY simple de una tabla)\n"
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="refresh_materialized_view",
+    description="Refrescar una vista materializada (o todas): incremental si declara key_column, completo con 'full'",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Vista a refrescar (por defecto: todas)"
+            },
+            "full": {
+                "type": "boolean",
+                "description": "Refresco completo aunque la vista admita el incremental (por defecto: false)"
+            }
+        },
+        "required": []
+    }
+)
+async def _tool_refresh_materialized_view(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    store = materialized_views
+    if store is None or not store.list():
+        return [types.TextContent(type="text", text="❌ No hay vistas materializadas (create_materialized_view)")]
+    try:
+        views = [store.get(arguments["name"])] if arguments.get("name") else store.list()
+    except KeyError as e:
+        return [types.TextContent(type="text", text=f"❌ {e.args[0]}")]
+    
+    def refresh():
+        return [store.refresh(view.name, full=arguments.get("full", False)) for view in views]
+    
+    results = await _run_blocking(refresh, _tool_timeout("refresh_materialized_view", arguments))
+    return [types.TextContent(type="text", text="\n".join(_format_refresh(result) for result in results))]
+
+@tool_registry.tool(
+    name="list_materialized_views",
+    description="Listar las vistas materializadas con su consulta, modo de refresco, antigüedad y número de filas",
+    input_schema={
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+)
+async def _tool_list_materialized_views(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    store = materialized_views
+    if store is None or not store.list():
+        return [types.TextContent(type="text", text="🧊 No hay vistas materializadas")]
+    result_text = f"🧊 Vistas materializadas ({store.path}):\n"
+    for view in store.list():
+        info = view.to_dict()
+        age = f"hace {info['age_seconds']:.0f} s" if info["age_seconds"] is not None else "nunca"
+        mode = f"incremental por {view.key_column}" if view.key_column else "completo"
+        result_text += f"\n• {view.name}: {view.row_count} filas, refrescada {age} ({mode})\n"
+        result_text += f"  {view.query}\n"
+        schedule = []
+        if view.refresh_seconds:
+            schedule.append(f"cada {view.refresh_seconds:g} s")
+        if view.full_refresh_seconds:
+            schedule.append(f"completo cada {view.full_refresh_seconds:g} s")
+        if view.max_staleness_seconds is not None:
+            schedule.append(f"antigüedad máxima {view.max_staleness_seconds:g} s")
+        if schedule:
+            result_text += f"  Refresco: {', '.join(schedule)}\n"
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="drop_materialized_view",
+    description="Eliminar una vista materializada",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Vista a eliminar"
+            }
+        },
+        "required": ["name"]
+    }
+)
+async def _tool_drop_materialized_view(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    store = materialized_views
+    # Espera a que termine un refresco en curso de la vista
+    if store is None or not await _run_blocking(lambda: store.drop(arguments["name"])):
+        return [types.TextContent(type="text", text=f"❌ No existe la vista materializada '{arguments['name']}'")]
+    return [types.TextContent(type="text", text=f"✅ Vista materializada '{arguments['name']}' eliminada")]
+
+@tool_registry.tool(
+    name="open_session",
+    description="Abrir una base de datos Access adicional con un alias, sin cerrar la conexión principal",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "alias": {
+                "type": "string",
+                "description": "Nombre corto de la sesión (por ejemplo '2023')"
+            },
+            "database_path": {
+                "type": "string",
+                "description": "Ruta completa al archivo de base de datos Access (.mdb o .accdb)"
+            },
+            "password": {
+                "type": "string",
+                "description": "Contraseña de la base de datos (opcional, por defecto: dpddpd)"
+            }
+        },
+        "required": ["alias", "database_path"]
+    }
+)
+async def _tool_open_session(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    alias = arguments["alias"]
+    database_path = arguments["database_path"]
+    await _run_blocking(lambda: session_manager.open(alias, database_path, arguments.get("password")))
+    return [types.TextContent(
+        type="text",
+        text=f"✅ Sesión '{alias}' abierta: {database_path} ({len(session_manager)} sesiones abiertas)"
+    )]
+
+@tool_registry.tool(
+    name="close_session",
+    description="Cerrar una sesión abierta con open_session",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "alias": {
+                "type": "string",
+                "description": "Alias de la sesión a cerrar"
+            }
+        },
+        "required": ["alias"]
+    }
+)
+async def _tool_close_session(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    alias = arguments["alias"]
+    await _run_blocking(lambda: session_manager.close(alias))
+    return [types.TextContent(type="text", text=f"✅ Sesión '{alias}' cerrada")]
+
+@tool_registry.tool(
+    name="list_sessions",
+    description="Listar las sesiones abiertas (alias y ruta de cada base de datos)",
+    input_schema={
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+)
+async def _tool_list_sessions(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    sessions = session_manager.sessions()
+    if not sessions:
+        return [types.TextContent(type="text", text="📋 No hay sesiones abiertas. Use open_session para abrir una")]
+    
+    result_text = f"📋 Sesiones abiertas ({len(sessions)}):\n\n"
+    for session in sessions:
+        opened = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(session.opened_at))
+        result_text += f"• {session.alias}: {session.database_path} (abierta {opened})\n"
+    return [types.TextContent(type="text", text=result_text)]
+
+@tool_registry.tool(
+    name="fan_out_query",
+    description="Ejecutar la misma consulta SELECT en varias sesiones en paralelo y combinar los resultados (unión o agregado)",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Consulta SELECT a ejecutar en cada base de datos"
+            },
+            "sessions": {
+                "type": "array",
+                "description": "Alias de las sesiones a consultar (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "parameters": {
+                "type": "array",
+                "description": "Parámetros para la consulta (opcional); se convierten al tipo de la columna con la que se comparan",
+                "items": {"type": ["string", "number", "boolean", "null"]}
+            },
+            "merge": {
+                "type": "string",
+                "enum": MERGE_MODES,
+                "description": "union: concatenar filas con la columna _database; aggregate: volver a agregar por group_by (por defecto: union)"
+            },
+            "group_by": {
+                "type": "array",
+                "description": "Columnas de agrupación para merge=aggregate",
+                "items": {"type": "string"}
+            },
+            "aggregates": {
+                "type": "object",
+                "description": "Columna -> función (sum, count, min, max) para merge=aggregate",
+                "additionalProperties": {"type": "string", "enum": AGGREGATE_FUNCTIONS}
+            },
+            "max_rows_per_database": {
+                "type": "integer",
+                "description": "Máximo de filas leídas de cada base de datos (por defecto: sessions.max_rows_per_database)"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "jsonl", "csv", "columnar"],
+                "description": "Formato del resultado: text (tabla legible), jsonl, csv o columnar (JSON compacto por columnas). Por defecto: text"
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Tamaño máximo de la respuesta en bytes (opcional)"
+            },
+            "max_cell_chars": {
+                "type": "integer",
+                "description": "Caracteres máximos por celda antes de truncar en text y csv (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancelan todas las consultas (por defecto: database.default_timeout)"
+            }
+        },
+        "required": ["query"]
+    }
+)
+async def _tool_fan_out_query(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    query = arguments["query"]
+    if not query.strip().upper().startswith("SELECT"):
+        return [types.TextContent(type="text", text="❌ fan_out_query solo admite consultas SELECT")]
+    
+    shaper = result_shaper.with_overrides(
+        max_response_bytes=arguments.get("max_response_bytes"),
+        max_cell_chars=arguments.get("max_cell_chars")
+    )
+    formatter = shaper.formatter_for(arguments.get("output_format"))
+    max_rows = CONFIG["database"]["max_records_display"] if formatter.name == "text" else None
+    
+    def run_fan_out():
+        result = session_manager.fan_out(
+            query,
+            aliases=arguments.get("sessions"),
+            params=arguments.get("parameters"),
+            merge=arguments.get("merge", "union"),
+            group_by=arguments.get("group_by"),
+            aggregates=arguments.get("aggregates"),
+            max_rows_per_database=arguments.get("max_rows_per_database",
+                                                CONFIG["sessions"]["max_rows_per_database"])
+        )
+        shaped = shaper.render(result.columns, result.rows, formatter=formatter, max_rows=max_rows)
+        return result, shaped
+    
+    result, shaped = await _run_blocking(run_fan_out, _tool_timeout("fan_out_query", arguments))
+    
+    summary = (f"🔀 {len(result.results)} bases de datos, {len(result.failures)} con error, "
+               f"{len(result.rows)} filas combinadas ({result.merge}) en {result.elapsed_seconds:.2f} s:\n")
+    for db_result in result.results:
+        if db_result.ok:
+            truncated = " (truncado)" if db_result.truncated else ""
+            summary += (f"✅ {db_result.alias}: {len(db_result.rows)} filas{truncated} "
+                        f"en {db_result.elapsed_seconds:.2f} s\n")
+        else:
+            summary += f"❌ {db_result.alias}: {db_result.error} ({db_result.elapsed_seconds:.2f} s)\n"
+    
+    response = _shaped_response(
+        shaped, shaper,
+        title="📊 Resultados combinados",
+        empty_text="📊 La consulta no devolvió resultados"
+    )
+    if shaped.output_format != "text":
+        response.append(types.TextContent(type="text", text=summary.strip()))
+    else:
+        response[0].text += "\n\n" + summary
+    return response
+
+FEDERATION_SOURCE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "session": {
+            "type": "string",
+            "description": "Alias de la sesión (open_session); si se omite, la conexión principal"
+        },
+        "table": {
+            "type": "string",
+            "description": "Tabla a combinar"
+        },
+        "query": {
+            "type": "string",
+            "description": "Consulta SELECT en lugar de una tabla (solo combinación por hash)"
+        },
+        "columns": {
+            "type": "array",
+            "description": "Columnas de la tabla (opcional, deben incluir las de combinación)",
+            "items": {"type": "string"}
+        },
+        "where": {
+            "type": "string",
+            "description": "Filtro WHERE de la tabla (opcional)"
+        }
+    }
+}
+
+@tool_registry.tool(
+    name="federated_query",
+    description="Combinar (JOIN) tablas de bases de datos Access distintas: con Jet y referencia externa o con una combinación por hash en Python que carga en memoria el lado con menos filas",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "left": dict(FEDERATION_SOURCE_SCHEMA, description="Lado izquierdo de la combinación"),
+            "right": dict(FEDERATION_SOURCE_SCHEMA, description="Lado derecho de la combinación"),
+            "on": {
+                "type": "array",
+                "description": "Parejas [columna_izquierda, columna_derecha] de la condición de igualdad",
+                "items": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "minItems": 2,
+                    "maxItems": 2
+                }
+            },
+            "join_type": {
+                "type": "string",
+                "enum": JOIN_TYPES,
+                "description": "Tipo de combinación (por defecto: inner)"
+            },
+            "strategy": {
+                "type": "string",
+                "enum": JOIN_STRATEGIES,
+                "description": "auto: Jet si los dos lados son tablas, si no hash; jet; hash (por defecto: auto)"
+            },
+            "build_side": {
+                "type": "string",
+                "enum": BUILD_SIDES,
+                "description": "Lado que se carga en memoria en la combinación por hash (por defecto: auto, el de menos filas según COUNT(*))"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "jsonl", "csv", "columnar"],
+                "description": "Formato del resultado: text (tabla legible), jsonl, csv o columnar (JSON compacto por columnas). Por defecto: text"
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Tamaño máximo de la respuesta en bytes (opcional)"
+            },
+            "max_cell_chars": {
+                "type": "integer",
+                "description": "Caracteres máximos por celda antes de truncar en text y csv (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la consulta (por defecto: database.default_timeout)"
+            }
+        },
+        "required": ["left", "right", "on"]
+    }
+)
+async def _tool_federated_query(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    left = JoinSource.from_arguments(arguments["left"])
+    right = JoinSource.from_arguments(arguments["right"])
+    shaper = result_shaper.with_overrides(
+        max_response_bytes=arguments.get("max_response_bytes"),
+        max_cell_chars=arguments.get("max_cell_chars")
+    )
+    formatter = shaper.formatter_for(arguments.get("output_format"))
+    max_rows = CONFIG["database"]["max_records_display"] if formatter.name == "text" else None
+    
+    def run_join():
+        plan, stream = federated_engine.execute(
+            left, right, arguments["on"],
+            join_type=arguments.get("join_type", "inner"),
+            strategy=arguments.get("strategy", "auto"),
+            build_side=arguments.get("build_side", "auto")
+        )
+        with stream:
+            return plan, shaper.render(stream.columns, stream, formatter=formatter, max_rows=max_rows)
+    
+    plan, shaped = await _run_blocking(run_join, _tool_timeout("federated_query", arguments))
+    
+    plan_text = f"🔗 Estrategia: {plan.describe()}"
+    if plan.notes:
+        plan_text += f"\n   Notas: {'; '.join(plan.notes)}"
+    
+    response = _shaped_response(
+        shaped, shaper,
+        title="📊 Resultado de la combinación",
+        empty_text="📊 La combinación no devolvió resultados"
+    )
+    if shaped.output_format != "text":
+        response.append(types.TextContent(type="text", text=plan_text))
+    else:
+        response[0].text = plan_text + "\n\n" + response[0].text
+    return response
+
+@tool_registry.tool(
+    name="read_access_file",
+    description="Leer tablas directamente del archivo .mdb/.accdb sin driver ODBC (solo lectura, Jet 4 / ACE): sin table_name lista las tablas; con table_name devuelve su esquema y sus filas",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "database_path": {
+                "type": "string",
+                "description": "Ruta del archivo Access (por defecto: la base de datos conectada)"
+            },
+            "table_name": {
+                "type": "string",
+                "description": "Tabla a leer (opcional; sin ella se listan las tablas)"
+            },
+            "columns": {
+                "type": "array",
+                "description": "Columnas a devolver (opcional, por defecto todas)",
+                "items": {"type": "string"}
+            },
+            "include_system": {
+                "type": "boolean",
+                "description": "Incluir las tablas del sistema al listar (por defecto: false)"
+            },
+            "output_format": {
+                "type": "string",
+                "enum": ["text", "jsonl", "csv", "columnar"],
+                "description": "Formato del resultado: text (tabla legible), jsonl, csv o columnar (JSON compacto por columnas). Por defecto: text"
+            },
+            "max_response_bytes": {
+                "type": "integer",
+                "description": "Tamaño máximo de la respuesta en bytes (opcional)"
+            },
+            "max_cell_chars": {
+                "type": "integer",
+                "description": "Caracteres máximos por celda antes de truncar en text y csv (opcional)"
+            },
+            "timeout_seconds": {
+                "type": "number",
+                "description": "Tiempo máximo en segundos; al agotarse se cancela la lectura (por defecto: database.default_timeout)"
+            }
+        }
+    }
+)
+async def _tool_read_access_file(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    database_path = arguments.get("database_path") or db_manager.database_path
+    if not database_path:
+        return [types.TextContent(type="text", text="❌ Indique database_path o conecte una base de datos")]
+    table_name = arguments.get("table_name")
+    
+    if not table_name:
+        def list_file_tables():
+            with JetDatabase(database_path) as database:
+                return database.format_name, database.list_tables(arguments.get("include_system", False))
+        
+        format_name, tables = await _run_blocking(list_file_tables, _tool_timeout("read_access_file", arguments))
+        if not tables:
+            return [types.TextContent(type="text", text=f"📋 No hay tablas en {database_path} ({format_name})")]
+        table_list = "\n".join(f"  • {table}" for table in tables)
+        return [types.TextContent(
+            type="text",
+            text=f"📋 Tablas en {database_path} ({format_name}, lectura directa):\n{table_list}"
+        )]
+    
+    shaper = result_shaper.with_overrides(
+        max_response_bytes=arguments.get("max_response_bytes"),
+        max_cell_chars=arguments.get("max_cell_chars")
+    )
+    formatter = shaper.formatter_for(arguments.get("output_format"))
+    max_rows = CONFIG["database"]["max_records_display"] if formatter.name == "text" else None
+    
+    def read_table():
+        with JetDatabase(database_path) as database:
+            table = database.table(table_name)
+            with database.open_table(table.name, arguments.get("columns"),
+                                     CONFIG["results"]["fetch_batch_size"]) as stream:
+                shaped = shaper.render(stream.columns, stream, formatter=formatter, max_rows=max_rows)
+            return table.name, table.schema(), shaped
+    
+    name, schema, shaped = await _run_blocking(read_table, _tool_timeout("read_access_file", arguments))
+    
+    schema_text = f"🏗️ Esquema de '{name}' (lectura directa): " + ", ".join(
+        f"{column['column_name']} {column['data_type']}" for column in schema
+    )
+    response = _shaped_response(
+        shaped, shaper,
+        title=f"📊 Registros de '{name}'",
+        empty_text=f"📊 No se encontraron registros en '{name}'"
+    )
+    if shaped.output_format != "text":
+        response.append(types.TextContent(type="text", text=schema_text))
+    else:
+        response[0].text = schema_text + "\n\n" + response[0].text
+    return response
+
+@server.list_tools()
+async def handle_list_tools() -> List[Tool]:
+    """Listar todas las herramientas disponibles (lista construida una sola vez)."""
+    return tool_registry.list_tools()
+
+async def _dispatch_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Ejecutar una herramienta registrada."""
+    if name not in tool_registry:
+        return [types.TextContent(
+            type="text",
+            text=f"❌ Herramienta desconocida: {name}"
+        )]
+    
+    try:
+        return await tool_registry.dispatch(name, arguments)
     except Exception as e:
         error_msg = f"❌ Error ejecutando '{name}': {str(e)}"
         logger.error(error_msg)
         return [types.TextContent(type="text", text=error_msg)]
 
+@server.call_tool()
+async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Manejar las llamadas a las herramientas registrando latencia, bytes y errores."""
+    with metrics.track(KIND_TOOL, name) as call:
+        response = await _dispatch_tool(name, arguments)
+        call.bytes = sum(len(content.text.encode("utf-8")) for content in response)
+        # Los errores se devuelven como texto con el prefijo ❌
+        call.error = bool(response) and response[0].text.startswith("❌")
+    return response
+
+def _save_startup_manifest(init_options: InitializationOptions):
+    """Guardar las respuestas del saludo inicial para el siguiente arranque (si han cambiado)."""
+    path = manifest_path()
+    if path is None:
+        return
+    try:
+        key = manifest_key()
+        if load_manifest(path, key) is not None:
+            return
+        from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+        initialize = types.InitializeResult(
+            protocolVersion=types.LATEST_PROTOCOL_VERSION,
+            capabilities=init_options.capabilities,
+            serverInfo=types.Implementation(name=init_options.server_name, version=init_options.server_version,
+                                            websiteUrl=init_options.website_url, icons=init_options.icons),
+            instructions=init_options.instructions
+        )
+        tools = types.ListToolsResult(tools=tool_registry.list_tools())
+        save_manifest(path, key, initialize.model_dump(mode="json", by_alias=True, exclude_none=True),
+                      tools.model_dump(mode="json", by_alias=True, exclude_none=True), SUPPORTED_PROTOCOL_VERSIONS)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el manifiesto de arranque: {e}")
+
+class _ReplayInput:
+    """stdin para stdio_server: primero las líneas ya leídas en el saludo inicial."""
+    
+    def __init__(self, lines: List[bytes]):
+        self.lines = lines
+    
+    async def __aiter__(self):
+        from io import TextIOWrapper
+        import anyio
+        for line in self.lines:
+            yield line.decode("utf-8", errors="replace")
+        async for line in anyio.wrap_file(TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")):
+            yield line
+
+class _HandshakeOutput:
+    """stdout para stdio_server que descarta la respuesta repetida a initialize."""
+    
+    def __init__(self, initialize_id: Any):
+        from io import TextIOWrapper
+        import anyio
+        self._stdout = anyio.wrap_file(TextIOWrapper(sys.stdout.buffer, encoding="utf-8"))
+        self._pending = initialize_id is not None
+        self._initialize_id = initialize_id
+    
+    async def write(self, text: str):
+        if self._pending:
+            message = json.loads(text)
+            if message.get("id") == self._initialize_id and ("result" in message or "error" in message):
+                self._pending = False
+                return
+        await self._stdout.write(text)
+    
+    async def flush(self):
+        await self._stdout.flush()
+
 async def main():
     """Función principal para ejecutar el servidor MCP."""
     # Configurar opciones de inicialización
@@ -2065,12 +4559,31 @@ async def main():
         )
     )
     
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            init_options
-        )
+    # Volcado periódico de métricas (opcional)
+    dumper = None
+    if CONFIG["metrics"]["dump_path"]:
+        dumper = MetricsDumper(metrics, CONFIG["metrics"]["dump_path"],
+                               CONFIG["metrics"]["dump_interval_seconds"])
+        dumper.start()
+    
+    _save_startup_manifest(init_options)
+    
+    # Los mensajes del saludo inicial ya respondidos se procesan ahora
+    stdin = stdout = None
+    if _startup_handshake is not None and _startup_handshake.lines:
+        stdin = _ReplayInput(_startup_handshake.lines)
+        stdout = _HandshakeOutput(_startup_handshake.initialize_id)
+    
+    try:
+        async with mcp.server.stdio.stdio_server(stdin, stdout) as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                init_options
+            )
+    finally:
+        if dumper is not None:
+            dumper.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,327 @@
+"""
+Métricas de latencia y volumen del servidor.
+
+Registra, por herramienta MCP y por método de AccessDatabaseManager, un
+histograma de latencias con cubos logarítmico-lineales (al estilo HDR:
+potencias de dos subdivididas en 16 cubos, error relativo < 6,25 %),
+número de llamadas, errores, filas y bytes devueltos, además de la tasa
+de aciertos de las cachés. Todo se guarda en memoria con coste constante
+por llamada; ``MetricsDumper`` puede volcar periódicamente una instantánea
+en JSON a disco.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cubos por potencia de dos (2**SUB_BUCKET_BITS)
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+PERCENTILES = (50, 90, 95, 99)
+
+KIND_TOOL = "tool"
+KIND_METHOD = "method"
+# Esperas internas (p. ej. de la cola de escrituras): solo se usa el histograma
+KIND_WAIT = "wait"
+
+# Llamada en curso del contexto actual (para atribuir filas a la herramienta)
+_current_call: contextvars.ContextVar = contextvars.ContextVar("metrics_current_call", default=None)
+
+
+class LatencyHistogram:
+    """Histograma de latencias en microsegundos con cubos logarítmico-lineales."""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    @staticmethod
+    def bucket_index(value_us: int) -> int:
+        """Índice del cubo de un valor."""
+        if value_us < 2 * SUB_BUCKET_COUNT:
+            return value_us
+        shift = value_us.bit_length() - (SUB_BUCKET_BITS + 1)
+        return (shift + 1) * SUB_BUCKET_COUNT + ((value_us >> shift) - SUB_BUCKET_COUNT)
+
+    @staticmethod
+    def bucket_upper_bound(index: int) -> int:
+        """Mayor valor que cae en un cubo."""
+        if index < 2 * SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_COUNT - 1
+        lower = (index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT) << shift
+        return lower + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        """Registrar una duración."""
+        value_us = max(0, int(seconds * 1_000_000))
+        index = self.bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def percentile(self, percent: float) -> int:
+        """Valor (µs) por debajo del cual cae el ``percent`` % de las muestras."""
+        if not self.total:
+            return 0
+        target = max(1, int(round(self.total * percent / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_upper_bound(index), self.max_us)
+        return self.max_us
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumen en milisegundos."""
+        result = {
+            "count": self.total,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "mean_ms": (self.sum_us / self.total / 1000.0) if self.total else 0.0,
+            "max_ms": self.max_us / 1000.0,
+        }
+        for percent in PERCENTILES:
+            result[f"p{percent}_ms"] = self.percentile(percent) / 1000.0
+        return result
+
+
+@dataclass
+class CallRecord:
+    """Datos de una llamada en curso."""
+    kind: str
+    name: str
+    rows: int = 0
+    bytes: int = 0
+    error: bool = False
+
+
+class OperationStats:
+    """Estadísticas acumuladas de una herramienta o método."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = self.histogram.to_dict()
+        result.update({"errors": self.errors, "rows": self.rows, "bytes": self.bytes})
+        return result
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso (seguro entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Vaciar todas las métricas."""
+        with self._lock:
+            self.started_at = time.time()
+            self._operations: Dict[str, Dict[str, OperationStats]] = {KIND_TOOL: {}, KIND_METHOD: {}, KIND_WAIT: {}}
+            self._caches: Dict[str, List[int]] = {}
+            self._gauges: Dict[str, float] = {}
+
+    def record(self, kind: str, name: str, seconds: float, rows: int = 0,
+               bytes_returned: int = 0, error: bool = False):
+        """Registrar una llamada terminada."""
+        with self._lock:
+            stats = self._operations.setdefault(kind, {}).get(name)
+            if stats is None:
+                stats = self._operations[kind][name] = OperationStats()
+            stats.histogram.record(seconds)
+            stats.rows += rows
+            stats.bytes += bytes_returned
+            if error:
+                stats.errors += 1
+
+    def record_cache(self, cache_name: str, hit: bool):
+        """Registrar un acierto o fallo de caché."""
+        with self._lock:
+            counters = self._caches.setdefault(cache_name, [0, 0])
+            counters[0 if hit else 1] += 1
+
+    def set_gauge(self, name: str, value: float):
+        """Fijar el valor actual de un indicador (p. ej. la profundidad de una cola)."""
+        with self._lock:
+            self._gauges[name] = value
+
+    @staticmethod
+    def current_tool() -> Optional[str]:
+        """Nombre de la herramienta en curso en este contexto (si la hay)."""
+        call = _current_call.get()
+        return call.name if call is not None else None
+
+    def add_rows(self, rows: int):
+        """Sumar filas a la herramienta en curso (si la hay)."""
+        call = _current_call.get()
+        if call is not None:
+            call.rows += rows
+
+    @contextmanager
+    def track(self, kind: str, name: str) -> Iterator[CallRecord]:
+        """Medir un bloque; el llamador puede anotar filas, bytes o error en el registro."""
+        call = CallRecord(kind, name)
+        token = _current_call.set(call) if kind == KIND_TOOL else None
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.error = True
+            raise
+        finally:
+            if token is not None:
+                _current_call.reset(token)
+            self.record(kind, name, time.perf_counter() - start, call.rows, call.bytes, call.error)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Instantánea serializable de todas las métricas."""
+        with self._lock:
+            operations = {
+                kind: {name: stats.to_dict() for name, stats in sorted(entries.items())}
+                for kind, entries in self._operations.items()
+            }
+            caches = {}
+            for cache_name, (hits, misses) in sorted(self._caches.items()):
+                lookups = hits + misses
+                caches[cache_name] = {"hits": hits, "misses": misses,
+                                      "hit_rate": (hits / lookups) if lookups else 0.0}
+            gauges = dict(sorted(self._gauges.items()))
+            uptime = time.time() - self.started_at
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "uptime_seconds": round(uptime, 3),
+            "tools": operations[KIND_TOOL],
+            "methods": operations[KIND_METHOD],
+            "waits": operations[KIND_WAIT],
+            "caches": caches,
+            "gauges": gauges,
+        }
+
+
+# Registro global del proceso
+REGISTRY = MetricsRegistry()
+
+
+def timed(name: Optional[str] = None, registry: Optional[MetricsRegistry] = None):
+    """
+    Decorador que mide un método de AccessDatabaseManager.
+
+    Si el resultado es una lista se cuentan sus elementos como filas.
+    """
+    def decorator(func: Callable) -> Callable:
+        method_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = registry or REGISTRY
+            with target.track(KIND_METHOD, method_name) as call:
+                result = func(*args, **kwargs)
+                if isinstance(result, list):
+                    call.rows = len(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def format_stats(snapshot: Dict[str, Any]) -> str:
+    """Formatear una instantánea como texto legible."""
+    lines = [f"⏱️ Estadísticas del servidor (activo {snapshot['uptime_seconds']:.0f} s)"]
+
+    for title, key in (("Herramientas", "tools"), ("Métodos de base de datos", "methods")):
+        entries = snapshot[key]
+        if not entries:
+            continue
+        lines.append(f"\n{title}:")
+        lines.append("nombre | llamadas | errores | p50 ms | p95 ms | p99 ms | máx ms | filas | bytes")
+        for name, stats in sorted(entries.items(), key=lambda item: -item[1]["count"]):
+            lines.append(
+                f"{name} | {stats['count']} | {stats['errors']} | {stats['p50_ms']:.1f} | "
+                f"{stats['p95_ms']:.1f} | {stats['p99_ms']:.1f} | {stats['max_ms']:.1f} | "
+                f"{stats['rows']} | {stats['bytes']}"
+            )
+
+    if snapshot.get("waits"):
+        lines.append("\nEsperas:")
+        lines.append("nombre | veces | p50 ms | p95 ms | p99 ms | máx ms")
+        for name, stats in sorted(snapshot["waits"].items()):
+            lines.append(f"{name} | {stats['count']} | {stats['p50_ms']:.1f} | {stats['p95_ms']:.1f} | "
+                         f"{stats['p99_ms']:.1f} | {stats['max_ms']:.1f}")
+
+    if snapshot.get("gauges"):
+        lines.append("\nIndicadores:")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"• {name}: {value:g}")
+
+    if snapshot["caches"]:
+        lines.append("\nCachés:")
+        for cache_name, cache in snapshot["caches"].items():
+            lines.append(f"• {cache_name}: {cache['hits']} aciertos, {cache['misses']} fallos "
+                         f"({cache['hit_rate']:.0%})")
+
+    if len(lines) == 1:
+        lines.append("\nTodavía no hay llamadas registradas.")
+    return "\n".join(lines)
+
+
+class MetricsDumper:
+    """Volcado periódico de las métricas a un fichero JSON."""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval_seconds: float = 60.0):
+        self.registry = registry
+        self.path = path
+        self.interval_seconds = max(1.0, float(interval_seconds))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def dump(self):
+        """Escribir la instantánea actual (reemplazo atómico del fichero)."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.registry.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.dump()
+            except Exception as e:
+                logger.warning(f"No se pudieron volcar las métricas a {self.path}: {e}")
+
+    def start(self):
+        """Arrancar el hilo de volcado."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Detener el hilo y hacer un último volcado."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.dump()
+        except Exception as e:
+            logger.warning(f"No se pudieron volcar las métricas a {self.path}: {e}")
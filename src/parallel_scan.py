@@ -0,0 +1,399 @@
+"""
+Recorrido en paralelo de tablas grandes.
+
+Un cursor ODBC lee las filas en un único hilo; para perfilar o exportar una
+tabla completa se reparte el trabajo:
+
+- ``pages``: con el lector directo (``jet_reader``) las páginas de datos de
+  la tabla se dividen en tramos contiguos y cada tramo se decodifica en un
+  proceso distinto del pool. Los procesos devuelven el perfil ya agregado
+  (o las filas, al exportar) y el resultado se combina aquí.
+- ``pk_ranges``: si el archivo no se puede leer directamente (Jet 3, cifrado)
+  se divide el rango de una clave numérica en intervalos y cada intervalo se
+  consulta por ODBC con su propia conexión. Las conexiones ODBC no se pueden
+  pasar a otro proceso, así que en este modo se usan hilos (pyodbc libera el
+  GIL mientras espera al driver).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .jet_reader import JetDatabase
+    from .streaming import IterableStream
+except ImportError:
+    from jet_reader import JetDatabase
+    from streaming import IterableStream
+
+logger = logging.getLogger(__name__)
+
+SCAN_MODES = ["auto", "pages", "pk_ranges"]
+
+# Valores de muestra que se guardan por columna
+SAMPLE_VALUES = 5
+
+
+@dataclass
+class ColumnProfile:
+    """Estadísticas de una columna que se pueden combinar entre particiones."""
+    name: str
+    data_type: str = ""
+    count: int = 0
+    nulls: int = 0
+    empty: int = 0
+    min_value: Any = None
+    max_value: Any = None
+    distinct: set = field(default_factory=set)
+    distinct_capped: bool = False
+    comparable: bool = True
+
+    def add(self, value: Any, max_distinct: int):
+        if value is None:
+            self.nulls += 1
+            return
+        self.count += 1
+        if isinstance(value, str) and not value.strip():
+            self.empty += 1
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            # Los binarios no se comparan ni se cuentan como valores distintos
+            return
+        self._update_range(value, value)
+        if not self.distinct_capped:
+            self.distinct.add(value)
+            if len(self.distinct) > max_distinct:
+                self.distinct_capped = True
+                self.distinct = set()
+
+    def _update_range(self, low: Any, high: Any):
+        if not self.comparable:
+            return
+        try:
+            if self.min_value is None or low < self.min_value:
+                self.min_value = low
+            if self.max_value is None or high > self.max_value:
+                self.max_value = high
+        except TypeError:
+            # Tipos mezclados en la misma columna (p. ej. una consulta con UNION)
+            self.comparable = False
+            self.min_value = self.max_value = None
+
+    def merge(self, other: "ColumnProfile", max_distinct: int):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.empty += other.empty
+        if not other.comparable:
+            self.comparable = False
+            self.min_value = self.max_value = None
+        elif other.min_value is not None:
+            self._update_range(other.min_value, other.max_value)
+        if other.distinct_capped:
+            self.distinct_capped = True
+            self.distinct = set()
+        elif not self.distinct_capped:
+            self.distinct |= other.distinct
+            if len(self.distinct) > max_distinct:
+                self.distinct_capped = True
+                self.distinct = set()
+
+    @property
+    def total(self) -> int:
+        return self.count + self.nulls
+
+    @property
+    def completeness(self) -> float:
+        return (self.count - self.empty) / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        distinct = None if self.distinct_capped else len(self.distinct)
+        samples = sorted(self.distinct, key=str)[:SAMPLE_VALUES] if not self.distinct_capped else []
+        return {
+            "data_type": self.data_type,
+            "count": self.count,
+            "null_count": self.nulls,
+            "empty_count": self.empty,
+            "completeness": self.completeness,
+            # None = más valores distintos que el límite configurado
+            "distinct_count": distinct,
+            "min": self.min_value,
+            "max": self.max_value,
+            "sample_values": [str(value) for value in samples]
+        }
+
+
+@dataclass
+class TableProfile:
+    """Perfil de una tabla (o de una partición de ella)."""
+    table: str
+    columns: List[ColumnProfile]
+    rows: int = 0
+    mode: str = ""
+    partitions: int = 1
+    workers: int = 1
+    elapsed_seconds: float = 0.0
+
+    @classmethod
+    def empty(cls, table: str, column_names: Sequence[str], data_types: Optional[Sequence[str]] = None):
+        data_types = data_types or [""] * len(column_names)
+        return cls(table, [ColumnProfile(name, data_type) for name, data_type in zip(column_names, data_types)])
+
+    def add_rows(self, rows, max_distinct: int):
+        columns = self.columns
+        for row in rows:
+            self.rows += 1
+            for column, value in zip(columns, row):
+                column.add(value, max_distinct)
+
+    def merge(self, other: "TableProfile", max_distinct: int):
+        self.rows += other.rows
+        for column, other_column in zip(self.columns, other.columns):
+            column.merge(other_column, max_distinct)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table_name": self.table,
+            "total_records": self.rows,
+            "mode": self.mode,
+            "partitions": self.partitions,
+            "workers": self.workers,
+            "elapsed_seconds": self.elapsed_seconds,
+            "fields": {column.name: column.to_dict() for column in self.columns},
+            "null_fields": [column.name for column in self.columns if column.nulls],
+            "empty_fields": [column.name for column in self.columns if column.empty]
+        }
+
+
+def partition_pages(pages: Sequence[int], pages_per_task: int) -> List[List[int]]:
+    """Tramos contiguos de páginas (las páginas cercanas se leen juntas)."""
+    pages = sorted(pages)
+    size = max(1, pages_per_task)
+    return [pages[index:index + size] for index in range(0, len(pages), size)]
+
+
+def key_ranges(low: Any, high: Any, partitions: int) -> List[Tuple[Any, Any]]:
+    """
+    Dividir [low, high] en intervalos semiabiertos [inicio, fin).
+
+    El último intervalo es cerrado (su fin es ``None``). Solo se dividen
+    claves numéricas; con cualquier otro tipo se devuelve un único intervalo.
+    """
+    if low is None or high is None:
+        return [(None, None)]
+    if isinstance(low, bool) or not isinstance(low, (int, float)) or not isinstance(high, (int, float)):
+        return [(None, None)]
+    partitions = max(1, partitions)
+    span = high - low
+    if isinstance(low, int) and isinstance(high, int):
+        partitions = min(partitions, span + 1)
+        step = -(-(span + 1) // partitions)
+        bounds = [low + step * index for index in range(partitions)]
+    else:
+        step = span / partitions
+        bounds = [low + step * index for index in range(partitions)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:] + [None])]
+
+
+# Trabajo de cada proceso. Los archivos abiertos se reutilizan entre tareas
+# del mismo proceso para no volver a leer el catálogo en cada tramo.
+
+_worker_databases: Dict[Tuple[str, int, int], JetDatabase] = {}
+_worker_lock = threading.Lock()
+
+
+def _worker_database(path: str) -> JetDatabase:
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _worker_lock:
+        database = _worker_databases.get(key)
+        if database is None:
+            for stale_key in [other for other in _worker_databases if other[0] == key[0]]:
+                _worker_databases.pop(stale_key).close()
+            database = _worker_databases[key] = JetDatabase(path)
+    return database
+
+
+def profile_pages(path: str, table_name: str, columns: Sequence[str], pages: Sequence[int],
+                  max_distinct: int) -> TableProfile:
+    """Perfilar un tramo de páginas (se ejecuta en un proceso del pool)."""
+    table = _worker_database(path).table(table_name)
+    profile = TableProfile.empty(table.name, columns)
+    profile.add_rows(table.iter_rows(columns, pages), max_distinct)
+    return profile
+
+
+def read_pages(path: str, table_name: str, columns: Sequence[str], pages: Sequence[int]) -> List[Tuple]:
+    """Decodificar las filas de un tramo de páginas (se ejecuta en un proceso del pool)."""
+    table = _worker_database(path).table(table_name)
+    return list(table.iter_rows(columns, pages))
+
+
+class ParallelScanner:
+    """Reparte el recorrido de una tabla entre varios procesos o conexiones."""
+
+    def __init__(self, workers: Optional[int] = None, pages_per_task: int = 64,
+                 max_distinct: int = 10000, min_pages: int = 32, use_processes: bool = True):
+        """
+        Args:
+            workers: Procesos o conexiones simultáneas (None = número de CPU)
+            pages_per_task: Páginas de datos que decodifica cada tarea
+            max_distinct: Valores distintos que se cuentan por columna antes de dejar de contarlos
+            min_pages: Por debajo de este número de páginas la tabla se lee en el proceso actual
+            use_processes: Usar procesos (False = hilos, útil para depurar)
+        """
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_distinct = max_distinct
+        self.min_pages = min_pages
+        self.use_processes = use_processes
+
+    def _executor(self, workers: int) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parallel-scan")
+
+    # Modo páginas (lector directo)
+
+    def _page_plan(self, path: str, table_name: str,
+                   columns: Optional[Sequence[str]]) -> Tuple[str, List[str], List[str], List[List[int]]]:
+        with JetDatabase(path) as database:
+            table = database.table(table_name)
+            selected = table.select_columns(columns)
+            partitions = partition_pages(table.data_pages(), self.pages_per_task)
+            return (table.name, [column.name for column in selected],
+                    [column.type_name for column in selected], partitions)
+
+    def profile_file(self, path: str, table_name: str, columns: Optional[Sequence[str]] = None) -> TableProfile:
+        """Perfilar una tabla leyendo el archivo por páginas en varios procesos."""
+        start = time.perf_counter()
+        name, column_names, data_types, partitions = self._page_plan(path, table_name, columns)
+        profile = TableProfile.empty(name, column_names, data_types)
+        profile.mode = "pages"
+        profile.partitions = len(partitions)
+
+        page_count = sum(len(partition) for partition in partitions)
+        if page_count < self.min_pages or self.workers == 1 or len(partitions) == 1:
+            profile.merge(profile_pages(path, name, column_names, [page for part in partitions for page in part],
+                                        self.max_distinct), self.max_distinct)
+        else:
+            profile.workers = min(self.workers, len(partitions))
+            with self._executor(profile.workers) as executor:
+                futures = [executor.submit(profile_pages, path, name, column_names, partition, self.max_distinct)
+                           for partition in partitions]
+                for future in futures:
+                    profile.merge(future.result(), self.max_distinct)
+        profile.elapsed_seconds = time.perf_counter() - start
+        return profile
+
+    def iter_file_rows(self, path: str, table_name: str, columns: Optional[Sequence[str]] = None,
+                       plan: Optional[Tuple] = None) -> Iterator[Tuple]:
+        """
+        Filas de la tabla en orden de página, decodificadas en varios procesos.
+
+        Solo hay ``2 * workers`` tramos en curso a la vez, de modo que la
+        memoria no crece con el tamaño de la tabla.
+        """
+        name, column_names, _, partitions = plan or self._page_plan(path, table_name, columns)
+        if len(partitions) <= 1 or self.workers == 1:
+            for partition in partitions:
+                yield from read_pages(path, name, column_names, partition)
+            return
+
+        executor = self._executor(min(self.workers, len(partitions)))
+        pending = deque()
+        remaining = iter(partitions)
+        try:
+            for partition in remaining:
+                pending.append(executor.submit(read_pages, path, name, column_names, partition))
+                if len(pending) >= 2 * self.workers:
+                    break
+            while pending:
+                rows = pending.popleft().result()
+                next_partition = next(remaining, None)
+                if next_partition is not None:
+                    pending.append(executor.submit(read_pages, path, name, column_names, next_partition))
+                yield from rows
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def open_file_table(self, path: str, table_name: str, columns: Optional[Sequence[str]] = None,
+                        batch_size: int = 500) -> IterableStream:
+        """Flujo con la interfaz de ``QueryStream`` para los exportadores."""
+        plan = self._page_plan(path, table_name, columns)
+        return IterableStream(plan[1], self.iter_file_rows(path, table_name, plan=plan), batch_size)
+
+    # Modo intervalos de clave (ODBC)
+
+    def profile_key_ranges(self, connect: Callable[[], Any], table_name: str, key_column: str,
+                           columns: Optional[Sequence[str]] = None) -> TableProfile:
+        """
+        Perfilar una tabla por intervalos de una clave numérica.
+
+        Args:
+            connect: Devuelve un gestor conectado nuevo (se desconecta al terminar)
+            table_name: Tabla a perfilar
+            key_column: Columna numérica con la que se reparten las filas
+            columns: Columnas a perfilar (None = todas)
+        """
+        start = time.perf_counter()
+        manager = connect()
+        try:
+            schema = manager.get_table_schema(table_name)
+            types_by_name = {column["column_name"].lower(): column["data_type"] for column in schema}
+            column_names = list(columns) if columns else [column["column_name"] for column in schema]
+            missing = [name for name in column_names + [key_column] if name.lower() not in types_by_name]
+            if missing:
+                raise ValueError(f"Columnas no encontradas en '{table_name}': {', '.join(missing)}")
+            bounds = manager.execute_query(
+                f"SELECT MIN([{key_column}]) AS low, MAX([{key_column}]) AS high FROM [{table_name}]"
+            )[0]
+        finally:
+            manager.disconnect()
+
+        ranges = key_ranges(bounds["low"], bounds["high"], self.workers * 4)
+        profile = TableProfile.empty(table_name, column_names,
+                                     [types_by_name[name.lower()] for name in column_names])
+        profile.mode = "pk_ranges"
+        profile.partitions = len(ranges)
+        select = f"SELECT {', '.join(f'[{name}]' for name in column_names)} FROM [{table_name}]"
+
+        def profile_range(key_range: Tuple[Any, Any]) -> TableProfile:
+            low, high = key_range
+            conditions, params = [], []
+            if low is not None:
+                # El último intervalo recoge también las claves NULL
+                conditions.append(f"[{key_column}] >= ?" if high is not None
+                                  else f"([{key_column}] >= ? OR [{key_column}] IS NULL)")
+                params.append(low)
+            if high is not None:
+                conditions.append(f"[{key_column}] < ?")
+                params.append(high)
+            query = select + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            part = TableProfile.empty(table_name, column_names)
+            range_manager = connect()
+            try:
+                with range_manager.open_query(query, params or None) as stream:
+                    part.add_rows(stream, self.max_distinct)
+            finally:
+                range_manager.disconnect()
+            return part
+
+        # El primer intervalo empieza en el mínimo: sin límite inferior para no perder filas
+        # si la tabla cambia entre la consulta de límites y el recorrido
+        ranges = [(None, ranges[0][1])] + ranges[1:]
+        profile.workers = min(self.workers, len(ranges))
+        with ThreadPoolExecutor(max_workers=profile.workers, thread_name_prefix="parallel-scan") as executor:
+            for part in executor.map(profile_range, ranges):
+                profile.merge(part, self.max_distinct)
+        profile.elapsed_seconds = time.perf_counter() - start
+        return profile
@@ -0,0 +1,413 @@
+"""
+Enlace de parámetros según el tipo de las columnas.
+
+Los parámetros de ``execute_query`` llegan como texto (JSON), y comparar
+una columna numérica o de fecha con un texto obliga a Jet a convertir en
+cada fila, lo que impide usar los índices. ``ParameterBinder`` averigua a
+qué columna se compara cada ``?`` de la sentencia:
+
+- ``col = ?``, ``? < t.col``, ``col LIKE ?``, ``col BETWEEN ? AND ?``,
+  ``col IN (?, ?)`` y ``SET col = ?``
+- ``INSERT INTO t (a, b) VALUES (?, ?)`` por posición
+
+y convierte el valor al tipo de la columna (con los mismos convertidores
+que ``import_file``). Además prepara la descripción de cada parámetro para
+``cursor.setinputsizes``, de modo que el driver los envíe con su tipo nativo.
+
+Lo que se calcula por sentencia (columnas, convertidores y tamaños) se
+guarda en una caché LRU por texto de la sentencia, y los esquemas de las
+tablas en otra caché que se invalida con las sentencias DDL. Si un
+parámetro no se puede asociar a una columna, o su valor no se puede
+convertir, se envía tal cual, como antes.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .data_import import value_converter
+    from .metrics import REGISTRY, MetricsRegistry
+except ImportError:
+    from data_import import value_converter
+    from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_STATEMENTS = 256
+
+# Códigos de tipo SQL de ODBC (los mismos valores que pyodbc.SQL_*)
+SQL_NUMERIC = 2
+SQL_INTEGER = 4
+SQL_SMALLINT = 5
+SQL_REAL = 7
+SQL_DOUBLE = 8
+SQL_TYPE_TIMESTAMP = 93
+SQL_BIT = -7
+SQL_TINYINT = -6
+SQL_BIGINT = -5
+SQL_WVARCHAR = -9
+SQL_WLONGVARCHAR = -10
+
+InputSize = Optional[Tuple[int, int, int]]
+
+_FIXED_INPUT_SIZES = {
+    "BYTE": (SQL_TINYINT, 0, 0), "TINYINT": (SQL_TINYINT, 0, 0),
+    "SMALLINT": (SQL_SMALLINT, 0, 0), "SHORT": (SQL_SMALLINT, 0, 0),
+    "INTEGER": (SQL_INTEGER, 0, 0), "INT": (SQL_INTEGER, 0, 0), "LONG": (SQL_INTEGER, 0, 0),
+    "COUNTER": (SQL_INTEGER, 0, 0), "AUTOINCREMENT": (SQL_INTEGER, 0, 0),
+    "BIGINT": (SQL_BIGINT, 0, 0),
+    "REAL": (SQL_REAL, 0, 0), "SINGLE": (SQL_REAL, 0, 0),
+    "DOUBLE": (SQL_DOUBLE, 0, 0), "FLOAT": (SQL_DOUBLE, 0, 0),
+    # Moneda de Access: 19 dígitos con 4 decimales
+    "CURRENCY": (SQL_NUMERIC, 19, 4), "MONEY": (SQL_NUMERIC, 19, 4),
+    # Access guarda las fechas con precisión de segundos
+    "DATETIME": (SQL_TYPE_TIMESTAMP, 19, 0), "DATE": (SQL_TYPE_TIMESTAMP, 19, 0),
+    "TIMESTAMP": (SQL_TYPE_TIMESTAMP, 19, 0),
+    "BIT": (SQL_BIT, 0, 0), "YESNO": (SQL_BIT, 0, 0), "BOOLEAN": (SQL_BIT, 0, 0),
+    "LONGCHAR": (SQL_WLONGVARCHAR, 0, 0), "MEMO": (SQL_WLONGVARCHAR, 0, 0),
+    "LONGTEXT": (SQL_WLONGVARCHAR, 0, 0),
+}
+_TEXT_TYPES = {"VARCHAR", "CHAR", "TEXT", "NVARCHAR", "NCHAR", "WVARCHAR", "WCHAR"}
+
+# Cadenas, fechas #...#, identificadores entre corchetes, palabras, números y operadores
+_TOKEN_PATTERN = re.compile(
+    r"(?P<literal>'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\#[^\#\n]*\#|\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<bracket>\[[^\]]*\])"
+    r"|(?P<word>[A-Za-z_][\w$]*)"
+    r"|(?P<operator><>|<=|>=|!=|[=<>])"
+    r"|(?P<symbol>\S)"
+)
+_COMPARISONS = {"=", "<>", "<=", ">=", "!=", "<", ">"}
+_TABLE_KEYWORDS = {"FROM", "JOIN", "UPDATE", "INTO"}
+_RESERVED = {
+    "SELECT", "FROM", "WHERE", "AND", "OR", "NOT", "IN", "LIKE", "BETWEEN", "IS", "NULL", "ON",
+    "JOIN", "INNER", "LEFT", "RIGHT", "OUTER", "GROUP", "ORDER", "BY", "HAVING", "UNION", "ALL",
+    "SET", "VALUES", "INTO", "UPDATE", "DELETE", "INSERT", "AS", "TOP", "DISTINCT", "EXISTS",
+    "ASC", "DESC", "TRANSFORM", "PIVOT",
+}
+_DDL_PATTERN = re.compile(r"^\s*(CREATE|ALTER|DROP)\b", re.IGNORECASE)
+_DDL_TABLE_PATTERN = re.compile(r"\bTABLE\s+(\[[^\]]+\]|[\w$]+)", re.IGNORECASE)
+
+
+@dataclass
+class SqlToken:
+    """Símbolo de una sentencia: literal, name, qualified (``t.col``), word (reservada), operator o symbol."""
+    kind: str
+    text: str
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "word" else self.text
+
+
+def tokenize_sql(query: str) -> List[SqlToken]:
+    """Separar la sentencia en símbolos y unir los nombres cualificados (``t.col``)."""
+    tokens: List[SqlToken] = []
+    for match in _TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "bracket":
+            kind, text = "name", text[1:-1]
+        elif kind == "word" and text.upper() not in _RESERVED:
+            kind = "name"
+        if (kind == "name" and len(tokens) >= 2 and tokens[-1].text == "."
+                and tokens[-2].kind == "name"):
+            qualifier = tokens[-2].text
+            del tokens[-2:]
+            tokens.append(SqlToken("qualified", f"{qualifier}\x00{text}"))
+            continue
+        tokens.append(SqlToken(kind, text))
+    return tokens
+
+
+def split_name(token: SqlToken) -> Tuple[Optional[str], str]:
+    """Cualificador (alias o tabla) y nombre de un identificador."""
+    if token.kind == "qualified":
+        qualifier, name = token.text.split("\x00", 1)
+        return qualifier, name
+    return None, token.text
+
+
+def _is_column(token: Optional[SqlToken]) -> bool:
+    return token is not None and token.kind in ("name", "qualified")
+
+
+def table_references(tokens: List[SqlToken]) -> Dict[str, str]:
+    """Tablas de la sentencia: alias (o nombre) en minúsculas -> nombre de la tabla."""
+    tables: Dict[str, str] = {}
+    index = 0
+    while index < len(tokens):
+        if tokens[index].upper not in _TABLE_KEYWORDS:
+            index += 1
+            continue
+        index += 1
+        # FROM a, b: varias tablas separadas por comas
+        while index < len(tokens) and _is_column(tokens[index]):
+            table = split_name(tokens[index])[1]
+            tables[table.lower()] = table
+            index += 1
+            if index < len(tokens) and tokens[index].upper == "AS":
+                index += 1
+            if index < len(tokens) and tokens[index].kind == "name":
+                tables[tokens[index].text.lower()] = table
+                index += 1
+            if index < len(tokens) and tokens[index].text == ",":
+                index += 1
+            else:
+                break
+    return tables
+
+
+def _token_at(tokens: List[SqlToken], index: int) -> Optional[SqlToken]:
+    return tokens[index] if 0 <= index < len(tokens) else None
+
+
+def _insert_columns(tokens: List[SqlToken]) -> Optional[Dict[int, Tuple[Optional[str], str]]]:
+    """En ``INSERT INTO t (a, b) VALUES (?, ?)``: posición del ``?`` -> columna."""
+    if len(tokens) < 4 or tokens[0].upper != "INSERT" or tokens[1].upper != "INTO":
+        return None
+    table = split_name(tokens[2])[1] if _is_column(tokens[2]) else None
+    if table is None or _token_at(tokens, 3) is None or tokens[3].text != "(":
+        return None
+    columns = []
+    index = 4
+    while index < len(tokens) and tokens[index].text != ")":
+        if _is_column(tokens[index]):
+            columns.append(split_name(tokens[index])[1])
+        index += 1
+    if _token_at(tokens, index + 1) is None or tokens[index + 1].upper != "VALUES":
+        return None
+    mapping = {}
+    position = 0
+    depth = 0
+    index += 2
+    while index < len(tokens):
+        token = tokens[index]
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth -= 1
+            if depth == 0:
+                break
+        elif token.text == "," and depth == 1:
+            position += 1
+        elif (token.text == "?" and depth == 1 and position < len(columns)
+              and tokens[index - 1].text in ("(", ",") and _token_at(tokens, index + 1) is not None
+              and tokens[index + 1].text in (")", ",")):
+            mapping[index] = (table, columns[position])
+        index += 1
+    return mapping
+
+
+def _compared_column(tokens: List[SqlToken], index: int) -> Tuple[Optional[SqlToken], bool]:
+    """Columna con la que se compara el ``?`` de la posición ``index`` (y si es un LIKE)."""
+    previous = _token_at(tokens, index - 1)
+    following = _token_at(tokens, index + 1)
+    if previous is not None and previous.upper in _COMPARISONS and _is_column(_token_at(tokens, index - 2)):
+        return tokens[index - 2], False
+    if following is not None and following.upper in _COMPARISONS and _is_column(_token_at(tokens, index + 2)):
+        return tokens[index + 2], False
+    if previous is not None and previous.upper == "LIKE":
+        before = index - 2
+        if _token_at(tokens, before) is not None and tokens[before].upper == "NOT":
+            before -= 1
+        if _is_column(_token_at(tokens, before)):
+            return tokens[before], True
+    if previous is not None and previous.upper == "BETWEEN" and _is_column(_token_at(tokens, index - 2)):
+        return tokens[index - 2], False
+    if (previous is not None and previous.upper == "AND" and _token_at(tokens, index - 2) is not None
+            and tokens[index - 2].text == "?" and _token_at(tokens, index - 3) is not None
+            and tokens[index - 3].upper == "BETWEEN" and _is_column(_token_at(tokens, index - 4))):
+        return tokens[index - 4], False
+    # col IN (?, ?, ...)
+    cursor = index - 1
+    while cursor >= 0 and tokens[cursor].text in ("?", ","):
+        cursor -= 1
+    if cursor >= 1 and tokens[cursor].text == "(" and tokens[cursor - 1].upper == "IN":
+        before = cursor - 2
+        if _token_at(tokens, before) is not None and tokens[before].upper == "NOT":
+            before -= 1
+        if _is_column(_token_at(tokens, before)):
+            return tokens[before], False
+    return None, False
+
+
+def placeholder_columns(query: str) -> Tuple[int, List[Optional[Tuple[List[str], str, bool]]]]:
+    """
+    Columna asociada a cada ``?`` de la sentencia.
+
+    Devuelve el número de marcadores y, por cada uno, ``(tablas candidatas,
+    columna, es_like)`` o None si no se ha podido asociar.
+    """
+    tokens = tokenize_sql(query)
+    tables = table_references(tokens)
+    inserted = _insert_columns(tokens) or {}
+    placeholders = []
+    for index, token in enumerate(tokens):
+        if token.text != "?":
+            continue
+        if index in inserted:
+            table, column = inserted[index]
+            placeholders.append(([table], column, False))
+            continue
+        column_token, is_like = _compared_column(tokens, index)
+        if column_token is None:
+            placeholders.append(None)
+            continue
+        qualifier, column = split_name(column_token)
+        if qualifier is not None:
+            candidates = [tables.get(qualifier.lower(), qualifier)]
+        else:
+            candidates = list(dict.fromkeys(tables.values()))
+        placeholders.append((candidates, column, is_like))
+    return len(placeholders), placeholders
+
+
+def input_size(column: Dict[str, Any]) -> InputSize:
+    """Descripción para ``setinputsizes`` de una columna (None si no se conoce el tipo)."""
+    data_type = (column.get("data_type") or "").upper().split("(")[0].strip()
+    if data_type in _FIXED_INPUT_SIZES:
+        return _FIXED_INPUT_SIZES[data_type]
+    if data_type in _TEXT_TYPES:
+        size = column.get("size")
+        return (SQL_WVARCHAR, size if isinstance(size, int) and 0 < size <= 255 else 255, 0)
+    return None
+
+
+@dataclass
+class _StatementBinding:
+    """Lo que se reutiliza entre ejecuciones de una misma sentencia."""
+    placeholders: int
+    converters: List[Optional[Callable[[Any], Any]]]
+    input_sizes: List[InputSize]
+
+    @property
+    def typed(self) -> bool:
+        return any(converter is not None for converter in self.converters)
+
+
+class ParameterBinder:
+    """
+    Convierte los parámetros al tipo de sus columnas y calcula ``setinputsizes``.
+
+    ``get_columns(tabla)`` devuelve las columnas como ``get_table_schema``
+    (``column_name``, ``data_type``, ``size``), o una lista vacía si la tabla
+    no existe.
+    """
+
+    def __init__(self, get_columns: Callable[[str], List[Dict[str, Any]]],
+                 max_statements: int = DEFAULT_MAX_STATEMENTS, registry: Optional[MetricsRegistry] = None):
+        self.get_columns = get_columns
+        self.max_statements = max(1, max_statements)
+        self.registry = registry or REGISTRY
+        self._lock = threading.Lock()
+        self._statements: "OrderedDict[str, _StatementBinding]" = OrderedDict()
+        self._schemas: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.conversion_fallbacks = 0
+
+    def bind(self, query: str, params: Optional[Sequence[Any]]) -> Tuple[Optional[List[Any]], Optional[List[InputSize]]]:
+        """
+        Parámetros convertidos y tamaños para ``setinputsizes`` (None si no hay ninguno conocido).
+
+        Si el número de parámetros no coincide con los marcadores de la
+        sentencia se devuelven sin cambios.
+        """
+        if not params:
+            return (list(params) if params is not None else None), None
+        statement = self.statement(query)
+        if statement.placeholders != len(params) or not statement.typed:
+            return list(params), None
+        values = []
+        sizes = list(statement.input_sizes)
+        for position, (value, converter) in enumerate(zip(params, statement.converters)):
+            if converter is not None and value is not None:
+                try:
+                    value = converter(value)
+                except (ValueError, TypeError) as e:
+                    # Se envía tal cual y sin tipo: Jet hará la conversión (o dará el error)
+                    logger.debug(f"Parámetro {position + 1} sin convertir: {e}")
+                    self.conversion_fallbacks += 1
+                    sizes[position] = None
+            values.append(value)
+        return values, (sizes if any(size is not None for size in sizes) else None)
+
+    def statement(self, query: str) -> _StatementBinding:
+        """Enlace de una sentencia (de la caché o calculado)."""
+        with self._lock:
+            statement = self._statements.get(query)
+            if statement is not None:
+                self._statements.move_to_end(query)
+        self.registry.record_cache("parameter_binding", statement is not None)
+        if statement is not None:
+            return statement
+
+        count, placeholders = placeholder_columns(query)
+        converters: List[Optional[Callable[[Any], Any]]] = []
+        sizes: List[InputSize] = []
+        for placeholder in placeholders:
+            column = self._resolve(placeholder) if placeholder is not None else None
+            if column is None or placeholder[2]:
+                # Los patrones de LIKE se quedan como texto
+                converters.append(None)
+                sizes.append(None)
+            else:
+                converters.append(value_converter(column))
+                sizes.append(input_size(column))
+        statement = _StatementBinding(count, converters, sizes)
+        with self._lock:
+            self._statements[query] = statement
+            while len(self._statements) > self.max_statements:
+                self._statements.popitem(last=False)
+        return statement
+
+    def _resolve(self, placeholder: Tuple[List[str], str, bool]) -> Optional[Dict[str, Any]]:
+        """Columna de una de las tablas candidatas (None si no existe o es ambigua)."""
+        candidates, column_name, _ = placeholder
+        found = [column for column in (self._schema(table).get(column_name.lower()) for table in candidates)
+                 if column is not None]
+        if not found or len({input_size(column) for column in found}) > 1:
+            return None
+        return found[0]
+
+    def _schema(self, table_name: str) -> Dict[str, Dict[str, Any]]:
+        key = table_name.lower()
+        with self._lock:
+            schema = self._schemas.get(key)
+        if schema is None:
+            try:
+                columns = self.get_columns(table_name)
+            except Exception as e:
+                logger.debug(f"Sin esquema para {table_name}: {e}")
+                columns = []
+            schema = {column["column_name"].lower(): column for column in columns if column.get("column_name")}
+            with self._lock:
+                self._schemas[key] = schema
+        return schema
+
+    def note_statement(self, query: str):
+        """Invalidar las cachés si la sentencia cambia la estructura de una tabla."""
+        if not _DDL_PATTERN.match(query):
+            return
+        match = _DDL_TABLE_PATTERN.search(query)
+        self.invalidate(match.group(1).strip("[]") if match else None)
+
+    def invalidate(self, table_name: Optional[str] = None):
+        """Olvidar el esquema de una tabla (o de todas) y los enlaces calculados."""
+        with self._lock:
+            if table_name is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(table_name.lower(), None)
+            self._statements.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "statements": len(self._statements),
+                "tables": len(self._schemas),
+                "conversion_fallbacks": self.conversion_fallbacks
+            }
@@ -0,0 +1,107 @@
+"""
+Límites de tiempo y cancelación de consultas.
+
+Cada llamada a una herramienta que ejecuta trabajo bloqueante abre un
+``CancelScope``: los cursores y flujos creados durante la llamada se
+registran en él y, si se agota el tiempo o el cliente cancela la petición,
+``cancel()`` llama a ``cursor.cancel()`` (SQLCancel en ODBC) para abortar
+la sentencia en curso. Los bucles de lectura comprueban además el estado
+del ámbito entre lotes (cancelación cooperativa).
+"""
+
+import contextvars
+import logging
+import math
+import threading
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_scope: contextvars.ContextVar = contextvars.ContextVar("query_cancel_scope", default=None)
+
+
+class QueryCancelledError(Exception):
+    """La consulta se canceló antes de terminar."""
+
+
+class QueryTimeoutError(QueryCancelledError):
+    """La consulta superó el tiempo máximo permitido."""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"La operación superó el tiempo máximo de {timeout:g} s y se canceló")
+        self.timeout = timeout
+
+
+class CancelScope:
+    """Conjunto de cursores de una llamada que se pueden cancelar juntos."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Args:
+            timeout: Tiempo máximo de la llamada en segundos (None o 0 = sin límite)
+        """
+        self.timeout = timeout or None
+        self.cancelled = False
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._targets: List[Any] = []
+
+    @property
+    def statement_timeout(self) -> Optional[int]:
+        """Tiempo máximo por sentencia para el driver ODBC (segundos enteros)."""
+        return int(math.ceil(self.timeout)) if self.timeout else None
+
+    def register(self, target):
+        """Registrar un cursor o flujo (cualquier objeto con ``cancel()``)."""
+        with self._lock:
+            if not self.cancelled:
+                self._targets.append(target)
+                return
+        _cancel_target(target)
+        raise QueryCancelledError(self.reason or "La operación fue cancelada")
+
+    def unregister(self, target):
+        """Quitar un objeto que ya terminó."""
+        with self._lock:
+            try:
+                self._targets.remove(target)
+            except ValueError:
+                pass
+
+    def cancel(self, reason: str = "La operación fue cancelada"):
+        """Cancelar todas las sentencias registradas."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.reason = reason
+            targets, self._targets = self._targets, []
+        for target in targets:
+            _cancel_target(target)
+        if targets:
+            logger.info(f"Canceladas {len(targets)} sentencias en curso: {reason}")
+
+    def check(self):
+        """Lanzar QueryCancelledError si el ámbito fue cancelado."""
+        if self.cancelled:
+            raise QueryCancelledError(self.reason or "La operación fue cancelada")
+
+    def run(self, func, *args, **kwargs):
+        """Ejecutar ``func`` con este ámbito como ámbito actual."""
+        token = _current_scope.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_scope.reset(token)
+
+
+def current_scope() -> Optional[CancelScope]:
+    """Ámbito de cancelación de la llamada en curso (si lo hay)."""
+    return _current_scope.get()
+
+
+def _cancel_target(target):
+    try:
+        target.cancel()
+    except Exception as e:
+        logger.debug(f"No se pudo cancelar la sentencia: {e}")
@@ -0,0 +1,421 @@
+"""
+Planes de ejecución de Jet (ShowPlan).
+
+Con la clave ``JETSHOWPLAN = "ON"`` en el registro (rama ``Engines\\Debug``
+del motor) Jet/ACE añade el plan de cada consulta que optimiza al archivo
+``showplan.out``: primero las tablas de entrada con sus índices y después
+los pasos numerados::
+
+    --- temp query ---
+
+    - Inputs to Query -
+    Table 'Pedidos'
+        Using index 'ClienteId'
+        Having Indexes:
+        ClienteId 2000 entries, 5 pages, 500 values
+          which has 1 column, fixed
+    - End inputs to Query -
+
+    01) Restrict rows of table Pedidos
+          using index 'ClienteId'
+          for expression "Pedidos.ClienteId=7"
+
+``parse_showplan`` convierte ese texto en ``QueryPlan`` (acceso a cada
+tabla, índice usado y estrategia de cada combinación) y ``ShowPlanCapture``
+lee lo que el motor añade al archivo mientras se ejecuta una consulta. El
+análisis no depende de Windows; activar la clave necesita ``winreg`` y el
+motor solo la lee al cargarse.
+"""
+
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import winreg
+    WINREG_AVAILABLE = True
+except ImportError:
+    WINREG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SHOWPLAN_FILE = "showplan.out"
+DEFAULT_WAIT_SECONDS = 2.0
+
+# Ramas Engines\Debug de ACE (Office 2007 en adelante) y de Jet 4.0
+_ENGINE_KEYS = [rf"SOFTWARE\Microsoft\Office\{version}\Access Connectivity Engine\Engines"
+                for version in ("16.0", "15.0", "14.0", "12.0")] + [r"SOFTWARE\Microsoft\Jet\4.0\Engines"]
+REGISTRY_KEYS = [key + r"\Debug" for key in _ENGINE_KEYS] + [
+    key.replace("SOFTWARE\\", "SOFTWARE\\Wow6432Node\\", 1) + r"\Debug" for key in _ENGINE_KEYS]
+
+# Métodos de acceso a una tabla
+ACCESS_SCAN = "scan"
+ACCESS_INDEX = "index"
+ACCESS_RUSHMORE = "rushmore"
+ACCESS_TEMPORARY_INDEX = "temporary index"
+
+# Estrategias de combinación de Jet
+JOIN_INDEX = "index join"
+JOIN_LOOKUP = "lookup join"
+JOIN_MERGE = "merge join"
+JOIN_NESTED = "nested iteration"
+
+_QUERY_HEADER = re.compile(r"^---\s*(.*?)\s*---\s*$")
+_STEP_HEADER = re.compile(r"^(\d+)\)\s+(.*\S)\s*$")
+_INPUT_TABLE = re.compile(r"^Table\s+'(.+)'\s*$", re.IGNORECASE)
+_INPUT_USING = re.compile(r"^Using index\s+'(.+)'\s*$", re.IGNORECASE)
+_INPUT_INDEX = re.compile(r"^(.+?)\s+(\d+)\s+entr(?:y|ies),\s*(\d+)\s+pages?,\s*(\d+)\s+values?\s*$",
+                          re.IGNORECASE)
+_INPUT_COLUMNS = re.compile(r"^which has\s+(\d+)\s+columns?(?:,\s*(.*))?$", re.IGNORECASE)
+_REFERENCE = r"(?:table\s+'(?P<{0}_table>[^']+)'|result of\s+'(?P<{0}_step>\d+)\)'|table\s+(?P<{0}_bare>.+?))"
+_JOIN = re.compile(r"^(?P<kind>Inner|Left|Right|Outer|Full)(?:\s+Outer)?\s+Join\s+" + _REFERENCE.format("left")
+                   + r"\s+to\s+" + _REFERENCE.format("right") + r"\s*$", re.IGNORECASE)
+_SINGLE = re.compile(r"^(?P<verb>Restrict rows of|Scan|Sort|Group|Remove duplicates from|Union|Select rows of)\s+"
+                     + _REFERENCE.format("source")
+                     + r"(?P<rest>\s+(?:by scanning|using|for|testing)\b.*)?\s*$", re.IGNORECASE)
+_EXPRESSION = re.compile(r"^(?P<kind>for|testing|join|then test)\s+expressions?\s+\"(?P<text>.*)\"\s*$",
+                         re.IGNORECASE)
+_USING_INDEX = re.compile(r"^using index\s+'(?P<index>[^']+)'", re.IGNORECASE)
+
+
+class ShowPlanError(RuntimeError):
+    """No se pudo activar o leer el plan de ejecución de Jet."""
+
+
+@dataclass
+class TableIndex:
+    """Índice de una tabla de entrada según ShowPlan."""
+    name: str
+    entries: int
+    pages: int
+    values: int
+    columns: int = 0
+    flags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TableInput:
+    """Tabla de entrada de la consulta."""
+    table: str
+    index_used: Optional[str] = None
+    indexes: List[TableIndex] = field(default_factory=list)
+
+
+@dataclass
+class PlanStep:
+    """Paso numerado del plan."""
+    number: int
+    text: str
+    operation: str
+    table: Optional[str] = None
+    inputs: List[str] = field(default_factory=list)
+    join_type: Optional[str] = None
+    access_method: Optional[str] = None
+    index: Optional[str] = None
+    join_strategy: Optional[str] = None
+    expressions: Dict[str, str] = field(default_factory=dict)
+    details: List[str] = field(default_factory=list)
+
+
+@dataclass
+class QueryPlan:
+    """Plan de una consulta: tablas de entrada y pasos."""
+    name: str
+    inputs: List[TableInput] = field(default_factory=list)
+    steps: List[PlanStep] = field(default_factory=list)
+
+    def table_access(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Cómo se lee cada tabla: ``{"method": scan|index|rushmore|temporary index, "index": nombre}``."""
+        access: Dict[str, Dict[str, Optional[str]]] = {}
+        for table_input in self.inputs:
+            method = ACCESS_INDEX if table_input.index_used else ACCESS_SCAN
+            access[table_input.table] = {"method": method, "index": table_input.index_used}
+        for step in self.steps:
+            if step.table and step.access_method:
+                # Rushmore no nombra los índices en el paso: se mantiene el de la entrada
+                index = step.index or (access.get(step.table, {}).get("index")
+                                       if step.access_method == ACCESS_RUSHMORE else None)
+                access[step.table] = {"method": step.access_method, "index": index}
+        return access
+
+    @property
+    def scanned_tables(self) -> List[str]:
+        """Tablas que se leen completas."""
+        return [table for table, access in self.table_access().items() if access["method"] == ACCESS_SCAN]
+
+    @property
+    def join_strategies(self) -> List[str]:
+        return [step.join_strategy for step in self.steps if step.join_strategy]
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["table_access"] = self.table_access()
+        result["scanned_tables"] = self.scanned_tables
+        return result
+
+
+def parse_showplan(text: str) -> List[QueryPlan]:
+    """Analizar el contenido de ``showplan.out`` (uno o varios planes, en orden)."""
+    plans: List[QueryPlan] = []
+    plan: Optional[QueryPlan] = None
+    in_inputs = False
+    table: Optional[TableInput] = None
+    step: Optional[PlanStep] = None
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        header = _QUERY_HEADER.match(line)
+        if header:
+            plan = QueryPlan(header.group(1))
+            plans.append(plan)
+            in_inputs, table, step = False, None, None
+            continue
+        if plan is None:
+            # Texto anterior al primer plan (archivo truncado): se ignora
+            continue
+        lowered = line.lower()
+        if lowered.startswith("- inputs to query"):
+            in_inputs = True
+            continue
+        if lowered.startswith("- end inputs to query"):
+            in_inputs, table = False, None
+            continue
+        if in_inputs:
+            table = _parse_input_line(plan, table, line)
+            continue
+        match = _STEP_HEADER.match(line)
+        if match:
+            step = _parse_step(int(match.group(1)), match.group(2))
+            plan.steps.append(step)
+        elif step is not None:
+            _parse_step_detail(step, line)
+    return plans
+
+
+def _parse_input_line(plan: QueryPlan, table: Optional[TableInput], line: str) -> Optional[TableInput]:
+    match = _INPUT_TABLE.match(line)
+    if match:
+        table = TableInput(match.group(1))
+        plan.inputs.append(table)
+        return table
+    if table is None:
+        return None
+    match = _INPUT_USING.match(line)
+    if match:
+        table.index_used = match.group(1)
+        return table
+    match = _INPUT_INDEX.match(line)
+    if match:
+        table.indexes.append(TableIndex(match.group(1), int(match.group(2)), int(match.group(3)),
+                                        int(match.group(4))))
+        return table
+    match = _INPUT_COLUMNS.match(line)
+    if match and table.indexes:
+        table.indexes[-1].columns = int(match.group(1))
+        table.indexes[-1].flags = [flag.strip() for flag in (match.group(2) or "").split(",") if flag.strip()]
+    return table
+
+
+def _reference(match, side: str) -> Optional[str]:
+    """Tabla (``'Pedidos'``) o paso (``'01)'``) de una referencia."""
+    if match.group(f"{side}_step"):
+        return f"{int(match.group(f'{side}_step')):02d})"
+    return match.group(f"{side}_table") or match.group(f"{side}_bare")
+
+
+def _parse_step(number: int, text: str) -> PlanStep:
+    step = PlanStep(number, text, operation=text.split()[0].lower())
+    join = _JOIN.match(text)
+    if join:
+        step.operation = "join"
+        step.join_type = join.group("kind").lower()
+        step.inputs = [_reference(join, "left"), _reference(join, "right")]
+        # La tabla que se busca por cada fila es la de la derecha
+        if not join.group("right_step"):
+            step.table = _reference(join, "right")
+        return step
+    single = _SINGLE.match(text)
+    if single:
+        verb = single.group("verb").lower()
+        step.operation = {"restrict rows of": "restrict", "select rows of": "restrict",
+                          "remove duplicates from": "distinct"}.get(verb, verb)
+        source = _reference(single, "source")
+        step.inputs = [source]
+        if not single.group("source_step"):
+            step.table = source
+            if step.operation == "scan":
+                step.access_method = ACCESS_SCAN
+        rest = (single.group("rest") or "").strip()
+        if rest:
+            _parse_step_detail(step, rest)
+    return step
+
+
+def _parse_step_detail(step: PlanStep, line: str):
+    lowered = line.lower()
+    expression = _EXPRESSION.match(line)
+    if expression:
+        kind = expression.group("kind").lower()
+        # Rushmore combina varias expresiones, una por línea
+        previous = step.expressions.get(kind)
+        step.expressions[kind] = f"{previous} AND {expression.group('text')}" if previous else expression.group("text")
+        return
+    if lowered.startswith("by scanning"):
+        step.access_method = ACCESS_SCAN
+    elif lowered.startswith("using rushmore"):
+        step.access_method = ACCESS_RUSHMORE
+    elif lowered.startswith("using temporary index"):
+        step.access_method = ACCESS_TEMPORARY_INDEX
+        if step.operation == "join":
+            step.join_strategy = JOIN_LOOKUP
+    elif "x-prod" in lowered:
+        step.access_method = step.access_method or ACCESS_SCAN
+        step.join_strategy = JOIN_NESTED
+    elif "merge" in lowered and step.operation == "join":
+        step.join_strategy = JOIN_MERGE
+    else:
+        index = _USING_INDEX.match(line)
+        if index is None:
+            step.details.append(line)
+            return
+        name = index.group("index")
+        # En las combinaciones el índice va como 'Tabla!Índice'
+        if "!" in name:
+            table, name = name.split("!", 1)
+            step.table = step.table or table
+        step.access_method = ACCESS_INDEX
+        step.index = name
+        if step.operation == "join":
+            step.join_strategy = JOIN_INDEX
+
+
+def format_plan(plan: QueryPlan) -> str:
+    """Resumen legible de un plan."""
+    lines = []
+    for table, access in plan.table_access().items():
+        if access["method"] == ACCESS_SCAN:
+            lines.append(f"• {table}: recorrido completo")
+        elif access["index"]:
+            lines.append(f"• {table}: {access['method']} '{access['index']}'")
+        else:
+            lines.append(f"• {table}: {access['method']}")
+    if lines:
+        lines.append("")
+    for step in plan.steps:
+        description = f"{step.number:02d}) {step.text}"
+        extras = [value for value in (step.join_strategy, step.access_method if not step.join_strategy else None,
+                                      f"índice '{step.index}'" if step.index else None) if value]
+        if extras:
+            description += f"  [{', '.join(extras)}]"
+        lines.append(description)
+        for kind, expression in step.expressions.items():
+            lines.append(f"      {kind} expression: {expression}")
+    return "\n".join(lines)
+
+
+class ShowPlanCapture:
+    """
+    Lee lo que Jet añade a ``showplan.out`` mientras se ejecuta una consulta.
+
+    ACE escribe el archivo en la carpeta Documentos del usuario y Jet 4.0 en
+    el directorio de trabajo; sin ``path`` se vigilan los dos.
+    """
+
+    def __init__(self, path: Optional[str] = None, wait_seconds: float = DEFAULT_WAIT_SECONDS,
+                 poll_interval: float = 0.1):
+        self.paths = [path] if path else default_paths()
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+
+    def mark(self) -> Dict[str, int]:
+        """Tamaño actual de cada archivo vigilado (0 si no existe)."""
+        return {path: _size(path) for path in self.paths}
+
+    def read_since(self, marks: Dict[str, int]) -> str:
+        """Texto añadido desde ``mark`` (espera hasta ``wait_seconds`` a que el motor escriba)."""
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            for path, offset in marks.items():
+                size = _size(path)
+                if size > offset or size < offset:
+                    # Si el archivo se vació o se sustituyó, se lee desde el principio
+                    return _read(path, offset if size > offset else 0)
+            if time.monotonic() >= deadline:
+                return ""
+            time.sleep(self.poll_interval)
+
+
+def default_paths() -> List[str]:
+    documents = Path.home() / "Documents"
+    paths = [str(documents / SHOWPLAN_FILE), os.path.join(os.getcwd(), SHOWPLAN_FILE)]
+    return list(dict.fromkeys(paths))
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _read(path: str, offset: int) -> str:
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        data = handle.read()
+    # Jet escribe en la página de códigos ANSI del sistema
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def showplan_enabled() -> Optional[bool]:
+    """Si alguna rama del registro tiene ``JETSHOWPLAN = ON`` (None fuera de Windows)."""
+    if not WINREG_AVAILABLE:
+        return None
+    for key_path in REGISTRY_KEYS:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
+                value, _ = winreg.QueryValueEx(key, "JETSHOWPLAN")
+        except OSError:
+            continue
+        if str(value).strip().upper() == "ON":
+            return True
+    return False
+
+
+def enable_showplan(key_paths: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Poner ``JETSHOWPLAN = ON`` en las ramas de los motores instalados.
+
+    Necesita permisos de administrador (HKEY_LOCAL_MACHINE) y el motor lo
+    lee al cargarse: puede hacer falta reiniciar el servidor. Devuelve las
+    ramas escritas.
+    """
+    if not WINREG_AVAILABLE:
+        raise ShowPlanError("ShowPlan solo se puede activar en Windows (winreg no disponible)")
+    written = []
+    errors = []
+    for key_path in key_paths or REGISTRY_KEYS:
+        engines = key_path.rsplit("\\", 1)[0]
+        try:
+            # Solo los motores instalados (existe la rama Engines)
+            winreg.CloseKey(winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, engines))
+        except OSError:
+            continue
+        try:
+            with winreg.CreateKeyEx(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_SET_VALUE) as key:
+                winreg.SetValueEx(key, "JETSHOWPLAN", 0, winreg.REG_SZ, "ON")
+            written.append(key_path)
+        except OSError as e:
+            errors.append(f"{key_path}: {e}")
+    if not written:
+        detail = "; ".join(errors) if errors else "no se encontró ningún motor Jet/ACE en el registro"
+        raise ShowPlanError(f"No se pudo activar JETSHOWPLAN ({detail})")
+    logger.info(f"JETSHOWPLAN activado en {', '.join(written)}")
+    return written
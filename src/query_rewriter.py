@@ -0,0 +1,719 @@
+"""
+Reescritura de SQL ANSI a SQL de Access (Jet).
+
+Los agentes suelen escribir SQL de otros motores que Jet rechaza o ejecuta
+mal. ``QueryRewriter`` analiza la sentencia (sin tocar cadenas ni fechas)
+y traduce:
+
+- ``LIMIT n`` y ``FETCH FIRST n ROWS ONLY`` a ``SELECT TOP n``, también en
+  subconsultas; si la consulta exterior solo proyecta una tabla derivada,
+  el ``TOP`` se baja a la subconsulta para que Jet deje de leer antes
+- ``LIMIT 0`` (que Jet no admite como ``TOP 0``) a la consulta envuelta en
+  una tabla derivada con ``WHERE 1=0``
+- ``OFFSET m`` (y ``LIMIT m, n``) a paginación por clave cuando se ordena
+  por una columna con índice único de una sola tabla y se conoce la última
+  clave de la página anterior (``WHERE clave > ?``); si no, a ``TOP m + n``
+  y las ``m`` primeras filas se descartan al leer
+- ``||`` a ``&``, ``!=`` a ``<>``, ``ILIKE`` a ``LIKE`` (en Jet ya no
+  distingue mayúsculas), ``CURRENT_DATE`` a ``Date()`` y
+  ``CURRENT_TIMESTAMP`` a ``Now()``
+- identificadores entre comillas invertidas, entre comillas dobles (si
+  son el nombre de una tabla o columna) o con espacios sin corchetes a
+  ``[nombre]`` con ``AccessUtils.escape_sql_identifier``
+
+La parte fija de cada reescritura se guarda por la huella de la sentencia
+(LRU); la paginación por clave recuerda la última clave de cada página
+devuelta hasta que el servidor escribe en la base de datos. Una sentencia
+que ya es SQL de Access se devuelve sin cambios.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    from .config import AccessUtils
+except ImportError:
+    from config import AccessUtils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_STATEMENTS = 256
+DEFAULT_MAX_PAGES = 1000
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<space>\s+)"
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<quoted>\"(?:[^\"]|\"\")*\")"
+    r"|(?P<backtick>`[^`]*`)"
+    r"|(?P<bracket>\[[^\]]*\])"
+    r"|(?P<date>#[^#\n]*#)"
+    r"|(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<word>[A-Za-z_][\w$]*)"
+    r"|(?P<operator>\|\||<>|<=|>=|!=)"
+    r"|(?P<symbol>.)",
+    re.DOTALL
+)
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX", "FIRST", "LAST", "STDEV", "STDEVP", "VAR", "VARP"}
+_FUNCTION_WORDS = {"CURRENT_DATE": "Date()", "CURRENT_TIMESTAMP": "Now()"}
+_DDL_PATTERN = re.compile(r"^\s*(CREATE|ALTER|DROP)\b", re.IGNORECASE)
+
+
+class QueryRewriteError(ValueError):
+    """La sentencia usa una construcción que no se puede traducir a Access."""
+
+
+@dataclass
+class _Token:
+    kind: str
+    text: str
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "word" else self.text
+
+
+@dataclass
+class _Group:
+    """Contenido entre paréntesis."""
+    children: List[Union[_Token, "_Group"]]
+
+    @property
+    def text(self) -> str:
+        return "(" + _render(self.children) + ")"
+
+
+_Item = Union[_Token, _Group]
+
+
+def _tokenize(query: str) -> List[_Token]:
+    return [_Token(match.lastgroup, match.group()) for match in _TOKEN_PATTERN.finditer(query)]
+
+
+def _parse(tokens: List[_Token]) -> List[_Item]:
+    """Agrupar los paréntesis (error si no están equilibrados)."""
+    stack: List[List[_Item]] = [[]]
+    for token in tokens:
+        if token.text == "(" and token.kind == "symbol":
+            stack.append([])
+        elif token.text == ")" and token.kind == "symbol":
+            if len(stack) == 1:
+                raise QueryRewriteError("Paréntesis sin abrir")
+            children = stack.pop()
+            stack[-1].append(_Group(children))
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1:
+        raise QueryRewriteError("Paréntesis sin cerrar")
+    return stack[0]
+
+
+def _render(items: Sequence[_Item]) -> str:
+    return "".join(item.text for item in items)
+
+
+def _words(items: Sequence[_Item]) -> List[Tuple[int, _Item]]:
+    """Elementos que no son espacios, con su posición."""
+    return [(index, item) for index, item in enumerate(items)
+            if not (isinstance(item, _Token) and item.kind == "space")]
+
+
+def _strip(items: Sequence[_Item]) -> List[_Item]:
+    """Quitar los espacios de los extremos."""
+    visible = _words(items)
+    return list(items[visible[0][0]:visible[-1][0] + 1]) if visible else []
+
+
+def _is_word(item: Optional[_Item], *words: str) -> bool:
+    return isinstance(item, _Token) and item.kind == "word" and item.upper in words
+
+
+def _starts_with_select(items: Sequence[_Item]) -> bool:
+    visible = _words(items)
+    return bool(visible) and _is_word(visible[0][1], "SELECT")
+
+
+def _integer(item: Optional[_Item]) -> Optional[int]:
+    if isinstance(item, _Token) and item.kind == "number" and item.text.isdigit():
+        return int(item.text)
+    return None
+
+
+@dataclass
+class _Paging:
+    """LIMIT/OFFSET quitados de un nivel de la sentencia."""
+    limit: Optional[int] = None
+    offset: int = 0
+
+
+def _opens_paging(item: _Item, following: Optional[_Item]) -> bool:
+    """Si la palabra empieza la cláusula de paginación y no es un nombre (``SELECT Limit FROM ...``)."""
+    if _is_word(item, "LIMIT", "OFFSET"):
+        return (isinstance(following, _Token)
+                and (following.kind == "number" or (following.kind == "symbol" and following.text == "?")))
+    return _is_word(item, "FETCH") and _is_word(following, "FIRST", "NEXT")
+
+
+def _take_paging(items: List[_Item]) -> Optional[_Paging]:
+    """Quitar ``LIMIT``/``OFFSET``/``FETCH`` del final de un nivel y devolverlos."""
+    visible = _words(items)
+    start = next((position for position, (_, item) in enumerate(visible)
+                  if _opens_paging(item, visible[position + 1][1] if position + 1 < len(visible) else None)),
+                 None)
+    if start is None:
+        return None
+    clause = [item for _, item in visible[start:]]
+    words = [item.upper if isinstance(item, _Token) else None for item in clause]
+    paging = _Paging()
+    position = 0
+    while position < len(clause):
+        word = words[position]
+        if word == "LIMIT":
+            first = _integer(clause[position + 1] if position + 1 < len(clause) else None)
+            if first is None:
+                raise QueryRewriteError("LIMIT solo admite un número literal")
+            if position + 3 < len(clause) and words[position + 2] == ",":
+                # LIMIT desplazamiento, filas (MySQL)
+                second = _integer(clause[position + 3])
+                if second is None:
+                    raise QueryRewriteError("LIMIT solo admite números literales")
+                paging.offset, paging.limit = first, second
+                position += 4
+            else:
+                paging.limit = first
+                position += 2
+        elif word == "OFFSET":
+            value = _integer(clause[position + 1] if position + 1 < len(clause) else None)
+            if value is None:
+                raise QueryRewriteError("OFFSET solo admite un número literal")
+            paging.offset = value
+            position += 2
+            if position < len(clause) and words[position] in ("ROW", "ROWS"):
+                position += 1
+        elif word == "FETCH":
+            # FETCH FIRST|NEXT n ROW|ROWS ONLY
+            value = _integer(clause[position + 2] if position + 2 < len(clause) else None)
+            if value is None or words[position + 1] not in ("FIRST", "NEXT"):
+                raise QueryRewriteError("FETCH debe ser FETCH FIRST n ROWS ONLY")
+            paging.limit = value
+            position += 3
+            while position < len(clause) and words[position] in ("ROW", "ROWS", "ONLY"):
+                position += 1
+        elif word == ";":
+            position += 1
+        else:
+            raise QueryRewriteError(f"No se esperaba '{clause[position].text}' tras LIMIT/OFFSET")
+    # Quitar la cláusula y el espacio que la precedía
+    cut = visible[start][0]
+    while cut > 0 and isinstance(items[cut - 1], _Token) and items[cut - 1].kind == "space":
+        cut -= 1
+    del items[cut:]
+    return paging
+
+
+def _select_head(items: List[_Item]) -> Tuple[int, Optional[int]]:
+    """Posición tras ``SELECT [DISTINCT]`` y el número de un ``TOP`` existente (si lo hay)."""
+    visible = _words(items)
+    position = 1
+    if position < len(visible) and _is_word(visible[position][1], "DISTINCT", "DISTINCTROW", "ALL"):
+        position += 1
+    insert_at = visible[position - 1][0] + 1
+    if position < len(visible) and _is_word(visible[position][1], "TOP"):
+        return insert_at, position
+    return insert_at, None
+
+
+def _apply_top(items: List[_Item], limit: int) -> bool:
+    """Poner ``TOP limit`` en un SELECT (o reducir el existente). True si cambia algo."""
+    insert_at, top_position = _select_head(items)
+    visible = _words(items)
+    if top_position is not None:
+        number_index, number = visible[top_position + 1] if top_position + 1 < len(visible) else (None, None)
+        current = _integer(number)
+        following = visible[top_position + 2][1] if top_position + 2 < len(visible) else None
+        if current is None or _is_word(following, "PERCENT"):
+            raise QueryRewriteError("No se puede combinar LIMIT con un TOP no numérico o PERCENT")
+        if current <= limit:
+            return False
+        items[number_index] = _Token("number", str(limit))
+        return True
+    items[insert_at:insert_at] = [_Token("space", " "), _Token("word", "TOP"), _Token("space", " "),
+                                  _Token("number", str(limit))]
+    return True
+
+
+def _top_level_words(items: Sequence[_Item]) -> List[str]:
+    return [item.upper for _, item in _words(items) if isinstance(item, _Token)]
+
+
+def _clause_positions(items: Sequence[_Item]) -> Dict[str, int]:
+    """Posición (en ``items``) de cada cláusula del nivel: FROM, WHERE, GROUP, HAVING, ORDER."""
+    positions = {}
+    visible = _words(items)
+    for position, (index, item) in enumerate(visible):
+        if _is_word(item, "FROM", "WHERE", "HAVING") and item.upper not in positions:
+            positions[item.upper] = index
+        elif (_is_word(item, "GROUP", "ORDER") and position + 1 < len(visible)
+              and _is_word(visible[position + 1][1], "BY") and item.upper not in positions):
+            positions[item.upper] = index
+    return positions
+
+
+def _push_top_down(items: List[_Item], limit: int, changes: List[str]):
+    """Bajar ``TOP`` a la tabla derivada si la consulta exterior solo la proyecta."""
+    words = _top_level_words(items)
+    if any(word in words for word in ("WHERE", "GROUP", "HAVING", "ORDER", "JOIN", "UNION", "DISTINCT",
+                                      "DISTINCTROW")):
+        return
+    positions = _clause_positions(items)
+    if "FROM" not in positions:
+        return
+    select_list = items[:positions["FROM"]]
+    if any(_is_word(item, *_AGGREGATES) for _, item in _words(select_list)):
+        return
+    source = _words(items[positions["FROM"] + 1:])
+    if not source or not isinstance(source[0][1], _Group) or not _starts_with_select(source[0][1].children):
+        return
+    # Tras la tabla derivada solo puede ir el alias
+    rest = [item for _, item in source[1:] if not (isinstance(item, _Token) and item.text == ";")]
+    if len(rest) > 2 or (len(rest) == 2 and not _is_word(rest[0], "AS")):
+        return
+    inner = source[0][1].children
+    if "UNION" in _top_level_words(inner):
+        return
+    if _apply_top(inner, limit):
+        changes.append(f"TOP {limit} llevado a la subconsulta")
+    _push_top_down(inner, limit, changes)
+
+
+def _derived(body: Sequence[_Item], alias: str) -> List[_Item]:
+    """``SELECT * FROM (body) AS alias``."""
+    return [_Token("word", "SELECT"), _Token("space", " "), _Token("symbol", "*"), _Token("space", " "),
+            _Token("word", "FROM"), _Token("space", " "), _Group(_strip(body)), _Token("space", " "),
+            _Token("word", "AS"), _Token("space", " "), _Token("bracket", alias)]
+
+
+def _rewrite_select(items: List[_Item], changes: List[str], top_level: bool) -> Optional[_Paging]:
+    """Reescribir un nivel que empieza por SELECT (y sus subconsultas)."""
+    _rewrite_nested(items, changes)
+    paging = _take_paging(items)
+    if paging is None:
+        return None
+    if paging.offset and not top_level:
+        raise QueryRewriteError("OFFSET en una subconsulta no se puede traducir a Access")
+    if paging.limit == 0:
+        # Jet rechaza TOP 0: la consulta se envuelve con un filtro que no deja pasar ninguna fila
+        order_at = _clause_positions(items).get("ORDER")
+        items[:] = (_derived(items[:order_at] if order_at is not None else items, "[_vacia]")
+                    + [_Token("space", " "), _Token("word", "WHERE"), _Token("space", " "),
+                       _Token("number", "1"), _Token("symbol", "="), _Token("number", "0")])
+        changes.append("LIMIT 0 → consulta sin filas (WHERE 1=0)")
+        return paging
+    if "UNION" in _top_level_words(items):
+        # TOP afecta solo al primer SELECT: se envuelve la unión y se saca su ORDER BY
+        order_at = _clause_positions(items).get("ORDER")
+        order = items[order_at:] if order_at is not None else []
+        items[:] = (_derived(items[:order_at] if order_at is not None else items, "[_union]")
+                    + ([_Token("space", " ")] + order if order else []))
+        changes.append("UNION envuelta en una tabla derivada para aplicar TOP")
+    if paging.limit is not None:
+        rows = paging.limit + paging.offset
+        clause = f"LIMIT {paging.limit}" + (f" OFFSET {paging.offset}" if paging.offset else "")
+        if _apply_top(items, rows):
+            changes.append(f"{clause} → TOP {rows}")
+        else:
+            changes.append(f"{clause} quitado: el TOP de la consulta ya es menor")
+        if not paging.offset:
+            _push_top_down(items, rows, changes)
+    elif paging.offset:
+        changes.append(f"OFFSET {paging.offset} sin LIMIT: se descartan filas al leer")
+    return paging
+
+
+def _rewrite_nested(items: List[_Item], changes: List[str]):
+    """Reescribir las subconsultas entre paréntesis de un nivel."""
+    for item in items:
+        if isinstance(item, _Group):
+            if _starts_with_select(item.children):
+                _rewrite_select(item.children, changes, top_level=False)
+            else:
+                _rewrite_nested(item.children, changes)
+
+
+def _walk_tokens(items: List[_Item]) -> Iterator[Tuple[List[_Item], int]]:
+    for index, item in enumerate(items):
+        if isinstance(item, _Group):
+            yield from _walk_tokens(item.children)
+        else:
+            yield items, index
+
+
+@dataclass
+class _Keyset:
+    """Datos para paginar por clave una sentencia con OFFSET."""
+    column: str
+    descending: bool
+    sql: str
+
+
+@dataclass
+class _Plan:
+    """Parte fija de la reescritura de una sentencia (se guarda por huella)."""
+    sql: str
+    changes: List[str]
+    limit: Optional[int] = None
+    offset: int = 0
+    base_fingerprint: Optional[str] = None
+    keyset: Optional[_Keyset] = None
+
+
+@dataclass
+class RewrittenQuery:
+    """Sentencia lista para ejecutar en Access."""
+    sql: str
+    params: Optional[List[Any]]
+    changes: List[str] = field(default_factory=list)
+    skip_rows: int = 0
+    limit: Optional[int] = None
+    cached: bool = False
+    keyset_used: bool = False
+    _page: Optional[Tuple[Any, int, str, Any]] = None
+    _rewriter: Optional["QueryRewriter"] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changes)
+
+    def rows(self, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[Sequence[Any]]:
+        """
+        Filas de la página: descarta ``skip_rows`` y corta en ``limit``.
+
+        Al terminar la página se recuerda su última clave para que la
+        siguiente se pueda pedir por clave.
+        """
+        key_index = None
+        if self._page is not None:
+            names = [column.lower() for column in columns]
+            key_index = names.index(self._page[2].lower()) if self._page[2].lower() in names else None
+        iterator = iter(rows)
+        for _ in range(self.skip_rows):
+            if next(iterator, None) is None:
+                return
+        returned = 0
+        last = None
+        for row in iterator:
+            if self.limit is not None and returned >= self.limit:
+                break
+            yield row
+            returned += 1
+            last = row
+        if key_index is not None and last is not None and last[key_index] is not None and self._rewriter is not None:
+            memo_key, offset, _, token = self._page
+            self._rewriter._remember_page(memo_key, offset + returned, last[key_index], token)
+
+
+def fingerprint(query: str) -> str:
+    """Huella de una sentencia (resumen del texto)."""
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class QueryRewriter:
+    """
+    Traduce sentencias a SQL de Access y guarda las traducciones por huella.
+
+    Args:
+        identifiers: Función con los nombres de tablas y columnas de la base
+            de datos (para las comillas dobles y los nombres con espacios);
+            se llama una vez hasta ``invalidate``
+        unique_key: ``unique_key(tabla)`` con una columna con índice único
+            (None si no tiene), para la paginación por clave
+        change_token: Valor que cambia cuando el propio servidor escribe; las
+            claves de página recordadas antes de una escritura se olvidan
+            (las filas insertadas o borradas desplazan los OFFSET)
+    """
+
+    def __init__(self, identifiers: Optional[Callable[[], Iterable[str]]] = None,
+                 unique_key: Optional[Callable[[str], Optional[str]]] = None,
+                 max_statements: int = DEFAULT_MAX_STATEMENTS, max_pages: int = DEFAULT_MAX_PAGES,
+                 change_token: Optional[Callable[[], Any]] = None):
+        self.identifiers = identifiers
+        self.unique_key = unique_key
+        self.change_token = change_token
+        self.max_statements = max(1, max_statements)
+        self.max_pages = max(1, max_pages)
+        self._lock = threading.Lock()
+        self._plans: "OrderedDict[str, _Plan]" = OrderedDict()
+        self._pages: "OrderedDict[Any, Dict[int, Any]]" = OrderedDict()
+        self._pages_token: Any = None
+        self._names: Optional[Dict[str, str]] = None
+        self._multiword: Dict[Tuple[str, ...], str] = {}
+        self._keys: Dict[str, Optional[str]] = {}
+
+    def invalidate(self):
+        """Olvidar nombres, claves y traducciones (tras cambios de estructura o al reconectar)."""
+        with self._lock:
+            self._plans.clear()
+            self._pages.clear()
+            self._names = None
+            self._multiword = {}
+            self._keys = {}
+
+    def note_statement(self, query: str):
+        """Invalidar las cachés si la sentencia cambia la estructura de la base de datos."""
+        if _DDL_PATTERN.match(query):
+            self.invalidate()
+
+    def rewrite(self, query: str, params: Optional[Sequence[Any]] = None) -> RewrittenQuery:
+        """Traducir una sentencia; lanza ``QueryRewriteError`` si no tiene traducción."""
+        key = fingerprint(query)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+        cached = plan is not None
+        if plan is None:
+            plan = self._plan(query)
+            with self._lock:
+                self._plans[key] = plan
+                while len(self._plans) > self.max_statements:
+                    self._plans.popitem(last=False)
+
+        params = list(params) if params is not None else None
+        result = RewrittenQuery(plan.sql, params, list(plan.changes), skip_rows=plan.offset,
+                                limit=plan.limit if plan.offset else None, cached=cached)
+        if plan.keyset is not None:
+            memo_key = (plan.base_fingerprint, tuple(repr(value) for value in params or []))
+            result._page = (memo_key, plan.offset, plan.keyset.column, self._token())
+            result._rewriter = self
+            last_key = self._page_key(memo_key, plan.offset) if plan.offset else None
+            if last_key is not None:
+                result.sql = plan.keyset.sql
+                result.params = (params or []) + [last_key[0]]
+                result.skip_rows = 0
+                result.keyset_used = True
+                result.changes.append(f"OFFSET {plan.offset} → página por clave ({plan.keyset.column})")
+        return result
+
+    def _token(self) -> Any:
+        return self.change_token() if self.change_token is not None else None
+
+    def _sync_pages(self, token: Any):
+        """Olvidar las páginas si el servidor ha escrito desde que se recordaron (con el bloqueo)."""
+        if token != self._pages_token:
+            self._pages.clear()
+            self._pages_token = token
+
+    def _page_key(self, memo_key, offset: int) -> Optional[Tuple[Any]]:
+        token = self._token()
+        with self._lock:
+            self._sync_pages(token)
+            pages = self._pages.get(memo_key)
+            if pages is None or offset not in pages:
+                return None
+            self._pages.move_to_end(memo_key)
+            return (pages[offset],)
+
+    def _remember_page(self, memo_key, end_offset: int, last_key: Any, token: Any = None):
+        current = self._token()
+        with self._lock:
+            self._sync_pages(current)
+            if token != current:
+                # La página se leyó antes de una escritura: su clave ya no sirve
+                return
+            self._pages.setdefault(memo_key, {})[end_offset] = last_key
+            self._pages.move_to_end(memo_key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def _plan(self, query: str) -> _Plan:
+        tokens = _tokenize(query)
+        changes: List[str] = []
+        self._rewrite_tokens(tokens, changes)
+        items = _parse(tokens)
+        if not _starts_with_select(items):
+            return _Plan(_render(items) if changes else query, changes)
+        base = _render(items)
+        paging = _rewrite_select(items, changes, top_level=True)
+        plan = _Plan(_render(items) if changes else query, changes)
+        if paging is not None:
+            plan.limit = paging.limit
+            plan.offset = paging.offset
+            if paging.limit is not None:
+                plan.keyset = self._keyset(items, paging)
+                if plan.keyset is not None:
+                    plan.base_fingerprint = fingerprint(_render(_take_base(base)))
+        return plan
+
+    # Sustituciones símbolo a símbolo
+
+    def _rewrite_tokens(self, tokens: List[_Token], changes: List[str]):
+        for index, token in enumerate(tokens):
+            if token.kind == "operator" and token.text == "||":
+                tokens[index] = _Token("operator", "&")
+                _note(changes, "|| → &")
+            elif token.kind == "operator" and token.text == "!=":
+                tokens[index] = _Token("operator", "<>")
+                _note(changes, "!= → <>")
+            elif token.kind == "word" and token.upper == "ILIKE":
+                tokens[index] = _Token("word", "LIKE")
+                _note(changes, "ILIKE → LIKE")
+            elif token.kind == "word" and token.upper in _FUNCTION_WORDS:
+                following = next((t for t in tokens[index + 1:] if t.kind != "space"), None)
+                if following is None or following.text != "(":
+                    tokens[index] = _Token("word", _FUNCTION_WORDS[token.upper])
+                    _note(changes, f"{token.upper} → {_FUNCTION_WORDS[token.upper]}")
+            elif token.kind == "backtick":
+                tokens[index] = _Token("bracket", AccessUtils.escape_sql_identifier(token.text[1:-1]))
+                _note(changes, "`identificador` → [identificador]")
+            elif token.kind == "quoted":
+                name = token.text[1:-1].replace('""', '"')
+                known = self._known_names().get(name.lower())
+                if known is not None:
+                    tokens[index] = _Token("bracket", AccessUtils.escape_sql_identifier(known))
+                    _note(changes, '"identificador" → [identificador]')
+        self._bracket_multiword(tokens, changes)
+
+    def _known_names(self) -> Dict[str, str]:
+        with self._lock:
+            if self._names is not None:
+                return self._names
+        names: Dict[str, str] = {}
+        if self.identifiers is not None:
+            try:
+                for name in self.identifiers():
+                    if name:
+                        names.setdefault(name.lower(), name)
+            except Exception as e:
+                logger.debug(f"No se pudieron leer los nombres de la base de datos: {e}")
+        multiword = {tuple(name.split()): original for name, original in names.items()
+                     if len(name.split()) > 1 and all(re.fullmatch(r"[\w$]+", part) for part in name.split())}
+        with self._lock:
+            self._names = names
+            self._multiword = multiword
+        return names
+
+    def _bracket_multiword(self, tokens: List[_Token], changes: List[str]):
+        """Poner corchetes a los nombres con espacios escritos sin ellos (``Order Details``)."""
+        if not any(token.kind == "word" for token in tokens):
+            return
+        self._known_names()
+        if not self._multiword:
+            return
+        longest = max(len(words) for words in self._multiword)
+        index = 0
+        while index < len(tokens):
+            if tokens[index].kind != "word":
+                index += 1
+                continue
+            # Palabras seguidas separadas solo por espacios
+            words, end = [], index
+            while end < len(tokens) and len(words) < longest:
+                if tokens[end].kind != "word":
+                    break
+                words.append((tokens[end].text.lower(), end))
+                if end + 2 < len(tokens) and tokens[end + 1].kind == "space" and tokens[end + 2].kind == "word":
+                    end += 2
+                else:
+                    break
+            match = None
+            for size in range(len(words), 1, -1):
+                original = self._multiword.get(tuple(word for word, _ in words[:size]))
+                if original is not None:
+                    match = (size, original)
+                    break
+            if match is None:
+                index += 1
+                continue
+            size, original = match
+            last = words[size - 1][1]
+            tokens[index:last + 1] = [_Token("bracket", AccessUtils.escape_sql_identifier(original))]
+            _note(changes, "nombre con espacios → [nombre]")
+            index += 1
+
+    # Paginación por clave
+
+    def _keyset(self, items: List[_Item], paging: _Paging) -> Optional[_Keyset]:
+        """Versión ``WHERE clave > ?`` si se ordena por la columna única de una sola tabla."""
+        if self.unique_key is None:
+            return None
+        words = _top_level_words(items)
+        if any(word in words for word in ("GROUP", "HAVING", "UNION", "DISTINCT", "DISTINCTROW", "JOIN")):
+            return None
+        positions = _clause_positions(items)
+        if "FROM" not in positions or "ORDER" not in positions:
+            return None
+        end_of_from = min((index for name, index in positions.items()
+                           if name in ("WHERE", "ORDER") and index > positions["FROM"]), default=len(items))
+        source = [item for _, item in _words(items[positions["FROM"] + 1:end_of_from])]
+        if not source or not isinstance(source[0], _Token) or source[0].kind not in ("word", "bracket"):
+            return None
+        if len(source) > 3 or any(isinstance(item, _Token) and item.text == "," for item in source):
+            return None
+        table = source[0].text.strip("[]")
+        order = [item for _, item in _words(items[positions["ORDER"]:])][2:]
+        order = [item for item in order if not (isinstance(item, _Token) and item.text == ";")]
+        descending = bool(order) and _is_word(order[-1], "DESC")
+        if order and _is_word(order[-1], "ASC", "DESC"):
+            order = order[:-1]
+        if len(order) == 3 and isinstance(order[1], _Token) and order[1].text == ".":
+            order = order[2:]
+        if len(order) != 1 or not isinstance(order[0], _Token) or order[0].kind not in ("word", "bracket"):
+            return None
+        column = order[0].text.strip("[]")
+        key = self._unique_key(table)
+        if key is None or key.lower() != column.lower():
+            return None
+        # La clave tiene que estar en el resultado para recordarla
+        select_list = [item for _, item in _words(items[:positions["FROM"]])]
+        names = {item.text.strip("[]").lower() for item in select_list
+                 if isinstance(item, _Token) and item.kind in ("word", "bracket")}
+        if not any(isinstance(item, _Token) and item.text == "*" for item in select_list) and column.lower() not in names:
+            return None
+
+        keyed = list(items)
+        _, top_position = _select_head(keyed)
+        visible = _words(keyed)
+        keyed[visible[top_position + 1][0]] = _Token("number", str(paging.limit))
+        predicate = [_Token("bracket", AccessUtils.escape_sql_identifier(column)), _Token("space", " "),
+                     _Token("operator", "<" if descending else ">"), _Token("space", " "), _Token("symbol", "?")]
+        order_at = _clause_positions(keyed)["ORDER"]
+        if "WHERE" in positions:
+            where_at = _clause_positions(keyed)["WHERE"]
+            condition = _strip(keyed[where_at + 1:order_at])
+            keyed[where_at + 1:order_at] = ([_Token("space", " "), _Group(condition), _Token("space", " "),
+                                             _Token("word", "AND"), _Token("space", " ")]
+                                            + predicate + [_Token("space", " ")])
+        else:
+            keyed[order_at:order_at] = [_Token("word", "WHERE"), _Token("space", " ")] + predicate + [
+                _Token("space", " ")]
+        return _Keyset(column, descending, _render(keyed))
+
+    def _unique_key(self, table: str) -> Optional[str]:
+        key = table.lower()
+        with self._lock:
+            if key in self._keys:
+                return self._keys[key]
+        try:
+            column = self.unique_key(table)
+        except Exception as e:
+            logger.debug(f"Sin columna única para {table}: {e}")
+            column = None
+        with self._lock:
+            self._keys[key] = column
+        return column
+
+
+def _take_base(text: str) -> List[_Item]:
+    """Sentencia sin LIMIT/OFFSET (identifica las páginas de una misma consulta)."""
+    items = _parse(_tokenize(text))
+    _take_paging(items)
+    return items
+
+
+def _note(changes: List[str], change: str):
+    if change not in changes:
+        changes.append(change)
@@ -0,0 +1,261 @@
+"""
+Formatos de salida para los resultados de las consultas.
+
+Además de la tabla de texto pensada para personas, permite devolver los
+resultados en formatos legibles por máquina:
+
+- ``jsonl``: un objeto JSON por fila
+- ``csv``: CSV con cabecera
+- ``columnar``: JSON compacto con los nombres de columna una sola vez y un
+  array de valores por columna
+
+Los valores de Access se convierten sin perder información: fechas en ISO
+8601, moneda (Decimal) como texto exacto y binarios (OLE) resumidos como
+longitud + hash.
+Los formatos JSON no aplican ``max_cell_chars``: los textos se devuelven
+completos y el tamaño de la respuesta se limita por filas.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import math
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+OUTPUT_FORMATS = ["text", "jsonl", "csv", "columnar"]
+
+
+def binary_digest(value) -> Dict[str, Any]:
+    """Obtener longitud y hash de un valor binario."""
+    data = bytes(value)
+    return {"length": len(data), "sha1": hashlib.sha1(data).hexdigest()[:12]}
+
+
+def summarize_binary(value) -> str:
+    """Resumir un valor binario como texto (longitud + hash)."""
+    digest = binary_digest(value)
+    return f"<binario {digest['length']} bytes sha1:{digest['sha1']}>"
+
+
+def _iso(value) -> str:
+    return value.isoformat()
+
+
+def _float_json(value: float):
+    # NaN e infinito no son JSON válido
+    return value if math.isfinite(value) else None
+
+
+# Conversión a tipos JSON por tipo exacto (evita cadenas de isinstance)
+_JSON_CONVERTERS = {
+    datetime: _iso,
+    date: _iso,
+    time: _iso,
+    Decimal: str,
+    float: _float_json,
+    uuid.UUID: str,
+    bytes: lambda value: {"$binary": binary_digest(value)},
+    bytearray: lambda value: {"$binary": binary_digest(value)},
+    memoryview: lambda value: {"$binary": binary_digest(value)},
+}
+
+_JSON_PASSTHROUGH = (str, int, bool, type(None))
+
+# Conversión a texto (tabla y CSV)
+_TEXT_CONVERTERS = {
+    datetime: _iso,
+    date: _iso,
+    time: _iso,
+    bytes: summarize_binary,
+    bytearray: summarize_binary,
+    memoryview: summarize_binary,
+}
+
+
+def to_json_value(value: Any) -> Any:
+    """Convertir un valor de Access a un valor serializable en JSON."""
+    value_type = type(value)
+    if value_type in _JSON_PASSTHROUGH:
+        return value
+    converter = _JSON_CONVERTERS.get(value_type)
+    if converter is not None:
+        return converter(value)
+    if isinstance(value, BINARY_TYPES):
+        return {"$binary": binary_digest(value)}
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def to_text_value(value: Any) -> str:
+    """Convertir un valor de Access a texto."""
+    converter = _TEXT_CONVERTERS.get(type(value))
+    if converter is not None:
+        return converter(value)
+    return str(value)
+
+
+class ResultFormatter(ABC):
+    """Base de los formatos de salida.
+
+    El formateador codifica cada fila por separado para que quien lo usa
+    pueda comprobar el tamaño antes de aceptarla (``encode_row`` seguido de
+    ``accept_row``).
+    """
+
+    name = ""
+    machine_readable = True
+
+    def __init__(self, max_cell_chars: Optional[int] = None):
+        self.max_cell_chars = max_cell_chars
+        self.columns: List[str] = []
+        self.parts: List[str] = []
+
+    def truncate_text(self, text: str) -> str:
+        """Truncar un texto largo indicando cuántos caracteres se omiten."""
+        if self.max_cell_chars and len(text) > self.max_cell_chars:
+            omitted = len(text) - self.max_cell_chars
+            return f"{text[:self.max_cell_chars]}…(+{omitted} caracteres)"
+        return text
+
+    def begin(self, columns: Sequence[str]) -> str:
+        """Iniciar la salida; devuelve el texto de cabecera."""
+        self.columns = list(columns)
+        return ""
+
+    @abstractmethod
+    def encode_row(self, values: Sequence[Any]) -> str:
+        """Codificar una fila en el formato de salida."""
+
+    def accept_row(self, encoded: str):
+        self.parts.append(encoded)
+
+    def finish(self, header: str, rows: int, truncated: bool) -> str:
+        """Componer la salida final."""
+        return header + "".join(self.parts)
+
+
+class TextFormatter(ResultFormatter):
+    """Tabla de texto separada por " | " (formato original)."""
+
+    name = "text"
+    machine_readable = False
+
+    def format_value(self, value: Any) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, BINARY_TYPES):
+            return summarize_binary(value)
+        return self.truncate_text(to_text_value(value))
+
+    def begin(self, columns: Sequence[str]) -> str:
+        super().begin(columns)
+        header_line = " | ".join(self.columns)
+        return header_line + "\n" + "-" * len(header_line) + "\n"
+
+    def encode_row(self, values: Sequence[Any]) -> str:
+        return " | ".join(self.format_value(value) for value in values) + "\n"
+
+
+class JsonLinesFormatter(ResultFormatter):
+    """Un objeto JSON por línea."""
+
+    name = "jsonl"
+
+    def encode_row(self, values: Sequence[Any]) -> str:
+        # Sin truncar: un valor recortado no se distinguiría del real
+        record = {column: to_json_value(value) for column, value in zip(self.columns, values)}
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class CsvFormatter(ResultFormatter):
+    """CSV con cabecera; NULL se representa como celda vacía."""
+
+    name = "csv"
+
+    def __init__(self, max_cell_chars: Optional[int] = None):
+        super().__init__(max_cell_chars)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _write(self, values: Sequence[Any]) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+    def begin(self, columns: Sequence[str]) -> str:
+        super().begin(columns)
+        return self._write(self.columns)
+
+    def encode_row(self, values: Sequence[Any]) -> str:
+        return self._write([
+            "" if value is None else self.truncate_text(to_text_value(value))
+            for value in values
+        ])
+
+
+class ColumnarJsonFormatter(ResultFormatter):
+    """JSON compacto: nombres de columna una vez y un array de valores por columna."""
+
+    name = "columnar"
+
+    def __init__(self, max_cell_chars: Optional[int] = None):
+        super().__init__(max_cell_chars)
+        self._data: List[List[Any]] = []
+        self._last: List[Any] = []
+
+    def begin(self, columns: Sequence[str]) -> str:
+        super().begin(columns)
+        self._data = [[] for _ in self.columns]
+        return ""
+
+    def encode_row(self, values: Sequence[Any]) -> str:
+        # Sin truncar: un valor recortado no se distinguiría del real
+        converted = [to_json_value(value) for value in values]
+        self._last = converted
+        # El tamaño de la fila codificada aproxima lo que ocupará en la salida
+        return json.dumps(converted, ensure_ascii=False, separators=(",", ":"))
+
+    def accept_row(self, encoded: str):
+        for column_values, value in zip(self._data, self._last):
+            column_values.append(value)
+
+    def finish(self, header: str, rows: int, truncated: bool) -> str:
+        return json.dumps({
+            "columns": self.columns,
+            "data": self._data,
+            "row_count": rows,
+            "truncated": truncated
+        }, ensure_ascii=False, separators=(",", ":"))
+
+
+FORMATTERS = {
+    "text": TextFormatter,
+    "jsonl": JsonLinesFormatter,
+    "csv": CsvFormatter,
+    "columnar": ColumnarJsonFormatter,
+}
+
+
+def get_formatter(output_format: Optional[str], max_cell_chars: Optional[int] = None) -> ResultFormatter:
+    """
+    Crear el formateador para un formato de salida.
+
+    Raises:
+        ValueError: Si el formato no está soportado
+    """
+    formatter_class = FORMATTERS.get((output_format or "text").lower())
+    if formatter_class is None:
+        raise ValueError(
+            f"Formato de salida no soportado: {output_format}. "
+            f"Formatos disponibles: {', '.join(OUTPUT_FORMATS)}"
+        )
+    return formatter_class(max_cell_chars)
@@ -0,0 +1,182 @@
+"""
+Control del tamaño de las respuestas de las herramientas.
+
+Aplica un presupuesto de bytes por respuesta, trunca las celdas largas
+(MEMO), resume las columnas binarias (OLE) como longitud + hash y permite
+proyectar columnas. El presupuesto se aplica mientras se recorren las filas,
+de modo que nunca se materializa más de lo que cabe en la respuesta.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from .result_formats import ResultFormatter, TextFormatter, get_formatter, summarize_binary
+except ImportError:
+    from result_formats import ResultFormatter, TextFormatter, get_formatter, summarize_binary
+
+# Bytes reservados para la cabecera y el pie que se añaden al final
+HEADER_RESERVE_BYTES = 256
+
+
+class ResponseBudget:
+    """Presupuesto de bytes (UTF-8) para una respuesta."""
+
+    def __init__(self, max_bytes: Optional[int]):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.exhausted = False
+
+    def try_consume(self, text: str) -> bool:
+        """Reservar los bytes de ``text``; devuelve False si no caben."""
+        size = len(text.encode("utf-8"))
+        if self.max_bytes is not None and self.used + size > self.max_bytes:
+            self.exhausted = True
+            return False
+        self.used += size
+        return True
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.max_bytes is None:
+            return None
+        return max(0, self.max_bytes - self.used)
+
+
+@dataclass
+class ShapedResult:
+    """Resultado ya formateado y acotado."""
+    text: str
+    columns: List[str]
+    rows_rendered: int
+    truncated: bool
+    truncation_reason: Optional[str] = None
+    bytes_used: int = 0
+    output_format: str = "text"
+
+
+class ResultShaper:
+    """Formateador de resultados con límites de tamaño."""
+
+    def __init__(self, max_response_bytes: Optional[int] = 65536,
+                 max_cell_chars: Optional[int] = 255):
+        self.max_response_bytes = max_response_bytes
+        self.max_cell_chars = max_cell_chars
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ResultShaper":
+        """Crear un formateador a partir de la sección ``results`` de la configuración."""
+        results_config = config.get("results", {})
+        return cls(
+            max_response_bytes=results_config.get("max_response_bytes", 65536),
+            max_cell_chars=results_config.get("max_cell_chars", 255)
+        )
+
+    def with_overrides(self, max_response_bytes: Optional[int] = None,
+                       max_cell_chars: Optional[int] = None) -> "ResultShaper":
+        """Obtener una copia con límites específicos de una llamada."""
+        return ResultShaper(
+            max_response_bytes=max_response_bytes if max_response_bytes else self.max_response_bytes,
+            max_cell_chars=max_cell_chars if max_cell_chars else self.max_cell_chars
+        )
+
+    @staticmethod
+    def summarize_binary(value) -> str:
+        """Resumir un valor binario como longitud + hash."""
+        return summarize_binary(value)
+
+    def shape_value(self, value: Any) -> str:
+        """Convertir un valor de celda a texto respetando los límites."""
+        return TextFormatter(self.max_cell_chars).format_value(value)
+
+    def formatter_for(self, output_format: Optional[str]) -> ResultFormatter:
+        """Crear el formateador de un formato de salida con los límites actuales."""
+        return get_formatter(output_format, self.max_cell_chars)
+
+    @staticmethod
+    def project(columns: Sequence[str], requested: Optional[Sequence[str]]) -> List[int]:
+        """
+        Obtener los índices de las columnas solicitadas.
+
+        La comparación no distingue mayúsculas, igual que Access.
+
+        Raises:
+            ValueError: Si alguna columna solicitada no existe en el resultado
+        """
+        if not requested:
+            return list(range(len(columns)))
+
+        positions = {col.lower(): i for i, col in enumerate(columns)}
+        indexes = []
+        missing = []
+        for col in requested:
+            index = positions.get(col.lower())
+            if index is None:
+                missing.append(col)
+            else:
+                indexes.append(index)
+        if missing:
+            raise ValueError(f"Columnas no encontradas en el resultado: {', '.join(missing)}")
+        return indexes
+
+    def render(self, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+               formatter: Optional[ResultFormatter] = None,
+               project_columns: Optional[Sequence[str]] = None,
+               max_rows: Optional[int] = None) -> ShapedResult:
+        """
+        Formatear filas con el formateador indicado (tabla de texto por defecto).
+
+        Las filas se consumen de una en una y se detiene la lectura en cuanto
+        se alcanza ``max_rows`` o el presupuesto de bytes.
+        """
+        if formatter is None:
+            formatter = TextFormatter(self.max_cell_chars)
+
+        indexes = self.project(columns, project_columns)
+        headers = [columns[i] for i in indexes]
+
+        max_bytes = self.max_response_bytes
+        if max_bytes is not None:
+            max_bytes = max(0, max_bytes - HEADER_RESERVE_BYTES)
+        budget = ResponseBudget(max_bytes)
+
+        header = formatter.begin(headers)
+        budget.try_consume(header)
+
+        rendered = 0
+        reason = None
+        for row in rows:
+            if max_rows is not None and rendered >= max_rows:
+                reason = "rows"
+                break
+            encoded = formatter.encode_row([row[i] for i in indexes])
+            if not budget.try_consume(encoded):
+                reason = "bytes"
+                break
+            formatter.accept_row(encoded)
+            rendered += 1
+
+        return ShapedResult(
+            text=formatter.finish(header, rendered, reason is not None),
+            columns=headers,
+            rows_rendered=rendered,
+            truncated=reason is not None,
+            truncation_reason=reason,
+            bytes_used=budget.used,
+            output_format=formatter.name
+        )
+
+    def render_table(self, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                     project_columns: Optional[Sequence[str]] = None,
+                     max_rows: Optional[int] = None) -> ShapedResult:
+        """Formatear filas como tabla de texto separada por " | "."""
+        return self.render(columns, rows, project_columns=project_columns, max_rows=max_rows)
+
+    def truncation_notice(self, shaped: ShapedResult) -> str:
+        """Texto explicativo cuando la respuesta se ha recortado."""
+        if not shaped.truncated:
+            return ""
+        if shaped.truncation_reason == "bytes":
+            return (f"\n... resultado truncado: se alcanzó el límite de "
+                    f"{self.max_response_bytes} bytes por respuesta")
+        return f"\n... resultado truncado: se muestran solo {shaped.rows_rendered} registros"
@@ -0,0 +1,298 @@
+"""
+Sesiones con varias bases de datos Access abiertas a la vez.
+
+Cada sesión tiene un alias (por ejemplo ``"2023"``) y su propio gestor de
+base de datos con su propia conexión ODBC. ``fan_out`` ejecuta la misma
+consulta de lectura en varias sesiones en paralelo (un hilo por base de
+datos) y combina los resultados:
+
+- ``union``: concatena las filas añadiendo una columna con el alias de origen
+- ``aggregate``: vuelve a agregar resultados parciales (SUM, COUNT, MIN, MAX)
+  agrupando por las columnas indicadas
+
+Los fallos de una base de datos no abortan las demás: se informan junto con
+el tiempo empleado en cada una.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MERGE_MODES = ["union", "aggregate"]
+
+# Funciones de agregado que se pueden combinar a partir de resultados parciales
+AGGREGATE_FUNCTIONS = ["sum", "count", "min", "max"]
+
+SOURCE_COLUMN = "_database"
+
+
+@dataclass
+class Session:
+    """Base de datos abierta con un alias."""
+    alias: str
+    database_path: str
+    manager: Any
+    opened_at: float = field(default_factory=time.time)
+    # pyodbc no permite usar una conexión desde dos hilos a la vez
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+@dataclass
+class DatabaseResult:
+    """Resultado de la consulta en una base de datos."""
+    alias: str
+    database_path: str
+    columns: List[str] = field(default_factory=list)
+    rows: List[Tuple] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    truncated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FanOutResult:
+    """Resultado combinado de una consulta repartida."""
+    merge: str
+    columns: List[str]
+    rows: List[Tuple]
+    results: List[DatabaseResult]
+    elapsed_seconds: float = 0.0
+
+    @property
+    def failures(self) -> List[DatabaseResult]:
+        return [result for result in self.results if not result.ok]
+
+
+class SessionManager:
+    """Sesiones abiertas por alias."""
+
+    def __init__(self, manager_factory: Optional[Callable[[], Any]] = None, max_workers: int = 8):
+        """
+        Args:
+            manager_factory: Crea un gestor nuevo (por ejemplo ``AccessDatabaseManager``)
+            max_workers: Máximo de bases de datos consultadas a la vez
+        """
+        self.manager_factory = manager_factory
+        self.max_workers = max(1, max_workers)
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, alias: str) -> bool:
+        return alias in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(self, alias: str, database_path: str, password: Optional[str] = None) -> Session:
+        """Conectar una base de datos nueva con un alias."""
+        if self.manager_factory is None:
+            raise ValueError("No hay un gestor de base de datos configurado para abrir sesiones")
+        if alias in self._sessions:
+            raise ValueError(f"La sesión '{alias}' ya está abierta")
+
+        manager = self.manager_factory()
+        connected = manager.connect(database_path, password) if password else manager.connect(database_path)
+        if not connected:
+            raise ValueError(f"No se pudo conectar a {database_path}")
+        try:
+            return self.attach(alias, manager, database_path)
+        except ValueError:
+            manager.disconnect()
+            raise
+
+    def attach(self, alias: str, manager: Any, database_path: Optional[str] = None) -> Session:
+        """Registrar un gestor ya conectado."""
+        if not alias:
+            raise ValueError("El alias de la sesión no puede estar vacío")
+        session = Session(alias, database_path or getattr(manager, "database_path", "") or "", manager)
+        with self._lock:
+            if alias in self._sessions:
+                raise ValueError(f"La sesión '{alias}' ya está abierta")
+            self._sessions[alias] = session
+        logger.info(f"Sesión '{alias}' abierta: {session.database_path}")
+        return session
+
+    def get(self, alias: str) -> Session:
+        session = self._sessions.get(alias)
+        if session is None:
+            raise ValueError(f"No hay ninguna sesión abierta con el alias '{alias}'")
+        return session
+
+    def sessions(self) -> List[Session]:
+        """Sesiones en el orden en que se abrieron."""
+        return list(self._sessions.values())
+
+    def close(self, alias: str):
+        with self._lock:
+            session = self._sessions.pop(alias, None)
+        if session is None:
+            raise ValueError(f"No hay ninguna sesión abierta con el alias '{alias}'")
+        with session.lock:
+            session.manager.disconnect()
+        logger.info(f"Sesión '{alias}' cerrada")
+
+    def close_all(self):
+        for alias in list(self._sessions):
+            try:
+                self.close(alias)
+            except Exception as e:
+                logger.warning(f"Error cerrando la sesión '{alias}': {e}")
+
+    def _query_one(self, session: Session, query: str, params: Optional[List],
+                   max_rows: Optional[int]) -> DatabaseResult:
+        result = DatabaseResult(session.alias, session.database_path)
+        start = time.perf_counter()
+        try:
+            with session.lock:
+                with session.manager.open_query(query, params) as stream:
+                    result.columns = list(stream.columns)
+                    for batch in stream.iter_batches():
+                        if max_rows is not None and len(result.rows) + len(batch) > max_rows:
+                            result.rows.extend(tuple(row) for row in batch[:max_rows - len(result.rows)])
+                            result.truncated = True
+                            break
+                        result.rows.extend(tuple(row) for row in batch)
+        except Exception as e:
+            result.error = str(e)
+            logger.warning(f"Error en la sesión '{session.alias}': {e}")
+        result.elapsed_seconds = time.perf_counter() - start
+        return result
+
+    def fan_out(self, query: str, aliases: Optional[Sequence[str]] = None, params: Optional[List] = None,
+                merge: str = "union", group_by: Optional[Sequence[str]] = None,
+                aggregates: Optional[Dict[str, str]] = None,
+                max_rows_per_database: Optional[int] = None) -> FanOutResult:
+        """
+        Ejecutar la misma consulta en varias sesiones en paralelo.
+
+        Args:
+            query: Consulta SELECT
+            aliases: Sesiones a consultar (None = todas)
+            params: Parámetros de la consulta
+            merge: 'union' o 'aggregate'
+            group_by: Columnas de agrupación (modo 'aggregate')
+            aggregates: Columna -> función ('sum', 'count', 'min', 'max') (modo 'aggregate')
+            max_rows_per_database: Máximo de filas leídas de cada base de datos
+
+        Raises:
+            ValueError: si los argumentos no son válidos o no hay sesiones
+        """
+        if merge not in MERGE_MODES:
+            raise ValueError(f"Modo de combinación no soportado: {merge}. Use uno de: {', '.join(MERGE_MODES)}")
+        if merge == "aggregate":
+            _check_aggregates(aggregates)
+
+        sessions = [self.get(alias) for alias in aliases] if aliases else self.sessions()
+        if not sessions:
+            raise ValueError("No hay sesiones abiertas. Use open_session primero")
+
+        start = time.perf_counter()
+        workers = min(self.max_workers, len(sessions))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fan-out") as executor:
+            # Cada hilo hereda el contexto (ámbito de cancelación, métricas) en su propia copia
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._query_one,
+                                session, query, params, max_rows_per_database)
+                for session in sessions
+            ]
+            results = [future.result() for future in futures]
+
+        if merge == "union":
+            columns, rows = merge_union(results)
+        else:
+            columns, rows = merge_aggregate(results, group_by or [], aggregates)
+        return FanOutResult(merge, columns, rows, results, time.perf_counter() - start)
+
+
+def _check_aggregates(aggregates: Optional[Dict[str, str]]):
+    if not aggregates:
+        raise ValueError("El modo 'aggregate' requiere indicar 'aggregates' (columna -> función)")
+    for column, function in aggregates.items():
+        if str(function).lower() not in AGGREGATE_FUNCTIONS:
+            raise ValueError(
+                f"Función de agregado no soportada para '{column}': {function}. "
+                f"Use una de: {', '.join(AGGREGATE_FUNCTIONS)} (para medias, devuelva SUM y COUNT)"
+            )
+
+
+def _column_positions(columns: Sequence[str], wanted: Sequence[str]) -> List[int]:
+    lookup = {column.lower(): index for index, column in enumerate(columns)}
+    missing = [name for name in wanted if name.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Columnas no encontradas en el resultado: {', '.join(missing)}")
+    return [lookup[name.lower()] for name in wanted]
+
+
+def _reference_columns(results: Sequence[DatabaseResult]) -> Optional[List[str]]:
+    """Columnas del primer resultado correcto; los que no coinciden pasan a ser fallos."""
+    reference = None
+    for result in results:
+        if not result.ok:
+            continue
+        if reference is None:
+            reference = result.columns
+        elif [c.lower() for c in result.columns] != [c.lower() for c in reference]:
+            result.error = (f"Columnas distintas al resto: {', '.join(result.columns)} "
+                            f"(se esperaba {', '.join(reference)})")
+            result.rows = []
+    return reference
+
+
+def merge_union(results: Sequence[DatabaseResult]) -> Tuple[List[str], List[Tuple]]:
+    """Concatenar las filas añadiendo el alias de origen como primera columna."""
+    reference = _reference_columns(results)
+    if reference is None:
+        return [], []
+    rows = [(result.alias,) + row for result in results if result.ok for row in result.rows]
+    return [SOURCE_COLUMN] + list(reference), rows
+
+
+def _combine(function: str, current: Any, value: Any) -> Any:
+    if value is None:
+        return current
+    if current is None:
+        return value
+    if function in ("sum", "count"):
+        return current + value
+    if function == "min":
+        return min(current, value)
+    return max(current, value)
+
+
+def merge_aggregate(results: Sequence[DatabaseResult], group_by: Sequence[str],
+                    aggregates: Dict[str, str]) -> Tuple[List[str], List[Tuple]]:
+    """Volver a agregar resultados parciales agrupando por ``group_by``."""
+    _check_aggregates(aggregates)
+    reference = _reference_columns(results)
+    if reference is None:
+        return [], []
+
+    group_positions = _column_positions(reference, group_by)
+    aggregate_names = list(aggregates)
+    aggregate_positions = _column_positions(reference, aggregate_names)
+    functions = [str(aggregates[name]).lower() for name in aggregate_names]
+
+    groups: Dict[Tuple, List[Any]] = {}
+    for result in results:
+        if not result.ok:
+            continue
+        for row in result.rows:
+            key = tuple(row[position] for position in group_positions)
+            values = groups.get(key)
+            if values is None:
+                values = groups[key] = [None] * len(aggregate_positions)
+            for index, position in enumerate(aggregate_positions):
+                values[index] = _combine(functions[index], values[index], row[position])
+
+    columns = [reference[position] for position in group_positions + aggregate_positions]
+    return columns, [key + tuple(values) for key, values in groups.items()]
@@ -0,0 +1,230 @@
+"""
+Registro de consultas lentas.
+
+Las consultas cuya duración supera un umbral se escriben como JSON Lines
+en un fichero con rotación por tamaño. Cada entrada guarda la sentencia
+original y normalizada (literales sustituidos por ``?``), los parámetros
+(redactados por defecto), los tiempos de ejecución y de lectura, las filas,
+la herramienta que la lanzó y, si falló o se canceló, el error.
+``SlowQueryLog.top`` agrega el registro por sentencia normalizada.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ["total_ms", "max_ms", "mean_ms", "count"]
+
+# Longitud máxima de la sentencia original guardada en cada entrada
+MAX_SQL_CHARS = 4000
+
+# Identificadores entre corchetes (se conservan), cadenas, fechas #...# y números
+_SQL_TOKEN = re.compile(
+    r"(?P<identifier>\[[^\]]*\])"
+    r"|(?P<literal>'(?:[^']|'')*'|#[^#\n]*#|(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b)"
+)
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Normalizar una sentencia para agrupar las que solo difieren en literales.
+
+    Sustituye cadenas, fechas ``#...#`` y números por ``?``, reduce las
+    listas ``(?, ?, ...)`` a ``(?...)`` y compacta los espacios.
+    """
+    normalized = _SQL_TOKEN.sub(lambda m: m.group("identifier") or "?", query)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return _PLACEHOLDER_LIST.sub("(?...)", normalized)
+
+
+def redact_parameter(value: Any) -> str:
+    """Describir un parámetro sin revelar su valor (tipo y longitud)."""
+    if value is None:
+        return "NULL"
+    type_name = type(value).__name__
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return f"<{type_name}:{len(value)}>"
+    return f"<{type_name}>"
+
+
+class SlowQueryLog:
+    """Fichero JSONL con rotación para consultas que superan un umbral."""
+
+    def __init__(self, path: str, threshold_ms: float = 1000, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 3, redact_parameters: bool = True, enabled: bool = True):
+        """
+        Inicializar el registro.
+
+        Args:
+            path: Ruta del fichero JSONL
+            threshold_ms: Duración total (ejecución + lectura) a partir de la cual se registra
+            max_bytes: Tamaño a partir del cual se rota el fichero
+            backup_count: Número de ficheros rotados que se conservan (``.1``, ``.2``...)
+            redact_parameters: Guardar solo el tipo y la longitud de los parámetros
+            enabled: Activar o desactivar el registro
+        """
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.redact_parameters = redact_parameters
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SlowQueryLog":
+        """Crear el registro a partir de la sección ``slow_query_log`` de CONFIG."""
+        section = config.get("slow_query_log", {})
+        path = section.get("path") or os.path.join(os.path.expanduser("~"), ".mcp-access", "slow_queries.jsonl")
+        return cls(
+            path,
+            threshold_ms=section.get("threshold_ms", 1000),
+            max_bytes=section.get("max_bytes", 5 * 1024 * 1024),
+            backup_count=section.get("backup_count", 3),
+            redact_parameters=section.get("redact_parameters", True),
+            enabled=section.get("enabled", True),
+        )
+
+    def record(self, query: str, params: Optional[Sequence[Any]], execute_seconds: float,
+               fetch_seconds: float = 0.0, rows: int = 0, tool: Optional[str] = None,
+               error: Optional[str] = None) -> bool:
+        """
+        Registrar una consulta si supera el umbral.
+
+        ``error`` se indica para las sentencias que fallaron, agotaron su
+        tiempo o se cancelaron (suelen ser las más lentas).
+
+        Returns:
+            True si se escribió una entrada
+        """
+        duration_ms = (execute_seconds + fetch_seconds) * 1000.0
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return False
+
+        if params:
+            parameters = [redact_parameter(p) if self.redact_parameters else _json_safe(p) for p in params]
+        else:
+            parameters = []
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "tool": tool,
+            "normalized_sql": normalize_sql(query),
+            "sql": query[:MAX_SQL_CHARS],
+            "parameters": parameters,
+            "duration_ms": round(duration_ms, 3),
+            "execute_ms": round(execute_seconds * 1000.0, 3),
+            "fetch_ms": round(fetch_seconds * 1000.0, 3),
+            "rows": rows,
+        }
+        if error is not None:
+            entry["error"] = error[:MAX_SQL_CHARS]
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._rotate_if_needed(len(line.encode("utf-8")))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.warning(f"No se pudo escribir en el registro de consultas lentas: {e}")
+            return False
+        return True
+
+    def _rotate_if_needed(self, incoming_bytes: int):
+        """Rotar el fichero si la nueva entrada supera ``max_bytes``."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size + incoming_bytes <= self.max_bytes:
+            return
+
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Iterar las entradas, de los ficheros rotados más antiguos al actual."""
+        paths = [f"{self.path}.{index}" for index in range(self.backup_count, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.debug(f"Línea no válida en {path}")
+
+    def top(self, limit: int = 10, sort_by: str = "total_ms", tool: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Agregar el registro por sentencia normalizada.
+
+        Args:
+            limit: Número de sentencias a devolver
+            sort_by: 'total_ms', 'max_ms', 'mean_ms' o 'count'
+            tool: Limitar a las consultas lanzadas por una herramienta
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Orden no soportado: {sort_by}. Opciones: {', '.join(SORT_KEYS)}")
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for entry in self.iter_entries():
+            if tool and entry.get("tool") != tool:
+                continue
+            key = entry.get("normalized_sql", "")
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "normalized_sql": key, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "execute_ms": 0.0, "fetch_ms": 0.0, "rows": 0, "errors": 0, "tools": set(),
+                    "last_seen": None, "example_sql": entry.get("sql"),
+                }
+            duration = entry.get("duration_ms", 0.0)
+            group["count"] += 1
+            group["total_ms"] += duration
+            group["execute_ms"] += entry.get("execute_ms", 0.0)
+            group["fetch_ms"] += entry.get("fetch_ms", 0.0)
+            group["rows"] += entry.get("rows", 0)
+            if entry.get("error"):
+                group["errors"] += 1
+            if duration >= group["max_ms"]:
+                group["max_ms"] = duration
+                group["example_sql"] = entry.get("sql")
+            if entry.get("tool"):
+                group["tools"].add(entry["tool"])
+            group["last_seen"] = entry.get("timestamp")
+
+        results = []
+        for group in groups.values():
+            group["mean_ms"] = group["total_ms"] / group["count"]
+            group["tools"] = sorted(group["tools"])
+            results.append(group)
+        results.sort(key=lambda group: group[sort_by], reverse=True)
+        return results[:limit]
+
+
+def _json_safe(value: Any) -> Any:
+    """Convertir un parámetro a un valor serializable en JSON."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return redact_parameter(value)
+    return str(value)
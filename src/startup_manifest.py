@@ -0,0 +1,167 @@
+"""
+Respuesta rápida al saludo inicial por stdio.
+
+El cliente MCP lanza un proceso nuevo por sesión y lo primero que pide es
+``initialize`` y ``tools/list``. Importar el SDK de MCP (pydantic, httpx,
+starlette...) tarda casi medio segundo, más que todo lo demás del
+servidor. Al arrancar con un manifiesto válido, ``serve_handshake``
+responde a esos mensajes con lo que el servidor devolvió la vez anterior
+sin importar nada pesado, y entre tanto el SDK se importa en segundo
+plano.
+
+Los mensajes leídos se devuelven en ``Handshake`` para que el servidor
+real los procese después como si acabaran de llegar: ``initialize`` se
+repite (y su segunda respuesta se descarta) para que la sesión quede
+inicializada. El manifiesto se identifica por las versiones de Python,
+del SDK y de los módulos del servidor; si alguno cambia se ignora y el
+servidor lo vuelve a escribir.
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+try:
+    from .config import CONFIG
+except ImportError:
+    from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class Handshake:
+    """Mensajes ya leídos de stdin en el saludo inicial."""
+    lines: List[bytes] = field(default_factory=list)
+    # Id de la petición initialize ya respondida (su respuesta repetida se descarta)
+    initialize_id: Any = None
+
+
+def manifest_path() -> Optional[str]:
+    """Fichero del manifiesto (None si el arranque rápido está desactivado)."""
+    settings = CONFIG["server"]
+    if not settings["fast_startup"]:
+        return None
+    return settings["startup_manifest"] or os.path.join(os.path.expanduser("~"), ".mcp-access",
+                                                        "startup-manifest.json")
+
+
+def manifest_key() -> str:
+    """Huella de lo que determina las respuestas: Python, el SDK y los módulos del servidor."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(sys.version.encode("utf-8"))
+    sources = []
+    spec = importlib.util.find_spec("mcp")
+    if spec is not None and spec.origin:
+        sources.append(spec.origin)
+    with os.scandir(os.path.dirname(os.path.abspath(__file__))) as entries:
+        sources.extend(sorted(entry.path for entry in entries if entry.name.endswith(".py")))
+    for path in sources:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(path: str, key: str) -> Optional[Dict[str, Any]]:
+    """Manifiesto guardado si corresponde a ``key``."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION or manifest.get("key") != key:
+        return None
+    return manifest
+
+
+def save_manifest(path: str, key: str, initialize: Dict[str, Any], tools: Dict[str, Any],
+                  protocol_versions: List[str]):
+    """Guardar las respuestas de initialize y tools/list para el siguiente arranque."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "key": key,
+        "protocol_versions": list(protocol_versions),
+        "initialize": initialize,
+        "tools": tools,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def serve_handshake(manifest: Dict[str, Any], stdin: BinaryIO, stdout: BinaryIO,
+                    warm_up: Optional[Callable[[], None]] = None) -> Handshake:
+    """
+    Responder a ``initialize``, ``ping`` y ``tools/list`` desde el manifiesto.
+
+    Vuelve con el primer mensaje que no sabe responder (o al cerrarse
+    stdin); ``warm_up`` se lanza en un hilo tras la primera respuesta de
+    ``tools/list``, mientras el cliente prepara su primera llamada.
+    """
+    handshake = Handshake()
+
+    def reply(request_id, result):
+        stdout.write(json.dumps({"jsonrpc": "2.0", "id": request_id, "result": result},
+                                ensure_ascii=False).encode("utf-8") + b"\n")
+        stdout.flush()
+
+    warming = False
+    while True:
+        line = stdin.readline()
+        if not line:
+            return handshake
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = None
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+            handshake.lines.append(line)
+            return handshake
+        method, request_id = message.get("method"), message.get("id")
+        params = message.get("params") or {}
+        if (method == "initialize" and request_id is not None and handshake.initialize_id is None
+                and isinstance(params.get("protocolVersion"), str) and isinstance(params.get("clientInfo"), dict)):
+            result = dict(manifest["initialize"])
+            if params["protocolVersion"] in manifest["protocol_versions"]:
+                result["protocolVersion"] = params["protocolVersion"]
+            reply(request_id, result)
+            handshake.initialize_id = request_id
+            handshake.lines.append(line)
+        elif method == "notifications/initialized" and handshake.initialize_id is not None:
+            handshake.lines.append(line)
+        elif method == "ping" and request_id is not None:
+            reply(request_id, {})
+        elif (method == "tools/list" and request_id is not None and handshake.initialize_id is not None
+              and not params.get("cursor")):
+            reply(request_id, manifest["tools"])
+            if warm_up is not None and not warming:
+                warming = True
+                threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+        else:
+            handshake.lines.append(line)
+            return handshake
+
+
+def serve_startup_handshake(warm_up: Optional[Callable[[], None]] = None) -> Optional[Handshake]:
+    """Saludo inicial por la entrada y salida estándar (None sin manifiesto válido)."""
+    path = manifest_path()
+    if path is None:
+        return None
+    try:
+        manifest = load_manifest(path, manifest_key())
+    except OSError as e:
+        logger.debug(f"Sin arranque rápido: {e}")
+        return None
+    if manifest is None:
+        return None
+    return serve_handshake(manifest, sys.stdin.buffer, sys.stdout.buffer, warm_up)
@@ -0,0 +1,122 @@
+"""
+Lectura por lotes de resultados de consultas.
+
+Envuelve un cursor DB-API (pyodbc, sqlite3...) y entrega las filas usando
+``fetchmany`` para no materializar el resultado completo en memoria.
+"""
+
+import time
+from contextlib import nullcontext
+from itertools import islice
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+try:
+    from .query_control import QueryCancelledError
+except ImportError:
+    from query_control import QueryCancelledError
+
+
+class QueryStream:
+    """Iterador por lotes sobre un cursor ya ejecutado."""
+
+    def __init__(self, cursor, batch_size: int = 500, on_close: Optional[Callable[["QueryStream"], None]] = None,
+                 lock=None):
+        """
+        Inicializar el flujo de resultados.
+
+        Args:
+            cursor: Cursor DB-API sobre el que ya se ejecutó la consulta
+            batch_size: Número de filas a pedir en cada ``fetchmany``
+            on_close: Función opcional a la que se llama al cerrar el flujo
+            lock: Cerrojo opcional de la conexión, que se toma en cada
+                ``fetchmany`` y al cerrar (conexiones compartidas entre hilos)
+        """
+        self.cursor = cursor
+        self.batch_size = max(1, int(batch_size))
+        self.columns: List[str] = [desc[0] for desc in (cursor.description or [])]
+        self.rows_fetched = 0
+        self.fetch_seconds = 0.0
+        self.closed = False
+        self.cancelled = False
+        self.on_close = on_close
+        self._lock = lock if lock is not None else nullcontext()
+
+    def iter_batches(self) -> Iterator[List[Sequence[Any]]]:
+        """Iterar sobre los lotes de filas devueltos por el cursor."""
+        while not self.closed:
+            if self.cancelled:
+                raise QueryCancelledError("La lectura de resultados fue cancelada")
+            start = time.perf_counter()
+            with self._lock:
+                batch = self.cursor.fetchmany(self.batch_size)
+            self.fetch_seconds += time.perf_counter() - start
+            if not batch:
+                break
+            self.rows_fetched += len(batch)
+            yield batch
+
+    def __iter__(self) -> Iterator[Sequence[Any]]:
+        for batch in self.iter_batches():
+            for row in batch:
+                yield row
+
+    def cancel(self):
+        """Abortar la sentencia en curso; puede llamarse desde otro hilo."""
+        self.cancelled = True
+        self.cursor.cancel()
+
+    def close(self):
+        """Cerrar el cursor subyacente (se ignoran los errores al cerrar)."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            with self._lock:
+                self.cursor.close()
+        except Exception:
+            pass
+        if self.on_close is not None:
+            self.on_close(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class IterableStream:
+    """Adaptador con la interfaz de QueryStream sobre filas ya disponibles en Python."""
+
+    def __init__(self, columns: List[str], rows, batch_size: int = 500):
+        self.columns = list(columns)
+        self.batch_size = max(1, int(batch_size))
+        self.rows_fetched = 0
+        self._rows = iter(rows)
+
+    def iter_batches(self) -> Iterator[List[Sequence[Any]]]:
+        while True:
+            batch = list(islice(self._rows, self.batch_size))
+            if not batch:
+                break
+            self.rows_fetched += len(batch)
+            yield batch
+
+    def __iter__(self) -> Iterator[Sequence[Any]]:
+        for batch in self.iter_batches():
+            for row in batch:
+                yield row
+
+    def close(self):
+        """Cerrar el generador de filas (libera los cursores que tenga abiertos)."""
+        close = getattr(self._rows, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,171 @@
+"""
+Registro declarativo de herramientas MCP.
+
+Cada herramienta se declara una sola vez con su esquema, su manejador y sus
+metadatos (tiempo máximo, concurrencia). Los esquemas se comprueban al
+registrarlos y los objetos ``Tool`` se construyen una única vez, de modo que
+``list_tools`` devuelve siempre la misma lista y la llamada a una
+herramienta es una búsqueda en un diccionario.
+
+La validación completa contra el metaesquema (jsonschema) se hace al
+construir la lista de herramientas por primera vez y no al importar el
+servidor, porque importar jsonschema retrasa el arranque.
+"""
+
+import asyncio
+import importlib.util
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from mcp.types import Tool
+
+# jsonschema solo se importa la primera vez que se valida un esquema completo
+JSONSCHEMA_AVAILABLE = importlib.util.find_spec("jsonschema") is not None
+jsonschema = None
+
+# Tipos de JSON Schema (comprobación rápida al registrar, sin jsonschema)
+SCHEMA_TYPES = {"array", "boolean", "integer", "null", "number", "object", "string"}
+
+logger = logging.getLogger(__name__)
+
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[List[Any]]]
+
+
+class ToolRegistrationError(ValueError):
+    """Declaración de herramienta no válida."""
+
+
+@dataclass
+class ToolSpec:
+    """Declaración de una herramienta."""
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: ToolHandler
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_tool(self) -> Tool:
+        return Tool(name=self.name, description=self.description, inputSchema=self.input_schema)
+
+
+def validate_schema(name: str, schema: Dict[str, Any]):
+    """Comprobar que el esquema de entrada de una herramienta es coherente."""
+    if schema.get("type") != "object":
+        raise ToolRegistrationError(f"El esquema de '{name}' debe ser de tipo 'object'")
+
+    properties = schema.get("properties", {})
+    if not isinstance(properties, dict):
+        raise ToolRegistrationError(f"'properties' de '{name}' debe ser un objeto")
+    missing = [prop for prop in schema.get("required", []) if prop not in properties]
+    if missing:
+        raise ToolRegistrationError(f"'{name}' requiere propiedades no declaradas: {', '.join(missing)}")
+    for prop_name, prop_schema in properties.items():
+        if "type" not in prop_schema and "enum" not in prop_schema:
+            raise ToolRegistrationError(f"La propiedad '{prop_name}' de '{name}' no declara 'type'")
+        prop_types = prop_schema.get("type", [])
+        unknown = [t for t in ([prop_types] if isinstance(prop_types, str) else prop_types) if t not in SCHEMA_TYPES]
+        if unknown:
+            raise ToolRegistrationError(f"La propiedad '{prop_name}' de '{name}' tiene un tipo desconocido: "
+                                        f"{', '.join(map(str, unknown))}")
+
+
+def _load_jsonschema():
+    """Importar jsonschema la primera vez que se necesita."""
+    global jsonschema
+    if jsonschema is None:
+        import jsonschema
+    return jsonschema
+
+
+def check_schema(name: str, schema: Dict[str, Any]):
+    """Validar el esquema contra el metaesquema de JSON Schema (si jsonschema está instalado)."""
+    if not JSONSCHEMA_AVAILABLE:
+        return
+    _load_jsonschema()
+    try:
+        jsonschema.Draft7Validator.check_schema(schema)
+    except jsonschema.exceptions.SchemaError as e:
+        raise ToolRegistrationError(f"Esquema no válido para '{name}': {e.message}")
+
+
+class ToolRegistry:
+    """Herramientas registradas, en el orden en que se declaran."""
+
+    def __init__(self, default_timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            default_timeouts: Tiempos máximos por nombre de herramienta (por ejemplo
+                ``CONFIG["database"]["tool_timeouts"]``) para las que no lo declaran
+        """
+        self.default_timeouts = default_timeouts or {}
+        self._specs: Dict[str, ToolSpec] = {}
+        self._tools: Optional[List[Tool]] = None
+        # Herramientas cuyo esquema ya pasó la validación completa
+        self._checked: Set[str] = set()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        """Registrar una herramienta validando su esquema."""
+        if spec.name in self._specs:
+            raise ToolRegistrationError(f"Herramienta duplicada: {spec.name}")
+        if spec.max_concurrency is not None and spec.max_concurrency < 1:
+            raise ToolRegistrationError(f"max_concurrency de '{spec.name}' debe ser >= 1")
+        validate_schema(spec.name, spec.input_schema)
+        if spec.timeout is None:
+            spec.timeout = self.default_timeouts.get(spec.name)
+        self._specs[spec.name] = spec
+        self._tools = None
+        return spec
+
+    def tool(self, name: str, description: str, input_schema: Dict[str, Any],
+             timeout: Optional[float] = None, max_concurrency: Optional[int] = None, **metadata):
+        """Decorador para registrar un manejador ``async def handler(arguments)``."""
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            self.register(ToolSpec(name, description, input_schema, handler,
+                                   timeout=timeout, max_concurrency=max_concurrency, metadata=metadata))
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._specs.get(name)
+
+    def list_tools(self) -> List[Tool]:
+        """Lista de ``Tool`` (se construye una sola vez, tras validar los esquemas nuevos)."""
+        if self._tools is None:
+            for spec in self._specs.values():
+                if spec.name not in self._checked:
+                    check_schema(spec.name, spec.input_schema)
+                    self._checked.add(spec.name)
+            self._tools = [spec.to_tool() for spec in self._specs.values()]
+        return self._tools
+
+    def _semaphore(self, spec: ToolSpec) -> Optional[asyncio.Semaphore]:
+        if spec.max_concurrency is None:
+            return None
+        semaphore = self._semaphores.get(spec.name)
+        if semaphore is None:
+            semaphore = self._semaphores[spec.name] = asyncio.Semaphore(spec.max_concurrency)
+        return semaphore
+
+    async def dispatch(self, name: str, arguments: Dict[str, Any]) -> List[Any]:
+        """
+        Ejecutar una herramienta respetando su límite de concurrencia.
+
+        Raises:
+            KeyError: si la herramienta no existe
+        """
+        spec = self._specs[name]
+        semaphore = self._semaphore(spec)
+        if semaphore is None:
+            return await spec.handler(arguments)
+        async with semaphore:
+            return await spec.handler(arguments)
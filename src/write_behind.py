@@ -0,0 +1,411 @@
+"""
+Escritura diferida (write-behind) de inserciones pequeñas y frecuentes.
+
+Un agente que inserta varias filas por segundo con ``insert_record`` paga
+en cada llamada un cursor, una sentencia y un commit. ``WriteBehindBuffer``
+guarda las inserciones en memoria y las escribe juntas, con un
+``executemany`` por tabla y grupo de columnas, cuando se acumulan
+``max_rows`` filas o la más antigua lleva ``max_delay_seconds`` esperando.
+
+- cada inserción devuelve un identificador (``wb-<n>``) con el que se puede
+  consultar después si ya se escribió o si falló
+- antes de confirmar la inserción al llamador se anota en un diario local
+  (JSON Lines); al arrancar, lo que quedó sin escribir se vuelve a encolar.
+  Si el proceso cae justo después de escribir un lote pero antes de
+  anotarlo, ese lote se repite (entrega al menos una vez)
+- si un lote falla por un error de datos se repite fila a fila y solo se
+  descartan las filas erróneas; si falla por un bloqueo o una cancelación
+  las filas siguen pendientes para el siguiente intento
+
+Las lecturas no ven las filas pendientes hasta que se escriben.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .metrics import REGISTRY, MetricsRegistry
+except ImportError:
+    from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PREFIX = "wb-"
+_MAX_FAILED_TOKENS = 10000
+# Entradas escritas en el diario a partir de las cuales se compacta
+_COMPACT_AFTER = 10000
+
+
+def format_token(number: int) -> str:
+    return f"{TOKEN_PREFIX}{number}"
+
+
+def parse_token(token: Any) -> int:
+    text = str(token)
+    if text.startswith(TOKEN_PREFIX):
+        text = text[len(TOKEN_PREFIX):]
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Identificador de escritura no válido: {token}")
+
+
+@dataclass
+class _PendingInsert:
+    token: int
+    table_name: str
+    columns: Tuple[str, ...]
+    values: List[Any]
+    queued_at: float
+
+
+@dataclass
+class FlushResult:
+    """Resultado de escribir las inserciones pendientes."""
+    rows: int = 0
+    statements: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    retry_error: Optional[str] = None
+    remaining: int = 0
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "statements": self.statements,
+            "failed": [{"token": token, "error": error} for token, error in self.failed],
+            "retry_error": self.retry_error,
+            "remaining": self.remaining,
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
+
+
+class _Journal:
+    """Diario JSON Lines de inserciones pendientes y lotes ya escritos."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.entries = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.handle = None
+
+    def load(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Inserciones anotadas y no marcadas como escritas, y el siguiente identificador."""
+        if not os.path.exists(self.path):
+            return [], 1
+        pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        next_token = 1
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea a medio escribir al caer el proceso
+                    continue
+                if "next_token" in entry:
+                    next_token = max(next_token, entry["next_token"])
+                elif "done" in entry:
+                    for token in entry["done"]:
+                        pending.pop(token, None)
+                elif "token" in entry:
+                    pending[entry["token"]] = entry
+                    next_token = max(next_token, entry["token"] + 1)
+        return list(pending.values()), next_token
+
+    def _append(self, entry: Dict[str, Any]):
+        if self.handle is None:
+            self.handle = open(self.path, "a", encoding="utf-8")
+        self.handle.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self.handle.flush()
+        if self.fsync:
+            os.fsync(self.handle.fileno())
+        self.entries += 1
+
+    def record(self, insert: _PendingInsert):
+        self._append({"token": insert.token, "table": insert.table_name,
+                      "data": dict(zip(insert.columns, insert.values))})
+
+    def mark_done(self, tokens: Sequence[int]):
+        if tokens:
+            self._append({"done": list(tokens)})
+
+    def rewrite(self, pending: List[_PendingInsert], next_token: int):
+        """Reescribir el diario solo con lo pendiente (y el contador, para no repetir identificadores)."""
+        self.close()
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps({"next_token": next_token}) + "\n")
+            for insert in pending:
+                handle.write(json.dumps({"token": insert.token, "table": insert.table_name,
+                                         "data": dict(zip(insert.columns, insert.values))},
+                                        ensure_ascii=False, default=str) + "\n")
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        self.entries = len(pending)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+
+class WriteBehindBuffer:
+    """Inserciones en memoria que se escriben por lotes en segundo plano."""
+
+    def __init__(self, execute_many: Callable[[str, List[List[Any]]], Any],
+                 journal_path: Optional[str] = None, max_rows: int = 500, max_delay_seconds: float = 2.0,
+                 fsync: bool = False, is_retryable: Optional[Callable[[Exception], bool]] = None,
+                 name: str = "write_behind", registry: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            execute_many: Ejecuta ``(sentencia, filas)`` en una transacción
+            journal_path: Diario local de lo pendiente (None = solo en memoria)
+            max_rows: Filas pendientes de una tabla que provocan la escritura
+            max_delay_seconds: Espera máxima de una fila antes de escribirse
+            fsync: Forzar el diario a disco en cada inserción (más lento, resiste cortes de luz)
+            is_retryable: Errores que dejan las filas pendientes en lugar de descartarlas
+        """
+        self.execute_many = execute_many
+        self.max_rows = max(1, max_rows)
+        self.max_delay_seconds = max(0.0, max_delay_seconds)
+        self.is_retryable = is_retryable
+        self.name = name
+        self.registry = registry or REGISTRY
+        self.journal = _Journal(journal_path, fsync) if journal_path else None
+
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: "OrderedDict[int, _PendingInsert]" = OrderedDict()
+        self._failed: "OrderedDict[int, str]" = OrderedDict()
+        self._next_token = 1
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_error: Optional[str] = None
+
+    # Arranque y recuperación
+
+    def start(self) -> int:
+        """Recuperar lo pendiente del diario y arrancar el hilo de escritura; devuelve las filas recuperadas."""
+        recovered = 0
+        if self.journal is not None:
+            entries, self._next_token = self.journal.load()
+            with self._condition:
+                for entry in entries:
+                    data = entry.get("data") or {}
+                    insert = _PendingInsert(entry["token"], entry["table"], tuple(data), list(data.values()),
+                                            time.monotonic())
+                    self._pending[insert.token] = insert
+                    self._next_token = max(self._next_token, insert.token + 1)
+                recovered = len(entries)
+            # El diario se reescribe solo con lo recuperado
+            self.journal.rewrite(list(self._pending.values()), self._next_token)
+            if recovered:
+                logger.info(f"Recuperadas {recovered} inserciones pendientes del diario {self.journal.path}")
+        self._publish()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+        self._thread.start()
+        return recovered
+
+    # Inserciones
+
+    def enqueue(self, table_name: str, data: Dict[str, Any]) -> str:
+        """Encolar una inserción; vuelve cuando está anotada en el diario."""
+        if not data:
+            raise ValueError("No hay datos que insertar")
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("La escritura diferida está cerrada")
+            insert = _PendingInsert(self._next_token, table_name, tuple(data), list(data.values()), time.monotonic())
+            self._next_token += 1
+            if self.journal is not None:
+                self.journal.record(insert)
+            self._pending[insert.token] = insert
+            self._publish()
+            # El hilo de escritura despierta con la primera fila (para fijar la espera) o al llenarse la tabla
+            if len(self._pending) == 1 or self._table_rows(table_name) >= self.max_rows:
+                self._condition.notify_all()
+            return format_token(insert.token)
+
+    def _table_rows(self, table_name: str) -> int:
+        return sum(1 for insert in self._pending.values() if insert.table_name == table_name)
+
+    def token_status(self, token: Any) -> str:
+        """'pending', 'flushed', 'failed: <error>' o 'unknown'."""
+        number = parse_token(token)
+        with self._condition:
+            if number in self._pending:
+                return "pending"
+            if number in self._failed:
+                return f"failed: {self._failed[number]}"
+            if 0 < number < self._next_token:
+                return "flushed"
+            return "unknown"
+
+    @property
+    def pending_rows(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    # Escritura
+
+    def flush(self, table_name: Optional[str] = None) -> FlushResult:
+        """Escribir ahora lo pendiente (de una tabla o de todas)."""
+        return self._flush(lambda insert: table_name is None or insert.table_name.lower() == table_name.lower())
+
+    def _flush(self, select: Callable[[_PendingInsert], bool]) -> FlushResult:
+        start = time.perf_counter()
+        result = FlushResult()
+        with self._flush_lock:
+            with self._condition:
+                selected = [insert for insert in self._pending.values() if select(insert)]
+            groups: "OrderedDict[Tuple[str, Tuple[str, ...]], List[_PendingInsert]]" = OrderedDict()
+            for insert in selected:
+                groups.setdefault((insert.table_name, insert.columns), []).append(insert)
+
+            for (table_name, columns), inserts in groups.items():
+                if result.retry_error is not None:
+                    break
+                query = (f"INSERT INTO [{table_name}] ({', '.join(f'[{column}]' for column in columns)}) "
+                         f"VALUES ({', '.join('?' for _ in columns)})")
+                written, failed = self._write_group(query, inserts, result)
+                self._finish(written, failed)
+                result.rows += len(written)
+            self.flushes += 1
+        result.remaining = self.pending_rows
+        result.elapsed_seconds = time.perf_counter() - start
+        return result
+
+    def _write_group(self, query: str, inserts: List[_PendingInsert],
+                     result: FlushResult) -> Tuple[List[_PendingInsert], List[Tuple[_PendingInsert, str]]]:
+        try:
+            self.execute_many(query, [insert.values for insert in inserts])
+            result.statements += 1
+            return inserts, []
+        except Exception as e:
+            if self._retryable(e):
+                result.retry_error = self.last_error = str(e)
+                logger.info(f"Escritura diferida aplazada: {e}")
+                return [], []
+            logger.info(f"Lote diferido rechazado ({e}); se repite fila a fila")
+
+        written, failed = [], []
+        for insert in inserts:
+            try:
+                self.execute_many(query, [insert.values])
+                result.statements += 1
+                written.append(insert)
+            except Exception as e:
+                if self._retryable(e):
+                    result.retry_error = self.last_error = str(e)
+                    break
+                failed.append((insert, str(e)))
+                result.failed.append((format_token(insert.token), str(e)))
+                self.last_error = str(e)
+        return written, failed
+
+    def _retryable(self, error: Exception) -> bool:
+        return self.is_retryable is not None and self.is_retryable(error)
+
+    def _finish(self, written: List[_PendingInsert], failed: List[Tuple[_PendingInsert, str]]):
+        """Quitar de lo pendiente lo escrito y lo descartado, y anotarlo en el diario."""
+        with self._condition:
+            for insert in written:
+                self._pending.pop(insert.token, None)
+            for insert, error in failed:
+                self._pending.pop(insert.token, None)
+                self._failed[insert.token] = error
+                while len(self._failed) > _MAX_FAILED_TOKENS:
+                    self._failed.popitem(last=False)
+            self.rows_written += len(written)
+            if self.journal is not None:
+                if not self._pending:
+                    self.journal.rewrite([], self._next_token)
+                elif self.journal.entries >= _COMPACT_AFTER:
+                    self.journal.rewrite(list(self._pending.values()), self._next_token)
+                else:
+                    self.journal.mark_done([insert.token for insert in written] +
+                                           [insert.token for insert, _ in failed])
+            self._publish()
+
+    # Hilo de escritura
+
+    def _due_tables(self, now: float) -> List[str]:
+        """Tablas que llegan al máximo de filas o cuya fila más antigua superó la espera."""
+        counts: Dict[str, int] = {}
+        oldest: Dict[str, float] = {}
+        for insert in self._pending.values():
+            counts[insert.table_name] = counts.get(insert.table_name, 0) + 1
+            oldest.setdefault(insert.table_name, insert.queued_at)
+        return [table for table, count in counts.items()
+                if count >= self.max_rows or now - oldest[table] >= self.max_delay_seconds]
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return next(iter(self._pending.values())).queued_at + self.max_delay_seconds
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.monotonic()
+                    due = self._due_tables(now)
+                    if due:
+                        break
+                    deadline = self._next_deadline()
+                    self._condition.wait(None if deadline is None else max(0.01, deadline - now))
+                if self._closed:
+                    return
+            tables = {table.lower() for table in due}
+            try:
+                result = self._flush(lambda insert: insert.table_name.lower() in tables)
+            except Exception as e:
+                logger.error(f"Error inesperado en la escritura diferida: {e}")
+                result = FlushResult(retry_error=str(e))
+            if result.retry_error is not None:
+                # Se reintenta tras la espera máxima para no insistir sobre un bloqueo
+                with self._condition:
+                    self._condition.wait(max(self.max_delay_seconds, 0.1))
+
+    def _publish(self):
+        self.registry.set_gauge(f"{self.name}.pending", len(self._pending))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            pending = len(self._pending)
+            tables: Dict[str, int] = {}
+            for insert in self._pending.values():
+                tables[insert.table_name] = tables.get(insert.table_name, 0) + 1
+            return {
+                "pending_rows": pending,
+                "pending_by_table": tables,
+                "rows_written": self.rows_written,
+                "failed_rows": len(self._failed),
+                "flushes": self.flushes,
+                "last_error": self.last_error,
+                "journal_path": self.journal.path if self.journal else None
+            }
+
+    def close(self, flush: bool = True) -> Optional[FlushResult]:
+        """Parar el hilo; con ``flush`` se escribe lo pendiente (lo que no se pueda queda en el diario)."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(30)
+        result = self.flush() if flush else None
+        if self.journal is not None:
+            self.journal.close()
+        return result
@@ -0,0 +1,354 @@
+"""
+Generador de archivos Jet 4 mínimos para las pruebas del lector directo.
+
+Escribe una base de datos con la cabecera, el catálogo MSysObjects y las
+tablas indicadas (definición, mapa de uso, páginas de datos y páginas LVAL
+para los Memo / OLE largos), siguiendo el mismo formato de página que
+escribe Access, de modo que ``jet_reader`` se pueda probar sin Windows.
+"""
+
+import struct
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PAGE_SIZE = 4096
+
+TYPES = {
+    "bool": (0x01, 0), "byte": (0x02, 1), "int": (0x03, 2), "long": (0x04, 4), "money": (0x05, 8),
+    "float": (0x06, 4), "double": (0x07, 8), "datetime": (0x08, 8), "binary": (0x09, 255),
+    "text": (0x0A, 510), "ole": (0x0B, 0), "memo": (0x0C, 0), "guid": (0x0F, 16), "numeric": (0x10, 17),
+}
+VARIABLE_TYPES = {"binary", "text", "ole", "memo"}
+
+# Valores largos con más bytes que esto se guardan fuera de la fila
+INLINE_LONG_VALUE_LIMIT = 64
+# Bytes de datos por fragmento en una página LVAL
+LONG_VALUE_CHUNK = 2000
+
+ACCESS_EPOCH = datetime(1899, 12, 30)
+
+# Indicador de objeto del sistema en MSysObjects.Flags (Long con signo)
+SYSTEM_FLAG = -0x80000000
+
+
+def encode_text(value: str, compress: bool = True) -> bytes:
+    """Texto Jet 4: UCS-2 o "compresión Unicode" (FF FE + tramos Latin-1/UCS-2)."""
+    if not compress or not value:
+        return value.encode("utf-16-le")
+    encoded = bytearray(b"\xff\xfe")
+    compressed = True
+    for char in value:
+        fits = 0 < ord(char) < 256
+        if fits != compressed:
+            encoded.append(0)
+            compressed = fits
+        encoded += bytes((ord(char),)) if compressed else char.encode("utf-16-le")
+    return bytes(encoded)
+
+
+def encode_datetime(value: datetime) -> bytes:
+    delta = value - ACCESS_EPOCH
+    days = delta.days
+    fraction = (delta.seconds + delta.microseconds / 1e6) / 86400
+    if days < 0 and fraction:
+        # Antes de 1899-12-30 la hora se suma a una parte entera negativa
+        return struct.pack("<d", -(abs(days) + fraction))
+    return struct.pack("<d", days + fraction)
+
+
+def encode_numeric(value: Decimal, scale: int) -> bytes:
+    magnitude = int(abs(value).scaleb(scale))
+    words = [(magnitude >> shift) & 0xFFFFFFFF for shift in (96, 64, 32, 0)]
+    return bytes((0x80 if value < 0 else 0,)) + struct.pack("<IIII", *words)
+
+
+class Column:
+    def __init__(self, name: str, type_name: str, number: int, length: Optional[int] = None,
+                 autonumber: bool = False, precision: int = 18, scale: int = 0):
+        self.name = name
+        self.type_name = type_name
+        self.type_code, default_length = TYPES[type_name]
+        self.length = length * 2 if (length and type_name == "text") else (length or default_length)
+        self.number = number
+        self.fixed = type_name not in VARIABLE_TYPES
+        self.autonumber = autonumber
+        self.precision = precision
+        self.scale = scale
+        self.variable_number = 0
+        self.fixed_offset = 0
+
+
+class Table:
+    def __init__(self, name: str, columns: Sequence[Tuple], rows: Sequence[Sequence[Any]],
+                 system: bool = False, deleted_rows: Sequence[int] = (), overflow_rows: Sequence[int] = ()):
+        self.name = name
+        self.columns = []
+        for number, spec in enumerate(columns):
+            name_, type_name = spec[0], spec[1]
+            options = spec[2] if len(spec) > 2 else {}
+            self.columns.append(Column(name_, type_name, number, **options))
+        fixed_offset = 0
+        variable_number = 0
+        for column in self.columns:
+            if column.fixed:
+                column.fixed_offset = fixed_offset
+                fixed_offset += column.length
+            else:
+                column.variable_number = variable_number
+                variable_number += 1
+        self.fixed_size = fixed_offset
+        self.rows = [list(row) for row in rows]
+        self.system = system
+        self.deleted_rows = set(deleted_rows)
+        self.overflow_rows = set(overflow_rows)
+        self.definition_page = None
+
+
+class JetFileBuilder:
+    """Construye un archivo Jet 4 en memoria."""
+
+    def __init__(self, compress_text: bool = True):
+        self.compress_text = compress_text
+        self.tables: List[Table] = []
+        self.pages: List[bytearray] = []
+
+    def add_table(self, name: str, columns: Sequence[Tuple], rows: Sequence[Sequence[Any]] = (), **options):
+        self.tables.append(Table(name, columns, rows, **options))
+
+    # Páginas
+
+    def _new_page(self) -> int:
+        self.pages.append(bytearray(PAGE_SIZE))
+        return len(self.pages) - 1
+
+    def _write_data_page(self, owner: int, rows: List[Tuple[bytes, int]]) -> int:
+        """Página de datos con filas (contenido, indicadores) escritas desde el final."""
+        number = self._new_page()
+        page = self.pages[number]
+        page[0:2] = b"\x01\x01"
+        struct.pack_into("<I", page, 4, owner)
+        struct.pack_into("<H", page, 0x0C, len(rows))
+        position = PAGE_SIZE
+        for index, (content, flags) in enumerate(rows):
+            position -= len(content)
+            page[position:position + len(content)] = content
+            struct.pack_into("<H", page, 0x0E + index * 2, position | flags)
+        free = position - (0x0E + 2 * len(rows))
+        if free < 0:
+            raise ValueError("Las filas no caben en la página")
+        struct.pack_into("<H", page, 2, free)
+        return number
+
+    def _store_rows(self, owner: int, rows: List[Tuple[bytes, int]]) -> List[int]:
+        """Repartir filas en páginas de datos; devuelve ``página << 8 | fila`` de cada una."""
+        pointers = []
+        pending: List[Tuple[bytes, int]] = []
+        used = 0x0E
+
+        def flush():
+            nonlocal pending, used
+            if pending:
+                page = self._write_data_page(owner, pending)
+                pointers.extend((page << 8) | index for index in range(len(pending)))
+            pending, used = [], 0x0E
+
+        for content, flags in rows:
+            if used + len(content) + 2 > PAGE_SIZE:
+                flush()
+            pending.append((content, flags))
+            used += len(content) + 2
+        flush()
+        return pointers
+
+    def _long_value(self, data: bytes) -> bytes:
+        """Cabecera de 12 bytes de un Memo / OLE (en línea, una página LVAL o varias)."""
+        if len(data) <= INLINE_LONG_VALUE_LIMIT:
+            return struct.pack("<III", len(data) | 0x80000000, 0, 0) + data
+        if len(data) <= LONG_VALUE_CHUNK:
+            pointer = self._store_rows(0, [(data, 0)])[0]
+            return struct.pack("<III", len(data) | 0x40000000, pointer, 0)
+        chunks = [data[i:i + LONG_VALUE_CHUNK] for i in range(0, len(data), LONG_VALUE_CHUNK)]
+        next_pointer = 0
+        # Se escriben del último al primero para conocer el puntero al siguiente
+        for chunk in reversed(chunks):
+            next_pointer = self._store_rows(0, [(struct.pack("<I", next_pointer) + chunk, 0)])[0]
+        return struct.pack("<III", len(data), next_pointer, 0)
+
+    # Filas
+
+    def _encode_value(self, column: Column, value: Any) -> bytes:
+        kind = column.type_name
+        if kind == "byte":
+            return struct.pack("<B", value)
+        if kind == "int":
+            return struct.pack("<h", value)
+        if kind == "long":
+            return struct.pack("<i", value)
+        if kind == "money":
+            return struct.pack("<q", int(Decimal(value).scaleb(4)))
+        if kind == "float":
+            return struct.pack("<f", value)
+        if kind == "double":
+            return struct.pack("<d", value)
+        if kind == "datetime":
+            return encode_datetime(value)
+        if kind == "guid":
+            return uuid.UUID(value.strip("{}")).bytes_le
+        if kind == "numeric":
+            return encode_numeric(Decimal(value), column.scale)
+        if kind == "text":
+            return encode_text(value, self.compress_text)
+        if kind == "binary":
+            return bytes(value)
+        if kind == "memo":
+            return self._long_value(encode_text(value, self.compress_text))
+        if kind == "ole":
+            return self._long_value(bytes(value))
+        raise ValueError(kind)
+
+    def _encode_row(self, table: Table, values: Sequence[Any]) -> bytes:
+        column_count = len(table.columns)
+        row = bytearray(struct.pack("<H", column_count))
+        row += bytes(table.fixed_size)
+        null_mask = bytearray((column_count + 7) // 8)
+        variable_offsets = []
+        for column, value in zip(table.columns, values):
+            present = value is not None
+            if column.type_name == "bool":
+                present = bool(value)
+            if present:
+                null_mask[column.number // 8] |= 1 << (column.number % 8)
+            if column.fixed:
+                if present and column.type_name != "bool":
+                    encoded = self._encode_value(column, value)
+                    start = 2 + column.fixed_offset
+                    row[start:start + len(encoded)] = encoded
+            else:
+                variable_offsets.append(len(row))
+                if present:
+                    row += self._encode_value(column, value)
+        if variable_offsets:
+            # Tabla de desplazamientos: fin de datos, luego de la última a la primera columna
+            trailer = struct.pack("<H", len(row))
+            for offset in reversed(variable_offsets):
+                trailer += struct.pack("<H", offset)
+            row += trailer + struct.pack("<H", len(variable_offsets))
+        row += null_mask
+        return bytes(row)
+
+    # Definiciones
+
+    def _definition(self, table: Table, usage_map_pointer: int, row_count: int) -> bytes:
+        body = bytearray(63)
+        body[0:2] = b"\x02\x01"
+        body[2:4] = b"VC"
+        struct.pack_into("<I", body, 16, row_count)
+        body[40] = 0x53 if table.system else 0x4E
+        struct.pack_into("<H", body, 41, len(table.columns))
+        struct.pack_into("<H", body, 43, sum(1 for column in table.columns if not column.fixed))
+        struct.pack_into("<H", body, 45, len(table.columns))
+        struct.pack_into("<I", body, 55, usage_map_pointer)
+        for column in table.columns:
+            entry = bytearray(25)
+            entry[0] = column.type_code
+            struct.pack_into("<H", entry, 5, column.number)
+            struct.pack_into("<H", entry, 7, column.variable_number)
+            struct.pack_into("<H", entry, 9, column.number)
+            if column.type_name == "numeric":
+                entry[11], entry[12] = column.precision, column.scale
+            entry[15] = (0x01 if column.fixed else 0) | 0x02 | (0x04 if column.autonumber else 0)
+            struct.pack_into("<H", entry, 21, column.fixed_offset)
+            struct.pack_into("<H", entry, 23, column.length)
+            body += entry
+        for column in table.columns:
+            name = column.name.encode("utf-16-le")
+            body += struct.pack("<H", len(name)) + name
+        struct.pack_into("<I", body, 8, len(body))
+        return bytes(body)
+
+    def _write_definition(self, number: int, definition: bytes):
+        """Escribir una definición, encadenando páginas si no cabe en una."""
+        chunk, rest = definition[:PAGE_SIZE], definition[PAGE_SIZE:]
+        self.pages[number][:len(chunk)] = chunk
+        while rest:
+            next_number = self._new_page()
+            struct.pack_into("<I", self.pages[number], 4, next_number)
+            page = self.pages[next_number]
+            page[0:2] = b"\x02\x01"
+            page[2:4] = b"VC"
+            chunk, rest = rest[:PAGE_SIZE - 8], rest[PAGE_SIZE - 8:]
+            page[8:8 + len(chunk)] = chunk
+            number = next_number
+
+    def _usage_map(self, pages: Sequence[int]) -> bytes:
+        start = min(pages) if pages else 0
+        bitmap = bytearray(((max(pages) - start) // 8 + 1) if pages else 1)
+        for page in pages:
+            bitmap[(page - start) // 8] |= 1 << ((page - start) % 8)
+        return b"\x00" + struct.pack("<I", start) + bytes(bitmap)
+
+    def build(self) -> bytes:
+        self.pages = []
+        header = self.pages[self._new_page()]
+        header[0:4] = b"\x00\x01\x00\x00"
+        header[4:20] = b"Standard Jet DB\x00"
+        header[0x14] = 1
+        self._new_page()                           # mapa global de páginas (no se usa)
+        catalog_page = self._new_page()            # página 2: MSysObjects
+        map_page = self._new_page()                # filas de los mapas de uso
+
+        for table in self.tables:
+            table.definition_page = self._new_page()
+
+        catalog = Table("MSysObjects", [("Id", "long"), ("ParentId", "long"), ("Name", "text", {"length": 255}),
+                                        ("Type", "int"), ("Flags", "long")], [], system=True)
+        catalog.definition_page = catalog_page
+        catalog.rows = [[catalog_page, 0x0F000001, "MSysObjects", 1, SYSTEM_FLAG]] + [
+            [table.definition_page, 0x0F000001, table.name, 1, SYSTEM_FLAG if table.system else 0]
+            for table in self.tables
+        ]
+
+        usage_maps = []
+        for table in [catalog] + self.tables:
+            rows = []
+            for index, values in enumerate(table.rows):
+                flags = 0x8000 if index in table.deleted_rows else 0
+                rows.append((self._encode_row(table, values), flags))
+            # Las filas desbordadas se mueven a otra página; en su lugar queda un puntero
+            moved = [(index, rows[index][0]) for index in sorted(table.overflow_rows)]
+            pointers = self._store_rows(table.definition_page, rows)
+            data_pages = sorted({pointer >> 8 for pointer in pointers})
+            for index, content in moved:
+                target = self._store_rows(table.definition_page, [(content, 0x8000)])[0]
+                data_pages.append(target >> 8)
+                page = self.pages[pointers[index] >> 8]
+                slot = pointers[index] & 0xFF
+                offset = struct.unpack_from("<H", page, 0x0E + slot * 2)[0] & 0x1FFF
+                struct.pack_into("<I", page, offset, target)
+                struct.pack_into("<H", page, 0x0E + slot * 2, offset | 0x4000)
+            usage_maps.append((table, data_pages))
+
+        map_rows = [(self._usage_map(pages), 0) for _, pages in usage_maps]
+        map_pointers = self._fill_page(map_page, map_rows)
+        for (table, _), pointer in zip(usage_maps, map_pointers):
+            live_rows = len(table.rows) - len(table.deleted_rows)
+            self._write_definition(table.definition_page, self._definition(table, pointer, live_rows))
+        return b"".join(bytes(page) for page in self.pages)
+
+    def _fill_page(self, number: int, rows: List[Tuple[bytes, int]]) -> List[int]:
+        page = self.pages[number]
+        page[0:2] = b"\x01\x01"
+        struct.pack_into("<H", page, 0x0C, len(rows))
+        position = PAGE_SIZE
+        for index, (content, flags) in enumerate(rows):
+            position -= len(content)
+            page[position:position + len(content)] = content
+            struct.pack_into("<H", page, 0x0E + index * 2, position | flags)
+        return [(number << 8) | index for index in range(len(rows))]
+
+    def write(self, path: str) -> str:
+        with open(path, "wb") as output:
+            output.write(self.build())
+        return path
@@ -0,0 +1,91 @@
+"""
+Backend de referencia sobre SQLite para las pruebas.
+
+Implementa la misma interfaz que AccessDatabaseManager (las partes que usan
+los módulos auxiliares) sobre una conexión sqlite3, de modo que las pruebas
+se puedan ejecutar sin el driver ODBC de Access.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from streaming import QueryStream
+
+
+class SQLiteDatabaseManager:
+    """Gestor con la interfaz de AccessDatabaseManager sobre SQLite."""
+
+    def __init__(self, database_path: str = ":memory:"):
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+
+    def connect(self, database_path: str) -> bool:
+        self.disconnect()
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        return True
+
+    def is_connected(self) -> bool:
+        return self.connection is not None
+
+    def disconnect(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict[str, Any]]:
+        cursor = self.connection.cursor()
+        cursor.execute(query, params or [])
+        if query.strip().upper().startswith("SELECT"):
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        self.connection.commit()
+        return [{"affected_rows": cursor.rowcount}]
+
+    def open_query(self, query: str, params: Optional[List] = None,
+                   batch_size: Optional[int] = None) -> QueryStream:
+        cursor = self.connection.cursor()
+        cursor.execute(query, params or [])
+        return QueryStream(cursor, batch_size or 500)
+
+    def list_tables(self) -> List[str]:
+        cursor = self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
+        cursor = self.connection.execute(f"PRAGMA table_info([{table_name}])")
+        return [{
+            "column_name": name,
+            "data_type": (col_type or "TEXT").upper(),
+            "size": 255,
+            "nullable": not not_null,
+            "default_value": default
+        } for _, name, col_type, not_null, default, _ in cursor.fetchall()]
+
+    def get_primary_keys(self, table_name: str) -> List[Dict[str, Any]]:
+        cursor = self.connection.execute(f"PRAGMA table_info([{table_name}])")
+        return [{
+            "column_name": name,
+            "table_name": table_name,
+            "constraint_name": "PRIMARY_KEY"
+        } for _, name, _, _, _, pk in sorted(cursor.fetchall(), key=lambda r: r[5]) if pk]
+
+    def get_table_indexes(self, table_name: str) -> List[Dict[str, Any]]:
+        indexes = []
+        for _, index_name, unique, origin, _ in self.connection.execute(f"PRAGMA index_list([{table_name}])"):
+            columns = [row[2] for row in self.connection.execute(f"PRAGMA index_info([{index_name}])")]
+            indexes.append({
+                "index_name": index_name,
+                "columns": columns,
+                "unique": bool(unique),
+                "ordinal_position": 1,
+                "type": "PRIMARY" if origin == "pk" else "INDEX"
+            })
+        return indexes
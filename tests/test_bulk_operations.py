@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para las actualizaciones y borrados masivos por clave.
+"""
+
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from bulk_operations import (BulkOperationError, JET_MAX_AND_CONDITIONS, keys_per_statement, merge_rows,
+                             normalize_keys, plan_delete, plan_row_updates, plan_update, run_plan)
+
+
+class TestPlanning(unittest.TestCase):
+    """Pruebas de la generación de sentencias."""
+
+    def test_normalize_keys(self):
+        """Probar los formatos de clave admitidos y la eliminación de repetidas."""
+        self.assertEqual(normalize_keys([1, 2, 2, 3], ["Id"]), [(1,), (2,), (3,)])
+        self.assertEqual(normalize_keys([[1, "A"], {"LINEA": "B", "pedido": 1}], ["Pedido", "Linea"]),
+                         [(1, "A"), (1, "B")])
+        with self.assertRaises(ValueError):
+            normalize_keys([[1]], ["Pedido", "Linea"])
+        with self.assertRaises(ValueError):
+            normalize_keys([None], ["Id"])
+
+    def test_jet_and_limit(self):
+        """Probar que las claves compuestas no superan el máximo de AND de Jet."""
+        self.assertEqual(keys_per_statement(["Id"], 500), 500)
+        self.assertEqual(keys_per_statement(["a", "b"], 500), JET_MAX_AND_CONDITIONS)
+        self.assertEqual(keys_per_statement(["a", "b", "c", "d"], 500), 33)
+
+        plan = plan_delete("Lineas", ["Pedido", "Linea"], [[n, n % 3] for n in range(250)], 500)
+        self.assertEqual([batch.keys for batch in plan.batches], [99, 99, 52])
+        query, params = plan.batches[0].statements[0]
+        self.assertEqual(query.count(" AND "), 99)
+        self.assertEqual(len(params), 198)
+
+    def test_in_batches(self):
+        """Probar los lotes IN con los valores antes que las claves."""
+        plan = plan_update("Clientes", ["Id"], list(range(5)), {"Activo": False, "Zona": "N"}, 2)
+        self.assertEqual(len(plan.batches), 3)
+        self.assertEqual(plan.batches[0].statements[0],
+                         ("UPDATE [Clientes] SET [Activo] = ?, [Zona] = ? WHERE [Id] IN (?, ?)", [False, "N", 0, 1]))
+        self.assertEqual(plan.keys, 5)
+
+    def test_row_updates_share_sql(self):
+        """Probar que las filas con las mismas columnas comparten la sentencia."""
+        plan = plan_row_updates("Precios", ["Id"], [{"Id": n, "Precio": n * 2} for n in range(5)], 2)
+        self.assertEqual([batch.keys for batch in plan.batches], [2, 2, 1])
+        self.assertEqual({query for query, _ in plan.statements}, {"UPDATE [Precios] SET [Precio] = ? WHERE [Id] = ?"})
+        self.assertEqual(plan.statements[3][1], [6, 3])
+        with self.assertRaises(ValueError):
+            plan_row_updates("Precios", ["Id"], [{"Id": 1}])
+
+
+class TestExecution(unittest.TestCase):
+    """Pruebas de la ejecución en transacciones."""
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE Clientes (Id INTEGER PRIMARY KEY, Zona TEXT)")
+        self.connection.executemany("INSERT INTO Clientes VALUES (?, ?)", [(n, "S") for n in range(1000)])
+        self.connection.commit()
+        self.transactions = []
+
+    def execute_transaction(self, statements):
+        """Como AccessDatabaseManager.execute_write_batch, sobre SQLite."""
+        self.transactions.append(len(statements))
+        try:
+            results = []
+            for query, params in statements:
+                cursor = self.connection.execute(query, params)
+                results.append([{"affected_rows": cursor.rowcount}])
+            self.connection.commit()
+            return results
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def count(self, where="1 = 1"):
+        return self.connection.execute(f"SELECT COUNT(*) FROM Clientes WHERE {where}").fetchone()[0]
+
+    def test_delete_reports_per_batch(self):
+        """Probar los registros eliminados por lote, con claves que no existen."""
+        keys = list(range(0, 500, 2)) + [5000, 5001]
+        result = run_plan(plan_delete("Clientes", ["Id"], keys, 100), self.execute_transaction)
+        self.assertEqual(self.transactions, [3])
+        self.assertEqual([batch.affected_rows for batch in result.plan.batches], [100, 100, 50])
+        self.assertEqual(result.affected_rows, 250)
+        self.assertIn("2 claves sin registro", result.describe())
+        self.assertEqual(self.count(), 750)
+
+    def test_update_rows(self):
+        """Probar la actualización con valores distintos por fila."""
+        rows = [{"Id": n, "Zona": f"Z{n % 4}"} for n in range(300)]
+        result = run_plan(plan_row_updates("Clientes", ["Id"], rows, 100), self.execute_transaction)
+        self.assertEqual(result.affected_rows, 300)
+        self.assertEqual(self.count("Zona = 'Z3'"), 75)
+
+    def test_failure_rolls_back_or_keeps_committed_batches(self):
+        """Probar el error en una transacción única y en una por lote."""
+        plan = plan_update("Clientes", ["Id"], list(range(300)), {"Zona": "N"}, 100)
+        plan.batches[2].statements[0] = ("UPDATE Clientes SET NoExiste = 1", [])
+        with self.assertRaises(BulkOperationError) as context:
+            run_plan(plan, self.execute_transaction)
+        self.assertIn("no se aplicó ningún cambio", str(context.exception))
+        self.assertEqual(self.count("Zona = 'N'"), 0)
+
+        with self.assertRaises(BulkOperationError) as context:
+            run_plan(plan, self.execute_transaction, single_transaction=False)
+        self.assertEqual(context.exception.result.affected_rows, 200)
+        self.assertEqual(context.exception.result.transactions, 2)
+        self.assertEqual(self.count("Zona = 'N'"), 200)
+
+
+
+class TestMerge(unittest.TestCase):
+    """Pruebas de la inserción o actualización por clave."""
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE Stock (Almacen TEXT COLLATE NOCASE, Articulo INTEGER, "
+                                "Unidades INTEGER, Nota TEXT, PRIMARY KEY (Almacen, Articulo))")
+        self.connection.executemany("INSERT INTO Stock VALUES (?, ?, ?, NULL)",
+                                    [("A", n, 10) for n in range(100)])
+        self.connection.commit()
+        self.queries = []
+
+    def merge(self, rows, **options):
+        """Como merge_records: búsqueda de claves y escrituras con el mismo cursor y un commit."""
+        cursor = self.connection.cursor()
+
+        def fetch_keys(query, params):
+            self.queries.append(query)
+            return cursor.execute(query, params).fetchall()
+
+        try:
+            result = merge_rows("Stock", ["Almacen", "Articulo"], rows, fetch_keys, cursor.executemany, **options)
+            self.connection.commit()
+            return result
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def test_splits_inserts_and_updates(self):
+        """Probar que las claves existentes se actualizan y las nuevas se insertan."""
+        rows = ([{"Almacen": "a", "Articulo": n, "Unidades": 99} for n in range(90, 110)] +
+                [{"almacen": "B", "articulo": 1, "Unidades": 5, "Nota": "nuevo"},
+                 {"Almacen": "A", "Articulo": 5},
+                 {"Almacen": "A", "Articulo": 95, "Unidades": 7}])
+        result = self.merge(rows, max_keys_per_statement=10)
+        self.assertEqual((result.rows, result.inserted, result.updated), (22, 11, 10))
+        self.assertEqual((result.unchanged, result.duplicates), (1, 1))
+        # 22 claves compuestas en lotes de 10: tres consultas y tres sentencias (una por grupo de columnas)
+        self.assertEqual(result.lookups, 3)
+        self.assertEqual(result.statements, 3)
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM Stock").fetchone()[0], 111)
+        self.assertEqual(self.connection.execute(
+            "SELECT Unidades FROM Stock WHERE Almacen = 'A' AND Articulo IN (95, 96) ORDER BY Articulo").fetchall(),
+            [(7,), (99,)])
+        self.assertEqual(self.connection.execute("SELECT Nota FROM Stock WHERE Almacen = 'B'").fetchone(), ("nuevo",))
+
+    def test_failure_rolls_back(self):
+        """Probar que un error deja la tabla sin cambios."""
+        rows = [{"Almacen": "A", "Articulo": 1, "Unidades": 0}, {"Almacen": "C", "Articulo": 1, "NoExiste": 1}]
+        with self.assertRaises(sqlite3.Error):
+            self.merge(rows)
+        self.assertEqual(self.connection.execute("SELECT SUM(Unidades) FROM Stock").fetchone()[0], 1000)
+
+    def test_converters(self):
+        """Probar la conversión de valores antes de comparar las claves."""
+        result = self.merge([{"Almacen": "A", "Articulo": "7", "Unidades": "3"}],
+                            converters={"articulo": int, "unidades": int})
+        self.assertEqual(result.updated, 1)
+        with self.assertRaises(ValueError):
+            self.merge([{"Almacen": "A", "Articulo": "x"}], converters={"articulo": int})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la captura incremental de cambios.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from change_capture import ChangeCapture, TableSnapshot, encode_key, row_hash
+from database_mirror import DatabaseMirror
+from sqlite_backend import SQLiteDatabaseManager
+
+
+class RecorderStub:
+    """Registro de cambios en memoria."""
+
+    def __init__(self):
+        self.changes = []
+
+    def record_change(self, **kwargs):
+        self.changes.append(kwargs)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Pruebas para la instantánea clave -> hash."""
+
+    def test_encode_key(self):
+        """Probar codificación de claves simples y compuestas."""
+        self.assertEqual(encode_key([5]), "5")
+        self.assertEqual(encode_key(["A", 2]), '["A",2]')
+
+    def test_row_hash_distinguishes_null(self):
+        """Probar que NULL y la cadena vacía producen hashes distintos."""
+        self.assertNotEqual(row_hash([1, None]), row_hash([1, ""]))
+        self.assertEqual(row_hash([1, b"\x00\x01"]), row_hash([1, bytearray(b"\x00\x01")]))
+
+    def test_round_trip(self):
+        """Probar guardado y carga de una instantánea."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            base_path = os.path.join(temp_dir, "tabla")
+            snapshot = TableSnapshot.from_entries([("3", 30), ("1", 10), ("2", 2 ** 63)])
+            snapshot.save(base_path)
+
+            loaded = TableSnapshot.load(base_path)
+            self.assertEqual(loaded.keys, ["1", "2", "3"])
+            self.assertEqual(list(loaded.hashes), [10, 2 ** 63, 30])
+            self.assertEqual(loaded.find("2"), 1)
+            self.assertEqual(loaded.find("4"), -1)
+
+    def test_load_missing(self):
+        """Probar carga sin instantánea previa."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertIsNone(TableSnapshot.load(os.path.join(temp_dir, "nada")))
+
+
+class TestChangeCapture(unittest.TestCase):
+    """Pruebas para la detección de cambios."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = SQLiteDatabaseManager(os.path.join(self.temp_dir.name, "origen.db"))
+        self.source.connection.executescript("""
+            CREATE TABLE Clientes (Id INTEGER PRIMARY KEY, Nombre VARCHAR, Foto BLOB);
+            CREATE TABLE Lineas (Pedido INTEGER, Linea INTEGER, Cantidad INTEGER, PRIMARY KEY (Pedido, Linea));
+        """)
+        self.source.connection.executemany(
+            "INSERT INTO Clientes VALUES (?, ?, ?)",
+            [(i, f"Cliente {i}", bytes([i])) for i in range(1, 101)]
+        )
+        self.source.connection.executemany(
+            "INSERT INTO Lineas VALUES (?, ?, ?)",
+            [(p, l, p * l) for p in range(1, 6) for l in range(1, 4)]
+        )
+        self.source.connection.commit()
+        self.recorder = RecorderStub()
+        self.capture = ChangeCapture(self.source, os.path.join(self.temp_dir.name, "estado"),
+                                     batch_size=16, change_recorder=self.recorder)
+
+    def tearDown(self):
+        self.source.disconnect()
+        self.temp_dir.cleanup()
+
+    def test_first_run(self):
+        """Probar que la primera captura solo crea la instantánea."""
+        change_set = self.capture.capture("Clientes")
+        self.assertTrue(change_set.first_run)
+        self.assertFalse(change_set.has_changes)
+        self.assertEqual(change_set.rows_scanned, 100)
+        self.assertEqual(self.recorder.changes, [])
+
+    def test_detect_changes(self):
+        """Probar detección de inserciones, modificaciones y borrados."""
+        self.capture.capture("Clientes")
+        self.source.execute_query("INSERT INTO Clientes VALUES (101, 'Nuevo', NULL)")
+        self.source.execute_query("UPDATE Clientes SET Nombre = 'Cambiado' WHERE Id = 7")
+        self.source.execute_query("UPDATE Clientes SET Foto = X'FF' WHERE Id = 8")
+        self.source.execute_query("DELETE FROM Clientes WHERE Id IN (50, 60)")
+
+        change_set = self.capture.capture("Clientes")
+        self.assertFalse(change_set.first_run)
+        self.assertEqual(change_set.inserted, [101])
+        self.assertEqual(sorted(change_set.updated), [7, 8])
+        self.assertEqual(change_set.deleted, [50, 60])
+        self.assertEqual(change_set.summary(), "1 insertados, 2 modificados, 2 eliminados")
+        self.assertEqual(len(self.recorder.changes), 1)
+        self.assertEqual(self.recorder.changes[0]["change_type"], "data")
+
+        self.assertFalse(self.capture.capture("Clientes").has_changes)
+
+    def test_dry_run_keeps_snapshot(self):
+        """Probar que commit=False no actualiza la instantánea."""
+        self.capture.capture("Clientes")
+        self.source.execute_query("DELETE FROM Clientes WHERE Id = 1")
+
+        self.assertEqual(self.capture.capture("Clientes", commit=False).deleted, [1])
+        self.assertEqual(self.capture.capture("Clientes").deleted, [1])
+
+    def test_composite_key(self):
+        """Probar claves primarias compuestas."""
+        self.capture.capture("Lineas")
+        self.source.execute_query("UPDATE Lineas SET Cantidad = 0 WHERE Pedido = 2 AND Linea = 3")
+
+        change_set = self.capture.capture("Lineas")
+        self.assertEqual(change_set.key_columns, ["Pedido", "Linea"])
+        self.assertEqual(change_set.updated, [[2, 3]])
+        self.assertEqual(list(change_set.iter_records()), [("updated", "[2, 3]")])
+
+    def test_missing_key_column(self):
+        """Probar error con columnas clave inexistentes."""
+        with self.assertRaises(ValueError):
+            self.capture.capture("Clientes", key_columns=["NoExiste"])
+
+    def test_incremental_mirror_refresh(self):
+        """Probar que la réplica aplica solo las filas cambiadas."""
+        mirror = DatabaseMirror(self.source, os.path.join(self.temp_dir.name, "replica.sqlite"),
+                                engine="sqlite", batch_size=16,
+                                change_capture=ChangeCapture(self.source, os.path.join(self.temp_dir.name, "replica")))
+        try:
+            mirror.mirror_tables(["Clientes"])
+            self.assertEqual(mirror.mirror_tables(["Clientes"], refresh=True)[0].status, "copied")
+
+            self.source.execute_query("INSERT INTO Clientes VALUES (101, 'Nuevo', NULL)")
+            self.source.execute_query("UPDATE Clientes SET Nombre = 'Cambiado' WHERE Id = 7")
+            self.source.execute_query("DELETE FROM Clientes WHERE Id = 50")
+
+            result = mirror.mirror_tables(["Clientes"], refresh=True)[0]
+            self.assertEqual(result.status, "updated")
+            self.assertEqual(result.rows, 2)
+            self.assertEqual(mirror.mirror_tables(["Clientes"], refresh=True)[0].status, "unchanged")
+
+            with mirror.open_query("SELECT COUNT(*), SUM(Id) FROM Clientes") as stream:
+                self.assertEqual(tuple(next(iter(stream))), (100, 5050 + 101 - 50))
+            with mirror.open_query("SELECT Nombre FROM Clientes WHERE Id = 7") as stream:
+                self.assertEqual(next(iter(stream))[0], "Cambiado")
+        finally:
+            mirror.close()
+
+    def test_failed_apply_keeps_changes(self):
+        """Probar que si falla la aplicación en la réplica los cambios se detectan otra vez."""
+        mirror = DatabaseMirror(self.source, os.path.join(self.temp_dir.name, "replica.sqlite"),
+                                engine="sqlite", change_capture=ChangeCapture(self.source, self.temp_dir.name))
+        try:
+            mirror.mirror_tables(["Clientes"])
+            mirror.mirror_tables(["Clientes"], refresh=True)
+            self.source.execute_query("DELETE FROM Clientes WHERE Id = 50")
+
+            def failing_apply(table_name, change_set):
+                raise OSError("disco lleno")
+
+            original = mirror.apply_changes
+            mirror.apply_changes = failing_apply
+            self.assertEqual(mirror.mirror_tables(["Clientes"], refresh=True)[0].status, "error")
+            mirror.apply_changes = original
+
+            self.assertEqual(mirror.mirror_tables(["Clientes"], refresh=True)[0].status, "updated")
+            with mirror.open_query("SELECT COUNT(*) FROM Clientes WHERE Id = 50") as stream:
+                self.assertEqual(next(iter(stream))[0], 0)
+        finally:
+            mirror.close()
+
+    def test_incremental_refresh_date_keys(self):
+        """Probar claves de fecha: los borrados y las modificaciones encuentran la fila en la réplica."""
+        self.source.connection.close()
+        self.source.connection = sqlite3.connect(self.source.database_path, check_same_thread=False,
+                                                 detect_types=sqlite3.PARSE_DECLTYPES)
+        self.source.connection.execute("CREATE TABLE Eventos (Momento TIMESTAMP PRIMARY KEY, Nota VARCHAR)")
+        self.source.connection.executemany(
+            "INSERT INTO Eventos VALUES (?, ?)",
+            [(f"2024-01-0{day} 10:30:00", f"evento {day}") for day in range(1, 6)])
+        self.source.connection.commit()
+        self.assertIsInstance(self.source.execute_query("SELECT Momento FROM Eventos")[0]["Momento"], datetime)
+
+        mirror = DatabaseMirror(self.source, os.path.join(self.temp_dir.name, "replica.sqlite"),
+                                engine="sqlite", change_capture=ChangeCapture(self.source, self.temp_dir.name))
+        try:
+            mirror.mirror_tables(["Eventos"])
+            mirror.mirror_tables(["Eventos"], refresh=True)
+            self.source.execute_query("DELETE FROM Eventos WHERE Momento = '2024-01-02 10:30:00'")
+            self.source.execute_query("UPDATE Eventos SET Nota = 'cambiado' WHERE Momento = '2024-01-03 10:30:00'")
+
+            self.assertEqual(mirror.mirror_tables(["Eventos"], refresh=True)[0].status, "updated")
+            with mirror.open_query("SELECT Nota FROM Eventos ORDER BY Momento") as stream:
+                self.assertEqual([row[0] for row in stream], ["evento 1", "cambiado", "evento 4", "evento 5"])
+        finally:
+            mirror.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
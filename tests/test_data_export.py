@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la exportación de consultas a ficheros.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data_export import PYARROW_AVAILABLE, StreamingExporter, resolve_export_format
+from streaming import QueryStream
+
+
+class TestStreamingExporter(unittest.TestCase):
+    """Pruebas para el exportador por lotes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE ventas (id INTEGER, cliente TEXT, importe REAL, adjunto BLOB)")
+        self.connection.executemany(
+            "INSERT INTO ventas VALUES (?, ?, ?, ?)",
+            [(i, f"cliente {i}" if i % 3 else None, i * 1.5, b"\x00\xff" if i == 0 else None)
+             for i in range(250)]
+        )
+
+    def tearDown(self):
+        self.connection.close()
+        self.temp_dir.cleanup()
+
+    def stream(self, batch_size=100):
+        cursor = self.connection.execute("SELECT * FROM ventas ORDER BY id")
+        return QueryStream(cursor, batch_size)
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_export_csv(self):
+        """Probar exportación a CSV."""
+        output = self.path("ventas.csv")
+        result = StreamingExporter().export(self.stream(), output)
+
+        self.assertEqual(result.export_format, "csv")
+        self.assertEqual(result.rows, 250)
+        self.assertEqual(result.bytes_written, os.path.getsize(output))
+        self.assertFalse(os.path.exists(output + ".part"))
+
+        with open(output, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["id", "cliente", "importe", "adjunto"])
+        self.assertEqual(len(rows), 251)
+        self.assertEqual(rows[1][3], "AP8=")
+        self.assertEqual(rows[1][1], "")
+
+    def test_export_jsonl(self):
+        """Probar exportación a JSON Lines."""
+        output = self.path("ventas.jsonl")
+        result = StreamingExporter().export(self.stream(), output)
+
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(result.rows, 250)
+        self.assertEqual(len(records), 250)
+        self.assertIsNone(records[0]["cliente"])
+        self.assertEqual(records[2]["importe"], 3.0)
+
+    def test_progress_callback(self):
+        """Probar notificación de progreso."""
+        calls = []
+        exporter = StreamingExporter(progress_every=100, progress_callback=lambda rows, size: calls.append(rows))
+        exporter.export(self.stream(batch_size=50), self.path("ventas.csv"))
+        self.assertEqual(calls, [100, 200])
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow no disponible")
+    def test_export_parquet(self):
+        """Probar exportación a Parquet."""
+        import pyarrow.parquet
+
+        output = self.path("ventas.parquet")
+        result = StreamingExporter().export(self.stream(), output)
+        table = pyarrow.parquet.read_table(output)
+        self.assertEqual(result.rows, 250)
+        self.assertEqual(table.num_rows, 250)
+        self.assertEqual(table.column_names, ["id", "cliente", "importe", "adjunto"])
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow no disponible")
+    def test_parquet_schema_from_description(self):
+        """Probar que el esquema Parquet sale de los tipos del cursor y no del primer lote."""
+        import pyarrow
+        import pyarrow.parquet
+
+        class TypedCursor:
+            # Como pyodbc: el tipo Python de cada columna en description
+            description = [("id", int, None, 10, 10, 0, False), ("importe", float, None, 53, 53, 0, True)]
+
+            def __init__(self, rows):
+                self.rows = iter(rows)
+
+            def fetchmany(self, size):
+                return [row for _, row in zip(range(size), self.rows)]
+
+            def close(self):
+                pass
+
+        rows = [(i, None) for i in range(10)] + [(i, i * 1.5) for i in range(10, 20)]
+        output = self.path("tipos.parquet")
+        StreamingExporter().export(QueryStream(TypedCursor(rows), batch_size=10), output)
+        table = pyarrow.parquet.read_table(output)
+        self.assertEqual(table.schema.field("importe").type, pyarrow.float64())
+        self.assertEqual(table.column("importe").to_pylist()[-1], 28.5)
+
+    def test_failed_export_removes_part_file(self):
+        """Probar que no queda el .part si falla el cierre del escritor."""
+        import data_export
+
+        class FailingWriter(data_export.CsvExportWriter):
+            def close(self):
+                super().close()
+                raise OSError("disco lleno")
+
+        output = self.path("ventas.csv")
+        original = data_export.EXPORT_WRITERS["csv"]
+        data_export.EXPORT_WRITERS["csv"] = FailingWriter
+        try:
+            with self.assertRaises(OSError):
+                StreamingExporter().export(self.stream(), output)
+        finally:
+            data_export.EXPORT_WRITERS["csv"] = original
+        self.assertFalse(os.path.exists(output + ".part"))
+        self.assertFalse(os.path.exists(output))
+
+    def test_resolve_export_format(self):
+        """Probar deducción del formato por extensión."""
+        self.assertEqual(resolve_export_format("a.CSV"), "csv")
+        self.assertEqual(resolve_export_format("a.ndjson"), "jsonl")
+        self.assertEqual(resolve_export_format("a.txt", "jsonl"), "jsonl")
+        with self.assertRaises(ValueError):
+            resolve_export_format("a.txt")
+        with self.assertRaises(ValueError):
+            resolve_export_format("a.csv", "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la importación de ficheros CSV/JSON Lines.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data_import import (FileImporter, ImportAbortedError, infer_columns, resolve_import_format,
+                         value_converter)
+from sqlite_backend import SQLiteDatabaseManager
+
+
+class TestConversion(unittest.TestCase):
+    """Pruebas de la conversión de valores y la inferencia de tipos."""
+
+    def test_value_converters(self):
+        """Probar la conversión según el tipo de columna de Access."""
+        self.assertEqual(value_converter({"data_type": "BYTE"})("12"), 12)
+        with self.assertRaises(ValueError):
+            value_converter({"data_type": "BYTE"})("300")
+        self.assertEqual(value_converter({"data_type": "INTEGER"})("7,0"), 7)
+        self.assertEqual(value_converter({"data_type": "INTEGER"})("7.00"), 7)
+        # Separadores de miles: se rechazan en lugar de importarse como 1
+        for text in ("1.000", "1,000", "-12.345.678"):
+            with self.assertRaises(ValueError, msg=text):
+                value_converter({"data_type": "INTEGER"})(text)
+        self.assertEqual(value_converter({"data_type": "DOUBLE"})("3,5"), 3.5)
+        self.assertEqual(value_converter({"data_type": "CURRENCY"})("10.25"), Decimal("10.25"))
+        self.assertIs(value_converter({"data_type": "BIT"})("Sí"), True)
+        self.assertEqual(value_converter({"data_type": "DATETIME"})("31/12/2024"), datetime(2024, 12, 31))
+        self.assertEqual(value_converter({"data_type": "LONGBINARY"})("AAE="), b"\x00\x01")
+        self.assertEqual(value_converter({"data_type": "VARCHAR", "size": 5})(12345), "12345")
+        with self.assertRaises(ValueError):
+            value_converter({"data_type": "VARCHAR", "size": 5})("demasiado")
+        self.assertEqual(len(value_converter({"data_type": "LONGCHAR", "size": 255})("x" * 1000)), 1000)
+
+    def test_infer_columns(self):
+        """Probar la inferencia de tipos a partir de una muestra."""
+        records = [["1", "1.5", "2024-01-01", "007", "true", "x"],
+                   ["2", "2", "2024-02-01", "008", "false", "y" * 300],
+                   ["", "", "", "", "", ""]]
+        columns = infer_columns(["Id", "Importe", "Fecha", "Codigo", "Activo", "Notas"], records)
+        self.assertEqual([column["type"] for column in columns],
+                         ["LONG", "DOUBLE", "DATETIME", "TEXT(255)", "BIT", "MEMO"])
+
+    def test_resolve_import_format(self):
+        self.assertEqual(resolve_import_format("datos.NDJSON"), "jsonl")
+        self.assertEqual(resolve_import_format("datos.dat", "csv"), "csv")
+        with self.assertRaises(ValueError):
+            resolve_import_format("datos.xlsx")
+
+
+class TestFileImporter(unittest.TestCase):
+    """Pruebas de la importación contra SQLite."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.manager = SQLiteDatabaseManager(os.path.join(self.directory.name, "destino.db"))
+        self.addCleanup(self.manager.disconnect)
+        self.manager.connection.execute(
+            "CREATE TABLE Clientes (Id INTEGER PRIMARY KEY, Nombre VARCHAR NOT NULL, Alta DATETIME, Saldo CURRENCY)"
+        )
+        self.transactions = 0
+
+    def insert_many(self, query, rows):
+        """Como AccessDatabaseManager.execute_many, sobre SQLite."""
+        self.transactions += 1
+        try:
+            self.manager.connection.executemany(query, [[str(v) if isinstance(v, Decimal) else v for v in row]
+                                                        for row in rows])
+            self.manager.connection.commit()
+        except Exception:
+            self.manager.connection.rollback()
+            raise
+        return len(rows)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        return path
+
+    def rows(self, query="SELECT Id, Nombre, Alta, Saldo FROM Clientes ORDER BY Id"):
+        return self.manager.connection.execute(query).fetchall()
+
+    def test_csv_with_rejects(self):
+        """Probar un CSV con punto y coma, conversiones fallidas y claves duplicadas."""
+        path = self.write("clientes.csv", "id;NOMBRE;alta;saldo;Extra\n"
+                                          "1;Ana;2024-01-05;10,50;x\n"
+                                          "2;Luis;no es fecha;0;x\n"
+                                          "3;Eva;;;x\n"
+                                          "1;Repetido;2024-01-01;1;x\n"
+                                          "4;Mar;05/02/2024;2;x\n")
+        importer = FileImporter(batch_size=2)
+        result = importer.import_file(path, "Clientes", self.insert_many,
+                                      schema=self.manager.get_table_schema("Clientes"))
+        self.assertEqual((result.rows_read, result.rows_imported, result.rows_rejected), (5, 3, 2))
+        self.assertEqual(result.ignored_fields, ["Extra"])
+        self.assertEqual([row[:2] for row in self.rows()], [(1, "Ana"), (3, "Eva"), (4, "Mar")])
+        self.assertEqual(self.rows()[1][2:], (None, None))
+
+        with open(result.rejects_path, encoding="utf-8") as handle:
+            rejects = [json.loads(line) for line in handle]
+        self.assertEqual([reject["line"] for reject in rejects], [3, 5])
+        self.assertIn("alta", rejects[0]["error"].lower())
+        self.assertEqual(rejects[1]["record"]["NOMBRE"], "Repetido")
+
+    def test_jsonl_with_column_map(self):
+        """Probar JSON Lines con mapeo de campos y líneas no válidas."""
+        lines = [json.dumps({"codigo": n, "razon": f"Cliente {n}", "saldo": n / 4}) for n in range(1, 6)]
+        lines.insert(2, "{no es json")
+        path = self.write("clientes.jsonl", "\n".join(lines) + "\n")
+        result = FileImporter().import_file(path, "Clientes", self.insert_many,
+                                            schema=self.manager.get_table_schema("Clientes"),
+                                            column_map={"codigo": "Id", "razon": "Nombre"})
+        self.assertEqual((result.rows_imported, result.rows_rejected), (5, 1))
+        self.assertEqual(self.rows()[-1][:2], (5, "Cliente 5"))
+        self.assertEqual(self.transactions, 1)
+
+        with self.assertRaises(ValueError):
+            FileImporter().import_file(path, "Clientes", self.insert_many,
+                                       schema=self.manager.get_table_schema("Clientes"),
+                                       column_map={"codigo": "NoExiste"})
+
+    def test_missing_required_column(self):
+        path = self.write("solo_id.csv", "Id\n1\n")
+        with self.assertRaises(ValueError) as context:
+            FileImporter().import_file(path, "Clientes", self.insert_many,
+                                       schema=self.manager.get_table_schema("Clientes"))
+        self.assertIn("Nombre", str(context.exception))
+
+    def test_create_table(self):
+        """Probar la creación de la tabla con los tipos inferidos."""
+        path = self.write("ventas.csv", "Id,Importe,Fecha\n" + "".join(f"{n},{n}.5,2024-03-{n % 28 + 1:02d}\n"
+                                                                        for n in range(50)))
+        created = []
+
+        def create_table(columns):
+            created.append(columns)
+            definitions = ", ".join(f"[{column['name']}] {column['type']}" for column in columns)
+            self.manager.connection.execute(f"CREATE TABLE Ventas ({definitions})")
+            return self.manager.get_table_schema("Ventas")
+
+        result = FileImporter(infer_rows=10).import_file(path, "Ventas", self.insert_many, schema=[],
+                                                         create_table=create_table)
+        self.assertTrue(result.created_table)
+        self.assertEqual([column["type"] for column in created[0]], ["LONG", "DOUBLE", "DATETIME"])
+        self.assertEqual(result.rows_imported, 50)
+        self.assertEqual(self.rows("SELECT COUNT(*), SUM(Importe) FROM Ventas")[0], (50, 1250.0))
+
+        with self.assertRaises(ValueError):
+            FileImporter().import_file(path, "Otra", self.insert_many, schema=[])
+
+    def test_abort_after_too_many_rejects(self):
+        path = self.write("malos.csv", "Id,Nombre\n" + "".join(f"x{n},A\n" for n in range(20)))
+        with self.assertRaises(ImportAbortedError) as context:
+            FileImporter(max_rejected=5).import_file(path, "Clientes", self.insert_many,
+                                                     schema=self.manager.get_table_schema("Clientes"))
+        self.assertEqual(context.exception.result.rows_rejected, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la réplica local de tablas.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database_mirror import DUCKDB_AVAILABLE, DatabaseMirror, referenced_tables, translate_query
+from sqlite_backend import SQLiteDatabaseManager
+
+
+class TestQueryTranslation(unittest.TestCase):
+    """Pruebas para la traducción de Jet SQL."""
+
+    def test_translate_top(self):
+        """Probar TOP -> LIMIT."""
+        self.assertEqual(
+            translate_query("SELECT TOP 5 * FROM [Ventas Anuales] ORDER BY [Id]"),
+            'SELECT * FROM "Ventas Anuales" ORDER BY "Id" LIMIT 5'
+        )
+
+    def test_translate_date_literal(self):
+        """Probar literales de fecha de Access."""
+        self.assertEqual(
+            translate_query("SELECT * FROM Pedidos WHERE Fecha > #2024-01-01#"),
+            "SELECT * FROM Pedidos WHERE Fecha > '2024-01-01'"
+        )
+
+    def test_translate_skips_strings(self):
+        """Probar que las cadenas no se tocan al traducir corchetes y fechas."""
+        self.assertEqual(
+            translate_query("SELECT [Nota] FROM Pedidos WHERE Nota = 'Ref #1 # 2 [x]' AND Fecha < #2024-02-01#"),
+            "SELECT \"Nota\" FROM Pedidos WHERE Nota = 'Ref #1 # 2 [x]' AND Fecha < '2024-02-01'"
+        )
+
+    def test_referenced_tables(self):
+        """Probar detección de tablas referenciadas."""
+        tables = referenced_tables("SELECT * FROM [Pedidos] p INNER JOIN Clientes c ON p.c = c.id")
+        self.assertEqual(tables, {"pedidos", "clientes"})
+
+
+class MirrorTestMixin:
+    """Pruebas comunes a los motores de réplica."""
+
+    engine = "sqlite"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = SQLiteDatabaseManager(os.path.join(self.temp_dir.name, "origen.db"))
+        self.source.connection.executescript("""
+            CREATE TABLE Clientes (Id INTEGER PRIMARY KEY, Nombre VARCHAR, Alta DATETIME);
+            CREATE INDEX idx_nombre ON Clientes (Nombre);
+            CREATE TABLE Pedidos (Id INTEGER PRIMARY KEY, ClienteId INTEGER, Importe DOUBLE);
+        """)
+        self.source.connection.executemany(
+            "INSERT INTO Clientes VALUES (?, ?, ?)",
+            [(i, f"Cliente {i}", "2024-01-01 00:00:00") for i in range(1, 51)]
+        )
+        self.source.connection.executemany(
+            "INSERT INTO Pedidos VALUES (?, ?, ?)",
+            [(i, i % 50 + 1, i * 10.0) for i in range(1, 1001)]
+        )
+        self.source.connection.commit()
+        mirror_path = os.path.join(self.temp_dir.name, f"replica.{self.engine}")
+        self.mirror = DatabaseMirror(self.source, mirror_path, engine=self.engine, batch_size=128)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.source.disconnect()
+        self.temp_dir.cleanup()
+
+    def test_mirror_tables(self):
+        """Probar copia completa de tablas con índices."""
+        results = {r.table_name: r for r in self.mirror.mirror_tables()}
+        self.assertEqual(results["Pedidos"].status, "copied")
+        self.assertEqual(results["Pedidos"].rows, 1000)
+        self.assertGreaterEqual(results["Clientes"].indexes, 1)
+
+        with self.mirror.open_query("SELECT TOP 3 [Id] FROM [Pedidos] ORDER BY [Id] DESC") as stream:
+            self.assertEqual([row[0] for row in stream], [1000, 999, 998])
+
+    def test_refresh_only_changed_tables(self):
+        """Probar que el refresco solo copia las tablas modificadas."""
+        self.mirror.mirror_tables()
+        self.source.execute_query("INSERT INTO Clientes VALUES (51, 'Nuevo', NULL)")
+
+        results = {r.table_name: r.status for r in self.mirror.mirror_tables(refresh=True)}
+        self.assertEqual(results, {"Clientes": "copied", "Pedidos": "unchanged"})
+
+        with self.mirror.open_query("SELECT COUNT(*) FROM Clientes") as stream:
+            self.assertEqual(next(iter(stream))[0], 51)
+
+    def test_covers(self):
+        """Probar enrutado de consultas a la réplica."""
+        self.mirror.mirror_tables(["Pedidos"])
+        self.assertTrue(self.mirror.covers("SELECT SUM(Importe) FROM Pedidos"))
+        self.assertFalse(self.mirror.covers("SELECT * FROM Pedidos INNER JOIN Clientes ON 1=1"))
+        self.assertFalse(self.mirror.covers("DELETE FROM Pedidos"))
+
+
+class TestSQLiteMirror(MirrorTestMixin, unittest.TestCase):
+    """Réplica sobre SQLite."""
+    engine = "sqlite"
+
+
+@unittest.skipUnless(DUCKDB_AVAILABLE, "duckdb no disponible")
+class TestDuckDBMirror(MirrorTestMixin, unittest.TestCase):
+    """Réplica sobre DuckDB."""
+    engine = "duckdb"
+
+
+if __name__ == "__main__":
+    unittest.main()
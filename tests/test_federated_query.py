@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para las consultas federadas entre bases de datos.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from federated_query import (FederatedQueryEngine, JoinSource, SourceConnection,
+                             build_jet_join_sql, external_table_reference, hash_join)
+from sqlite_backend import SQLiteDatabaseManager
+
+
+class TestJetSql(unittest.TestCase):
+    """Pruebas de la sentencia Jet con referencia externa."""
+
+    def test_external_reference(self):
+        """Probar la referencia a una tabla de otro archivo."""
+        self.assertEqual(external_table_reference("Clientes", r"C:\datos\Clientes.accdb"),
+                         r"[;DATABASE=C:\datos\Clientes.accdb].[Clientes]")
+        self.assertEqual(external_table_reference("Clientes", "c.accdb", "clave"),
+                         "[MS Access;PWD=clave;DATABASE=c.accdb].[Clientes]")
+        with self.assertRaises(ValueError):
+            external_table_reference("Clientes", "c.accdb", "cla]ve")
+
+    def test_build_join_sql(self):
+        """Probar la sentencia con tabla derivada para el lado filtrado."""
+        sql = build_jet_join_sql(
+            JoinSource(table="Ventas"),
+            JoinSource(table="Clientes", columns=["id", "nombre"], where="activo = True"),
+            [("cliente_id", "id")], "left",
+            right_reference="[;DATABASE=c.accdb].[Clientes]"
+        )
+        self.assertEqual(
+            sql,
+            "SELECT l.*, r.* FROM [Ventas] AS l LEFT JOIN "
+            "(SELECT [id], [nombre] FROM [;DATABASE=c.accdb].[Clientes] WHERE activo = True) AS r "
+            "ON l.[cliente_id] = r.[id]"
+        )
+        with self.assertRaises(ValueError):
+            build_jet_join_sql(JoinSource(query="SELECT 1"), JoinSource(table="T"), [("a", "b")])
+
+    def test_source_validation(self):
+        """Probar que cada lado es una tabla o una consulta SELECT."""
+        with self.assertRaises(ValueError):
+            JoinSource()
+        with self.assertRaises(ValueError):
+            JoinSource(table="T", query="SELECT 1")
+        with self.assertRaises(ValueError):
+            JoinSource(query="DELETE FROM T")
+        self.assertEqual(JoinSource(table="T", session="2023").label, "2023.T")
+
+
+class TestHashJoin(unittest.TestCase):
+    """Pruebas de la combinación por hash."""
+
+    LEFT_COLUMNS = ["id", "cliente"]
+    LEFT_ROWS = [(1, "A"), (2, "b"), (3, "C"), (4, None)]
+    RIGHT_COLUMNS = ["codigo", "nombre"]
+    RIGHT_ROWS = [("a", "Ana"), ("B", "Berta"), ("B", "Bea"), ("z", "Zoe")]
+
+    def join(self, build_is_left, join_type):
+        if build_is_left:
+            rows = hash_join(self.LEFT_COLUMNS, self.LEFT_ROWS, self.RIGHT_COLUMNS, self.RIGHT_ROWS,
+                             ["cliente"], ["codigo"], True, join_type)
+        else:
+            rows = hash_join(self.RIGHT_COLUMNS, self.RIGHT_ROWS, self.LEFT_COLUMNS, self.LEFT_ROWS,
+                             ["codigo"], ["cliente"], False, join_type)
+        return sorted(rows, key=lambda row: (row[0], str(row[3])))
+
+    def test_inner_join_either_build_side(self):
+        """Probar que el resultado no depende del lado cargado en memoria."""
+        expected = [(1, "A", "a", "Ana"), (2, "b", "B", "Bea"), (2, "b", "B", "Berta")]
+        self.assertEqual(self.join(True, "inner"), expected)
+        self.assertEqual(self.join(False, "inner"), expected)
+
+    def test_left_join_either_build_side(self):
+        """Probar que LEFT JOIN conserva las filas izquierdas sin pareja (y las de clave NULL)."""
+        expected = [(1, "A", "a", "Ana"), (2, "b", "B", "Bea"), (2, "b", "B", "Berta"),
+                    (3, "C", None, None), (4, None, None, None)]
+        self.assertEqual(self.join(True, "left"), expected)
+        self.assertEqual(self.join(False, "left"), expected)
+
+    def test_max_build_rows(self):
+        """Probar el límite de filas de la tabla hash."""
+        with self.assertRaises(ValueError):
+            list(hash_join(self.LEFT_COLUMNS, self.LEFT_ROWS, self.RIGHT_COLUMNS, self.RIGHT_ROWS,
+                           ["cliente"], ["codigo"], True, max_build_rows=2))
+
+    def test_missing_key_column(self):
+        """Probar el error con columnas de combinación inexistentes."""
+        with self.assertRaises(ValueError):
+            list(hash_join(self.LEFT_COLUMNS, self.LEFT_ROWS, self.RIGHT_COLUMNS, self.RIGHT_ROWS,
+                           ["no_existe"], ["codigo"], True))
+
+
+class TestFederatedQueryEngine(unittest.TestCase):
+    """Pruebas del planificador y la ejecución sobre dos bases de datos."""
+
+    def setUp(self):
+        self.ventas = SQLiteDatabaseManager()
+        self.ventas.connection.execute("CREATE TABLE Ventas (id INTEGER, cliente_id INTEGER, importe REAL)")
+        self.ventas.connection.executemany("INSERT INTO Ventas VALUES (?, ?, ?)",
+                                           [(i, i % 3, float(i)) for i in range(30)])
+        self.clientes = SQLiteDatabaseManager()
+        self.clientes.connection.execute("CREATE TABLE Clientes (id INTEGER, nombre TEXT)")
+        self.clientes.connection.executemany("INSERT INTO Clientes VALUES (?, ?)", [(0, "Ana"), (1, "Luis")])
+        self.connections = {
+            None: SourceConnection(self.ventas, "ventas.db"),
+            "clientes": SourceConnection(self.clientes, "clientes.db")
+        }
+        self.engine = FederatedQueryEngine(lambda alias: self.connections[alias], batch_size=7)
+
+    def tearDown(self):
+        self.ventas.disconnect()
+        self.clientes.disconnect()
+
+    def test_plan_chooses_smaller_build_side(self):
+        """Probar que el lado con menos filas se carga en memoria."""
+        left = JoinSource(table="Ventas")
+        right = JoinSource(table="Clientes", session="clientes")
+        plan = self.engine.plan(left, right, [("cliente_id", "id")])
+        self.assertEqual(plan.strategy, "hash")
+        self.assertEqual(plan.row_counts, {"left": 30, "right": 2})
+        self.assertEqual(plan.build_side, "right")
+
+        plan = self.engine.plan(right, left, [("id", "cliente_id")])
+        self.assertEqual(plan.build_side, "left")
+        self.assertEqual(self.engine.plan(left, right, [("cliente_id", "id")], build_side="left").build_side, "left")
+
+    def test_execute_hash_join(self):
+        """Probar la combinación completa con columnas prefijadas."""
+        plan, stream = self.engine.execute(
+            JoinSource(table="Ventas", where="importe >= 10"),
+            JoinSource(table="Clientes", session="clientes"),
+            [("cliente_id", "id")], join_type="left"
+        )
+        with stream:
+            self.assertEqual(stream.columns, ["Ventas.id", "Ventas.cliente_id", "Ventas.importe",
+                                              "clientes.Clientes.id", "clientes.Clientes.nombre"])
+            rows = list(stream)
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(plan.row_counts["left"], 20)
+        names = {row[0]: row[4] for row in rows}
+        self.assertEqual((names[12], names[13], names[14]), ("Ana", "Luis", None))
+
+    def test_query_source(self):
+        """Probar un lado definido por consulta."""
+        plan, stream = self.engine.execute(
+            JoinSource(query="SELECT cliente_id, SUM(importe) AS total FROM Ventas GROUP BY cliente_id"),
+            JoinSource(table="Clientes", session="clientes"),
+            [("cliente_id", "id")]
+        )
+        with stream:
+            rows = sorted(stream)
+        self.assertEqual([(row[0], row[3]) for row in rows], [(0, "Ana"), (1, "Luis")])
+        self.assertEqual(plan.strategy, "hash")
+
+    def test_jet_fallback_to_hash(self):
+        """Probar que en modo auto se recurre al hash si el driver rechaza la sentencia Jet."""
+        self.connections[None] = SourceConnection(self.ventas, "ventas.accdb")
+        self.connections["clientes"] = SourceConnection(self.clientes, "clientes.accdb", "clave")
+        left = JoinSource(table="Ventas")
+        right = JoinSource(table="Clientes", session="clientes")
+
+        plan = self.engine.plan(left, right, [("cliente_id", "id")], strategy="jet")
+        self.assertEqual(plan.strategy, "jet")
+        self.assertIn("[MS Access;PWD=clave;DATABASE=clientes.accdb].[Clientes] AS r", plan.sql)
+
+        plan, stream = self.engine.execute(left, right, [("cliente_id", "id")])
+        with stream:
+            self.assertEqual(len(list(stream)), 20)
+        self.assertEqual(plan.strategy, "hash")
+        self.assertTrue(any("Jet rechazó" in note for note in plan.notes))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el asesor de índices.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from index_advisor import IndexAdvisor, statement_columns
+from slow_query_log import SlowQueryLog
+
+SCHEMAS = {
+    "pedidos": [
+        {"column_name": "Id", "data_type": "COUNTER"},
+        {"column_name": "ClienteId", "data_type": "INTEGER"},
+        {"column_name": "Estado", "data_type": "VARCHAR"},
+        {"column_name": "Fecha", "data_type": "DATETIME"},
+        {"column_name": "Adjunto", "data_type": "LONGBINARY"},
+    ],
+    "clientes": [
+        {"column_name": "Id", "data_type": "COUNTER"},
+        {"column_name": "Nombre", "data_type": "VARCHAR"},
+        {"column_name": "Provincia", "data_type": "VARCHAR"},
+    ],
+}
+
+# 2000 pedidos de 500 clientes con 2 estados; 150 clientes de 50 provincias (tabla pequeña)
+TABLES = {
+    "pedidos": {
+        "columns": ["id", "clienteid", "estado", "fecha"],
+        "rows": [(n, n % 500, "abierto" if n % 2 else "cerrado", f"2024-01-{n % 28 + 1:02d}") for n in range(2000)],
+    },
+    "clientes": {
+        "columns": ["id", "nombre", "provincia"],
+        "rows": [(n, f"Cliente {n}", f"P{n % 50}") for n in range(150)],
+    },
+}
+
+
+class TestStatementColumns(unittest.TestCase):
+    """Pruebas de la extracción de columnas de una sentencia."""
+
+    def uses(self, query):
+        def table_columns(table):
+            return {column["column_name"].lower(): column for column in SCHEMAS.get(table.lower(), [])}
+        return [(use.table, use.column, use.role) for use in statement_columns(query, table_columns)]
+
+    def test_where_join_order(self):
+        """Probar igualdades, rangos, combinaciones y ORDER BY."""
+        query = ("SELECT c.Nombre FROM Pedidos p INNER JOIN Clientes c ON p.ClienteId = c.Id "
+                 "WHERE p.Estado = 'abierto' AND Fecha >= ? AND Provincia IN ('P1', 'P2') "
+                 "AND Nombre LIKE '%x%' AND Year(Fecha) = 2024 ORDER BY c.Nombre")
+        self.assertEqual(self.uses(query), [
+            ("Pedidos", "ClienteId", "join"), ("Clientes", "Id", "join"),
+            ("Pedidos", "Estado", "equality"), ("Pedidos", "Fecha", "range"),
+            ("Clientes", "Provincia", "equality"), ("Clientes", "Nombre", "order"),
+        ])
+
+    def test_ambiguous_and_unknown(self):
+        """Probar que se ignoran las columnas ambiguas o inexistentes."""
+        query = "SELECT * FROM Pedidos, Clientes WHERE Id = 5 AND Importe > 3 AND Nombre LIKE 'Ana%'"
+        self.assertEqual(self.uses(query), [("Clientes", "Nombre", "range")])
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    """Pruebas de las propuestas del asesor."""
+
+    def setUp(self):
+        self.indexes = {"pedidos": [{"index_name": "PrimaryKey", "columns": ["Id"]}], "clientes": []}
+
+        def sample(table, columns, rows):
+            data = TABLES[table.lower()]
+            positions = [data["columns"].index(column.lower()) for column in columns]
+            return [tuple(row[position] for position in positions) for row in data["rows"][:rows]]
+
+        self.advisor = IndexAdvisor(
+            lambda table: SCHEMAS.get(table.lower(), []),
+            lambda table: self.indexes.get(table.lower(), []),
+            sample,
+            count_rows=lambda table: len(TABLES[table.lower()]["rows"]),
+            sample_rows=1000
+        )
+
+    def test_ranked_create_index(self):
+        """Probar índices compuestos, de combinación y el orden por tiempo ahorrado."""
+        groups = [
+            {"normalized_sql": "q1", "example_sql": "SELECT * FROM Pedidos WHERE Estado = ? AND ClienteId = ?",
+             "count": 10, "execute_ms": 5000.0, "rows": 20},
+            {"normalized_sql": "q2", "example_sql": "SELECT * FROM Pedidos WHERE ClienteId = 7",
+             "count": 4, "execute_ms": 1000.0, "rows": 16},
+            {"normalized_sql": "q3",
+             "example_sql": "SELECT * FROM Clientes c INNER JOIN Pedidos p ON p.ClienteId = c.Id",
+             "count": 2, "execute_ms": 800.0, "rows": 4000},
+        ]
+        advice = self.advisor.advise(groups)
+        self.assertEqual(advice.statements_analyzed, 3)
+        self.assertEqual([candidate.create_sql for candidate in advice.candidates], [
+            "CREATE INDEX [IX_Pedidos_ClienteId_Estado] ON [Pedidos] ([ClienteId], [Estado])",
+        ])
+        best = advice.candidates[0]
+        # ClienteId (500 valores) va antes que Estado (2); recoge q2 y la combinación de q3 por prefijo.
+        # El estado depende del cliente: la pareja sigue teniendo 500 valores distintos
+        self.assertEqual(best.statements, ["q1", "q2", "q3"])
+        self.assertEqual(best.executions, 16)
+        self.assertAlmostEqual(best.saved_ms, (5000 + 1000 + 800) * (1 - 1 / 500))
+        # Clientes.Id de la combinación no se propone: la tabla es pequeña
+        self.assertEqual(advice.skipped, {"tabla pequeña": 1})
+
+    def test_filters(self):
+        """Probar que se descartan los índices existentes y los poco selectivos."""
+        self.indexes["pedidos"].append({"index_name": "IxCliente", "columns": ["ClienteId", "Fecha"]})
+        groups = [
+            {"normalized_sql": "q1", "example_sql": "SELECT * FROM Pedidos WHERE ClienteId = ?",
+             "count": 1, "execute_ms": 900.0, "rows": 4},
+            {"normalized_sql": "q2", "example_sql": "SELECT * FROM Pedidos WHERE Estado = 'abierto'",
+             "count": 1, "execute_ms": 900.0, "rows": 1000},
+            {"normalized_sql": "q3", "example_sql": "SELECT * FROM Pedidos WHERE Fecha > ? ORDER BY Fecha",
+             "count": 3, "execute_ms": 3000.0, "rows": 30},
+            {"normalized_sql": "q4", "example_sql": "DELETE FROM Pedidos WHERE Id = 1",
+             "count": 1, "execute_ms": 5000.0, "rows": 1},
+        ]
+        advice = self.advisor.advise(groups)
+        self.assertEqual(advice.statements_analyzed, 3)
+        self.assertEqual(advice.skipped, {"ya cubierto por un índice existente": 1, "poco selectivo": 1})
+        self.assertEqual(len(advice.candidates), 1)
+        candidate = advice.candidates[0]
+        self.assertEqual(candidate.columns, ["Fecha"])
+        # Rango de una sola tabla: fracción observada (10 filas de 2000)
+        self.assertAlmostEqual(candidate.matched_fraction, 10 / 2000)
+        self.assertAlmostEqual(candidate.saved_ms, 3000 * (1 - 10 / 2000))
+
+    def test_from_slow_query_log(self):
+        """Probar el análisis de las entradas agregadas del registro."""
+        with tempfile.TemporaryDirectory() as directory:
+            log = SlowQueryLog(os.path.join(directory, "lentas.jsonl"), threshold_ms=0)
+            for client in (3, 9):
+                log.record(f"SELECT * FROM Pedidos WHERE ClienteId = {client}", None, 1.5, 0.1, 4, "execute_query")
+            advice = self.advisor.advise(log.top())
+        self.assertEqual([candidate.columns for candidate in advice.candidates], [["ClienteId"]])
+        self.assertEqual(advice.candidates[0].executions, 2)
+        self.assertAlmostEqual(advice.candidates[0].saved_ms, 3000 * (1 - 1 / 500))
+
+
+if __name__ == "__main__":
+    unittest.main()
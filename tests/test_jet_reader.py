@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el lector directo de páginas Jet/ACE.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from jet_fixture import JetFileBuilder, encode_text
+from jet_reader import JetDatabase, JetFormatError, decode_datetime, decode_text
+
+
+class TestDecoders(unittest.TestCase):
+    """Pruebas de la decodificación de valores."""
+
+    def test_compressed_text(self):
+        """Probar el texto con compresión Unicode y tramos UCS-2."""
+        for value in ["Hola", "Añoranza", "Δelta y ωmega", ""]:
+            self.assertEqual(decode_text(encode_text(value)), value)
+            self.assertEqual(decode_text(encode_text(value, compress=False)), value)
+
+    def test_datetime_before_epoch(self):
+        """Probar que la hora se cuenta hacia delante también antes de 1899-12-30."""
+        self.assertEqual(decode_datetime(-1.25), datetime(1899, 12, 29, 6, 0))
+        self.assertEqual(decode_datetime(45000.5), datetime(2023, 3, 15, 12, 0))
+
+
+class TestJetDatabase(unittest.TestCase):
+    """Pruebas de lectura de archivos generados."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def build(self, builder: JetFileBuilder) -> JetDatabase:
+        path = builder.write(os.path.join(self.directory.name, "prueba.mdb"))
+        database = JetDatabase(path)
+        self.addCleanup(database.close)
+        return database
+
+    def test_catalog_and_schema(self):
+        """Probar el catálogo, las tablas del sistema y el esquema."""
+        builder = JetFileBuilder()
+        builder.add_table("Clientes", [("Id", "long", {"autonumber": True}), ("Nombre", "text", {"length": 50}),
+                                       ("Activo", "bool"), ("Saldo", "money")])
+        builder.add_table("MSysACEs", [("ACM", "long")], system=True)
+        database = self.build(builder)
+
+        self.assertEqual(database.format_name, "Jet 4")
+        self.assertEqual(database.list_tables(), ["Clientes"])
+        self.assertIn("MSysACEs", database.list_tables(include_system=True))
+        schema = database.get_table_schema("clientes")
+        self.assertEqual([(column["column_name"], column["data_type"], column["size"]) for column in schema],
+                         [("Id", "COUNTER", 4), ("Nombre", "VARCHAR", 50), ("Activo", "BIT", 0),
+                          ("Saldo", "CURRENCY", 8)])
+        with self.assertRaises(ValueError):
+            database.table("NoExiste")
+
+    def test_fixed_and_variable_values(self):
+        """Probar todos los tipos, los nulos y el orden de columnas pedido."""
+        builder = JetFileBuilder()
+        columns = [("Id", "long"), ("Nombre", "text"), ("Activo", "bool"), ("Edad", "byte"), ("Cantidad", "int"),
+                   ("Saldo", "money"), ("Ratio", "float"), ("Valor", "double"), ("Alta", "datetime"),
+                   ("Codigo", "guid"), ("Importe", "numeric", {"precision": 18, "scale": 2}),
+                   ("Datos", "binary"), ("Notas", "memo")]
+        rows = [
+            [1, "Ana", True, 30, -5, Decimal("12.3400"), 0.5, 3.25, datetime(2024, 1, 31, 8, 30),
+             "{6F9619FF-8B86-D011-B42D-00C04FC964FF}", Decimal("-1234.56"), b"\x01\x02", "corta"],
+            [2, None, False, None, None, None, None, None, datetime(1899, 12, 29, 6, 0), None, None, None, None],
+        ]
+        builder.add_table("Tipos", columns, rows)
+        database = self.build(builder)
+
+        first, second = list(database.iter_rows("Tipos"))
+        self.assertEqual(first, (1, "Ana", True, 30, -5, Decimal("12.3400"), 0.5, 3.25, datetime(2024, 1, 31, 8, 30),
+                                 "{6F9619FF-8B86-D011-B42D-00C04FC964FF}", Decimal("-1234.56"), b"\x01\x02", "corta"))
+        self.assertEqual(second, (2, None, False, None, None, None, None, None, datetime(1899, 12, 29, 6, 0),
+                                  None, None, None, None))
+        self.assertEqual(list(database.iter_rows("Tipos", ["Notas", "id"])), [("corta", 1), (None, 2)])
+        with self.assertRaises(ValueError):
+            list(database.iter_rows("Tipos", ["NoExiste"]))
+
+    def test_long_values(self):
+        """Probar Memo y OLE en línea, en una página LVAL y encadenados."""
+        medium = "Texto medio " * 20
+        long = "Párrafo largo con acentos y Ω. " * 400
+        blob = bytes(range(256)) * 40
+        builder = JetFileBuilder()
+        builder.add_table("Documentos", [("Id", "long"), ("Texto", "memo"), ("Adjunto", "ole")],
+                          [[1, "breve", b"abc"], [2, medium, blob[:500]], [3, long, blob]])
+        database = self.build(builder)
+
+        rows = list(database.iter_rows("Documentos"))
+        self.assertEqual(rows, [(1, "breve", b"abc"), (2, medium, blob[:500]), (3, long, blob)])
+
+    def test_many_pages_deleted_and_overflow_rows(self):
+        """Probar varias páginas de datos, filas borradas y filas desbordadas."""
+        rows = [[number, f"Fila {number:05d} " + "x" * 40] for number in range(1000)]
+        builder = JetFileBuilder(compress_text=False)
+        builder.add_table("Grande", [("Id", "long"), ("Texto", "text")], rows,
+                          deleted_rows=[3, 500], overflow_rows=[10, 999])
+        database = self.build(builder)
+
+        table = database.table("Grande")
+        self.assertGreater(len(table.data_pages()), 20)
+        self.assertEqual(table.row_count, 998)
+        ids = sorted(row[0] for row in table.iter_rows(["Id"]))
+        self.assertEqual(ids, [number for number in range(1000) if number not in (3, 500)])
+
+        # Recorrer por páginas da las mismas filas que el recorrido completo
+        pages = table.data_pages()
+        split = [row for half in (pages[::2], pages[1::2]) for row in table.iter_rows(pages=half)]
+        self.assertEqual(sorted(split), sorted(table.iter_rows()))
+
+    def test_wide_definition_spans_pages(self):
+        """Probar una definición de tabla encadenada en varias páginas."""
+        columns = [(f"Columna_con_nombre_largo_{number:03d}", "long") for number in range(120)]
+        builder = JetFileBuilder()
+        builder.add_table("Ancha", columns, [list(range(120))])
+        database = self.build(builder)
+
+        table = database.table("Ancha")
+        self.assertEqual(len(table.columns), 120)
+        self.assertEqual(table.columns[-1].name, "Columna_con_nombre_largo_119")
+        self.assertEqual(list(table.iter_rows()), [tuple(range(120))])
+
+    def test_open_table_stream(self):
+        """Probar el flujo por lotes con la interfaz de QueryStream."""
+        builder = JetFileBuilder()
+        builder.add_table("Numeros", [("N", "long")], [[number] for number in range(25)])
+        database = self.build(builder)
+
+        with database.open_table("Numeros", batch_size=10) as stream:
+            self.assertEqual(stream.columns, ["N"])
+            batches = list(stream.iter_batches())
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+
+    def test_rejects_other_files(self):
+        """Probar los errores con archivos que no son Jet 4 / ACE."""
+        path = os.path.join(self.directory.name, "texto.mdb")
+        with open(path, "wb") as output:
+            output.write(b"no es una base de datos" * 400)
+        with self.assertRaises(JetFormatError):
+            JetDatabase(path)
+
+        data = bytearray(JetFileBuilder().build())
+        data[0x14] = 0
+        path = os.path.join(self.directory.name, "jet3.mdb")
+        with open(path, "wb") as output:
+            output.write(bytes(data))
+        with self.assertRaises(JetFormatError):
+            JetDatabase(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la copia local de lectura.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from local_cache import BlockSyncedCopy, LocalReadCache
+from sqlite_backend import SQLiteDatabaseManager
+
+BLOCK = 4096
+
+
+class TestBlockSyncedCopy(unittest.TestCase):
+    """Pruebas de la copia por bloques."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = os.path.join(self.directory.name, "red", "ventas.accdb")
+        os.makedirs(os.path.dirname(self.source))
+        self.data = bytearray(os.urandom(BLOCK * 5 + 100))
+        self.write_source()
+        self.copy = BlockSyncedCopy(self.source, os.path.join(self.directory.name, "cache"), block_size=BLOCK)
+
+    def write_source(self):
+        with open(self.source, "wb") as source:
+            source.write(self.data)
+
+    def read(self, path):
+        with open(path, "rb") as handle:
+            return handle.read()
+
+    def test_copies_only_changed_blocks(self):
+        """Probar que solo se escriben los bloques modificados y el tamaño se ajusta."""
+        slot = self.copy.slots[0]
+        first = self.copy.sync_into(slot)
+        self.assertEqual((first.blocks_checked, first.blocks_copied), (6, 6))
+        self.assertEqual(self.read(slot.path), bytes(self.data))
+
+        self.data[BLOCK * 2 + 10] ^= 0xFF
+        self.write_source()
+        second = self.copy.sync_into(slot, force=True)
+        self.assertEqual(second.blocks_copied, 1)
+        self.assertEqual(second.bytes_copied, BLOCK)
+        self.assertEqual(self.read(slot.path), bytes(self.data))
+
+        del self.data[BLOCK * 3:]
+        self.write_source()
+        third = self.copy.sync_into(slot, force=True)
+        self.assertEqual(third.blocks_copied, 0)
+        self.assertEqual(self.read(slot.path), bytes(self.data))
+
+    def test_state_survives_restart(self):
+        """Probar que los resúmenes guardados evitan copiar de nuevo tras reiniciar."""
+        self.copy.sync_into(self.copy.slots[0])
+        copy = BlockSyncedCopy(self.source, os.path.join(self.directory.name, "cache"), block_size=BLOCK)
+        slot = copy.slots[0]
+        self.assertTrue(slot.matches(os.stat(self.source)))
+        self.assertEqual(copy.sync_into(slot, force=True).blocks_copied, 0)
+
+
+class TestLocalReadCache(unittest.TestCase):
+    """Pruebas del cambio de conexión entre versiones de la copia."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.source = os.path.join(self.directory.name, "ventas.db")
+        with sqlite3.connect(self.source) as connection:
+            connection.execute("CREATE TABLE Ventas (Id INTEGER PRIMARY KEY, Importe REAL)")
+            connection.executemany("INSERT INTO Ventas VALUES (?, ?)", [(n, n * 1.5) for n in range(100)])
+        connection.close()
+        self.writes = 0
+        self.cache = LocalReadCache(self.source, os.path.join(self.directory.name, "cache"), SQLiteDatabaseManager,
+                                    block_size=BLOCK, max_staleness_seconds=60,
+                                    change_token=lambda: self.writes)
+        self.addCleanup(self.cache.close)
+
+    def count(self, max_staleness=None):
+        with self.cache.open_query("SELECT COUNT(*) FROM Ventas", max_staleness_seconds=max_staleness) as stream:
+            return list(stream)[0][0]
+
+    def insert(self, number):
+        connection = sqlite3.connect(self.source)
+        with connection:
+            connection.execute("INSERT INTO Ventas VALUES (?, ?)", (number, 1.0))
+        connection.close()
+
+    def test_reads_from_local_copy(self):
+        """Probar que las lecturas usan la copia local y respetan el desfase admitido."""
+        self.assertEqual(self.count(), 100)
+        self.assertNotEqual(self.cache.active_path, self.source)
+        self.assertTrue(self.cache.active_path.startswith(os.path.join(self.directory.name, "cache")))
+
+        self.insert(100)
+        # Dentro del desfase admitido se lee la versión anterior
+        self.assertEqual(self.count(), 100)
+        # Sin desfase admitido se comprueba el origen y se cambia de versión
+        self.assertEqual(self.count(max_staleness=0), 101)
+        self.assertEqual(self.cache.status()["generation"], 2)
+
+    def test_own_writes_force_refresh(self):
+        """Probar que una escritura propia invalida la copia aunque no haya vencido el desfase."""
+        self.assertEqual(self.count(), 100)
+        self.insert(100)
+        self.writes += 1
+        self.assertTrue(self.cache.is_stale())
+        self.assertEqual(self.count(), 101)
+
+    def test_unchanged_source_keeps_connection(self):
+        """Probar que una comprobación sin cambios no abre otra conexión."""
+        self.cache.refresh()
+        result = self.cache.refresh(force=True)
+        self.assertFalse(result.changed)
+        self.assertTrue(result.verified)
+        self.assertEqual(self.cache.swaps, 1)
+
+    def test_old_version_closes_after_reads(self):
+        """Probar que la versión retirada se cierra cuando terminan sus lecturas."""
+        self.cache.refresh()
+        stream = self.cache.open_query("SELECT Id FROM Ventas ORDER BY Id")
+        batches = stream.iter_batches()
+        self.assertEqual(len(next(batches)), 100)
+
+        self.insert(100)
+        time.sleep(0.01)
+        self.cache.refresh(force=True)
+        self.assertEqual(self.cache.status()["open_connections"], 2)
+        # La lectura en curso termina en su versión, sin la fila nueva
+        self.assertEqual(list(batches), [])
+        stream.close()
+        self.assertEqual(self.cache.status()["open_connections"], 1)
+
+        # Con la otra copia libre se puede preparar una versión nueva
+        self.insert(101)
+        self.assertTrue(self.cache.refresh(force=True).changed)
+        self.assertEqual(self.count(max_staleness=60), 102)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la cola de escrituras con archivos de bloqueo.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from lock_scheduler import (LockConflictError, WriteScheduler, is_lock_conflict, lock_file_path,
+                            read_lock_file)
+from metrics import MetricsRegistry
+from query_control import CancelScope, QueryCancelledError
+
+LOCKED = Exception("[HY000] [Microsoft][ODBC Microsoft Access Driver] Could not update; currently locked. "
+                   "(-3218) (SQLExecDirectW)")
+
+
+class FakeBackend:
+    """Ejecuta lotes registrándolos; puede fallar con bloqueos o con errores de sentencia."""
+
+    def __init__(self, lock_failures=0):
+        self.lock_failures = lock_failures
+        self.batches = []
+        self.delay = 0
+        self.started = threading.Event()
+
+    def execute_batch(self, statements):
+        self.started.set()
+        time.sleep(self.delay)
+        if self.lock_failures:
+            self.lock_failures -= 1
+            raise LOCKED
+        if any(query == "MALA" for query, _ in statements):
+            raise Exception("Error de sintaxis")
+        self.batches.append([query for query, _ in statements])
+        return [[{"affected_rows": 1}] for _ in statements]
+
+
+class TestLockFile(unittest.TestCase):
+    """Pruebas del archivo de bloqueo y de la detección de conflictos."""
+
+    def test_lock_file_path(self):
+        self.assertEqual(lock_file_path(r"C:\datos\Ventas.accdb"), r"C:\datos\Ventas.laccdb")
+        self.assertEqual(lock_file_path("/datos/ventas.mdb"), "/datos/ventas.ldb")
+
+    def test_read_lock_file(self):
+        """Probar las entradas de 64 bytes (equipo y usuario)."""
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "Ventas.accdb")
+            self.assertFalse(read_lock_file(database).exists)
+
+            entries = b"".join(machine.ljust(32, b"\x00") + user.ljust(32, b"\x00")
+                               for machine, user in [(b"PC-CONTABILIDAD", b"Admin"), (b"PORT\xc1TIL", b"Admin")])
+            with open(lock_file_path(database), "wb") as lock_file:
+                lock_file.write(entries)
+            status = read_lock_file(database)
+            self.assertEqual([str(user) for user in status.users], ["PC-CONTABILIDAD (Admin)", "PORTÁTIL (Admin)"])
+            self.assertIn("PC-CONTABILIDAD", status.describe())
+
+    def test_is_lock_conflict(self):
+        self.assertTrue(is_lock_conflict(LOCKED))
+        self.assertTrue(is_lock_conflict(Exception("No se pudo actualizar; bloqueado actualmente (-3218)")))
+        self.assertTrue(is_lock_conflict(Exception("... (-3260) (SQLExecDirectW)")))
+        self.assertFalse(is_lock_conflict(Exception("Syntax error in INSERT INTO statement. (-3502)")))
+
+
+class TestWriteScheduler(unittest.TestCase):
+    """Pruebas de la cola de escrituras."""
+
+    def make(self, backend, **options):
+        self.registry = MetricsRegistry()
+        options.setdefault("backoff_initial_seconds", 0.001)
+        scheduler = WriteScheduler(backend.execute_batch, registry=self.registry, name="cola",
+                                   sleep=lambda seconds: None, **options)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def test_retries_lock_conflicts(self):
+        """Probar que los conflictos se reintentan hasta que se libera el bloqueo."""
+        backend = FakeBackend(lock_failures=3)
+        scheduler = self.make(backend)
+        self.assertEqual(scheduler.execute("UPDATE T SET a = ?", [1]), [{"affected_rows": 1}])
+        self.assertEqual(scheduler.stats()["lock_conflicts"], 3)
+        snapshot = self.registry.snapshot()
+        self.assertIn("cola.lock_wait", snapshot["waits"])
+        self.assertEqual(snapshot["gauges"]["cola.depth"], 0)
+
+    def test_gives_up_with_lock_file_users(self):
+        """Probar el error final con los usuarios del archivo de bloqueo."""
+        backend = FakeBackend(lock_failures=10)
+        scheduler = self.make(backend, max_retries=2,
+                              lock_status=lambda: read_lock_file(os.path.join(tempfile.gettempdir(), "no.accdb")))
+        with self.assertRaises(LockConflictError) as context:
+            scheduler.execute("DELETE FROM T")
+        self.assertIn("3 intentos", str(context.exception))
+        self.assertIn("sin archivo de bloqueo", str(context.exception))
+        self.assertEqual(backend.lock_failures, 7)
+
+    def test_batches_and_isolates_failures(self):
+        """Probar que las escrituras simultáneas se agrupan y una sentencia errónea no arrastra al lote."""
+        backend = FakeBackend()
+        backend.delay = 0.05
+        scheduler = self.make(backend)
+        first = scheduler.submit("INSERT 0")
+        backend.started.wait(1)
+        futures = [scheduler.submit(query) for query in ("INSERT 1", "MALA", "INSERT 2")]
+        self.assertEqual(first.result(1), [{"affected_rows": 1}])
+        self.assertEqual(futures[0].result(1), [{"affected_rows": 1}])
+        with self.assertRaises(Exception):
+            futures[1].result(1)
+        self.assertEqual(futures[2].result(1), [{"affected_rows": 1}])
+        # INSERT 0 solo; luego el lote de tres falla y se repite de uno en uno
+        self.assertEqual(backend.batches, [["INSERT 0"], ["INSERT 1"], ["INSERT 2"]])
+        self.assertEqual(scheduler.stats()["failures"], 1)
+
+    def test_transaction_runs_alone(self):
+        """Probar que una transacción no se mezcla con otras escrituras ni se repite por partes."""
+        backend = FakeBackend()
+        backend.delay = 0.05
+        scheduler = self.make(backend)
+        first = scheduler.submit("INSERT 0")
+        backend.started.wait(1)
+        before = scheduler.submit("INSERT 1")
+        transaction = scheduler.submit_transaction([("DELETE 1", None), ("DELETE 2", None)])
+        failing = scheduler.submit_transaction([("DELETE 3", None), ("MALA", None)])
+        after = scheduler.submit("INSERT 2")
+        self.assertEqual(transaction.result(1), [[{"affected_rows": 1}], [{"affected_rows": 1}]])
+        with self.assertRaises(Exception):
+            failing.result(1)
+        after.result(1)
+        first.result(1)
+        before.result(1)
+        self.assertEqual(backend.batches, [["INSERT 0"], ["INSERT 1"], ["DELETE 1", "DELETE 2"], ["INSERT 2"]])
+
+    def test_readers_have_priority(self):
+        """Probar que una escritura espera a las lecturas en curso de otros hilos."""
+        backend = FakeBackend()
+        scheduler = self.make(backend, max_reader_wait_seconds=5)
+        read_started, release = threading.Event(), threading.Event()
+
+        def reader():
+            with scheduler.reading():
+                read_started.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        read_started.wait(1)
+        future = scheduler.submit("UPDATE T SET a = 1")
+        time.sleep(0.05)
+        self.assertFalse(future.done())
+        release.set()
+        thread.join()
+        self.assertEqual(future.result(1), [{"affected_rows": 1}])
+
+        # Las lecturas del propio hilo que escribe no la bloquean
+        with scheduler.reading():
+            self.assertEqual(scheduler.execute("UPDATE T SET a = 2"), [{"affected_rows": 1}])
+
+    def test_cancel_pending_write(self):
+        """Probar que cancelar la llamada retira la escritura de la cola."""
+        backend = FakeBackend()
+        backend.delay = 0.2
+        scheduler = self.make(backend)
+        scheduler.submit("INSERT 0")
+        backend.started.wait(1)
+        scope = CancelScope()
+        result = {}
+
+        def writer():
+            try:
+                scope.run(scheduler.execute, "INSERT 1")
+            except QueryCancelledError as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        scope.cancel("Tiempo agotado")
+        thread.join(1)
+        self.assertIn("error", result)
+        scheduler.close()
+        self.assertEqual(backend.batches, [["INSERT 0"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para las vistas materializadas.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from materialized_views import MaterializedViewStore, ViewDefinitionError, parse_aggregate_query
+from sqlite_backend import SQLiteDatabaseManager
+
+VIEW_QUERY = ("SELECT p.Estado, SUM(Importe) AS Total, COUNT(*) AS Pedidos, AVG(Importe) AS Media, "
+              "MAX(Importe) AS Mayor FROM Pedidos p WHERE Importe > 0 GROUP BY p.Estado ORDER BY Total DESC")
+
+
+class TestParseAggregateQuery(unittest.TestCase):
+    """Pruebas de la descomposición de la consulta de la vista."""
+
+    def test_decomposition(self):
+        """Probar grupos, agregados y la consulta parcial para Access."""
+        aggregate = parse_aggregate_query(VIEW_QUERY)
+        self.assertEqual([(column.name, column.kind) for column in aggregate.columns],
+                         [("Estado", "group"), ("Total", "sum"), ("Pedidos", "count"), ("Media", "avg"),
+                          ("Mayor", "max")])
+        self.assertEqual(aggregate.order_by, [("Total", True)])
+        self.assertEqual(aggregate.access_sql("[Id] > ?"),
+                         "SELECT p.Estado AS [c0], SUM(Importe) AS [c1], COUNT(*) AS [c2], SUM(Importe) AS [c3], "
+                         "COUNT(Importe) AS [c4], MAX(Importe) AS [c5] FROM Pedidos p "
+                         "WHERE (Importe > 0) AND ([Id] > ?) GROUP BY p.Estado")
+
+    def test_not_incremental(self):
+        """Probar las consultas que no se pueden refrescar por incrementos."""
+        for query in ("SELECT Estado, SUM(Importe) AS Total FROM Pedidos GROUP BY Estado HAVING SUM(Importe) > 5",
+                      "SELECT c.Nombre, COUNT(*) AS n FROM Pedidos p INNER JOIN Clientes c ON p.ClienteId = c.Id "
+                      "GROUP BY c.Nombre",
+                      "SELECT Estado, COUNT(DISTINCT ClienteId) AS Clientes FROM Pedidos GROUP BY Estado",
+                      "SELECT Estado, SUM(Importe) FROM Pedidos GROUP BY Estado",
+                      "SELECT Estado, ClienteId, SUM(Importe) AS Total FROM Pedidos GROUP BY Estado",
+                      "SELECT SUM(Importe) + SUM(Descuento) AS Neto FROM Pedidos"):
+            with self.assertRaises(ViewDefinitionError, msg=query):
+                parse_aggregate_query(query)
+
+
+class TestMaterializedViewStore(unittest.TestCase):
+    """Pruebas del almacén sobre el backend SQLite."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = SQLiteDatabaseManager(os.path.join(self.temp_dir.name, "origen.db"))
+        self.source.connection.execute(
+            "CREATE TABLE Pedidos (Id INTEGER PRIMARY KEY, ClienteId INTEGER, Estado VARCHAR, Importe DOUBLE)")
+        self.insert(range(1, 101))
+        self.path = os.path.join(self.temp_dir.name, "vistas.sqlite")
+        self.store = MaterializedViewStore(self.source, self.path, batch_size=7)
+
+    def tearDown(self):
+        self.store.close()
+        self.source.disconnect()
+        self.temp_dir.cleanup()
+
+    def insert(self, ids, estado=None):
+        self.source.connection.executemany(
+            "INSERT INTO Pedidos VALUES (?, ?, ?, ?)",
+            [(n, n % 10, estado or ("abierto" if n % 3 else "cerrado"), float(n % 7)) for n in ids])
+        self.source.connection.commit()
+
+    def expected(self):
+        rows = self.source.execute_query(
+            "SELECT Estado, SUM(Importe), COUNT(*), AVG(Importe), MAX(Importe) FROM Pedidos "
+            "WHERE Importe > 0 GROUP BY Estado ORDER BY SUM(Importe) DESC")
+        return [tuple(row.values()) for row in rows]
+
+    def served(self, query, params=None):
+        stream = self.store.open_query(query, params)
+        self.assertIsNotNone(stream, query)
+        with stream:
+            return stream.columns, [tuple(row) for row in stream]
+
+    def test_incremental_refresh(self):
+        """Probar que el incremento combina los grupos guardados con las filas nuevas."""
+        result = self.store.create("Ventas por estado", VIEW_QUERY, key_column="Id")
+        self.assertEqual((result.mode, result.high_water), ("full", 100))
+        columns, rows = self.served(VIEW_QUERY + ";")
+        self.assertEqual(columns, ["Estado", "Total", "Pedidos", "Media", "Mayor"])
+        self.assertEqual(rows, self.expected())
+
+        self.insert(range(101, 131))
+        self.insert(range(131, 136), estado="anulado")
+        result = self.store.refresh("ventas por estado")
+        self.assertEqual((result.mode, result.rows_read, result.groups, result.high_water),
+                         ("incremental", 3, 3, 135))
+        rows = self.served(VIEW_QUERY)[1]
+        for row, expected in zip(rows, self.expected()):
+            self.assertEqual(row[0], expected[0])
+            for value, expected_value in zip(row[1:], expected[1:]):
+                self.assertAlmostEqual(value, expected_value)
+        self.assertEqual(len(rows), 3)
+
+        self.assertEqual(self.store.refresh("Ventas por estado").mode, "unchanged")
+
+        # Consultas sobre la vista por su nombre (con parámetros)
+        self.assertEqual(self.served("SELECT Pedidos FROM [Ventas por estado] WHERE Estado = ?", ["anulado"])[1],
+                         [(4,)])
+        self.assertIsNone(self.store.open_query("SELECT Estado, SUM(Importe) AS Total FROM Pedidos GROUP BY Estado"))
+
+    def test_full_refresh_views(self):
+        """Probar una vista sin incremento, la persistencia y los refrescos programados."""
+        query = "SELECT Estado, COUNT(*) AS n FROM Pedidos GROUP BY Estado HAVING COUNT(*) > 40"
+        with self.assertRaises(ViewDefinitionError):
+            self.store.create("Grandes", query, key_column="Id")
+        self.store.create("Grandes", query, refresh_seconds=60)
+        self.assertEqual(self.served(query)[1], [("abierto", 67)])
+        with self.assertRaises(ViewDefinitionError):
+            self.store.create("Pedidos", "SELECT COUNT(*) AS n FROM Pedidos")
+
+        self.source.connection.execute("UPDATE Pedidos SET Estado = 'abierto'")
+        self.source.connection.commit()
+        self.store.close()
+        self.store = MaterializedViewStore(self.source, self.path)
+        [view] = self.store.list()
+        self.assertEqual((view.name, view.refresh_seconds, view.row_count), ("Grandes", 60, 1))
+        self.assertEqual(self.store.due(view.refreshed_at + 10), [])
+        self.assertEqual(self.store.due(view.refreshed_at + 61), [("Grandes", False)])
+        self.store.refresh_due()
+        # Sin esperar al siguiente refresco programado la vista sigue igual
+        self.assertEqual(self.served(query)[1], [("abierto", 67)])
+
+        self.store.get("Grandes").refreshed_at -= 120
+        [result] = self.store.refresh_due()
+        self.assertEqual(result.mode, "full")
+        self.assertEqual(self.served(query)[1], [("abierto", 100)])
+
+        self.assertTrue(self.store.drop("grandes"))
+        self.assertIsNone(self.store.open_query(query))
+        # El bloqueo de refresco de la vista se quita con ella
+        self.assertEqual(self.store._refreshing, {})
+
+    def test_staleness_and_full_schedule(self):
+        """Probar el refresco al leer una vista antigua y el completo periódico que recoge los cambios."""
+        self.store.create("Ventas", VIEW_QUERY, key_column="Id", full_refresh_seconds=3600,
+                          max_staleness_seconds=30)
+        self.insert(range(101, 111))
+        view = self.store.get("Ventas")
+        self.assertEqual(self.served("SELECT SUM(Pedidos) FROM Ventas")[1], [(86,)])
+        view.refreshed_at -= 60
+        self.assertEqual(self.served("SELECT SUM(Pedidos) FROM Ventas")[1], [(95,)])
+
+        # Las modificaciones de filas ya agregadas solo las recoge el refresco completo
+        self.source.connection.execute("UPDATE Pedidos SET Importe = 0 WHERE Id <= 10")
+        self.source.connection.commit()
+        self.assertEqual(self.store.refresh("Ventas").mode, "unchanged")
+        self.store.get("Ventas").full_refreshed_at -= 3600
+        self.assertEqual(self.store.due(), [("Ventas", True)])
+        self.store.refresh_due()
+        self.assertEqual(self.served(VIEW_QUERY)[1], self.expected())
+
+    def test_failed_refresh_keeps_view_state(self):
+        """Probar que un refresco cuya transacción falla no cambia el estado de la vista."""
+        self.store.create("Ventas", VIEW_QUERY, key_column="Id")
+        before = self.store.get("Ventas")
+        self.insert(range(101, 111), estado="anulado")
+        for full in (False, True):
+            with patch.object(self.store, "_save", side_effect=sqlite3.OperationalError("disco lleno")):
+                with self.assertRaises(sqlite3.OperationalError):
+                    self.store.refresh("Ventas", full=full)
+            view = self.store.get("Ventas")
+            self.assertIs(view, before)
+            self.assertEqual((view.high_water, view.row_count), (100, 2))
+
+        # El siguiente incremento parte de la clave anterior y recoge las filas nuevas
+        result = self.store.refresh("Ventas")
+        self.assertEqual((result.mode, result.rows_read, result.high_water), ("incremental", 1, 110))
+        self.assertEqual(self.served(VIEW_QUERY)[1], self.expected())
+
+    def test_reads_do_not_wait_for_access(self):
+        """Probar que una vista se lee mientras otro hilo la refresca desde Access."""
+        self.store.create("Ventas", VIEW_QUERY, key_column="Id")
+        self.store.create("Grandes", "SELECT Estado, COUNT(*) AS n FROM Pedidos GROUP BY Estado")
+        before = self.served(VIEW_QUERY)[1]
+        reading, release = threading.Event(), threading.Event()
+        open_query = self.source.open_query
+
+        def slow_open_query(query, params=None, batch_size=None):
+            stream = open_query(query, params, batch_size)
+            batches = stream.iter_batches
+
+            def iter_batches():
+                reading.set()
+                release.wait(5)
+                yield from batches()
+
+            stream.iter_batches = iter_batches
+            return stream
+
+        self.source.open_query = slow_open_query
+        self.insert(range(101, 111), estado="anulado")
+        results = []
+        refresh = threading.Thread(target=lambda: results.append(self.store.refresh("Ventas", full=True)))
+        refresh.start()
+        try:
+            self.assertTrue(reading.wait(5))
+            # La lectura responde con la carga anterior sin esperar a Access
+            self.assertEqual(self.served(VIEW_QUERY)[1], before)
+            self.assertEqual(self.served("SELECT SUM(n) FROM Grandes")[1], [(100,)])
+        finally:
+            release.set()
+            refresh.join(5)
+        self.source.open_query = open_query
+        self.assertEqual(results[0].mode, "full")
+        self.assertEqual(self.served(VIEW_QUERY)[1], self.expected())
+        # La tabla de carga no queda en el fichero
+        tables = [row[0] for row in self.store.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        self.assertNotIn("_mv_Ventas_refresh", tables)
+
+
+if __name__ == "__main__":
+    unittest.main()
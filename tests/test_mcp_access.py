@@ -8,6 +8,7 @@ import tempfile
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
 
 # Agregar el directorio src al path
@@ -268,12 +269,14 @@ class TestAccessDatabaseManagerMock(unittest.TestCase):
     
     def setUp(self):
         """Configurar pruebas."""
-        # Importar aquí para evitar problemas si pyodbc no está disponible
-        try:
-            from mcp_access_server import AccessDatabaseManager
-            self.AccessDatabaseManager = AccessDatabaseManager
-        except ImportError:
-            self.skipTest("pyodbc no disponible")
+        from mcp_access_server import AccessDatabaseManager
+        self.AccessDatabaseManager = AccessDatabaseManager
+        # El servidor importa pyodbc al conectar: se sustituye por un módulo
+        # simulado para que las pruebas no necesiten el driver
+        stub = SimpleNamespace(threadsafety=1, connect=Mock(side_effect=RuntimeError("pyodbc simulado")))
+        patcher = patch('mcp_access_server.pyodbc', stub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
     
     @patch('mcp_access_server.pyodbc.connect')
     @patch('mcp_access_server.Path')
@@ -293,6 +296,41 @@ class TestAccessDatabaseManagerMock(unittest.TestCase):
         self.assertEqual(db_manager.connection, mock_connection)
         self.assertEqual(db_manager.database_path, "test.accdb")
     
+    @patch('mcp_access_server.pyodbc.connect')
+    @patch('mcp_access_server.Path')
+    def test_connect_forgets_previous_column_types(self, mock_path, mock_connect):
+        """Probar que al cambiar de archivo no se usan los tipos de columna del anterior."""
+        mock_path.return_value.exists.return_value = True
+        db_manager = self.AccessDatabaseManager()
+        if db_manager.parameter_binder is None:
+            self.skipTest("parameter_binding desactivado")
+        db_manager.parameter_binder.get_columns = lambda table: [
+            {"column_name": "Id", "data_type": "INTEGER", "size": 10}]
+        db_manager.parameter_binder.bind("SELECT * FROM Pedidos WHERE Id = ?", ["7"])
+        self.assertEqual(db_manager.parameter_binder.stats()["tables"], 1)
+        
+        db_manager.connect("otra.accdb")
+        self.assertEqual(db_manager.parameter_binder.stats()["tables"], 0)
+        self.assertEqual(db_manager.parameter_binder.stats()["statements"], 0)
+    
+    @patch('mcp_access_server.pyodbc.connect')
+    @patch('mcp_access_server.Path')
+    def test_connect_closes_previous_connection(self, mock_path, mock_connect):
+        """Probar que al conectar a otro archivo se cierran la cola y la conexión anteriores."""
+        mock_path.return_value.exists.return_value = True
+        previous = Mock()
+        mock_connect.side_effect = [previous, Mock()]
+        db_manager = self.AccessDatabaseManager()
+        db_manager.connect("primera.accdb")
+        scheduler = db_manager.write_scheduler
+        
+        db_manager.connect("segunda.accdb")
+        previous.close.assert_called_once()
+        if scheduler is not None:
+            self.assertIsNot(db_manager.write_scheduler, scheduler)
+            with self.assertRaises(RuntimeError):
+                scheduler.submit("DELETE FROM Pedidos")
+    
     @patch('mcp_access_server.Path')
     def test_connect_file_not_found(self, mock_path):
         """Probar conexión con archivo inexistente."""
@@ -324,6 +362,59 @@ class TestAccessDatabaseManagerMock(unittest.TestCase):
         self.assertIsNone(db_manager.connection)
         self.assertIsNone(db_manager.database_path)
     
+    def test_cursor_timeout_per_call(self):
+        """Probar que cada cursor se crea con el tiempo máximo de su llamada y no con el de otra."""
+        from mcp_access_server import CONFIG
+        from query_control import CancelScope
+        
+        db_manager = self.AccessDatabaseManager()
+        connection = Mock()
+        connection.timeout = 0
+        timeouts = []
+        connection.cursor.side_effect = lambda: timeouts.append(connection.timeout) or Mock()
+        db_manager.connection = connection
+        
+        CancelScope(4.5).run(db_manager._new_cursor)
+        # Sin ámbito (hilo escritor, tareas de fondo): el tiempo por defecto
+        db_manager._cursor()
+        self.assertEqual(timeouts, [5, CONFIG["database"]["default_timeout"]])
+    
+    def test_failed_write_rolls_back_only_writes(self):
+        """Probar que una escritura fallida deshace su transacción y una lectura fallida no deshace nada."""
+        db_manager = self.AccessDatabaseManager()
+        connection = Mock()
+        connection.timeout = 0
+        connection.cursor.return_value.execute.side_effect = Exception("Operation canceled")
+        db_manager.connection = connection
+        
+        with self.assertRaises(Exception):
+            db_manager.execute_query("SELECT * FROM Pedidos")
+        connection.rollback.assert_not_called()
+        with self.assertRaises(Exception):
+            db_manager.execute_query("DELETE FROM Pedidos WHERE Id = 1")
+        connection.rollback.assert_called_once()
+        connection.commit.assert_not_called()
+    
+    def test_batch_resets_input_sizes(self):
+        """Probar que una sentencia del lote no hereda los tamaños de parámetro de la anterior."""
+        db_manager = self.AccessDatabaseManager()
+        connection = Mock()
+        connection.timeout = 0
+        db_manager.connection = connection
+        db_manager.parameter_binder = Mock()
+        sizes = [(12, 255, 0), (4, 0, 0)]
+        db_manager.parameter_binder.bind.side_effect = [(["a", 1], sizes), ([2.5], [])]
+        
+        db_manager.execute_write_batch([
+            ("INSERT INTO Pedidos (Estado, Id) VALUES (?, ?)", ["a", 1]),
+            ("UPDATE Pedidos SET Importe = ?", [2.5]),
+            ("DELETE FROM Pedidos", None),
+        ])
+        cursor = connection.cursor.return_value
+        self.assertEqual([call.args[0] for call in cursor.setinputsizes.call_args_list], [sizes, None, None])
+        self.assertEqual(len(cursor.execute.call_args_list), 3)
+        connection.commit.assert_called_once()
+    
     def test_is_connected(self):
         """Probar verificación de conexión."""
         db_manager = self.AccessDatabaseManager()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para las métricas del servidor.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from metrics import (KIND_METHOD, KIND_TOOL, LatencyHistogram, MetricsDumper,
+                     MetricsRegistry, format_stats, timed)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Pruebas para el histograma de latencias."""
+
+    def test_bucket_bounds(self):
+        """Probar que cada valor cae en un cubo que lo contiene."""
+        for value in list(range(0, 200)) + [1000, 65535, 65536, 10 ** 6, 3 * 10 ** 7]:
+            index = LatencyHistogram.bucket_index(value)
+            upper = LatencyHistogram.bucket_upper_bound(index)
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper - value, max(1, value // 16))
+            if index:
+                self.assertLess(LatencyHistogram.bucket_upper_bound(index - 1), value)
+
+    def test_percentiles(self):
+        """Probar percentiles con error relativo acotado."""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000.0)
+
+        summary = histogram.to_dict()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["p50_ms"], 50, delta=50 * 0.07)
+        self.assertAlmostEqual(summary["p99_ms"], 99, delta=99 * 0.07)
+        self.assertEqual(summary["max_ms"], 100)
+        self.assertEqual(summary["min_ms"], 1)
+
+    def test_empty(self):
+        """Probar histograma vacío."""
+        self.assertEqual(LatencyHistogram().to_dict()["p95_ms"], 0)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Pruebas para el registro de métricas."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_track_tool(self):
+        """Probar medición de herramientas y atribución de filas."""
+        with self.registry.track(KIND_TOOL, "execute_query") as call:
+            self.registry.add_rows(10)
+            self.registry.add_rows(5)
+            call.bytes = 300
+
+        stats = self.registry.snapshot()["tools"]["execute_query"]
+        self.assertEqual(stats["count"], 1)
+        self.assertEqual(stats["rows"], 15)
+        self.assertEqual(stats["bytes"], 300)
+        self.assertEqual(stats["errors"], 0)
+
+    def test_add_rows_outside_tool(self):
+        """Probar que las filas fuera de una herramienta se ignoran."""
+        self.registry.add_rows(10)
+        self.assertEqual(self.registry.snapshot()["tools"], {})
+
+    def test_timed_decorator(self):
+        """Probar el decorador de métodos con resultados y errores."""
+        registry = self.registry
+
+        class Manager:
+            @timed(registry=registry)
+            def list_tables(self):
+                return ["a", "b"]
+
+            @timed("consulta", registry=registry)
+            def fail(self):
+                raise RuntimeError("fallo")
+
+        manager = Manager()
+        self.assertEqual(manager.list_tables(), ["a", "b"])
+        with self.assertRaises(RuntimeError):
+            manager.fail()
+
+        methods = self.registry.snapshot()["methods"]
+        self.assertEqual(methods["list_tables"]["rows"], 2)
+        self.assertEqual(methods["consulta"]["errors"], 1)
+
+    def test_cache_hit_rate(self):
+        """Probar tasa de aciertos de caché."""
+        for hit in (True, True, True, False):
+            self.registry.record_cache("mirror", hit)
+        cache = self.registry.snapshot()["caches"]["mirror"]
+        self.assertEqual((cache["hits"], cache["misses"]), (3, 1))
+        self.assertAlmostEqual(cache["hit_rate"], 0.75)
+
+    def test_thread_safety(self):
+        """Probar registros concurrentes."""
+        def work():
+            for _ in range(500):
+                self.registry.record(KIND_METHOD, "execute_query", 0.001, rows=1)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.registry.snapshot()["methods"]["execute_query"]
+        self.assertEqual((stats["count"], stats["rows"]), (2000, 2000))
+
+    def test_reset_and_format(self):
+        """Probar reinicio y formato de texto."""
+        self.registry.record(KIND_TOOL, "list_tables", 0.002)
+        self.assertIn("list_tables | 1 | 0", format_stats(self.registry.snapshot()))
+
+        self.registry.reset()
+        self.assertIn("Todavía no hay llamadas", format_stats(self.registry.snapshot()))
+
+    def test_dumper(self):
+        """Probar volcado a JSON."""
+        self.registry.record(KIND_TOOL, "list_tables", 0.002)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "metricas", "stats.json")
+            MetricsDumper(self.registry, path).dump()
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual(data["tools"]["list_tables"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el recorrido en paralelo de tablas.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from jet_fixture import JetFileBuilder
+from parallel_scan import ColumnProfile, ParallelScanner, key_ranges, partition_pages
+from sqlite_backend import SQLiteDatabaseManager
+
+ROWS = [[number, f"Cliente {number % 97}" if number % 10 else None, "" if number % 25 == 0 else "ok"]
+        for number in range(3000)]
+
+
+class TestPartitioning(unittest.TestCase):
+    """Pruebas del reparto del trabajo."""
+
+    def test_partition_pages(self):
+        """Probar tramos contiguos de páginas."""
+        self.assertEqual(partition_pages([9, 3, 4, 5, 8], 2), [[3, 4], [5, 8], [9]])
+        self.assertEqual(partition_pages([], 4), [])
+
+    def test_key_ranges(self):
+        """Probar los intervalos de clave, cerrados en el último tramo."""
+        self.assertEqual(key_ranges(1, 10, 3), [(1, 5), (5, 9), (9, None)])
+        self.assertEqual(key_ranges(5, 6, 8), [(5, 6), (6, None)])
+        self.assertEqual(key_ranges(0.0, 1.0, 2), [(0.0, 0.5), (0.5, None)])
+        self.assertEqual(key_ranges("a", "z", 4), [(None, None)])
+        self.assertEqual(key_ranges(None, None, 4), [(None, None)])
+
+    def test_column_profile_merge(self):
+        """Probar que combinar perfiles parciales equivale a perfilar todo junto."""
+        values = [3, None, 7, 3, 1, None, 9]
+        whole = ColumnProfile("n")
+        for value in values:
+            whole.add(value, 100)
+        first, second = ColumnProfile("n"), ColumnProfile("n")
+        for value in values[:3]:
+            first.add(value, 100)
+        for value in values[3:]:
+            second.add(value, 100)
+        first.merge(second, 100)
+        self.assertEqual(first.to_dict(), whole.to_dict())
+        self.assertEqual((whole.min_value, whole.max_value, len(whole.distinct), whole.nulls), (1, 9, 4, 2))
+
+        first.merge(second, 3)
+        self.assertTrue(first.distinct_capped)
+        self.assertIsNone(first.to_dict()["distinct_count"])
+
+
+class TestPageScan(unittest.TestCase):
+    """Pruebas del recorrido por páginas con el lector directo."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        builder = JetFileBuilder()
+        builder.add_table("Clientes", [("Id", "long"), ("Nombre", "text"), ("Estado", "text")], ROWS)
+        cls.path = builder.write(os.path.join(cls.directory.name, "clientes.mdb"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def check_profile(self, profile):
+        self.assertEqual(profile.rows, 3000)
+        by_name = {column.name: column for column in profile.columns}
+        self.assertEqual((by_name["Id"].min_value, by_name["Id"].max_value), (0, 2999))
+        self.assertEqual(by_name["Nombre"].nulls, 300)
+        self.assertEqual(len(by_name["Nombre"].distinct), 97)
+        self.assertEqual(by_name["Estado"].empty, 120)
+        self.assertEqual(by_name["Id"].data_type, "INTEGER")
+
+    def test_profile_serial_and_threads(self):
+        """Probar que el resultado no depende del reparto."""
+        serial = ParallelScanner(workers=1).profile_file(self.path, "clientes")
+        self.check_profile(serial)
+        threads = ParallelScanner(workers=3, pages_per_task=2, min_pages=0, use_processes=False)
+        profile = threads.profile_file(self.path, "Clientes")
+        self.check_profile(profile)
+        self.assertGreater(profile.partitions, 3)
+        self.assertEqual(profile.workers, 3)
+
+    def test_profile_processes(self):
+        """Probar el reparto entre procesos."""
+        scanner = ParallelScanner(workers=2, pages_per_task=4, min_pages=0)
+        self.check_profile(scanner.profile_file(self.path, "Clientes"))
+
+    def test_rows_keep_page_order(self):
+        """Probar que la exportación en paralelo conserva el orden de las filas."""
+        scanner = ParallelScanner(workers=2, pages_per_task=1, min_pages=0)
+        with scanner.open_file_table(self.path, "Clientes", ["Id", "Nombre"], batch_size=100) as stream:
+            self.assertEqual(stream.columns, ["Id", "Nombre"])
+            rows = list(stream)
+        self.assertEqual(rows, [(row[0], row[1]) for row in ROWS])
+
+
+class TestKeyRangeScan(unittest.TestCase):
+    """Pruebas del recorrido por intervalos de clave con conexiones separadas."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "clientes.db")
+        manager = SQLiteDatabaseManager(self.path)
+        manager.connection.execute("CREATE TABLE Clientes (Id INTEGER PRIMARY KEY, Nombre TEXT, Estado TEXT)")
+        manager.connection.executemany("INSERT INTO Clientes VALUES (?, ?, ?)", ROWS)
+        manager.connection.commit()
+        manager.disconnect()
+        self.connections = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def connect(self):
+        self.connections += 1
+        return SQLiteDatabaseManager(self.path)
+
+    def test_profile_key_ranges(self):
+        """Probar que los intervalos cubren todas las filas una sola vez."""
+        scanner = ParallelScanner(workers=3)
+        profile = scanner.profile_key_ranges(self.connect, "Clientes", "Id")
+        self.assertEqual(profile.rows, 3000)
+        self.assertEqual(profile.mode, "pk_ranges")
+        self.assertEqual(profile.partitions, 12)
+        self.assertEqual(self.connections, 13)
+        by_name = {column.name: column for column in profile.columns}
+        self.assertEqual(by_name["Nombre"].nulls, 300)
+        self.assertEqual(by_name["Estado"].empty, 120)
+
+        with self.assertRaises(ValueError):
+            scanner.profile_key_ranges(self.connect, "Clientes", "NoExiste")
+
+
+if __name__ == "__main__":
+    unittest.main()
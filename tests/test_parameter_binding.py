@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el enlace de parámetros por tipo de columna.
+"""
+
+import sys
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from metrics import MetricsRegistry
+from parameter_binding import (SQL_DOUBLE, SQL_INTEGER, SQL_NUMERIC, SQL_TYPE_TIMESTAMP, SQL_WVARCHAR,
+                               ParameterBinder, placeholder_columns)
+
+SCHEMAS = {
+    "pedidos": [
+        {"column_name": "Id", "data_type": "COUNTER", "size": 10},
+        {"column_name": "ClienteId", "data_type": "INTEGER", "size": 10},
+        {"column_name": "Fecha", "data_type": "DATETIME", "size": 19},
+        {"column_name": "Importe", "data_type": "CURRENCY", "size": 19},
+        {"column_name": "Estado", "data_type": "VARCHAR", "size": 20},
+    ],
+    "clientes": [
+        {"column_name": "Id", "data_type": "COUNTER", "size": 10},
+        {"column_name": "Nombre", "data_type": "VARCHAR", "size": 100},
+        {"column_name": "Saldo", "data_type": "DOUBLE", "size": 53},
+    ],
+}
+
+
+class TestPlaceholderColumns(unittest.TestCase):
+    """Pruebas de la asociación de cada ``?`` con su columna."""
+
+    def columns(self, query):
+        count, placeholders = placeholder_columns(query)
+        self.assertEqual(count, len(placeholders))
+        return [(placeholder[1], placeholder[2]) if placeholder else None for placeholder in placeholders]
+
+    def test_comparisons(self):
+        """Probar comparaciones, LIKE, BETWEEN e IN."""
+        query = ("SELECT * FROM Pedidos p WHERE p.ClienteId = ? AND ? <= [Fecha] AND Estado NOT LIKE ? "
+                 "AND Importe BETWEEN ? AND ? AND Id IN (?, ?) AND Estado <> 'a = ?'")
+        self.assertEqual(self.columns(query), [
+            ("ClienteId", False), ("Fecha", False), ("Estado", True),
+            ("Importe", False), ("Importe", False), ("Id", False), ("Id", False),
+        ])
+
+    def test_insert_and_update(self):
+        """Probar INSERT por posición y SET de UPDATE."""
+        self.assertEqual(self.columns("INSERT INTO [Pedidos] ([ClienteId], Fecha, Estado) VALUES (?, Now(), ?)"),
+                         [("ClienteId", False), ("Estado", False)])
+        self.assertEqual(self.columns("UPDATE Pedidos SET Estado = ? WHERE Id = ?"),
+                         [("Estado", False), ("Id", False)])
+
+    def test_unresolved(self):
+        """Probar que las expresiones no reconocidas quedan sin columna."""
+        self.assertEqual(self.columns("SELECT * FROM Pedidos WHERE Year(Fecha) = ? + 1"), [None])
+
+
+class TestParameterBinder(unittest.TestCase):
+    """Pruebas de la conversión y la caché de enlaces."""
+
+    def setUp(self):
+        self.lookups = []
+        self.registry = MetricsRegistry()
+
+        def get_columns(table):
+            self.lookups.append(table)
+            return SCHEMAS.get(table.lower(), [])
+
+        self.binder = ParameterBinder(get_columns, max_statements=2, registry=self.registry)
+
+    def test_typed_binding(self):
+        """Probar que los textos se convierten al tipo de la columna."""
+        values, sizes = self.binder.bind(
+            "SELECT * FROM Pedidos WHERE ClienteId = ? AND Fecha >= ? AND Importe > ? AND Estado = ?",
+            ["42", "2024-03-01", "10,5", "abierto"]
+        )
+        self.assertEqual(values, [42, datetime(2024, 3, 1), Decimal("10.5"), "abierto"])
+        self.assertEqual(sizes, [(SQL_INTEGER, 0, 0), (SQL_TYPE_TIMESTAMP, 19, 0), (SQL_NUMERIC, 19, 4),
+                                 (SQL_WVARCHAR, 20, 0)])
+
+    def test_joins_resolve_by_alias(self):
+        """Probar columnas de varias tablas: por alias o por la única tabla que la tiene."""
+        values, sizes = self.binder.bind(
+            "SELECT * FROM Pedidos AS p INNER JOIN Clientes c ON p.ClienteId = c.Id "
+            "WHERE c.Id = ? AND Saldo < ? AND Nombre LIKE ? AND Id > ?",
+            ["7", "1.5", "A%", "3"]
+        )
+        # Id es ambiguo sin alias (existe en las dos tablas pero ambas son COUNTER): se convierte igual
+        self.assertEqual(values, [7, 1.5, "A%", 3])
+        self.assertEqual(sizes, [(SQL_INTEGER, 0, 0), (SQL_DOUBLE, 0, 0), None, (SQL_INTEGER, 0, 0)])
+
+    def test_fallbacks(self):
+        """Probar que lo no convertible o no asociado se envía sin cambios."""
+        values, sizes = self.binder.bind("SELECT * FROM Pedidos WHERE ClienteId = ? AND Estado = ?",
+                                         ["no es un número", "x"])
+        self.assertEqual(values, ["no es un número", "x"])
+        self.assertEqual(sizes, [None, (SQL_WVARCHAR, 20, 0)])
+        self.assertEqual(self.binder.stats()["conversion_fallbacks"], 1)
+
+        # Sin columnas conocidas no se pasan tamaños; con otro número de parámetros tampoco
+        self.assertEqual(self.binder.bind("SELECT * FROM Vista WHERE A = ?", ["1"]), (["1"], None))
+        self.assertEqual(self.binder.bind("SELECT * FROM Pedidos WHERE Id = ?", ["1", "2"]), (["1", "2"], None))
+        self.assertEqual(self.binder.bind("SELECT * FROM Pedidos", None), (None, None))
+
+    def test_statement_cache(self):
+        """Probar que las sentencias repetidas reutilizan el enlace y que el DDL lo invalida."""
+        query = "SELECT * FROM Pedidos WHERE ClienteId = ?"
+        first = self.binder.statement(query)
+        self.assertIs(self.binder.statement(query), first)
+        self.assertEqual(self.lookups, ["Pedidos"])
+        self.assertEqual(self.registry.snapshot()["caches"]["parameter_binding"]["hits"], 1)
+
+        self.binder.note_statement("UPDATE Pedidos SET Estado = 'x'")
+        self.assertIs(self.binder.statement(query), first)
+        self.binder.note_statement("ALTER TABLE [Pedidos] ADD COLUMN Nota TEXT(10)")
+        self.assertIsNot(self.binder.statement(query), first)
+        self.assertEqual(self.lookups, ["Pedidos", "Pedidos"])
+
+        # LRU de dos sentencias
+        self.binder.statement("SELECT * FROM Clientes WHERE Id = ?")
+        self.binder.statement("SELECT * FROM Clientes WHERE Saldo = ?")
+        self.assertEqual(self.binder.stats()["statements"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
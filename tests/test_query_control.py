@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para los límites de tiempo y la cancelación de consultas.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from query_control import CancelScope, QueryCancelledError, QueryTimeoutError, current_scope
+from streaming import QueryStream
+
+
+class CancellableCursor:
+    """Cursor sqlite3 con ``cancel()`` como el de pyodbc (usa ``interrupt``)."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.cancel_calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def cancel(self):
+        self.cancel_calls += 1
+        self.connection.interrupt()
+
+
+class TestCancelScope(unittest.TestCase):
+    """Pruebas para el ámbito de cancelación."""
+
+    def test_statement_timeout(self):
+        """Probar conversión del tiempo máximo a segundos enteros para ODBC."""
+        self.assertEqual(CancelScope(2.1).statement_timeout, 3)
+        self.assertIsNone(CancelScope(0).statement_timeout)
+        self.assertIsNone(CancelScope().timeout)
+
+    def test_run_sets_current_scope(self):
+        """Probar que el ámbito solo es el actual dentro de ``run``."""
+        scope = CancelScope(5)
+        self.assertIsNone(current_scope())
+        self.assertIs(scope.run(current_scope), scope)
+        self.assertIsNone(current_scope())
+
+    def test_cancel_registered_targets(self):
+        """Probar que cancel() llega a todos los objetos registrados una vez."""
+        class Target:
+            calls = 0
+
+            def cancel(self):
+                self.calls += 1
+
+        scope = CancelScope()
+        first, second, finished = Target(), Target(), Target()
+        for target in (first, second, finished):
+            scope.register(target)
+        scope.unregister(finished)
+
+        scope.cancel("prueba")
+        scope.cancel("otra vez")
+        self.assertEqual((first.calls, second.calls, finished.calls), (1, 1, 0))
+        self.assertEqual(scope.reason, "prueba")
+        with self.assertRaises(QueryCancelledError):
+            scope.check()
+
+    def test_register_after_cancel(self):
+        """Probar que no se pueden lanzar sentencias en un ámbito cancelado."""
+        scope = CancelScope()
+        scope.cancel()
+        connection = sqlite3.connect(":memory:")
+        cursor = CancellableCursor(connection)
+        with self.assertRaises(QueryCancelledError):
+            scope.register(cursor)
+        self.assertEqual(cursor.cancel_calls, 1)
+
+    def test_timeout_error_is_cancellation(self):
+        """Probar jerarquía y mensaje del error de tiempo agotado."""
+        error = QueryTimeoutError(1.5)
+        self.assertIsInstance(error, QueryCancelledError)
+        self.assertIn("1.5 s", str(error))
+
+
+class TestStreamCancellation(unittest.TestCase):
+    """Pruebas de cancelación sobre consultas reales."""
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.connection.execute("CREATE TABLE t (id INTEGER)")
+        self.connection.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(200)])
+        self.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_cancel_between_batches(self):
+        """Probar cancelación cooperativa entre lotes."""
+        cursor = CancellableCursor(self.connection)
+        cursor.execute("SELECT id FROM t")
+        stream = QueryStream(cursor, batch_size=10)
+        batches = stream.iter_batches()
+        next(batches)
+        stream.cancel()
+        with self.assertRaises(QueryCancelledError):
+            next(batches)
+        self.assertEqual(stream.rows_fetched, 10)
+
+    def test_cancel_running_statement(self):
+        """Probar que cancelar desde otro hilo aborta una sentencia larga."""
+        scope = CancelScope(0.2)
+        errors = []
+
+        def run():
+            cursor = CancellableCursor(self.connection)
+            scope.register(cursor)
+            try:
+                cursor.execute("SELECT COUNT(*) FROM t a, t b, t c, t d")
+                cursor.fetchall()
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=scope.run, args=(run,))
+        start = time.perf_counter()
+        worker.start()
+        time.sleep(scope.timeout)
+        scope.cancel("tiempo máximo agotado")
+        worker.join(timeout=10)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el análisis de los planes de Jet (ShowPlan).
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from query_plan import (ACCESS_INDEX, ACCESS_RUSHMORE, ACCESS_SCAN, JOIN_INDEX, JOIN_LOOKUP, JOIN_NESTED,
+                        ShowPlanCapture, format_plan, parse_showplan)
+
+SAMPLES = Path(__file__).parent / "sample_showplans"
+
+
+def load(name):
+    return parse_showplan((SAMPLES / name).read_bytes().decode("utf-8"))
+
+
+class TestParseShowPlan(unittest.TestCase):
+    """Pruebas con planes grabados de showplan.out."""
+
+    def test_index_join(self):
+        """Probar una restricción por índice combinada por índice (fin de línea CRLF)."""
+        [plan] = load("index_join.out")
+        self.assertEqual(plan.name, "temp query")
+        self.assertEqual([table.table for table in plan.inputs], ["Clientes", "Pedidos"])
+        clientes = plan.inputs[0]
+        self.assertEqual(clientes.index_used, "Provincia")
+        self.assertEqual([(index.name, index.entries, index.values) for index in clientes.indexes],
+                         [("PrimaryKey", 150, 150), ("Provincia", 150, 50)])
+        self.assertEqual(clientes.indexes[0].flags, ["fixed", "unique", "primary-key", "no-nulls"])
+
+        restrict, join, sort = plan.steps
+        self.assertEqual((restrict.operation, restrict.table, restrict.access_method, restrict.index),
+                         ("restrict", "Clientes", ACCESS_INDEX, "Provincia"))
+        self.assertEqual(restrict.expressions, {"for": 'Clientes.Provincia="P1"'})
+        self.assertEqual((join.operation, join.join_type, join.inputs), ("join", "inner", ["01)", "Pedidos"]))
+        self.assertEqual((join.table, join.index, join.join_strategy), ("Pedidos", "ClientesPedidos", JOIN_INDEX))
+        self.assertEqual((sort.operation, sort.inputs), ("sort", ["02)"]))
+
+        self.assertEqual(plan.table_access(), {
+            "Clientes": {"method": ACCESS_INDEX, "index": "Provincia"},
+            "Pedidos": {"method": ACCESS_INDEX, "index": "ClientesPedidos"},
+        })
+        self.assertEqual(plan.scanned_tables, [])
+
+    def test_scans_and_lookup_join(self):
+        """Probar recorridos completos, nombres con espacios y combinación con índice temporal."""
+        [plan] = load("scan_lookup_join.out")
+        self.assertEqual(plan.scanned_tables, ["Pedidos", "Order Details"])
+        self.assertEqual(plan.steps[0].table, "Order Details")
+        self.assertEqual(plan.steps[0].expressions, {"testing": "[Order Details].Cantidad>10"})
+        self.assertEqual(plan.join_strategies, [JOIN_LOOKUP])
+        self.assertEqual(plan.steps[2].inputs, ["01)", "02)"])
+        self.assertEqual(plan.steps[3].operation, "group")
+        self.assertIn("recorrido completo", format_plan(plan))
+
+    def test_multiple_queries(self):
+        """Probar varios planes en el archivo, producto cartesiano y Rushmore."""
+        cartesian, rushmore = load("multiple_queries.out")
+        self.assertEqual(cartesian.name, "Consulta1")
+        self.assertEqual(cartesian.join_strategies, [JOIN_NESTED])
+        self.assertEqual(cartesian.scanned_tables, ["Clientes", "Provincias"])
+        self.assertEqual(cartesian.steps[0].expressions, {"then test": "Clientes.Provincia=Provincias.Codigo"})
+
+        self.assertEqual(rushmore.table_access(), {"Pedidos": {"method": ACCESS_RUSHMORE, "index": "ClienteId"}})
+        self.assertEqual(rushmore.steps[0].expressions["for"], "Pedidos.ClienteId=7 AND Pedidos.Estado='abierto'")
+        self.assertEqual(rushmore.steps[1].operation, "distinct")
+        self.assertEqual(rushmore.to_dict()["scanned_tables"], [])
+
+
+class TestShowPlanCapture(unittest.TestCase):
+    """Pruebas de la lectura de lo añadido a showplan.out."""
+
+    def test_reads_appended_text(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "showplan.out")
+            capture = ShowPlanCapture(path, wait_seconds=0)
+            # Sin archivo ni cambios no hay plan
+            self.assertEqual(capture.read_since(capture.mark()), "")
+
+            Path(path).write_text((SAMPLES / "scan_lookup_join.out").read_text(encoding="utf-8"), encoding="utf-8")
+            marks = capture.mark()
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write((SAMPLES / "index_join.out").read_text(encoding="utf-8"))
+            [plan] = parse_showplan(capture.read_since(marks))
+            self.assertEqual(plan.join_strategies, [JOIN_INDEX])
+
+            # Archivo vaciado y reescrito por el motor: se lee desde el principio
+            marks = capture.mark()
+            Path(path).write_text("--- temp query ---\n01) Scan table 'Pedidos'\n", encoding="utf-8")
+            [plan] = parse_showplan(capture.read_since(marks))
+            self.assertEqual(plan.table_access(), {"Pedidos": {"method": ACCESS_SCAN, "index": None}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la traducción de SQL ANSI a SQL de Access.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from query_rewriter import QueryRewriteError, QueryRewriter
+
+NAMES = ["Pedidos", "Clientes", "Order Details", "Id", "ClienteId", "Nombre", "Apellido", "Unit Price"]
+KEYS = {"pedidos": "Id", "clientes": "Id"}
+
+
+class TestQueryRewriter(unittest.TestCase):
+    """Pruebas de las reescrituras y de la paginación."""
+
+    def setUp(self):
+        self.identifier_calls = 0
+        self.writes = 0
+
+        def identifiers():
+            self.identifier_calls += 1
+            return NAMES
+
+        self.rewriter = QueryRewriter(identifiers, lambda table: KEYS.get(table.lower()),
+                                      change_token=lambda: self.writes)
+
+    def sql(self, query):
+        return self.rewriter.rewrite(query).sql
+
+    def test_limit_to_top(self):
+        """Probar LIMIT, FETCH FIRST, un TOP existente y las subconsultas."""
+        self.assertEqual(self.sql("SELECT * FROM Pedidos ORDER BY Id LIMIT 10;"),
+                         "SELECT TOP 10 * FROM Pedidos ORDER BY Id")
+        self.assertEqual(self.sql("SELECT DISTINCT Nombre FROM Clientes FETCH FIRST 5 ROWS ONLY"),
+                         "SELECT DISTINCT TOP 5 Nombre FROM Clientes")
+        self.assertEqual(self.sql("SELECT TOP 3 * FROM Pedidos LIMIT 10"), "SELECT TOP 3 * FROM Pedidos")
+        self.assertEqual(self.sql("SELECT * FROM Clientes WHERE Id IN (SELECT ClienteId FROM Pedidos LIMIT 2)"),
+                         "SELECT * FROM Clientes WHERE Id IN (SELECT TOP 2 ClienteId FROM Pedidos)")
+
+        # Sin traducción posible
+        for query in ("SELECT * FROM Pedidos LIMIT ?", "SELECT TOP 5 PERCENT * FROM Pedidos LIMIT 2",
+                      "SELECT * FROM (SELECT * FROM Pedidos LIMIT 2 OFFSET 4) AS p",
+                      "SELECT * FROM Pedidos WHERE (Id > 3"):
+            with self.assertRaises(QueryRewriteError):
+                self.rewriter.rewrite(query)
+
+    def test_limit_zero_returns_no_rows(self):
+        """Probar que LIMIT 0 no se traduce a TOP 0, que Jet rechaza."""
+        self.assertEqual(self.sql("SELECT * FROM Pedidos ORDER BY Id LIMIT 0"),
+                         "SELECT * FROM (SELECT * FROM Pedidos) AS [_vacia] WHERE 1=0")
+        self.assertEqual(self.sql("SELECT COUNT(*) FROM Pedidos FETCH FIRST 0 ROWS ONLY"),
+                         "SELECT * FROM (SELECT COUNT(*) FROM Pedidos) AS [_vacia] WHERE 1=0")
+        self.assertEqual(self.sql("SELECT * FROM Clientes WHERE Id IN (SELECT ClienteId FROM Pedidos LIMIT 0)"),
+                         "SELECT * FROM Clientes WHERE Id IN "
+                         "(SELECT * FROM (SELECT ClienteId FROM Pedidos) AS [_vacia] WHERE 1=0)")
+        result = self.rewriter.rewrite("SELECT Nombre FROM Clientes ORDER BY Id LIMIT 0 OFFSET 5")
+        self.assertNotIn("TOP", result.sql)
+        self.assertFalse(result.keyset_used)
+
+    def test_paging_words_as_names(self):
+        """Probar que LIMIT, OFFSET y FETCH sin sus argumentos son nombres de columna."""
+        for query in ("SELECT Limit FROM Orders", "SELECT Offset, Id FROM Orders WHERE Fetch = 3",
+                      "SELECT Id FROM Orders ORDER BY Limit"):
+            result = self.rewriter.rewrite(query)
+            self.assertEqual((result.sql, result.changed), (query, False))
+        self.assertEqual(self.sql("SELECT Limit FROM Orders ORDER BY Offset LIMIT 5"),
+                         "SELECT TOP 5 Limit FROM Orders ORDER BY Offset")
+
+    def test_operators_and_identifiers(self):
+        """Probar operadores ANSI, comillas y nombres con espacios sin tocar las cadenas."""
+        result = self.rewriter.rewrite(
+            'SELECT Nombre || \' \' || "Apellido", `Unit Price` FROM Order Details '
+            "WHERE Nombre ILIKE 'a||b%' AND Id != 3 AND Fecha < CURRENT_DATE AND \"texto\" = 'x'"
+        )
+        self.assertEqual(result.sql,
+                         "SELECT Nombre & ' ' & [Apellido], [Unit Price] FROM [Order Details] "
+                         "WHERE Nombre LIKE 'a||b%' AND Id <> 3 AND Fecha < Date() AND \"texto\" = 'x'")
+        self.assertTrue(result.changed)
+
+        # SQL de Access: sin cambios y con la traducción recordada por huella
+        query = "SELECT TOP 5 [Nombre] FROM [Clientes] WHERE Nombre LIKE 'A*'"
+        first = self.rewriter.rewrite(query)
+        self.assertEqual((first.sql, first.changed, first.cached), (query, False, False))
+        self.assertTrue(self.rewriter.rewrite(query).cached)
+        self.assertEqual(self.identifier_calls, 1)
+
+        self.rewriter.note_statement("ALTER TABLE Clientes ADD COLUMN Nota TEXT(10)")
+        self.assertFalse(self.rewriter.rewrite(query).cached)
+        self.assertEqual(self.identifier_calls, 2)
+
+    def test_push_down_and_union(self):
+        """Probar que TOP baja a la tabla derivada y que la unión se envuelve."""
+        self.assertEqual(self.sql("SELECT p.* FROM (SELECT * FROM Pedidos WHERE ClienteId = 4) AS p LIMIT 5"),
+                         "SELECT TOP 5 p.* FROM (SELECT TOP 5 * FROM Pedidos WHERE ClienteId = 4) AS p")
+        # Con filtro exterior no se puede bajar
+        self.assertEqual(self.sql("SELECT * FROM (SELECT * FROM Pedidos) AS p WHERE Id > 2 LIMIT 5"),
+                         "SELECT TOP 5 * FROM (SELECT * FROM Pedidos) AS p WHERE Id > 2")
+        self.assertEqual(self.sql("SELECT Id FROM Pedidos UNION SELECT Id FROM Clientes ORDER BY Id LIMIT 3"),
+                         "SELECT TOP 3 * FROM (SELECT Id FROM Pedidos UNION SELECT Id FROM Clientes) AS [_union] "
+                         "ORDER BY Id")
+
+    def test_offset_skips_rows(self):
+        """Probar OFFSET sin columna única: TOP m + n y se descartan m filas al leer."""
+        result = self.rewriter.rewrite("SELECT Nombre FROM Clientes ORDER BY Nombre LIMIT 2 OFFSET 3")
+        self.assertEqual(result.sql, "SELECT TOP 5 Nombre FROM Clientes ORDER BY Nombre")
+        rows = [(f"C{n}",) for n in range(5)]
+        self.assertEqual(list(result.rows(["Nombre"], rows)), [("C3",), ("C4",)])
+        self.assertFalse(result.keyset_used)
+
+        mysql = self.rewriter.rewrite("SELECT Nombre FROM Clientes LIMIT 3, 2")
+        self.assertEqual((mysql.sql, mysql.skip_rows, mysql.limit), ("SELECT TOP 5 Nombre FROM Clientes", 3, 2))
+
+    def test_keyset_pagination(self):
+        """Probar que la página siguiente se pide por clave tras leer la anterior."""
+        base = "SELECT * FROM Pedidos WHERE ClienteId = ? ORDER BY Id"
+        first = self.rewriter.rewrite(base + " LIMIT 3", [7])
+        self.assertEqual(first.sql, "SELECT TOP 3 * FROM Pedidos WHERE ClienteId = ? ORDER BY Id")
+        rows = [(11, 7), (15, 7), (18, 7)]
+        self.assertEqual(list(first.rows(["Id", "ClienteId"], rows)), rows)
+
+        second = self.rewriter.rewrite(base + " LIMIT 3 OFFSET 3", [7])
+        self.assertTrue(second.keyset_used)
+        self.assertEqual(second.sql, "SELECT TOP 3 * FROM Pedidos WHERE (ClienteId = ?) AND [Id] > ? ORDER BY Id")
+        self.assertEqual(second.params, [7, 18])
+        self.assertEqual(second.skip_rows, 0)
+        list(second.rows(["Id", "ClienteId"], [(20, 7), (21, 7), (30, 7)]))
+
+        # La tercera página sigue por clave; con otros parámetros no hay clave conocida
+        third = self.rewriter.rewrite(base + " LIMIT 3 OFFSET 6", [7])
+        self.assertEqual(third.params, [7, 30])
+        other = self.rewriter.rewrite(base + " LIMIT 3 OFFSET 3", [8])
+        self.assertFalse(other.keyset_used)
+        self.assertEqual((other.sql, other.skip_rows), ("SELECT TOP 6 * FROM Pedidos WHERE ClienteId = ? ORDER BY Id", 3))
+
+        # Tras una escritura del servidor las claves recordadas ya no valen
+        self.writes += 1
+        after_write = self.rewriter.rewrite(base + " LIMIT 3 OFFSET 3", [7])
+        self.assertFalse(after_write.keyset_used)
+        self.assertEqual(after_write.skip_rows, 3)
+
+        # Una página leída antes de la escritura no deja su clave
+        stale = self.rewriter.rewrite(base + " LIMIT 3", [7])
+        self.writes += 1
+        list(stale.rows(["Id", "ClienteId"], rows))
+        self.assertFalse(self.rewriter.rewrite(base + " LIMIT 3 OFFSET 3", [7]).keyset_used)
+
+
+if __name__ == "__main__":
+    unittest.main()
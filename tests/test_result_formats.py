@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para los formatos de salida legibles por máquina.
+"""
+
+import csv
+import io
+import json
+import sys
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from result_formats import (
+    ColumnarJsonFormatter, CsvFormatter, JsonLinesFormatter, TextFormatter,
+    get_formatter, to_json_value, to_text_value
+)
+from result_shaping import ResultShaper
+
+ROWS = [
+    (1, "Ana", datetime(2024, 3, 1, 10, 30), Decimal("1234.5600"), None, b"\x01\x02"),
+    (2, "Luis", datetime(2024, 3, 2, 8, 0), Decimal("0.0001"), True, None),
+]
+COLUMNS = ["ID", "Nombre", "Fecha", "Importe", "Activo", "Foto"]
+
+
+class TestValueConversion(unittest.TestCase):
+    """Pruebas para la conversión de tipos de Access."""
+
+    def test_json_values(self):
+        """Probar conversión a JSON sin pérdida."""
+        self.assertEqual(to_json_value(datetime(2024, 1, 2, 3, 4, 5)), "2024-01-02T03:04:05")
+        self.assertEqual(to_json_value(date(2024, 1, 2)), "2024-01-02")
+        self.assertEqual(to_json_value(Decimal("12.3400")), "12.3400")
+        self.assertIsNone(to_json_value(None))
+        self.assertIs(to_json_value(True), True)
+        self.assertIsNone(to_json_value(float("nan")))
+        self.assertEqual(to_json_value(b"abc")["$binary"]["length"], 3)
+
+    def test_text_values(self):
+        """Probar conversión a texto."""
+        self.assertEqual(to_text_value(datetime(2024, 1, 2)), "2024-01-02T00:00:00")
+        self.assertIn("3 bytes", to_text_value(b"abc"))
+
+
+class TestFormatters(unittest.TestCase):
+    """Pruebas para los formateadores."""
+
+    def render(self, output_format, **kwargs):
+        shaper = ResultShaper(**kwargs)
+        return shaper.render(COLUMNS, ROWS, formatter=shaper.formatter_for(output_format))
+
+    def test_jsonl(self):
+        """Probar salida JSON Lines."""
+        shaped = self.render("jsonl")
+        records = [json.loads(line) for line in shaped.text.splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["Importe"], "1234.5600")
+        self.assertIsNone(records[0]["Activo"])
+        self.assertEqual(records[1]["Fecha"], "2024-03-02T08:00:00")
+
+    def test_csv(self):
+        """Probar salida CSV con cabecera y NULL vacío."""
+        shaped = self.render("csv")
+        rows = list(csv.reader(io.StringIO(shaped.text)))
+        self.assertEqual(rows[0], COLUMNS)
+        self.assertEqual(rows[1][4], "")
+        self.assertEqual(rows[2][3], "0.0001")
+
+    def test_columnar(self):
+        """Probar JSON columnar compacto."""
+        shaped = self.render("columnar")
+        payload = json.loads(shaped.text)
+        self.assertEqual(payload["columns"], COLUMNS)
+        self.assertEqual(payload["data"][1], ["Ana", "Luis"])
+        self.assertEqual(payload["row_count"], 2)
+        self.assertFalse(payload["truncated"])
+
+    def test_columnar_truncated_is_valid_json(self):
+        """Probar que el JSON columnar sigue siendo válido al truncar."""
+        rows = [(i, "x" * 50) for i in range(1000)]
+        shaper = ResultShaper(max_response_bytes=1500)
+        shaped = shaper.render(["ID", "Texto"], rows, formatter=ColumnarJsonFormatter())
+        payload = json.loads(shaped.text)
+        self.assertTrue(payload["truncated"])
+        self.assertEqual(payload["row_count"], len(payload["data"][0]))
+        self.assertLess(payload["row_count"], 1000)
+
+    def test_json_formats_keep_values_intact(self):
+        """Probar que los formatos JSON no truncan los valores de las celdas."""
+        shaped = ResultShaper(max_cell_chars=5).render(
+            ["Texto"], [("abcdefghij",)], formatter=JsonLinesFormatter(max_cell_chars=5))
+        self.assertEqual(json.loads(shaped.text)["Texto"], "abcdefghij")
+        shaped = ResultShaper(max_cell_chars=5).render(
+            ["Texto"], [("abcdefghij",)], formatter=ColumnarJsonFormatter(max_cell_chars=5))
+        self.assertEqual(json.loads(shaped.text)["data"], [["abcdefghij"]])
+
+    def test_get_formatter(self):
+        """Probar selección de formateador."""
+        self.assertIsInstance(get_formatter(None), TextFormatter)
+        self.assertIsInstance(get_formatter("CSV"), CsvFormatter)
+        with self.assertRaises(ValueError):
+            get_formatter("xml")
+
+
+if __name__ == "__main__":
+    unittest.main()
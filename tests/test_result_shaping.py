@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el control de tamaño de las respuestas.
+"""
+
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from result_shaping import ResponseBudget, ResultShaper
+from streaming import QueryStream
+
+
+class CountingRows:
+    """Iterable que cuenta cuántas filas se han consumido."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.consumed = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.consumed += 1
+            yield row
+
+
+class TestResponseBudget(unittest.TestCase):
+    """Pruebas para el presupuesto de bytes."""
+
+    def test_try_consume_respects_limit(self):
+        """Probar que no se supera el límite de bytes."""
+        budget = ResponseBudget(10)
+        self.assertTrue(budget.try_consume("12345"))
+        self.assertFalse(budget.try_consume("123456"))
+        self.assertTrue(budget.exhausted)
+        self.assertEqual(budget.used, 5)
+        self.assertEqual(budget.remaining, 5)
+
+    def test_counts_utf8_bytes(self):
+        """Probar que se cuentan bytes UTF-8 y no caracteres."""
+        budget = ResponseBudget(3)
+        self.assertFalse(budget.try_consume("ñáé"))
+
+    def test_unlimited(self):
+        """Probar presupuesto sin límite."""
+        budget = ResponseBudget(None)
+        self.assertTrue(budget.try_consume("x" * 100000))
+        self.assertIsNone(budget.remaining)
+
+
+class TestResultShaper(unittest.TestCase):
+    """Pruebas para el formateador de resultados."""
+
+    def test_shape_value_null(self):
+        """Probar formateo de NULL."""
+        self.assertEqual(ResultShaper().shape_value(None), "NULL")
+
+    def test_shape_value_truncates_long_text(self):
+        """Probar truncado de celdas largas (MEMO)."""
+        shaper = ResultShaper(max_cell_chars=10)
+        text = shaper.shape_value("a" * 25)
+        self.assertTrue(text.startswith("a" * 10))
+        self.assertIn("+15", text)
+
+    def test_shape_value_binary_summary(self):
+        """Probar resumen de columnas binarias (OLE)."""
+        shaper = ResultShaper()
+        text = shaper.shape_value(b"\x00\x01" * 1000)
+        self.assertIn("2000 bytes", text)
+        self.assertIn("sha1:", text)
+        self.assertLess(len(text), 60)
+
+    def test_project_columns(self):
+        """Probar proyección de columnas sin distinguir mayúsculas."""
+        self.assertEqual(ResultShaper.project(["ID", "Nombre", "Foto"], ["nombre", "id"]), [1, 0])
+        self.assertEqual(ResultShaper.project(["ID", "Nombre"], None), [0, 1])
+
+    def test_project_unknown_column(self):
+        """Probar error con columnas inexistentes."""
+        with self.assertRaises(ValueError):
+            ResultShaper.project(["ID"], ["Otra"])
+
+    def test_render_table_max_rows(self):
+        """Probar que se detiene la lectura al alcanzar max_rows."""
+        rows = CountingRows([(i, f"fila {i}") for i in range(100)])
+        shaped = ResultShaper().render_table(["ID", "Texto"], rows, max_rows=5)
+
+        self.assertEqual(shaped.rows_rendered, 5)
+        self.assertTrue(shaped.truncated)
+        self.assertEqual(shaped.truncation_reason, "rows")
+        self.assertLessEqual(rows.consumed, 6)
+        self.assertIn("fila 4", shaped.text)
+        self.assertNotIn("fila 5", shaped.text)
+
+    def test_render_table_byte_budget(self):
+        """Probar que el presupuesto de bytes se aplica durante el recorrido."""
+        rows = CountingRows([(i, "x" * 100) for i in range(10000)])
+        shaper = ResultShaper(max_response_bytes=2000, max_cell_chars=None)
+        shaped = shaper.render_table(["ID", "Texto"], rows)
+
+        self.assertTrue(shaped.truncated)
+        self.assertEqual(shaped.truncation_reason, "bytes")
+        self.assertLessEqual(len(shaped.text.encode("utf-8")), 2000)
+        self.assertLess(rows.consumed, 100)
+        self.assertIn("2000 bytes", shaper.truncation_notice(shaped))
+
+    def test_render_table_projection(self):
+        """Probar proyección de columnas en la tabla."""
+        shaped = ResultShaper().render_table(["ID", "Foto"], [(1, b"abc")], project_columns=["ID"])
+        self.assertEqual(shaped.columns, ["ID"])
+        self.assertNotIn("binario", shaped.text)
+
+    def test_from_config(self):
+        """Probar creación desde la configuración."""
+        shaper = ResultShaper.from_config({"results": {"max_response_bytes": 10, "max_cell_chars": 3}})
+        self.assertEqual(shaper.max_response_bytes, 10)
+        self.assertEqual(shaper.max_cell_chars, 3)
+
+        overridden = shaper.with_overrides(max_cell_chars=50)
+        self.assertEqual(overridden.max_cell_chars, 50)
+        self.assertEqual(overridden.max_response_bytes, 10)
+
+
+class TestQueryStream(unittest.TestCase):
+    """Pruebas para la lectura por lotes."""
+
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE t (id INTEGER, nombre TEXT)")
+        self.connection.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"n{i}") for i in range(25)])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_iterates_in_batches(self):
+        """Probar iteración por lotes con fetchmany."""
+        cursor = self.connection.execute("SELECT id, nombre FROM t ORDER BY id")
+        with QueryStream(cursor, batch_size=10) as stream:
+            self.assertEqual(stream.columns, ["id", "nombre"])
+            batches = list(stream.iter_batches())
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+        self.assertEqual(stream.rows_fetched, 25)
+        self.assertTrue(stream.closed)
+
+    def test_iterates_rows(self):
+        """Probar iteración fila a fila."""
+        cursor = self.connection.execute("SELECT id FROM t ORDER BY id")
+        stream = QueryStream(cursor, batch_size=7)
+        self.assertEqual([row[0] for row in stream], list(range(25)))
+
+
+if __name__ == "__main__":
+    unittest.main()
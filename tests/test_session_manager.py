@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para las sesiones con varias bases de datos.
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from session_manager import SOURCE_COLUMN, SessionManager
+from sqlite_backend import SQLiteDatabaseManager
+
+
+def yearly_database(year, rows):
+    """Base de datos en memoria con la tabla Ventas de un año."""
+    manager = SQLiteDatabaseManager()
+    manager.connection.execute("CREATE TABLE Ventas (id INTEGER, region TEXT, importe REAL)")
+    manager.connection.executemany(
+        "INSERT INTO Ventas VALUES (?, ?, ?)",
+        [(year * 1000 + i, region, amount) for i, (region, amount) in enumerate(rows)]
+    )
+    manager.connection.commit()
+    return manager
+
+
+class TestSessionManager(unittest.TestCase):
+    """Pruebas para SessionManager."""
+
+    def setUp(self):
+        self.sessions = SessionManager(max_workers=4)
+        self.sessions.attach("2022", yearly_database(2022, [("norte", 10.0), ("sur", 5.0)]), "ventas_2022.accdb")
+        self.sessions.attach("2023", yearly_database(2023, [("norte", 7.0), ("norte", 3.0), ("este", 1.0)]),
+                             "ventas_2023.accdb")
+
+    def tearDown(self):
+        self.sessions.close_all()
+
+    def test_attach_and_close(self):
+        """Probar alias duplicados, búsqueda y cierre."""
+        self.assertEqual([s.alias for s in self.sessions.sessions()], ["2022", "2023"])
+        self.assertEqual(self.sessions.get("2023").database_path, "ventas_2023.accdb")
+        with self.assertRaises(ValueError):
+            self.sessions.attach("2022", SQLiteDatabaseManager())
+        self.sessions.close("2022")
+        self.assertNotIn("2022", self.sessions)
+        with self.assertRaises(ValueError):
+            self.sessions.get("2022")
+        with self.assertRaises(ValueError):
+            self.sessions.open("2024", "ventas_2024.accdb")
+
+    def test_open_with_factory(self):
+        """Probar apertura con la fábrica de gestores."""
+        class Manager(SQLiteDatabaseManager):
+            def connect(self, database_path, password="dpddpd"):
+                self.database_path = database_path
+                return database_path != "mala.accdb"
+
+        sessions = SessionManager(Manager)
+        self.assertEqual(sessions.open("a", "a.accdb").database_path, "a.accdb")
+        with self.assertRaises(ValueError):
+            sessions.open("b", "mala.accdb")
+        self.assertEqual(len(sessions), 1)
+
+    def test_fan_out_union(self):
+        """Probar unión con columna de origen y tiempos por base de datos."""
+        result = self.sessions.fan_out("SELECT id, region, importe FROM Ventas ORDER BY id")
+        self.assertEqual(result.columns, [SOURCE_COLUMN, "id", "region", "importe"])
+        self.assertEqual(len(result.rows), 5)
+        self.assertEqual(result.rows[0], ("2022", 2022000, "norte", 10.0))
+        self.assertEqual(result.rows[-1][0], "2023")
+        self.assertEqual(result.failures, [])
+        self.assertTrue(all(r.elapsed_seconds >= 0 for r in result.results))
+
+    def test_fan_out_aggregate(self):
+        """Probar que los resultados parciales se vuelven a agregar."""
+        result = self.sessions.fan_out(
+            "SELECT region, SUM(importe) AS total, COUNT(*) AS n, MAX(importe) AS maximo "
+            "FROM Ventas GROUP BY region",
+            merge="aggregate", group_by=["region"],
+            aggregates={"total": "sum", "n": "count", "maximo": "max"}
+        )
+        self.assertEqual(result.columns, ["region", "total", "n", "maximo"])
+        merged = {row[0]: row[1:] for row in result.rows}
+        self.assertEqual(merged["norte"], (20.0, 3, 10.0))
+        self.assertEqual(merged["sur"], (5.0, 1, 5.0))
+        self.assertEqual(merged["este"], (1.0, 1, 1.0))
+
+        with self.assertRaises(ValueError):
+            self.sessions.fan_out("SELECT region FROM Ventas", merge="aggregate",
+                                  group_by=["region"], aggregates={"importe": "avg"})
+
+    def test_fan_out_partial_failure(self):
+        """Probar que el fallo de una base de datos no aborta las demás."""
+        broken = SQLiteDatabaseManager()
+        self.sessions.attach("rota", broken, "rota.accdb")
+        different = SQLiteDatabaseManager()
+        different.connection.execute("CREATE TABLE Ventas (id INTEGER, otra TEXT, importe REAL)")
+        self.sessions.attach("distinta", different, "distinta.accdb")
+
+        result = self.sessions.fan_out("SELECT * FROM Ventas")
+        self.assertEqual(len(result.rows), 5)
+        failures = {r.alias: r.error for r in result.failures}
+        self.assertEqual(set(failures), {"rota", "distinta"})
+        self.assertIn("no such table", failures["rota"])
+        self.assertIn("Columnas distintas", failures["distinta"])
+
+    def test_fan_out_selected_sessions_and_limit(self):
+        """Probar selección de sesiones y límite de filas por base de datos."""
+        result = self.sessions.fan_out("SELECT id FROM Ventas", aliases=["2023"], max_rows_per_database=2)
+        self.assertEqual(len(result.rows), 2)
+        self.assertTrue(result.results[0].truncated)
+        with self.assertRaises(ValueError):
+            self.sessions.fan_out("SELECT id FROM Ventas", aliases=["1999"])
+
+    def test_fan_out_runs_in_parallel(self):
+        """Probar que las bases de datos se consultan en hilos distintos a la vez."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        class SlowManager(SQLiteDatabaseManager):
+            def open_query(self, query, params=None, batch_size=None):
+                barrier.wait()
+                return super().open_query(query, params, batch_size)
+
+        sessions = SessionManager(max_workers=2)
+        for alias in ("a", "b"):
+            manager = SlowManager()
+            manager.connection.execute("CREATE TABLE t (x INTEGER)")
+            sessions.attach(alias, manager)
+        result = sessions.fan_out("SELECT x FROM t")
+        self.assertEqual(result.failures, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el registro de consultas lentas.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from slow_query_log import SlowQueryLog, normalize_sql, redact_parameter
+
+
+class TestNormalizeSql(unittest.TestCase):
+    """Pruebas para la normalización de sentencias."""
+
+    def test_literals(self):
+        """Probar sustitución de cadenas, fechas y números."""
+        self.assertEqual(
+            normalize_sql("SELECT TOP 5 * FROM [Pedidos 2024]\n WHERE Nombre = 'O''Brien' AND Fecha > #2024-01-01# AND Importe > 10.5"),
+            "SELECT TOP ? * FROM [Pedidos 2024] WHERE Nombre = ? AND Fecha > ? AND Importe > ?"
+        )
+
+    def test_identifiers_with_digits(self):
+        """Probar que no se alteran identificadores con dígitos."""
+        self.assertEqual(normalize_sql("SELECT Campo1 FROM T2 WHERE x=3"), "SELECT Campo1 FROM T2 WHERE x=?")
+
+    def test_in_lists(self):
+        """Probar que las listas IN de distinto tamaño se agrupan."""
+        self.assertEqual(normalize_sql("SELECT * FROM T WHERE Id IN (1, 2, 3)"),
+                         normalize_sql("SELECT * FROM T WHERE Id IN (?,?)"))
+
+    def test_redact_parameter(self):
+        """Probar descripción de parámetros redactados."""
+        self.assertEqual(redact_parameter("secreto"), "<str:7>")
+        self.assertEqual(redact_parameter(42), "<int>")
+        self.assertEqual(redact_parameter(None), "NULL")
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    """Pruebas para el fichero de consultas lentas."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "lentas", "slow.jsonl")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read_lines(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_threshold(self):
+        """Probar que solo se registran las consultas por encima del umbral."""
+        log = SlowQueryLog(self.path, threshold_ms=100)
+        self.assertFalse(log.record("SELECT 1", None, 0.05, 0.04))
+        self.assertTrue(log.record("SELECT * FROM T WHERE Id = ?", ["clave"], 0.08, 0.03, rows=7, tool="execute_query"))
+
+        entries = self.read_lines(self.path)
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["parameters"], ["<str:5>"])
+        self.assertEqual(entry["tool"], "execute_query")
+        self.assertEqual(entry["rows"], 7)
+        self.assertAlmostEqual(entry["execute_ms"], 80, places=3)
+        self.assertAlmostEqual(entry["fetch_ms"], 30, places=3)
+        self.assertAlmostEqual(entry["duration_ms"], 110, places=3)
+
+    def test_parameters_without_redaction(self):
+        """Probar que se pueden guardar los valores de los parámetros."""
+        log = SlowQueryLog(self.path, threshold_ms=0, redact_parameters=False)
+        log.record("SELECT * FROM T WHERE Id = ?", [5, b"\x00"], 0.001)
+        self.assertEqual(self.read_lines(self.path)[0]["parameters"], [5, "<bytes:1>"])
+
+    def test_failed_statements(self):
+        """Probar que las sentencias fallidas se registran con su error y se cuentan en el resumen."""
+        log = SlowQueryLog(self.path, threshold_ms=100)
+        self.assertTrue(log.record("SELECT * FROM T WHERE Id = 1", None, 30.0, tool="execute_query",
+                                   error="Tiempo de consulta agotado"))
+        log.record("SELECT * FROM T WHERE Id = 2", None, 0.2, rows=1)
+        [entry, ok] = self.read_lines(self.path)
+        self.assertEqual(entry["error"], "Tiempo de consulta agotado")
+        self.assertNotIn("error", ok)
+        self.assertEqual(log.top()[0]["errors"], 1)
+
+    def test_disabled(self):
+        """Probar registro desactivado."""
+        log = SlowQueryLog(self.path, threshold_ms=0, enabled=False)
+        self.assertFalse(log.record("SELECT 1", None, 1.0))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_rotation(self):
+        """Probar rotación por tamaño conservando backup_count ficheros."""
+        log = SlowQueryLog(self.path, threshold_ms=0, max_bytes=600, backup_count=2)
+        for i in range(30):
+            log.record(f"SELECT * FROM T WHERE Id = {i}", None, 0.5)
+
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        for path in (self.path, self.path + ".1", self.path + ".2"):
+            self.assertLessEqual(os.path.getsize(path), 600)
+
+        sqls = [entry["sql"] for entry in log.iter_entries()]
+        self.assertEqual(sqls[-1], "SELECT * FROM T WHERE Id = 29")
+        self.assertEqual(sqls, sorted(sqls, key=lambda sql: int(sql.rsplit(" ", 1)[1])))
+
+    def test_top(self):
+        """Probar agregación por sentencia normalizada."""
+        log = SlowQueryLog(self.path, threshold_ms=0)
+        log.record("SELECT * FROM A WHERE Id = 1", None, 0.2, 0.1, rows=1, tool="execute_query")
+        log.record("SELECT * FROM A WHERE Id = 2", None, 0.5, 0.1, rows=3, tool="get_records")
+        log.record("SELECT COUNT(*) FROM B", None, 0.4, tool="execute_query")
+
+        top = log.top()
+        self.assertEqual(top[0]["normalized_sql"], "SELECT * FROM A WHERE Id = ?")
+        self.assertEqual(top[0]["count"], 2)
+        self.assertAlmostEqual(top[0]["total_ms"], 900, places=3)
+        self.assertAlmostEqual(top[0]["max_ms"], 600, places=3)
+        self.assertEqual(top[0]["example_sql"], "SELECT * FROM A WHERE Id = 2")
+        self.assertEqual(top[0]["tools"], ["execute_query", "get_records"])
+
+        by_count = log.top(sort_by="count", tool="execute_query")
+        self.assertEqual([group["count"] for group in by_count], [1, 1])
+
+        with self.assertRaises(ValueError):
+            log.top(sort_by="rows")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la respuesta rápida al saludo inicial.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from startup_manifest import load_manifest, save_manifest, serve_handshake
+
+INITIALIZE = {"protocolVersion": "2025-11-25", "capabilities": {"tools": {"listChanged": False}},
+              "serverInfo": {"name": "mcp-access-server", "version": "1.0.0"}}
+TOOLS = {"tools": [{"name": "list_tables", "inputSchema": {"type": "object", "properties": {}}}]}
+
+
+def messages(*items):
+    return io.BytesIO(b"".join(json.dumps(item).encode("utf-8") + b"\n" for item in items))
+
+
+class TestStartupManifest(unittest.TestCase):
+    """Pruebas del manifiesto y del saludo inicial."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "manifiesto", "startup-manifest.json")
+        save_manifest(self.path, "clave", INITIALIZE, TOOLS, ["2024-11-05", "2025-11-25"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_manifest_key(self):
+        """Probar que un manifiesto de otra versión del servidor se ignora."""
+        self.assertEqual(load_manifest(self.path, "clave")["tools"], TOOLS)
+        self.assertIsNone(load_manifest(self.path, "otra"))
+        self.assertIsNone(load_manifest(self.path + ".no", "clave"))
+
+    def test_handshake_and_replay(self):
+        """Probar las respuestas del manifiesto y las líneas que se entregan al servidor."""
+        initialize = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+                      "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                                 "clientInfo": {"name": "cliente", "version": "1"}}}
+        initialized = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+        call = {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "list_tables"}}
+        stdin = messages(initialize, initialized, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}, call,
+                         {"jsonrpc": "2.0", "id": 4, "method": "tools/list"})
+        stdout = io.BytesIO()
+        warmed = []
+        handshake = serve_handshake(load_manifest(self.path, "clave"), stdin, stdout, lambda: warmed.append(1))
+
+        replies = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([reply["id"] for reply in replies], [1, 2])
+        # Versión del cliente admitida; si no, la del manifiesto
+        self.assertEqual(replies[0]["result"], dict(INITIALIZE, protocolVersion="2024-11-05"))
+        self.assertEqual(replies[1]["result"], TOOLS)
+        self.assertEqual([json.loads(line) for line in handshake.lines], [initialize, initialized, call])
+        self.assertEqual(handshake.initialize_id, 1)
+        # El resto de stdin queda para el servidor
+        self.assertEqual(json.loads(stdin.readline())["id"], 4)
+
+    def test_requests_before_initialize(self):
+        """Probar que lo que no es el saludo se deja entero al servidor."""
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        stdout = io.BytesIO()
+        handshake = serve_handshake(load_manifest(self.path, "clave"), messages(request), stdout)
+        self.assertEqual(stdout.getvalue(), b"")
+        self.assertEqual((len(handshake.lines), handshake.initialize_id), (1, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para el registro declarativo de herramientas.
+"""
+
+import asyncio
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from tool_registry import JSONSCHEMA_AVAILABLE, ToolRegistrationError, ToolRegistry
+
+SIMPLE_SCHEMA = {
+    "type": "object",
+    "properties": {"table_name": {"type": "string"}},
+    "required": ["table_name"]
+}
+
+
+class TestToolRegistry(unittest.TestCase):
+    """Pruebas para ToolRegistry."""
+
+    def setUp(self):
+        self.registry = ToolRegistry(default_timeouts={"lenta": 60})
+
+    def test_register_and_list(self):
+        """Probar registro y lista de herramientas construida una vez."""
+        @self.registry.tool("primera", "Primera herramienta", SIMPLE_SCHEMA)
+        async def primera(arguments):
+            return [arguments["table_name"]]
+
+        @self.registry.tool("lenta", "Segunda herramienta", {"type": "object", "properties": {}})
+        async def lenta(arguments):
+            return []
+
+        tools = self.registry.list_tools()
+        self.assertEqual([tool.name for tool in tools], ["primera", "lenta"])
+        self.assertIs(self.registry.list_tools(), tools)
+        self.assertEqual(tools[0].inputSchema, SIMPLE_SCHEMA)
+        self.assertEqual(self.registry.get("lenta").timeout, 60)
+        self.assertIsNone(self.registry.get("primera").timeout)
+        self.assertIn("primera", self.registry)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_dispatch(self):
+        """Probar ejecución por nombre."""
+        @self.registry.tool("eco", "Eco", SIMPLE_SCHEMA)
+        async def eco(arguments):
+            return [arguments["table_name"]]
+
+        self.assertEqual(asyncio.run(self.registry.dispatch("eco", {"table_name": "T"})), ["T"])
+        with self.assertRaises(KeyError):
+            asyncio.run(self.registry.dispatch("otra", {}))
+
+    def test_invalid_schemas(self):
+        """Probar que los esquemas incoherentes se rechazan al registrar."""
+        async def handler(arguments):
+            return []
+
+        invalid = [
+            {"type": "array"},
+            {"type": "object", "properties": {}, "required": ["falta"]},
+            {"type": "object", "properties": {"x": {"description": "sin tipo"}}},
+            {"type": "object", "properties": {"x": {"type": "entero"}}},
+        ]
+        for index, schema in enumerate(invalid):
+            with self.assertRaises(ToolRegistrationError):
+                self.registry.tool(f"mala{index}", "Mala", schema)(handler)
+
+    @unittest.skipUnless(JSONSCHEMA_AVAILABLE, "jsonschema no disponible")
+    def test_full_validation_on_first_list(self):
+        """Probar que la validación con jsonschema se hace al construir la lista, no al registrar."""
+        async def handler(arguments):
+            return []
+
+        self.registry.tool("mala", "Mala", {"type": "object", "properties": {"x": {"type": "string",
+                                                                                 "minLength": -1}}})(handler)
+        with self.assertRaises(ToolRegistrationError):
+            self.registry.list_tools()
+
+    def test_duplicate(self):
+        """Probar que no se puede registrar dos veces el mismo nombre."""
+        async def handler(arguments):
+            return []
+
+        self.registry.tool("una", "Una", SIMPLE_SCHEMA)(handler)
+        with self.assertRaises(ToolRegistrationError):
+            self.registry.tool("una", "Otra", SIMPLE_SCHEMA)(handler)
+
+    def test_max_concurrency(self):
+        """Probar que max_concurrency limita las ejecuciones simultáneas."""
+        state = {"active": 0, "peak": 0}
+
+        @self.registry.tool("exclusiva", "Exclusiva", {"type": "object", "properties": {}}, max_concurrency=1)
+        async def exclusiva(arguments):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return []
+
+        async def run():
+            await asyncio.gather(*(self.registry.dispatch("exclusiva", {}) for _ in range(5)))
+
+        asyncio.run(run())
+        self.assertEqual(state["peak"], 1)
+
+
+class TestServerRegistry(unittest.TestCase):
+    """Pruebas sobre las herramientas declaradas por el servidor."""
+
+    def test_server_tools(self):
+        """Probar que list_tools devuelve la lista precalculada."""
+        import mcp_access_server
+
+        tools = asyncio.run(mcp_access_server.handle_list_tools())
+        names = [tool.name for tool in tools]
+        self.assertEqual(len(names), len(set(names)))
+        for expected in ("connect_database", "execute_query", "get_records", "export_query", "get_server_stats"):
+            self.assertIn(expected, names)
+        self.assertIs(asyncio.run(mcp_access_server.handle_list_tools()), tools)
+        self.assertEqual(mcp_access_server.tool_registry.get("export_query").max_concurrency, 1)
+
+    def test_unknown_tool(self):
+        """Probar la respuesta ante una herramienta desconocida."""
+        import mcp_access_server
+
+        response = asyncio.run(mcp_access_server.handle_call_tool("no_existe", {}))
+        self.assertIn("Herramienta desconocida", response[0].text)
+
+    def test_catalog_tools_leave_event_loop(self):
+        """Probar que las herramientas del catálogo esperan a la conexión fuera del bucle de eventos."""
+        import mcp_access_server
+
+        threads = []
+
+        def list_tables():
+            threads.append(threading.current_thread())
+            return ["Pedidos"]
+
+        with patch.object(mcp_access_server.db_manager, "list_tables", list_tables):
+            response = asyncio.run(mcp_access_server.handle_call_tool("list_tables", {}))
+        self.assertIn("Pedidos", response[0].text)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Pruebas unitarias para la escritura diferida de inserciones.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from metrics import MetricsRegistry
+from write_behind import WriteBehindBuffer, parse_token
+
+
+class Locked(Exception):
+    pass
+
+
+class FakeWriter:
+    """Ejecuta executemany registrándolo; falla con 'MALA' o con un bloqueo simulado."""
+
+    def __init__(self):
+        self.calls = []
+        self.locked = False
+        self.written = threading.Event()
+
+    def execute_many(self, query, rows):
+        if self.locked:
+            raise Locked("currently locked")
+        if any("MALA" in row for row in rows):
+            raise ValueError("valor no válido")
+        self.calls.append((query, [list(row) for row in rows]))
+        self.written.set()
+
+
+class TestWriteBehindBuffer(unittest.TestCase):
+    """Pruebas del búfer de inserciones."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.journal = os.path.join(self.directory.name, "diario", "ventas.jsonl")
+        self.writer = FakeWriter()
+
+    def make(self, **options):
+        options.setdefault("max_delay_seconds", 60)
+        buffer = WriteBehindBuffer(self.writer.execute_many, journal_path=self.journal,
+                                   is_retryable=lambda error: isinstance(error, Locked),
+                                   registry=MetricsRegistry(), **options)
+        buffer.start()
+        self.addCleanup(buffer.close, False)
+        return buffer
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("La condición no se cumplió a tiempo")
+            time.sleep(0.01)
+
+    def test_flush_on_size(self):
+        """Probar que al llegar a max_rows se escribe un único executemany."""
+        buffer = self.make(max_rows=3)
+        tokens = [buffer.enqueue("Lecturas", {"Sensor": n, "Valor": n * 1.5}) for n in range(3)]
+        self.wait_for(lambda: buffer.pending_rows == 0)
+        self.assertEqual(len(self.writer.calls), 1)
+        query, rows = self.writer.calls[0]
+        self.assertEqual(query, "INSERT INTO [Lecturas] ([Sensor], [Valor]) VALUES (?, ?)")
+        self.assertEqual(rows, [[0, 0.0], [1, 1.5], [2, 3.0]])
+        self.assertEqual([buffer.token_status(token) for token in tokens], ["flushed"] * 3)
+        self.assertEqual(buffer.token_status("wb-99"), "unknown")
+
+    def test_flush_on_delay(self):
+        """Probar que una fila no espera más de max_delay_seconds."""
+        buffer = self.make(max_rows=1000, max_delay_seconds=0.05)
+        token = buffer.enqueue("Lecturas", {"Sensor": 1})
+        self.assertEqual(buffer.token_status(token), "pending")
+        self.assertTrue(self.writer.written.wait(2))
+        self.wait_for(lambda: buffer.token_status(token) == "flushed")
+
+    def test_bad_rows_fail_alone(self):
+        """Probar que una fila errónea se descarta sin arrastrar al resto del lote."""
+        buffer = self.make(max_rows=1000)
+        good = buffer.enqueue("Lecturas", {"Valor": "1"})
+        bad = buffer.enqueue("Lecturas", {"Valor": "MALA"})
+        other = buffer.enqueue("Eventos", {"Tipo": "x"})
+        result = buffer.flush("lecturas")
+        self.assertEqual(result.rows, 1)
+        self.assertEqual(result.failed, [(bad, "valor no válido")])
+        self.assertEqual(buffer.token_status(good), "flushed")
+        self.assertEqual(buffer.token_status(bad), "failed: valor no válido")
+        self.assertEqual(buffer.token_status(other), "pending")
+        self.assertEqual(result.remaining, 1)
+
+    def test_journal_survives_restart(self):
+        """Probar que lo pendiente se recupera del diario con los mismos identificadores."""
+        buffer = self.make(max_rows=1000)
+        self.writer.locked = True
+        first = buffer.enqueue("Lecturas", {"Sensor": 1})
+        second = buffer.enqueue("Lecturas", {"Sensor": 2})
+        result = buffer.flush()
+        self.assertEqual(result.retry_error, "currently locked")
+        self.assertEqual(result.remaining, 2)
+        # Caída: no se escribe nada al cerrar
+        buffer.close(flush=False)
+
+        self.writer.locked = False
+        restarted = self.make(max_rows=1000)
+        self.assertEqual(restarted.pending_rows, 2)
+        self.assertEqual(restarted.token_status(second), "pending")
+        result = restarted.flush()
+        self.assertEqual(result.rows, 2)
+        self.assertEqual(self.writer.calls[0][1], [[1], [2]])
+        self.assertEqual(restarted.token_status(first), "flushed")
+        self.assertEqual(parse_token(restarted.enqueue("Lecturas", {"Sensor": 3})), 3)
+        restarted.flush()
+        restarted.close(flush=False)
+
+        # Sin nada pendiente el diario solo guarda el contador: los identificadores no se repiten
+        with open(self.journal, encoding="utf-8") as handle:
+            self.assertEqual(handle.read(), '{"next_token": 4}\n')
+        self.assertEqual(self.make().enqueue("Lecturas", {"Sensor": 4}), "wb-4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark de importación de ficheros (import_file).
+
+Genera un CSV o JSON Lines sintético y mide las filas por segundo de
+``FileImporter``:
+
+- contra SQLite (backend de referencia, siempre disponible)
+- contra una base de datos Access con ``--access`` (requiere pyodbc y el
+  driver de Access); se crea una tabla temporal que se borra al terminar
+
+Uso:
+    python tools/benchmark_import.py [--rows 100000] [--format csv] [--batch-size 1000]
+                                     [--target 10000] [--access C:\\datos\\prueba.accdb]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from data_import import FileImporter  # noqa: E402
+
+TABLE_NAME = "BenchmarkImport"
+TABLE_COLUMNS = [
+    {"name": "Id", "type": "LONG", "primary_key": True},
+    {"name": "Nombre", "type": "TEXT(100)"},
+    {"name": "Alta", "type": "DATETIME"},
+    {"name": "Importe", "type": "DOUBLE"},
+    {"name": "Activo", "type": "BIT"},
+]
+
+
+def print_status(message, status="INFO"):
+    """Imprime mensajes con formato"""
+    icons = {
+        "INFO": "ℹ️",
+        "SUCCESS": "✅",
+        "ERROR": "❌",
+        "WARNING": "⚠️"
+    }
+    print(f"{icons.get(status, 'ℹ️')} {message}")
+
+
+def generate_file(path: str, rows: int, file_format: str):
+    """Escribir un fichero sintético con ``rows`` filas."""
+    start = datetime(2020, 1, 1)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        if file_format == "csv":
+            handle.write("Id,Nombre,Alta,Importe,Activo\n")
+        for number in range(1, rows + 1):
+            values = [number, f"Cliente {number % 997}", (start + timedelta(minutes=number)).isoformat(sep=" "),
+                      round(number * 1.37 % 10000, 2), "true" if number % 3 else "false"]
+            if file_format == "csv":
+                handle.write(",".join(str(value) for value in values) + "\n")
+            else:
+                handle.write(json.dumps(dict(zip(["Id", "Nombre", "Alta", "Importe", "Activo"], values))) + "\n")
+
+
+def benchmark_sqlite(source_path: str, batch_size: int):
+    """Importar en una base de datos SQLite temporal."""
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "benchmark.db"))
+        definitions = ", ".join(f"[{column['name']}] {column['type']}" for column in TABLE_COLUMNS)
+        connection.execute(f"CREATE TABLE {TABLE_NAME} ({definitions})")
+        schema = [{"column_name": name, "data_type": data_type.upper(), "size": 255, "nullable": True,
+                   "default_value": None}
+                  for _, name, data_type, _, _, _ in connection.execute(f"PRAGMA table_info({TABLE_NAME})")]
+
+        def insert_many(query, rows):
+            connection.executemany(query, [[value.isoformat(sep=" ") if isinstance(value, datetime) else value
+                                            for value in row] for row in rows])
+            connection.commit()
+
+        try:
+            return FileImporter(batch_size=batch_size).import_file(source_path, TABLE_NAME, insert_many,
+                                                                   schema=schema)
+        finally:
+            connection.close()
+
+
+def benchmark_access(source_path: str, database_path: str, batch_size: int):
+    """Importar en una tabla temporal de una base de datos Access."""
+    from mcp_access_server import AccessDatabaseManager
+
+    manager = AccessDatabaseManager()
+    if not manager.connect(database_path):
+        raise RuntimeError(f"No se pudo conectar a {database_path}")
+    try:
+        if TABLE_NAME.lower() in (table.lower() for table in manager.list_tables()):
+            manager.drop_table(TABLE_NAME)
+        manager.create_table(TABLE_NAME, TABLE_COLUMNS)
+        try:
+            return FileImporter(batch_size=batch_size).import_file(
+                source_path, TABLE_NAME, manager.execute_many, schema=manager.get_table_schema(TABLE_NAME)
+            )
+        finally:
+            manager.drop_table(TABLE_NAME)
+    finally:
+        manager.disconnect()
+
+
+def report(label: str, result, target: float) -> bool:
+    print(f"{label}: {result.rows_imported} filas en {result.elapsed_seconds:.2f} s "
+          f"({result.rows_per_second:.0f} filas/s, {result.batches} lotes, {result.rows_rejected} rechazadas)")
+    return result.rows_per_second >= target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importación de ficheros")
+    parser.add_argument("--rows", type=int, default=100000, help="Filas del fichero (por defecto: 100000)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="Formato (por defecto: csv)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Filas por lote (por defecto: 1000)")
+    parser.add_argument("--target", type=float, default=10000.0,
+                        help="Objetivo de filas/s contra SQLite (por defecto: 10000)")
+    parser.add_argument("--access", metavar="RUTA", help="Medir también contra esta base de datos Access")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, f"datos.{args.format}")
+        generate_file(source_path, args.rows, args.format)
+        print_status(f"Fichero de prueba: {args.rows} filas ({os.path.getsize(source_path)} bytes, {args.format})")
+
+        passed = report("SQLite", benchmark_sqlite(source_path, args.batch_size), args.target)
+        if args.access:
+            try:
+                report("Access", benchmark_access(source_path, args.access, args.batch_size), 0)
+            except Exception as e:
+                print_status(f"No se pudo medir contra Access: {e}", "ERROR")
+
+    if passed:
+        print_status(f"Objetivo cumplido contra SQLite (>= {args.target:.0f} filas/s)", "SUCCESS")
+        return 0
+    print_status(f"Objetivo no cumplido contra SQLite (< {args.target:.0f} filas/s)", "WARNING")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque del servidor MCP Access.
+
+Mide, en procesos nuevos (como los lanza el cliente MCP en cada sesión):
+
+- el tiempo de importar ``mcp_access_server``
+- el tiempo desde que se lanza el servidor hasta la primera respuesta de
+  ``tools/list`` por stdio (initialize + initialized + tools/list); a partir
+  del segundo arranque se responde desde el manifiesto de arranque
+  (``server.fast_startup``) sin esperar a importar el SDK de MCP
+
+Uso:
+    python tools/benchmark_startup.py [--runs 10] [--target-ms 200] [--importtime 15]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+SERVER_SCRIPT = SRC_DIR / "mcp_access_server.py"
+
+IMPORT_SNIPPET = (
+    "import sys, time; sys.path.insert(0, {src!r}); start = time.perf_counter(); "
+    "import mcp_access_server; print((time.perf_counter() - start) * 1000)"
+)
+
+
+def print_status(message, status="INFO"):
+    """Imprime mensajes con formato"""
+    icons = {
+        "INFO": "ℹ️",
+        "SUCCESS": "✅",
+        "ERROR": "❌",
+        "WARNING": "⚠️"
+    }
+    print(f"{icons.get(status, 'ℹ️')} {message}")
+
+
+def measure_import() -> float:
+    """Tiempo (ms) de importar el servidor en un proceso nuevo."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(src=str(SRC_DIR))],
+        capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def _send(process, message):
+    process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+    process.stdin.flush()
+
+
+def _read_response(process, request_id, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("El servidor cerró la salida sin responder")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+    raise TimeoutError("Sin respuesta del servidor")
+
+
+def measure_first_list_tools() -> tuple:
+    """Tiempo (ms) hasta la primera respuesta de tools/list y número de herramientas."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SERVER_SCRIPT)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        env=dict(os.environ, PYTHONUNBUFFERED="1")
+    )
+    try:
+        _send(process, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "benchmark-startup", "version": "1.0.0"}
+            }
+        })
+        _read_response(process, 1)
+        _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}})
+        response = _read_response(process, 2)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return elapsed_ms, len(response.get("result", {}).get("tools", []))
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def show_import_profile(top: int):
+    """Mostrar los módulos que más tardan en importarse (python -X importtime)."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys; sys.path.insert(0, {str(SRC_DIR)!r}); import mcp_access_server"],
+        capture_output=True, text=True
+    )
+    entries = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, module = line[len("import time:"):].split("|")
+            entries.append((int(cumulative), module.rstrip()))
+        except ValueError:
+            continue
+    print(f"\nMódulos más lentos (acumulado, top {top}):")
+    for cumulative, module in sorted(entries, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+def summarize(label: str, samples: list) -> float:
+    median = statistics.median(samples)
+    print(f"{label}: mediana {median:.1f} ms | mín {min(samples):.1f} ms | máx {max(samples):.1f} ms "
+          f"({len(samples)} ejecuciones)")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del servidor MCP Access")
+    parser.add_argument("--runs", type=int, default=10, help="Ejecuciones por medida (por defecto: 10)")
+    parser.add_argument("--target-ms", type=float, default=200.0,
+                        help="Objetivo para la primera respuesta de tools/list (por defecto: 200)")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Mostrar los N módulos más lentos de importar")
+    args = parser.parse_args()
+
+    print_status(f"Python {sys.version.split()[0]} - {args.runs} ejecuciones por medida")
+
+    # Una ejecución previa para calentar la caché de bytecode (.pyc)
+    measure_import()
+
+    import_median = summarize("Importar mcp_access_server", [measure_import() for _ in range(args.runs)])
+
+    # Un arranque previo para escribir el manifiesto de arranque
+    measure_first_list_tools()
+    samples, tool_count = [], 0
+    for _ in range(args.runs):
+        elapsed_ms, tool_count = measure_first_list_tools()
+        samples.append(elapsed_ms)
+    list_tools_median = summarize(f"Primera respuesta de tools/list ({tool_count} herramientas)", samples)
+
+    if args.importtime:
+        show_import_profile(args.importtime)
+
+    if list_tools_median <= args.target_ms:
+        print_status(f"Objetivo cumplido: {list_tools_median:.1f} ms <= {args.target_ms:.0f} ms", "SUCCESS")
+        return 0
+    print_status(f"Objetivo no cumplido: {list_tools_median:.1f} ms > {args.target_ms:.0f} ms "
+                 f"(importación: {import_median:.1f} ms)", "WARNING")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())